@@ -19,6 +19,7 @@
 //  Current versions can be found at www.libavg.de
 
 #include "Anim.h"
+#include "AnimScheduler.h"
 
 #include "../base/Exception.h"
 #include "../base/ObjectCounter.h"
@@ -34,7 +35,8 @@ Anim::Anim(const object& startCallback, const object& stopCallback)
     : m_StartCallback(startCallback),
       m_StopCallback(stopCallback),
       m_bRunning(false),
-      m_bIsRoot(true)
+      m_bIsRoot(true),
+      m_SchedulerIndex(-1)
 {
     ObjectCounter::get()->incRef(&typeid(*this));
     Player::get()->registerPlaybackEndListener(this);
@@ -71,7 +73,7 @@ void Anim::start(bool)
     m_bRunning = true;
     m_This = shared_from_this();
     if (m_bIsRoot) {
-        Player::get()->registerPreRenderListener(this);
+        AnimScheduler::get()->addAnim(this);
     }
     if (m_StartCallback != object()) {
         call<void>(m_StartCallback.ptr());
@@ -89,9 +91,14 @@ void Anim::setHasParent()
     m_bIsRoot = false;
 }
 
-void Anim::onPreRender()
+int Anim::getSchedulerIndex() const
 {
-    step();
+    return m_SchedulerIndex;
+}
+
+void Anim::setSchedulerIndex(int i)
+{
+    m_SchedulerIndex = i;
 }
     
 void Anim::onPlaybackEnd()
@@ -107,7 +114,7 @@ void Anim::onPlaybackEnd()
 void Anim::setStopped()
 {
     if (m_bIsRoot) {
-        Player::get()->unregisterPreRenderListener(this);
+        AnimScheduler::get()->removeAnim(this);
     }
     m_bRunning = false;
     if (m_StopCallback != object()) {
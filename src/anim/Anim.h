@@ -26,7 +26,6 @@
 // Python docs say python.h should be included before any standard headers (!)
 #include "../player/WrapPython.h" 
 
-#include "../base/IPreRenderListener.h"
 #include "../base/IPlaybackEndListener.h"
 
 #include <boost/python.hpp>
@@ -44,8 +43,7 @@ class GroupAnim;
 typedef boost::shared_ptr<class Anim> AnimPtr;
 typedef boost::weak_ptr<class Anim> AnimWeakPtr;
 
-class AVG_API Anim: public boost::enable_shared_from_this<Anim>, IPreRenderListener,
-        IPlaybackEndListener
+class AVG_API Anim: public boost::enable_shared_from_this<Anim>, IPlaybackEndListener
 {
 public:
     Anim(const boost::python::object& startCallback, 
@@ -59,10 +57,13 @@ public:
     bool isRunning() const;
     void setHasParent();
     
-    virtual void onPreRender();
     virtual void onPlaybackEnd();
     virtual bool step() = 0;
 
+    // Position in the AnimScheduler's list of running animations or -1.
+    int getSchedulerIndex() const;
+    void setSchedulerIndex(int i);
+
 protected:
     void setStopped();
    
@@ -73,6 +74,7 @@ private:
     boost::python::object m_StopCallback;
     bool m_bRunning;
     bool m_bIsRoot;
+    int m_SchedulerIndex;
     AnimPtr m_This; // Makes sure there is always a reference to the animation
                     // while it's running.
 };
@@ -0,0 +1,150 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "AnimScheduler.h"
+#include "Anim.h"
+
+#include "../base/Exception.h"
+#include "../base/ScopeTimer.h"
+#include "../base/TimeSource.h"
+
+#include "../player/Player.h"
+#include "../player/Canvas.h"
+
+using namespace std;
+
+namespace avg {
+
+AnimScheduler* AnimScheduler::s_pAnimScheduler = 0;
+
+AnimScheduler* AnimScheduler::get()
+{
+    if (s_pAnimScheduler == 0) {
+        s_pAnimScheduler = new AnimScheduler();
+    }
+    return s_pAnimScheduler;
+}
+
+AnimScheduler::AnimScheduler()
+    : m_NumAnims(0),
+      m_bStepping(false),
+      m_StepTime(0)
+{
+}
+
+AnimScheduler::~AnimScheduler()
+{
+}
+
+void AnimScheduler::addAnim(Anim* pAnim)
+{
+    AVG_ASSERT(pAnim->getSchedulerIndex() == -1);
+    pAnim->setSchedulerIndex(int(m_pAnims.size()));
+    m_pAnims.push_back(pAnim);
+    m_NumAnims++;
+    updateRegistration();
+}
+
+void AnimScheduler::removeAnim(Anim* pAnim)
+{
+    int i = pAnim->getSchedulerIndex();
+    AVG_ASSERT(i >= 0 && m_pAnims[i] == pAnim);
+    m_pAnims[i] = 0;
+    pAnim->setSchedulerIndex(-1);
+    m_NumAnims--;
+    if (!m_bStepping) {
+        compact();
+        updateRegistration();
+    }
+}
+
+static ProfilingZoneID AnimProfilingZone("Animations");
+
+void AnimScheduler::onPreRender()
+{
+    ScopeTimer timer(AnimProfilingZone);
+    long long startTime = TimeSource::get()->getCurrentMicrosecs();
+    m_bStepping = true;
+    try {
+        // Animations started during the pass are appended and stepped as well.
+        for (unsigned i = 0; i < m_pAnims.size(); ++i) {
+            Anim* pAnim = m_pAnims[i];
+            if (pAnim) {
+                pAnim->step();
+            }
+        }
+    } catch (...) {
+        m_bStepping = false;
+        compact();
+        updateRegistration();
+        throw;
+    }
+    m_bStepping = false;
+    m_StepTime = TimeSource::get()->getCurrentMicrosecs()-startTime;
+    compact();
+    updateRegistration();
+}
+
+int AnimScheduler::getNumAnims() const
+{
+    return m_NumAnims;
+}
+
+long long AnimScheduler::getStepTime() const
+{
+    return m_StepTime;
+}
+
+void AnimScheduler::compact()
+{
+    if (int(m_pAnims.size()) == m_NumAnims) {
+        return;
+    }
+    unsigned numKept = 0;
+    for (unsigned i = 0; i < m_pAnims.size(); ++i) {
+        Anim* pAnim = m_pAnims[i];
+        if (pAnim) {
+            pAnim->setSchedulerIndex(numKept);
+            m_pAnims[numKept] = pAnim;
+            numKept++;
+        }
+    }
+    m_pAnims.resize(numKept);
+}
+
+void AnimScheduler::updateRegistration()
+{
+    CanvasPtr pMainCanvas = Player::get()->getMainCanvas();
+    CanvasPtr pCanvas = m_pCanvas.lock();
+    if (pCanvas && (m_NumAnims == 0 || pCanvas != pMainCanvas)) {
+        pCanvas->unregisterPreRenderListener(this);
+        m_pCanvas.reset();
+        pCanvas = CanvasPtr();
+        m_StepTime = 0;
+    }
+    if (m_NumAnims > 0 && !pCanvas && pMainCanvas) {
+        pMainCanvas->registerPreRenderListener(this);
+        m_pCanvas = pMainCanvas;
+    }
+}
+
+}
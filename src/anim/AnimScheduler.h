@@ -0,0 +1,74 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _AnimScheduler_H_
+#define _AnimScheduler_H_
+
+#include "../api.h"
+
+#include "../base/IPreRenderListener.h"
+
+#include <boost/weak_ptr.hpp>
+
+#include <vector>
+
+namespace avg {
+
+class Anim;
+class Canvas;
+
+// Steps all running root animations in one pass before each frame is rendered.
+// Animations are kept in start order in a contiguous array. Animations that stop 
+// during a pass leave an empty slot that is removed after the pass.
+class AVG_API AnimScheduler: public IPreRenderListener
+{
+public:
+    static AnimScheduler* get();
+    virtual ~AnimScheduler();
+
+    void addAnim(Anim* pAnim);
+    void removeAnim(Anim* pAnim);
+
+    virtual void onPreRender();
+
+    int getNumAnims() const;
+    // Time spent stepping animations in the last frame, in microseconds.
+    long long getStepTime() const;
+
+private:
+    AnimScheduler();
+    void compact();
+    void updateRegistration();
+
+    std::vector<Anim*> m_pAnims;
+    int m_NumAnims;
+    bool m_bStepping;
+    // The canvas the scheduler is registered with as pre-render listener.
+    boost::weak_ptr<Canvas> m_pCanvas;
+    long long m_StepTime;
+
+    static AnimScheduler* s_pAnimScheduler;
+};
+
+}
+
+#endif
@@ -23,6 +23,9 @@
 #include "../base/Exception.h"
 #include "../player/Player.h"
 #include "../player/Node.h"
+#include "../player/AreaNode.h"
+#include "../player/RectNode.h"
+#include "../player/CircleNode.h"
 
 using namespace boost;
 using namespace boost::python;
@@ -32,6 +35,18 @@ namespace avg {
 
 AttrAnim::AttrAnimationMap AttrAnim::s_ActiveAnimations;
 
+ObjAttrID::ObjAttrID(const object& obj, const string& sAttrName)
+    : m_sAttrName(sAttrName)
+{
+    // libavg objects are hashed without a detour through python.
+    extract<ExportedObject*> exportedObj(obj);
+    if (exportedObj.check()) {
+        m_ObjHash = exportedObj()->getHash();
+    } else {
+        m_ObjHash = extract<long>(obj.attr("__hash__")());
+    }
+}
+
 bool ObjAttrID::operator < (const ObjAttrID& other) const
 {
     if (m_ObjHash < other.m_ObjHash) {
@@ -50,13 +65,31 @@ int AttrAnim::getNumRunningAnims()
     return s_ActiveAnimations.size();
 }
 
+int AttrAnim::getNumNativeAnims()
+{
+    int numNativeAnims = 0;
+    AttrAnimationMap::iterator it;
+    for (it = s_ActiveAnimations.begin(); it != s_ActiveAnimations.end(); ++it) {
+        AttrAnim* pAnim = dynamic_cast<AttrAnim*>(it->second.get());
+        if (pAnim && pAnim->hasNativeSetter()) {
+            numNativeAnims++;
+        }
+    }
+    return numNativeAnims;
+}
+
 AttrAnim::AttrAnim(const object& node, const string& sAttrName, 
         const object& startCallback, const object& stopCallback)
     : Anim(startCallback, stopCallback),
       m_Node(node),
-      m_sAttrName(sAttrName)
+      m_sAttrName(sAttrName),
+      m_ID(node, sAttrName),
+      m_pNode(0),
+      m_pFloatSetter(0),
+      m_pVec2Setter(0)
 {
     object obj = getValue();
+    initNativeSetter();
 }
 
 AttrAnim::~AttrAnim()
@@ -80,24 +113,155 @@ void AttrAnim::setValue(const object& val)
     m_Node.attr(m_sAttrName.c_str()) = val;
 }
 
+void AttrAnim::setFloatValue(float val)
+{
+    if (m_pFloatSetter) {
+        m_pFloatSetter(m_pNode, val);
+    } else {
+        setValue(object(val));
+    }
+}
+
+void AttrAnim::setVec2Value(const glm::vec2& val)
+{
+    if (m_pVec2Setter) {
+        m_pVec2Setter(m_pNode, val);
+    } else {
+        setValue(object(val));
+    }
+}
+
+bool AttrAnim::hasNativeSetter() const
+{
+    return m_pFloatSetter || m_pVec2Setter;
+}
+
 void AttrAnim::addToMap()
 {
-    s_ActiveAnimations[ObjAttrID(m_Node, m_sAttrName)] = 
-            dynamic_pointer_cast<AttrAnim>(shared_from_this());
+    s_ActiveAnimations[m_ID] = dynamic_pointer_cast<AttrAnim>(shared_from_this());
 }
 
 void AttrAnim::removeFromMap()
 {
-    s_ActiveAnimations.erase(ObjAttrID(m_Node, m_sAttrName));
+    s_ActiveAnimations.erase(m_ID);
 }
 
 void AttrAnim::stopActiveAttrAnim()
 {
-    ObjAttrID id(m_Node, m_sAttrName);
-    AttrAnimationMap::iterator it = s_ActiveAnimations.find(id);
+    AttrAnimationMap::iterator it = s_ActiveAnimations.find(m_ID);
     if (it != s_ActiveAnimations.end()) {
         it->second->abort();
     }
 }
 
+namespace {
+
+template<class NODE>
+bool isNodeType(Node* pNode)
+{
+    return dynamic_cast<NODE*>(pNode) != 0;
+}
+
+template<class NODE>
+PyObject* getClassObject()
+{
+    const converter::registration* pReg = converter::registry::query(type_id<NODE>());
+    if (pReg) {
+        return (PyObject*)(pReg->m_class_object);
+    } else {
+        return 0;
+    }
+}
+
+template<class NODE, void (NODE::*SETTER)(float)>
+void setFloatAttr(Node* pNode, float val)
+{
+    (static_cast<NODE*>(pNode)->*SETTER)(val);
+}
+
+template<class NODE, void (NODE::*SETTER)(const glm::vec2&)>
+void setVec2Attr(Node* pNode, const glm::vec2& val)
+{
+    (static_cast<NODE*>(pNode)->*SETTER)(val);
+}
+
+struct NativeAttr {
+    const char* m_pName;
+    bool (*m_pIsNodeType)(Node*);
+    PyObject* (*m_pGetClassObject)();
+    void (*m_pFloatSetter)(Node*, float);
+    void (*m_pVec2Setter)(Node*, const glm::vec2&);
+};
+
+// Node attributes that are commonly animated and the C++ setters the python wrapper 
+// calls for them.
+const NativeAttr NATIVE_ATTRS[] = {
+    {"opacity", isNodeType<Node>, getClassObject<Node>, 
+            setFloatAttr<Node, &Node::setOpacity>, 0},
+    {"x", isNodeType<AreaNode>, getClassObject<AreaNode>, 
+            setFloatAttr<AreaNode, &AreaNode::setX>, 0},
+    {"y", isNodeType<AreaNode>, getClassObject<AreaNode>, 
+            setFloatAttr<AreaNode, &AreaNode::setY>, 0},
+    {"pos", isNodeType<AreaNode>, getClassObject<AreaNode>, 
+            0, setVec2Attr<AreaNode, &AreaNode::setPos>},
+    {"width", isNodeType<AreaNode>, getClassObject<AreaNode>, 
+            setFloatAttr<AreaNode, &AreaNode::setWidth>, 0},
+    {"height", isNodeType<AreaNode>, getClassObject<AreaNode>, 
+            setFloatAttr<AreaNode, &AreaNode::setHeight>, 0},
+    {"size", isNodeType<AreaNode>, getClassObject<AreaNode>, 
+            0, setVec2Attr<AreaNode, &AreaNode::setSize>},
+    {"angle", isNodeType<AreaNode>, getClassObject<AreaNode>, 
+            setFloatAttr<AreaNode, &AreaNode::setAngle>, 0},
+    {"pivot", isNodeType<AreaNode>, getClassObject<AreaNode>, 
+            0, setVec2Attr<AreaNode, &AreaNode::setPivot>},
+    {"strokewidth", isNodeType<VectorNode>, getClassObject<VectorNode>, 
+            setFloatAttr<VectorNode, &VectorNode::setStrokeWidth>, 0},
+    {"fillopacity", isNodeType<FilledVectorNode>, getClassObject<FilledVectorNode>, 
+            setFloatAttr<FilledVectorNode, &FilledVectorNode::setFillOpacity>, 0},
+    {"pos", isNodeType<RectNode>, getClassObject<RectNode>, 
+            0, setVec2Attr<RectNode, &RectNode::setPos>},
+    {"size", isNodeType<RectNode>, getClassObject<RectNode>, 
+            0, setVec2Attr<RectNode, &RectNode::setSize>},
+    {"angle", isNodeType<RectNode>, getClassObject<RectNode>, 
+            setFloatAttr<RectNode, &RectNode::setAngle>, 0},
+    {"pos", isNodeType<CircleNode>, getClassObject<CircleNode>, 
+            0, setVec2Attr<CircleNode, &CircleNode::setPos>},
+    {"r", isNodeType<CircleNode>, getClassObject<CircleNode>, 
+            setFloatAttr<CircleNode, &CircleNode::setR>, 0},
+};
+
+}
+
+void AttrAnim::initNativeSetter()
+{
+    extract<Node*> nodeExtract(m_Node);
+    if (!nodeExtract.check()) {
+        return;
+    }
+    Node* pNode = nodeExtract();
+    const char* pAttrName = m_sAttrName.c_str();
+    object nodeClass(handle<>(borrowed((PyObject*)(Py_TYPE(m_Node.ptr())))));
+    int numAttrs = sizeof(NATIVE_ATTRS)/sizeof(NativeAttr);
+    for (int i = 0; i < numAttrs; ++i) {
+        const NativeAttr& attr = NATIVE_ATTRS[i];
+        if (m_sAttrName != attr.m_pName || !attr.m_pIsNodeType(pNode)) {
+            continue;
+        }
+        PyObject* pAttrClass = attr.m_pGetClassObject();
+        if (pAttrClass) {
+            // If a derived class redefines the attribute, it needs to be set through
+            // python.
+            object attrClass(handle<>(borrowed(pAttrClass)));
+            object nodeAttr = nodeClass.attr(pAttrName);
+            object classAttr = attrClass.attr(pAttrName);
+            if (nodeAttr.ptr() == classAttr.ptr()) {
+                m_pNode = pNode;
+                m_pFloatSetter = attr.m_pFloatSetter;
+                m_pVec2Setter = attr.m_pVec2Setter;
+            }
+        }
+        return;
+    }
+}
+
 }
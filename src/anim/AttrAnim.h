@@ -28,6 +28,8 @@
 // Python docs say python.h should be included before any standard headers (!)
 #include "../player/WrapPython.h" 
 
+#include "../base/GLMHelper.h"
+
 #include <boost/python.hpp>
 #include <boost/shared_ptr.hpp>
 #include <boost/weak_ptr.hpp>
@@ -38,16 +40,13 @@
 namespace avg {
 
 struct ObjAttrID {
-    ObjAttrID(const boost::python::object& obj, const std::string& sAttrName)
-        : m_ObjHash(boost::python::extract<long>(obj.attr("__hash__")())),
-          m_sAttrName(sAttrName)
-    {
-    }
+    ObjAttrID(const boost::python::object& obj, const std::string& sAttrName);
     long m_ObjHash;
     std::string m_sAttrName;
     bool operator < (const ObjAttrID& other) const;
 };
 
+class Node;
 class AttrAnim;
 
 typedef boost::shared_ptr<class Anim> AttrAnimPtr;
@@ -57,6 +56,8 @@ class AVG_API AttrAnim: public Anim
 {
 public:
     static int getNumRunningAnims();
+    // Number of running animations that set their attribute without using python.
+    static int getNumNativeAnims();
 
     AttrAnim(const boost::python::object& node, const std::string& sAttrName,
             const boost::python::object& startCallback, 
@@ -68,6 +69,11 @@ public:
 protected:
     boost::python::object getValue() const;
     void setValue(const boost::python::object& val);
+    // These set known node attributes directly and fall back to setValue(object)
+    // for all other attributes.
+    void setFloatValue(float val);
+    void setVec2Value(const glm::vec2& val);
+    bool hasNativeSetter() const;
 
     void addToMap();
     void removeFromMap();
@@ -76,9 +82,17 @@ private:
     AttrAnim();
     AttrAnim(const AttrAnim&);
     void stopActiveAttrAnim();
+    void initNativeSetter();
 
     boost::python::object m_Node;
     std::string m_sAttrName;
+    ObjAttrID m_ID;
+
+    typedef void (*FloatSetter)(Node*, float);
+    typedef void (*Vec2Setter)(Node*, const glm::vec2&);
+    Node* m_pNode;
+    FloatSetter m_pFloatSetter;
+    Vec2Setter m_pVec2Setter;
 
     typedef std::map<ObjAttrID, AttrAnimPtr> AttrAnimationMap;
     static AttrAnimationMap s_ActiveAnimations;
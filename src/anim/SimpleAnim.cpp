@@ -37,7 +37,8 @@ SimpleAnim::SimpleAnim(const object& node, const string& sAttrName, long long du
       m_Duration(duration),
       m_StartValue(startValue),
       m_EndValue(endValue),
-      m_bUseInt(bUseInt)
+      m_bUseInt(bUseInt),
+      m_bVec2Value(false)
 {
 }
 
@@ -60,6 +61,7 @@ void SimpleAnim::start(bool bKeepAttr)
         setValue(m_EndValue);
         remove();
     } else {
+        initValues();
         step();
     }
 }
@@ -71,15 +73,6 @@ void SimpleAnim::abort()
     }
 }
 
-template<class T>
-object typedLERP(const object& startValue, const object& endValue, float part)
-{
-    T start = extract<T>(startValue);
-    T end = extract<T>(endValue);
-    T cur = start+(end-start)*part;
-    return object(cur);
-}
-
 bool SimpleAnim::step()
 {
     AVG_ASSERT(isRunning());
@@ -90,25 +83,20 @@ bool SimpleAnim::step()
         remove();
         return true;
     } else {
-        object curValue;
         float part = interpolate(t);
-        if (isPythonType<float>(m_StartValue)) {
-            curValue = typedLERP<float>(m_StartValue, m_EndValue, part);
+        if (m_bVec2Value) {
+            glm::vec2 curValue = m_StartVec+(m_EndVec-m_StartVec)*part;
             if (m_bUseInt) {
-                float d = extract<float>(curValue);
-                curValue = object(round(d));
+                curValue = glm::vec2(round(curValue.x), round(curValue.y));
             }
-        } else if (isPythonType<glm::vec2>(m_StartValue)) {
-            curValue = typedLERP<glm::vec2>(m_StartValue, m_EndValue, part);
+            setVec2Value(curValue);
+        } else {
+            float curValue = m_StartVec.x+(m_EndVec.x-m_StartVec.x)*part;
             if (m_bUseInt) {
-                glm::vec2 pt = extract<glm::vec2>(curValue);
-                curValue = object(glm::vec2(round(pt.x), round(pt.y)));
+                curValue = round(curValue);
             }
-        } else {
-            throw (Exception(AVG_ERR_TYPE, 
-                    "Animated attributes must be either numbers or Point2D."));
+            setFloatValue(curValue);
         }
-        setValue(curValue);
         return false;
     }
 }
@@ -154,6 +142,22 @@ long long SimpleAnim::calcStartTime()
     return Player::get()->getFrameTime()-(long long)(part*getDuration());
 }
 
+void SimpleAnim::initValues()
+{
+    if (isPythonType<float>(m_StartValue)) {
+        m_bVec2Value = false;
+        m_StartVec = glm::vec2(extract<float>(m_StartValue), 0);
+        m_EndVec = glm::vec2(extract<float>(m_EndValue), 0);
+    } else if (isPythonType<glm::vec2>(m_StartValue)) {
+        m_bVec2Value = true;
+        m_StartVec = extract<glm::vec2>(m_StartValue)();
+        m_EndVec = extract<glm::vec2>(m_EndValue)();
+    } else {
+        throw (Exception(AVG_ERR_TYPE, 
+                    "Animated attributes must be either numbers or Point2D."));
+    }
+}
+
 float SimpleAnim::getStartPart(float start, float end, float cur)
 {
     float tstart = 0;
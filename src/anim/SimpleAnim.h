@@ -62,6 +62,7 @@ private:
     long long getStartTime() const;
     long long getDuration() const;
     long long calcStartTime();
+    void initValues();
     virtual float getStartPart(float start, float end, float cur);
 
     long long m_Duration;
@@ -69,6 +70,12 @@ private:
     boost::python::object m_EndValue;
     bool m_bUseInt;
     long long m_StartTime;
+
+    // Start and end values converted once at start so step() doesn't need python.
+    // Float values are stored in x.
+    bool m_bVec2Value;
+    glm::vec2 m_StartVec;
+    glm::vec2 m_EndVec;
 };
 
 }
@@ -25,11 +25,17 @@
 
 #include <string>
 #include <cstring>
+#include <algorithm>
 
 #define VOLUME_FADE_SAMPLES 100
 
 namespace avg {
 
+static inline short clampSample(float sample)
+{
+    return short(std::max(-32768.f, std::min(sample, 32767.f)));
+}
+
 AudioBuffer::AudioBuffer(int numFrames, AudioParams ap)
     : m_NumFrames(numFrames),
       m_AP(ap)
@@ -85,20 +91,18 @@ void AudioBuffer::volumize(float lastVol, float curVol)
         return;
     }
    
-    for (int i = 0; i < m_NumFrames*m_AP.m_Channels; i++) {
-        float fadeVol = 0;
-        if (volDiff != 0 && i < VOLUME_FADE_SAMPLES) {
-            fadeVol = volDiff * (VOLUME_FADE_SAMPLES - i) / VOLUME_FADE_SAMPLES;
-        }
-        
-        int s = int(m_pData[i] * (curVol + fadeVol));
-        
-        if (s < -32768)
-            s = -32768;
-        if (s >  32767)
-            s = 32767;
-        
-        m_pData[i] = s;
+    int numSamples = m_NumFrames*m_AP.m_Channels;
+    int numFadeSamples = 0;
+    if (volDiff != 0) {
+        numFadeSamples = std::min(numSamples, VOLUME_FADE_SAMPLES);
+    }
+    for (int i = 0; i < numFadeSamples; i++) {
+        float fadeVol = volDiff * (VOLUME_FADE_SAMPLES - i) / VOLUME_FADE_SAMPLES;
+        m_pData[i] = clampSample(m_pData[i] * (curVol + fadeVol));
+    }
+    // Constant volume: Simple enough for the compiler to vectorize.
+    for (int i = numFadeSamples; i < numSamples; i++) {
+        m_pData[i] = clampSample(m_pData[i] * curVol);
     }
 }
 
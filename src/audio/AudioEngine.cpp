@@ -27,8 +27,11 @@
 
 #include "../base/Exception.h"
 #include "../base/Logger.h"
+#include "../base/ThreadHelper.h"
 
 #include <iostream>
+#include <algorithm>
+#include <cstring>
 
 using namespace std;
 using namespace boost;
@@ -47,14 +50,15 @@ AudioEngine::AudioEngine()
       m_pMixBuffer(0),
       m_pLimiter(0),
       m_bEnabled(true),
+      m_pSourceSnapshot(new AudioSourceList),
+      m_MixCount(0),
       m_Volume(1),
-      m_bInitialized(false)
+      m_bInitialized(false),
+      m_bDeviceOpen(false),
+      m_bOffline(false),
+      m_NumOfflineFrames(0)
 {
     AVG_ASSERT(s_pInstance == 0);
-    if (SDL_InitSubSystem(SDL_INIT_AUDIO) == -1) {
-        AVG_LOG_ERROR("Can't init SDL audio subsystem.");
-        exit(-1);
-    }
     s_pInstance = this;
 }
 
@@ -67,8 +71,11 @@ AudioEngine::~AudioEngine()
         delete m_pLimiter;
         m_pLimiter = 0;
     }
-    SDL_QuitSubSystem(SDL_INIT_AUDIO);
+    if (m_bDeviceOpen) {
+        SDL_QuitSubSystem(SDL_INIT_AUDIO);
+    }
     m_AudioSources.clear();
+    delete m_pSourceSnapshot.load();
 }
 
 int AudioEngine::getChannels()
@@ -96,54 +103,31 @@ void AudioEngine::init(const AudioParams& ap, float volume)
     if (!m_bInitialized) {
         m_bInitialized = true;
         m_AP = ap;
-        Dynamics<float, 2>* pLimiter = new Dynamics<float, 2>(float(m_AP.m_SampleRate));
-        pLimiter->setThreshold(0.f); // in dB
-        pLimiter->setAttackTime(0.f); // in seconds
-        pLimiter->setReleaseTime(0.05f); // in seconds
-        pLimiter->setRmsTime(0.f); // in seconds
-        pLimiter->setRatio(std::numeric_limits<float>::infinity());
-        pLimiter->setMakeupGain(0.f); // in dB
-        m_pLimiter = pLimiter;
-
-        SDL_AudioSpec desired;
-        desired.freq = m_AP.m_SampleRate;
-        desired.format = AUDIO_S16SYS;
-        desired.channels = m_AP.m_Channels;
-        desired.silence = 0;
-        desired.samples = m_AP.m_OutputBufferSamples;
-        desired.callback = audioCallback;
-        desired.userdata = this;
-
-        int err = SDL_OpenAudio(&desired, 0);
-        if (err < 0) {
-            static bool bWarned = false;
-            if (!bWarned) {
-                AVG_TRACE(Logger::category::CONFIG, Logger::severity::WARNING,
-                        "Can't open audio: " << SDL_GetError());
-                bWarned = true;
-            }
-        }
-    } else {
-        SDL_PauseAudio(0);
+        createLimiter();
     }
 }
 
 void AudioEngine::teardown()
 {
-    {
-        lock_guard lock(m_Mutex);
+    if (m_bDeviceOpen) {
+        SDL_LockAudio();
         SDL_PauseAudio(1);
+        SDL_UnlockAudio();
+        // Optimized away - takes too long.
+//        SDL_CloseAudio();
     }
-    // Optimized away - takes too long.
-//    SDL_CloseAudio();
 
     m_AudioSources.clear();
+    publishSources();
+    if (m_pWAVWriter) {
+        WAVWriterPtr pWAVWriter = m_pWAVWriter;
+        m_pWAVWriter = WAVWriterPtr();
+        pWAVWriter->close();
+    }
 }
 
 void AudioEngine::setAudioEnabled(bool bEnabled)
 {
-    SDL_LockAudio();
-    lock_guard lock(m_Mutex);
     AVG_ASSERT(m_AudioSources.empty());
     m_bEnabled = bEnabled;
     if (m_bEnabled) {
@@ -151,82 +135,121 @@ void AudioEngine::setAudioEnabled(bool bEnabled)
     } else {
         pause();
     }
-    SDL_UnlockAudio();
+}
+
+void AudioEngine::setOffline(bool bOffline, const std::string& sWAVFilename)
+{
+    AVG_ASSERT(m_AudioSources.empty());
+    AVG_ASSERT(m_bInitialized);
+    if (bOffline && !m_bOffline) {
+        pause();
+    }
+    m_bOffline = bOffline;
+    m_NumOfflineFrames = 0;
+    if (m_bOffline) {
+        // Start with a clean limiter state so the output is reproducible.
+        createLimiter();
+    }
+    if (m_pWAVWriter) {
+        m_pWAVWriter->close();
+    }
+    m_pWAVWriter = WAVWriterPtr();
+    if (m_bOffline && sWAVFilename != "") {
+        m_pWAVWriter = WAVWriterPtr(new WAVWriter(sWAVFilename, m_AP));
+    }
+}
+
+bool AudioEngine::isOffline() const
+{
+    return m_bOffline;
+}
+
+void AudioEngine::mixOffline(long long time)
+{
+    AVG_ASSERT(m_bOffline);
+    if (!m_bEnabled) {
+        return;
+    }
+    // Like a sound card, mix complete buffers. The output can be up to one buffer
+    // ahead of time.
+    long long endFrame = time*m_AP.m_SampleRate/1000;
+    int numFrames = m_AP.m_OutputBufferSamples;
+    int numSamples = numFrames*getChannels();
+    m_OfflineBuffer.resize(numSamples);
+    while (m_NumOfflineFrames < endFrame) {
+        short* pBuffer = &m_OfflineBuffer[0];
+        memset(pBuffer, 0, numSamples*sizeof(short));
+        mixAudio((Uint8*)pBuffer, numSamples*sizeof(short));
+        if (m_pWAVWriter) {
+            m_pWAVWriter->write(pBuffer, numFrames);
+        }
+        m_NumOfflineFrames += numFrames;
+    }
+}
+
+long long AudioEngine::getNumOfflineFrames() const
+{
+    return m_NumOfflineFrames;
 }
 
 void AudioEngine::play()
 {
+    if (m_bOffline) {
+        return;
+    }
+    if (!m_bDeviceOpen) {
+        openDevice();
+    }
     SDL_PauseAudio(0);
 }
 
 void AudioEngine::pause()
 {
-    SDL_PauseAudio(1);
+    if (m_bDeviceOpen) {
+        SDL_PauseAudio(1);
+    }
 }
 
 int AudioEngine::addSource(AudioMsgQueue& dataQ, AudioMsgQueue& statusQ)
 {
-    SDL_LockAudio();
-    lock_guard lock(m_Mutex);
     static int nextID = -1;
     nextID++;
     AudioSourcePtr pSrc(new AudioSource(dataQ, statusQ, m_AP.m_SampleRate));
     m_AudioSources[nextID] = pSrc;
-    SDL_UnlockAudio();
+    publishSources();
     return nextID;
 }
 
 void AudioEngine::removeSource(int id)
 {
-    SDL_LockAudio();
-    lock_guard lock(m_Mutex);
     int numErased = m_AudioSources.erase(id);
     AVG_ASSERT(numErased == 1);
-    SDL_UnlockAudio();
+    publishSources();
 }
 
 void AudioEngine::pauseSource(int id)
 {
-    lock_guard lock(m_Mutex);
-    AudioSourceMap::iterator itSource = m_AudioSources.find(id);
-    AVG_ASSERT(itSource != m_AudioSources.end());
-    AudioSourcePtr pSource = itSource->second;
-    pSource->pause();
+    getSource(id)->pause();
 }
 
 void AudioEngine::playSource(int id)
 {
-    lock_guard lock(m_Mutex);
-    AudioSourceMap::iterator itSource = m_AudioSources.find(id);
-    AVG_ASSERT(itSource != m_AudioSources.end());
-    AudioSourcePtr pSource = itSource->second;
-    pSource->play();
+    getSource(id)->play();
 }
 
 void AudioEngine::notifySeek(int id)
 {
-    lock_guard lock(m_Mutex);
-    AudioSourceMap::iterator itSource = m_AudioSources.find(id);
-    AVG_ASSERT(itSource != m_AudioSources.end());
-    AudioSourcePtr pSource = itSource->second;
-    pSource->notifySeek();
+    getSource(id)->notifySeek();
 }
 
 void AudioEngine::setSourceVolume(int id, float volume)
 {
-    lock_guard lock(m_Mutex);
-    AudioSourceMap::iterator itSource = m_AudioSources.find(id);
-    AVG_ASSERT(itSource != m_AudioSources.end());
-    AudioSourcePtr pSource = itSource->second;
-    pSource->setVolume(volume);
+    getSource(id)->setVolume(volume);
 }
 
 void AudioEngine::setVolume(float volume)
 {
-    SDL_LockAudio();
-    lock_guard lock(m_Mutex);
     m_Volume = volume;
-    SDL_UnlockAudio();
 }
 
 float AudioEngine::getVolume() const
@@ -241,36 +264,81 @@ bool AudioEngine::isEnabled() const
         
 void AudioEngine::mixAudio(Uint8 *pDestBuffer, int destBufferLen)
 {
-    int numFrames = destBufferLen/(2*getChannels()); // 16 bit samples.
-
-    if (m_AudioSources.size() == 0) {
+    m_MixCount++;
+    const AudioSourceList* pSources = m_pSourceSnapshot.load();
+    if (pSources->empty()) {
+        m_MixCount++;
         return;
     }
-    if (!m_pTempBuffer || m_pTempBuffer->getNumFrames() < numFrames) {
+
+    int numFrames = destBufferLen/(2*getChannels()); // 16 bit samples.
+    int numSamples = numFrames*getChannels();
+    if (!m_pTempBuffer || m_pTempBuffer->getNumFrames() != numFrames) {
         if (m_pTempBuffer) {
             delete[] m_pMixBuffer;
         }
         m_pTempBuffer = AudioBufferPtr(new AudioBuffer(numFrames, m_AP));
-        m_pMixBuffer = new float[getChannels()*numFrames];
+        m_pMixBuffer = new float[numSamples];
     }
 
-    for (int i = 0; i < getChannels()*numFrames; ++i) {
+    for (int i = 0; i < numSamples; ++i) {
         m_pMixBuffer[i]=0;
     }
-    {
-        lock_guard lock(m_Mutex);
-        AudioSourceMap::iterator it;
-        for (it = m_AudioSources.begin(); it != m_AudioSources.end(); it++) {
-            m_pTempBuffer->clear();
-            it->second->fillAudioBuffer(m_pTempBuffer);
-            addBuffers(m_pMixBuffer, m_pTempBuffer);
-        }
+    AudioSourceList::const_iterator it;
+    for (it = pSources->begin(); it != pSources->end(); it++) {
+        m_pTempBuffer->clear();
+        (*it)->fillAudioBuffer(m_pTempBuffer, m_bOffline);
+        addBuffers(m_pMixBuffer, m_pTempBuffer);
+    }
+    m_MixCount++;
+
+    calcVolume(m_pMixBuffer, numSamples, getVolume());
+    m_pLimiter->processBlock(m_pMixBuffer, numFrames);
+    short* pDest = (short*)pDestBuffer;
+    for (int i = 0; i < numSamples; ++i) {
+        float sample = m_pMixBuffer[i]*32768;
+        sample = std::max(-32768.f, std::min(sample, 32767.f));
+        pDest[i] = short(sample);
+    }
+}
+
+void AudioEngine::createLimiter()
+{
+    delete m_pLimiter;
+    Dynamics<float, 2>* pLimiter = new Dynamics<float, 2>(float(m_AP.m_SampleRate));
+    pLimiter->setThreshold(0.f); // in dB
+    pLimiter->setAttackTime(0.f); // in seconds
+    pLimiter->setReleaseTime(0.05f); // in seconds
+    pLimiter->setRmsTime(0.f); // in seconds
+    pLimiter->setRatio(std::numeric_limits<float>::infinity());
+    pLimiter->setMakeupGain(0.f); // in dB
+    m_pLimiter = pLimiter;
+}
+
+void AudioEngine::openDevice()
+{
+    if (SDL_InitSubSystem(SDL_INIT_AUDIO) == -1) {
+        AVG_LOG_ERROR("Can't init SDL audio subsystem.");
+        exit(-1);
     }
-    calcVolume(m_pMixBuffer, numFrames*getChannels(), getVolume());
-    for (int i = 0; i < numFrames; ++i) {
-        m_pLimiter->process(m_pMixBuffer+i*getChannels());
-        for (int j = 0; j < getChannels(); ++j) {
-            ((short*)pDestBuffer)[i*2+j]=short(m_pMixBuffer[i*2+j]*32768);
+    m_bDeviceOpen = true;
+
+    SDL_AudioSpec desired;
+    desired.freq = m_AP.m_SampleRate;
+    desired.format = AUDIO_S16SYS;
+    desired.channels = m_AP.m_Channels;
+    desired.silence = 0;
+    desired.samples = m_AP.m_OutputBufferSamples;
+    desired.callback = audioCallback;
+    desired.userdata = this;
+
+    int err = SDL_OpenAudio(&desired, 0);
+    if (err < 0) {
+        static bool bWarned = false;
+        if (!bWarned) {
+            AVG_TRACE(Logger::category::CONFIG, Logger::severity::WARNING,
+                    "Can't open audio: " << SDL_GetError());
+            bWarned = true;
         }
     }
 }
@@ -283,11 +351,38 @@ void AudioEngine::audioCallback(void *userData, Uint8 *audioBuffer, int audioBuf
 
 void AudioEngine::addBuffers(float *pDest, AudioBufferPtr pSrc)
 {
-    int numFrames = pSrc->getNumFrames();
-    short * pData = pSrc->getData();
-    for(int i = 0; i < numFrames*getChannels(); ++i) {
-        pDest[i] += pData[i]/32768.0f;
+    int numSamples = pSrc->getNumFrames()*getChannels();
+    const short * pData = pSrc->getData();
+    const float scale = 1.f/32768;
+    for(int i = 0; i < numSamples; ++i) {
+        pDest[i] += pData[i]*scale;
+    }
+}
+
+AudioSourcePtr AudioEngine::getSource(int id)
+{
+    AudioSourceMap::iterator itSource = m_AudioSources.find(id);
+    AVG_ASSERT(itSource != m_AudioSources.end());
+    return itSource->second;
+}
+
+void AudioEngine::publishSources()
+{
+    AudioSourceList* pSources = new AudioSourceList;
+    AudioSourceMap::iterator it;
+    for (it = m_AudioSources.begin(); it != m_AudioSources.end(); ++it) {
+        pSources->push_back(it->second);
+    }
+    const AudioSourceList* pOldSources = m_pSourceSnapshot.exchange(pSources);
+
+    // If mixAudio() is running, it might still be using the old snapshot.
+    unsigned mixCount = m_MixCount;
+    if (mixCount & 1) {
+        while (m_MixCount == mixCount) {
+            yield();
+        }
     }
+    delete pOldSources;
 }
 
 void AudioEngine::calcVolume(float *pBuffer, int numSamples, float volume)
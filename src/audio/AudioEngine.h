@@ -29,16 +29,20 @@
 #include "AudioParams.h"
 #include "AudioBuffer.h"
 #include "IProcessor.h"
+#include "WAVWriter.h"
 
 #include <SDL/SDL.h>
 
-#include <boost/thread/mutex.hpp>
+#include <boost/atomic.hpp>
 
 #include <map>
+#include <vector>
+#include <string>
 
 namespace avg {
 
 typedef std::map<int, AudioSourcePtr> AudioSourceMap;
+typedef std::vector<AudioSourcePtr> AudioSourceList;
 
 class AVG_API AudioEngine
 {
@@ -52,6 +56,15 @@ class AVG_API AudioEngine
         const AudioParams * getParams();
 
         void setAudioEnabled(bool bEnabled);
+
+        // In offline mode, no audio device is opened. Instead, mixOffline() mixes
+        // audio on demand and sources wait for their decoders, so the output only
+        // depends on the times passed. The output can be written to a WAV file.
+        void setOffline(bool bOffline, const std::string& sWAVFilename="");
+        bool isOffline() const;
+        // Mixes audio up to time (in milliseconds since playback started).
+        void mixOffline(long long time);
+        long long getNumOfflineFrames() const;
         
         void init(const AudioParams& ap, float volume);
         void teardown();
@@ -69,10 +82,17 @@ class AVG_API AudioEngine
         void setVolume(float volume);
         float getVolume() const;
         bool isEnabled() const;
+
+        // Mixes all sources into pDestBuffer (16 bit samples). Called in the audio
+        // callback. Doesn't lock.
+        void mixAudio(Uint8 *pDestBuffer, int destBufferLen);
         
     private:
-        void mixAudio(Uint8 *pDestBuffer, int destBufferLen);
         static void audioCallback(void *userData, Uint8 *audioBuffer, int audioBufferLen);
+        void createLimiter();
+        void openDevice();
+        AudioSourcePtr getSource(int id);
+        void publishSources();
         void addBuffers(float *pDest, AudioBufferPtr pSrc);
         void calcVolume(float *pBuffer, int numSamples, float volume);
         
@@ -80,12 +100,23 @@ class AVG_API AudioEngine
         AudioBufferPtr m_pTempBuffer;
         float * m_pMixBuffer;
         IProcessor<float>* m_pLimiter;
-        boost::mutex m_Mutex;
 
         bool m_bEnabled;
+        // m_AudioSources belongs to the main thread. mixAudio() only sees snapshots
+        // of it that are replaced (never changed) when a source is added or removed.
+        // m_MixCount is odd while mixAudio() runs, so the main thread knows when an 
+        // old snapshot is no longer in use.
         AudioSourceMap m_AudioSources;
-        float m_Volume;
+        boost::atomic<const AudioSourceList*> m_pSourceSnapshot;
+        boost::atomic<unsigned> m_MixCount;
+        boost::atomic<float> m_Volume;
         bool m_bInitialized;
+        bool m_bDeviceOpen;
+
+        bool m_bOffline;
+        long long m_NumOfflineFrames;
+        std::vector<short> m_OfflineBuffer;
+        WAVWriterPtr m_pWAVWriter;
         
         static AudioEngine* s_pInstance;
 };
@@ -22,6 +22,10 @@
 #include "AudioSource.h"
 #include "AudioEngine.h"
 
+#include "../base/ThreadHelper.h"
+#include "../base/TimeSource.h"
+#include "../base/Logger.h"
+
 #include <string>
 #include <algorithm>
 
@@ -29,12 +33,16 @@ using namespace std;
 
 namespace avg {
 
+// Maximum time offline mixing waits for a decoder, in milliseconds.
+static const int OFFLINE_TIMEOUT = 1000;
+
 AudioSource::AudioSource(AudioMsgQueue& msgQ, AudioMsgQueue& statusQ, int sampleRate)
     : m_MsgQ(msgQ),
       m_StatusQ(statusQ),
       m_SampleRate(sampleRate),
       m_bPaused(false),
       m_bSeeking(false),
+      m_bEOF(false),
       m_Volume(1.0),
       m_LastVolume(1.0)
 {
@@ -56,10 +64,12 @@ void AudioSource::play()
 
 void AudioSource::notifySeek()
 {
+    lock_guard lock(m_SeekMutex);
     while (m_bSeeking) {
         processNextMsg(true);
     }
     m_bSeeking = true;
+    m_bEOF = false;
 }
     
 void AudioSource::setVolume(float volume)
@@ -67,11 +77,19 @@ void AudioSource::setVolume(float volume)
     m_Volume = volume;
 }
 
-void AudioSource::fillAudioBuffer(AudioBufferPtr pBuffer)
+void AudioSource::fillAudioBuffer(AudioBufferPtr pBuffer, bool bWaitForData)
 {
+    boost::unique_lock<boost::mutex> lock(m_SeekMutex, boost::try_to_lock);
+    if (!lock.owns_lock()) {
+        return;
+    }
     bool bContinue = true;
     while (bContinue && m_bSeeking) {
-        bContinue = processNextMsg(false);
+        if (bWaitForData) {
+            bContinue = processNextMsgWithTimeout();
+        } else {
+            bContinue = processNextMsg(false);
+        }
     }
     if (!m_bPaused) {
         unsigned char* pDest = (unsigned char *)(pBuffer->getData());
@@ -99,14 +117,20 @@ void AudioSource::fillAudioBuffer(AudioBufferPtr pBuffer)
     //            cerr << "  " << m_LastTime << endl;
             }
             if (framesLeftToFill != 0) {
-                bool bContinue = processNextMsg(false);
+                bool bContinue;
+                if (bWaitForData) {
+                    bContinue = processNextMsgWithTimeout();
+                } else {
+                    bContinue = processNextMsg(false);
+                }
                 if (!bContinue) {
                     framesLeftToFill = 0;
                 }
             }
         }
-        pBuffer->volumize(m_LastVolume, m_Volume);
-        m_LastVolume = m_Volume;
+        float volume = m_Volume;
+        pBuffer->volumize(m_LastVolume, volume);
+        m_LastVolume = volume;
 
         AudioMsgPtr pStatusMsg(new AudioMsg);
         pStatusMsg->setAudioTime(m_LastTime);
@@ -120,6 +144,7 @@ bool AudioSource::processNextMsg(bool bWait)
     if (pMsg) {
         switch (pMsg->getType()) {
             case AudioMsg::AUDIO:
+                m_bEOF = false;
                 m_pInputAudioBuffer = pMsg->getAudioBuffer();
                 m_CurInputAudioPos = 0;
                 m_LastTime = pMsg->getAudioTime();
@@ -128,6 +153,7 @@ bool AudioSource::processNextMsg(bool bWait)
             case AudioMsg::END_OF_FILE: {
 //                cerr << "        AudioSource: EOF" << endl;
                 m_bSeeking = false;
+                m_bEOF = true;
                 AudioMsgPtr pStatusMsg(new AudioMsg);
                 pStatusMsg->setEOF();
                 m_StatusQ.push(pStatusMsg);
@@ -136,6 +162,7 @@ bool AudioSource::processNextMsg(bool bWait)
             case AudioMsg::SEEK_DONE: {
 //                cerr << "        AudioSource: SEEK_DONE" << endl;
                 m_bSeeking = false;
+                m_bEOF = false;
                 m_pInputAudioBuffer = AudioBufferPtr();
                 m_LastTime = pMsg->getSeekTime();
                 AudioMsgPtr pStatusMsg(new AudioMsg);
@@ -153,4 +180,21 @@ bool AudioSource::processNextMsg(bool bWait)
     }
 }
 
+bool AudioSource::processNextMsgWithTimeout()
+{
+    // Gives the decoder time to catch up, but doesn't hang if it's stuck.
+    long long timeoutTime = TimeSource::get()->getCurrentMillisecs()+OFFLINE_TIMEOUT;
+    while (true) {
+        bool bContinue = processNextMsg(false);
+        if (bContinue || m_bEOF) {
+            return bContinue;
+        }
+        if (TimeSource::get()->getCurrentMillisecs() > timeoutTime) {
+            AVG_LOG_WARNING("Offline audio: Timeout waiting for audio data.");
+            return false;
+        }
+        msleep(1);
+    }
+}
+
 }
@@ -27,10 +27,17 @@
 #include "AudioMsg.h"
 
 #include <boost/shared_ptr.hpp>
+#include <boost/thread/mutex.hpp>
+#include <boost/atomic.hpp>
 
 namespace avg
 {
 
+// pause(), play(), notifySeek() and setVolume() are called from the main thread,
+// fillAudioBuffer() from the audio thread. fillAudioBuffer() never blocks: It
+// outputs silence while notifySeek() is in progress. The exception is offline
+// mixing, where fillAudioBuffer() is called in the main thread with bWaitForData set
+// and waits for the decoder to deliver data.
 class AVG_API AudioSource
 {
 public:
@@ -42,10 +49,11 @@ public:
     void notifySeek();
     void setVolume(float volume);
 
-    void fillAudioBuffer(AudioBufferPtr pBuffer);
+    void fillAudioBuffer(AudioBufferPtr pBuffer, bool bWaitForData=false);
 
 private:
     bool processNextMsg(bool bWait);
+    bool processNextMsgWithTimeout();
 
     AudioMsgQueue& m_MsgQ;    
     AudioMsgQueue& m_StatusQ;
@@ -53,9 +61,11 @@ private:
     AudioBufferPtr m_pInputAudioBuffer;
     float m_LastTime;
     int m_CurInputAudioPos;
-    bool m_bPaused;
+    boost::atomic<bool> m_bPaused;
     bool m_bSeeking;
-    float m_Volume;
+    bool m_bEOF;
+    boost::mutex m_SeekMutex;
+    boost::atomic<float> m_Volume;
     float m_LastVolume;
 };
 
@@ -32,14 +32,19 @@
 #include <cmath>
 #include <limits>
 #include <memory.h>
+#include <algorithm>
 
 #define LOOKAHEAD 64
 #define AVG1 27
 #define AVG2 38
+#define DYNAMICS_BLOCK_SIZE 256
 
 namespace avg {
 
 // Dynamics processor (compressor & limiter).
+// processBlock() works in blocks of DYNAMICS_BLOCK_SIZE frames: Peak detection, gain
+// calculation and gain application are separate loops over the block, so only the
+// inherently recursive parts (rms, lookahead, envelope) are computed frame by frame.
 template<typename T, int CHANNELS>
 class AVG_API Dynamics: public IProcessor<T>
 {
@@ -47,6 +52,7 @@ class AVG_API Dynamics: public IProcessor<T>
         Dynamics(T fs);
         virtual ~Dynamics();
         virtual void process(T* pSamples);
+        virtual void processBlock(T* pSamples, int numFrames);
 
         void setThreshold(T threshold);
         T getThreshold() const;
@@ -62,6 +68,7 @@ class AVG_API Dynamics: public IProcessor<T>
         T getMakeupGain() const;
 
     private:
+        void processChunk(T* pSamples, int numFrames);
         void maxFilter(T& rms);
 
         T m_fs;
@@ -100,6 +107,9 @@ class AVG_API Dynamics: public IProcessor<T>
 
         T makeupGain_;
         T postGain_;
+
+        T* pLevelBuf_;
+        T* pGainBuf_;
 };
 
 template<typename T, int CHANNELS>
@@ -130,7 +140,9 @@ Dynamics<T, CHANNELS>::Dynamics(T fs)
       delayBuf_(0),
       delayBufIdx_(0),
       makeupGain_(0.),
-      postGain_(1.)
+      postGain_(1.),
+      pLevelBuf_(0),
+      pGainBuf_(0)
 {
     lookaheadBuf_ = new T[LOOKAHEAD];
     for (int i = 0; i < LOOKAHEAD; i++) {
@@ -146,6 +158,9 @@ Dynamics<T, CHANNELS>::Dynamics(T fs)
     delayBuf_ = new T[LOOKAHEAD*CHANNELS];
     memset(delayBuf_, 0, sizeof(T)*LOOKAHEAD*CHANNELS);
 
+    pLevelBuf_ = new T[DYNAMICS_BLOCK_SIZE];
+    pGainBuf_ = new T[DYNAMICS_BLOCK_SIZE];
+
     setThreshold(0.);
     setRmsTime(0.);
     setRatio(std::numeric_limits<T>::infinity());
@@ -163,6 +178,9 @@ Dynamics<T, CHANNELS>::~Dynamics()
     delete[] avg2Buf_;
 
     delete[] delayBuf_;
+
+    delete[] pLevelBuf_;
+    delete[] pGainBuf_;
 }
 
 template<typename T, int CHANNELS>
@@ -181,74 +199,102 @@ void Dynamics<T, CHANNELS>::maxFilter(T& rms)
 template<typename T, int CHANNELS>
 void Dynamics<T, CHANNELS>::process(T* pSamples)
 {
+    processChunk(pSamples, 1);
+}
 
-    //---------------- Preprocessing
-    T x = 0.f;
-    for (int i = 0; i < CHANNELS; i++) {
-        // Apply pregain
-        const T tmp = pSamples[i] * preGain_;
+template<typename T, int CHANNELS>
+void Dynamics<T, CHANNELS>::processBlock(T* pSamples, int numFrames)
+{
+    for (int i = 0; i < numFrames; i += DYNAMICS_BLOCK_SIZE) {
+        int framesInChunk = std::min(numFrames-i, DYNAMICS_BLOCK_SIZE);
+        processChunk(pSamples+i*CHANNELS, framesInChunk);
+    }
+}
 
-        T abs = std::fabs(tmp);
-        if (abs > x) {
-            x = abs;
+template<typename T, int CHANNELS>
+void Dynamics<T, CHANNELS>::processChunk(T* pSamples, int numFrames)
+{
+    T* pLevel = pLevelBuf_;
+    T* pGain = pGainBuf_;
+
+    //---------------- Preprocessing: Apply pregain, find peak over channels.
+    for (int j = 0; j < numFrames; j++) {
+        T x = 0.f;
+        for (int i = 0; i < CHANNELS; i++) {
+            x = std::max(x, std::fabs(pSamples[j*CHANNELS+i] * preGain_));
         }
+        pLevel[j] = x;
     }
 
-    //---------------- RMS
-    T rms = (1.f - rmsCoef_) * x * x + rmsCoef_ * rms1_;
-    rms1_ = rms;
-    rms   = sqrt(rms);
+    //---------------- RMS, max filter
+    for (int j = 0; j < numFrames; j++) {
+        const T x = pLevel[j];
+        T rms = (1.f - rmsCoef_) * x * x + rmsCoef_ * rms1_;
+        rms1_ = rms;
+        rms   = sqrt(rms);
 
-    //---------------- Max filter
-    if (rms > 1.) {
-        maxFilter(rms);
+        if (rms > 1.) {
+            maxFilter(rms);
+        }
+
+        pLevel[j] = lookaheadBuf_[lookaheadBufIdx_];
+        lookaheadBuf_[lookaheadBufIdx_] = 1.;
+        lookaheadBufIdx_ = (lookaheadBufIdx_+1)&(LOOKAHEAD-1);
     }
 
     //---------------- Ratio
-    T dbMax  = std::log10(lookaheadBuf_[lookaheadBufIdx_]);
-    T dbComp = dbMax * inverseRatio_;
-    T comp   = std::pow(static_cast<T>(10.), dbComp);
-    T c      = comp / lookaheadBuf_[lookaheadBufIdx_];
-
-    lookaheadBuf_[lookaheadBufIdx_] = 1.;
-    lookaheadBufIdx_ = (lookaheadBufIdx_+1)%LOOKAHEAD;
-
-    //---------------- Attack/release envelope
-    if (env1_ <= c) {
-        c = c + (env1_ - c) * relCoef_;
+    // comp = 10^(log10(level)*inverseRatio), gain = comp/level. For a limiter
+    // (inverseRatio == 0), that's just 1/level.
+    if (inverseRatio_ == 0) {
+        for (int j = 0; j < numFrames; j++) {
+            pGain[j] = 1.f / pLevel[j];
+        }
     } else {
-        c = c + (env1_ - c) * attCoef_;
+        const T exponent = inverseRatio_ - 1.f;
+        for (int j = 0; j < numFrames; j++) {
+            pGain[j] = std::exp(std::log(pLevel[j]) * exponent);
+        }
     }
-    env1_ = c;
-
-    //---------------- Smoothing
-    const T tmp1           = avg1Old_ + c - avg1Buf_[avg1BufRIdx_];
-    avg1Old_               = tmp1;
-    avg1Buf_[avg1BufWIdx_] = c;
-    c = tmp1;
-    avg1BufRIdx_ = (avg1BufRIdx_+1)%AVG1;
-    avg1BufWIdx_ = (avg1BufWIdx_+1)%AVG1;
-
-    const T tmp2           = avg2Old_ + c - avg2Buf_[avg2BufRIdx_];
-    avg2Old_               = tmp2;
-    avg2Buf_[avg2BufWIdx_] = c;
-    c = tmp2;
-    avg2BufRIdx_ = (avg2BufRIdx_+1)%AVG2;
-    avg2BufWIdx_ = (avg2BufWIdx_+1)%AVG2;
-
-    c = c / (static_cast<T>(AVG1) * static_cast<T>(AVG2));
-
-    //---------------- Postprocessing
-    for (int i = 0; i < CHANNELS; i++) {
-        // Delay input samples
-        const T in                 = delayBuf_[delayBufIdx_*CHANNELS+i];
-        delayBuf_[delayBufIdx_*CHANNELS+i] = pSamples[i];
-
-        // Apply control signal
-        pSamples[i] = in * c * postGain_;
+
+    //---------------- Attack/release envelope, smoothing
+    for (int j = 0; j < numFrames; j++) {
+        T c = pGain[j];
+        if (env1_ <= c) {
+            c = c + (env1_ - c) * relCoef_;
+        } else {
+            c = c + (env1_ - c) * attCoef_;
+        }
+        env1_ = c;
+
+        const T tmp1           = avg1Old_ + c - avg1Buf_[avg1BufRIdx_];
+        avg1Old_               = tmp1;
+        avg1Buf_[avg1BufWIdx_] = c;
+        c = tmp1;
+        avg1BufRIdx_ = (avg1BufRIdx_+1 == AVG1) ? 0 : avg1BufRIdx_+1;
+        avg1BufWIdx_ = (avg1BufWIdx_+1 == AVG1) ? 0 : avg1BufWIdx_+1;
+
+        const T tmp2           = avg2Old_ + c - avg2Buf_[avg2BufRIdx_];
+        avg2Old_               = tmp2;
+        avg2Buf_[avg2BufWIdx_] = c;
+        c = tmp2;
+        avg2BufRIdx_ = (avg2BufRIdx_+1 == AVG2) ? 0 : avg2BufRIdx_+1;
+        avg2BufWIdx_ = (avg2BufWIdx_+1 == AVG2) ? 0 : avg2BufWIdx_+1;
+
+        pGain[j] = c;
     }
 
-    delayBufIdx_ = (delayBufIdx_+1)&(LOOKAHEAD-1);
+    //---------------- Postprocessing: Delay input samples, apply control signal.
+    const T gainScale = postGain_ / (static_cast<T>(AVG1) * static_cast<T>(AVG2));
+    for (int j = 0; j < numFrames; j++) {
+        T* pDelay = delayBuf_ + delayBufIdx_*CHANNELS;
+        const T c = pGain[j] * gainScale;
+        for (int i = 0; i < CHANNELS; i++) {
+            const T in = pDelay[i];
+            pDelay[i] = pSamples[j*CHANNELS+i];
+            pSamples[j*CHANNELS+i] = in * c;
+        }
+        delayBufIdx_ = (delayBufIdx_+1)&(LOOKAHEAD-1);
+    }
 }
 
 template<typename T, int CHANNELS>
@@ -31,6 +31,9 @@ public:
     virtual ~IProcessor() {};
     virtual void process(T* pSamples) = 0;
 
+    // Processes numFrames consecutive frames of interleaved samples.
+    virtual void processBlock(T* pSamples, int numFrames) = 0;
+
 };
 
 }
@@ -0,0 +1,131 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "WAVWriter.h"
+
+#include "../base/Exception.h"
+
+#include <vector>
+
+using namespace std;
+
+namespace avg {
+
+static const int HEADER_SIZE = 44;
+
+WAVWriter::WAVWriter(const string& sFilename, const AudioParams& ap)
+    : m_sFilename(sFilename),
+      m_AP(ap),
+      m_NumFramesWritten(0)
+{
+    m_pFile = fopen(sFilename.c_str(), "wb");
+    if (!m_pFile) {
+        throw Exception(AVG_ERR_FILEIO, "Can't open '"+sFilename+"' for writing.");
+    }
+    writeHeader();
+}
+
+WAVWriter::~WAVWriter()
+{
+    if (m_pFile) {
+        fclose(m_pFile);
+    }
+}
+
+void WAVWriter::write(const short* pSamples, int numFrames)
+{
+    AVG_ASSERT(m_pFile);
+    int numSamples = numFrames*m_AP.m_Channels;
+    // WAV files are little-endian.
+    vector<unsigned char> buffer(numSamples*2);
+    for (int i = 0; i < numSamples; ++i) {
+        unsigned short sample = (unsigned short)(pSamples[i]);
+        buffer[i*2] = (unsigned char)(sample & 0xFF);
+        buffer[i*2+1] = (unsigned char)(sample >> 8);
+    }
+    if (numSamples > 0) {
+        checkWrite(fwrite(&buffer[0], 1, buffer.size(), m_pFile) == buffer.size());
+    }
+    m_NumFramesWritten += numFrames;
+}
+
+void WAVWriter::close()
+{
+    if (m_pFile) {
+        checkWrite(fseek(m_pFile, 0, SEEK_SET) == 0);
+        writeHeader();
+        FILE* pFile = m_pFile;
+        m_pFile = 0;
+        if (fclose(pFile) != 0) {
+            throw Exception(AVG_ERR_FILEIO, "Error writing '"+m_sFilename+"'.");
+        }
+    }
+}
+
+int WAVWriter::getNumFramesWritten() const
+{
+    return m_NumFramesWritten;
+}
+
+void WAVWriter::writeHeader()
+{
+    int frameSize = m_AP.m_Channels*2;
+    unsigned dataSize = unsigned(m_NumFramesWritten)*frameSize;
+    writeTag("RIFF");
+    writeInt(HEADER_SIZE-8+dataSize, 4);
+    writeTag("WAVE");
+
+    writeTag("fmt ");
+    writeInt(16, 4);                              // Chunk size
+    writeInt(1, 2);                               // PCM
+    writeInt(m_AP.m_Channels, 2);
+    writeInt(m_AP.m_SampleRate, 4);
+    writeInt(m_AP.m_SampleRate*frameSize, 4);     // Bytes per second
+    writeInt(frameSize, 2);
+    writeInt(16, 2);                              // Bits per sample
+
+    writeTag("data");
+    writeInt(dataSize, 4);
+}
+
+void WAVWriter::writeTag(const char* pTag)
+{
+    checkWrite(fwrite(pTag, 1, 4, m_pFile) == 4);
+}
+
+void WAVWriter::writeInt(unsigned val, int numBytes)
+{
+    unsigned char bytes[4];
+    for (int i = 0; i < numBytes; ++i) {
+        bytes[i] = (unsigned char)((val >> (i*8)) & 0xFF);
+    }
+    checkWrite(fwrite(bytes, 1, numBytes, m_pFile) == size_t(numBytes));
+}
+
+void WAVWriter::checkWrite(bool bOk)
+{
+    if (!bOk) {
+        throw Exception(AVG_ERR_FILEIO, "Error writing '"+m_sFilename+"'.");
+    }
+}
+
+}
@@ -0,0 +1,66 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _WAVWriter_H_
+#define _WAVWriter_H_
+
+#include "../api.h"
+
+#include "AudioParams.h"
+
+#include <boost/shared_ptr.hpp>
+
+#include <string>
+#include <stdio.h>
+
+namespace avg {
+
+// Writes 16 bit PCM samples to a RIFF WAVE file. The chunk sizes in the header are
+// filled in by close().
+class AVG_API WAVWriter
+{
+public:
+    WAVWriter(const std::string& sFilename, const AudioParams& ap);
+    virtual ~WAVWriter();
+
+    void write(const short* pSamples, int numFrames);
+    void close();
+
+    int getNumFramesWritten() const;
+
+private:
+    void writeHeader();
+    void writeTag(const char* pTag);
+    void writeInt(unsigned val, int numBytes);
+    void checkWrite(bool bOk);
+
+    std::string m_sFilename;
+    AudioParams m_AP;
+    FILE* m_pFile;
+    int m_NumFramesWritten;
+};
+
+typedef boost::shared_ptr<WAVWriter> WAVWriterPtr;
+
+}
+
+#endif
@@ -0,0 +1,127 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+#include "AudioEngine.h"
+#include "AudioMsg.h"
+
+#include "../base/StringHelper.h"
+#include "../base/TimeSource.h"
+
+#include <iostream>
+#include <math.h>
+#include <stdlib.h>
+
+using namespace avg;
+using namespace std;
+
+// Mixes numSources sine sources for the given time using offline mixing and
+// reports how much faster than realtime that was.
+// Usage: benchmarkaudio [numSources [seconds]]
+
+static const int SAMPLE_RATE = 44100;
+static const int CHANNELS = 2;
+static const int BUFFER_FRAMES = 1024;
+
+AudioBufferPtr createSineBuffer(const AudioParams& ap, float freq)
+{
+    AudioBufferPtr pBuffer(new AudioBuffer(4096, ap));
+    short* pData = pBuffer->getData();
+    for (int i = 0; i < pBuffer->getNumFrames(); ++i) {
+        short sample = short(8000*sin(i*freq*2*M_PI/SAMPLE_RATE));
+        for (int j = 0; j < CHANNELS; ++j) {
+            pData[i*CHANNELS+j] = sample;
+        }
+    }
+    return pBuffer;
+}
+
+void clearQueue(AudioMsgQueue& q)
+{
+    while (q.pop(false)) {
+    }
+}
+
+float runMixBenchmark(int numSources, float seconds)
+{
+    AudioEngine* pEngine = AudioEngine::get();
+    AudioParams ap(SAMPLE_RATE, CHANNELS, BUFFER_FRAMES);
+    int numFrames = int(seconds*SAMPLE_RATE);
+
+    vector<AudioMsgQueuePtr> pDataQs;
+    vector<AudioMsgQueuePtr> pStatusQs;
+    vector<int> sourceIDs;
+    for (int i = 0; i < numSources; ++i) {
+        // Use the same input buffer over and over; AudioSource doesn't change it.
+        AudioBufferPtr pBuffer = createSineBuffer(ap, 110.f+i*20);
+        AudioMsgQueuePtr pDataQ(new AudioMsgQueue());
+        for (int j = 0; j*pBuffer->getNumFrames() < numFrames; ++j) {
+            AudioMsgPtr pMsg(new AudioMsg);
+            pMsg->setAudio(pBuffer, float(j*pBuffer->getNumFrames())/SAMPLE_RATE);
+            pDataQ->push(pMsg);
+        }
+        AudioMsgPtr pEOFMsg(new AudioMsg);
+        pEOFMsg->setEOF();
+        pDataQ->push(pEOFMsg);
+        AudioMsgQueuePtr pStatusQ(new AudioMsgQueue());
+        pDataQs.push_back(pDataQ);
+        pStatusQs.push_back(pStatusQ);
+        sourceIDs.push_back(pEngine->addSource(*pDataQ, *pStatusQ));
+        pEngine->setSourceVolume(sourceIDs.back(), 0.5f);
+    }
+
+    // Mix in steps of 100 ms, like a player running at 10 fps.
+    long long mixTime = 0;
+    for (long long time = 100; time <= seconds*1000; time += 100) {
+        long long startTime = TimeSource::get()->getCurrentMicrosecs();
+        pEngine->mixOffline(time);
+        mixTime += TimeSource::get()->getCurrentMicrosecs()-startTime;
+        for (int j = 0; j < numSources; ++j) {
+            clearQueue(*pStatusQs[j]);
+        }
+    }
+
+    for (int i = 0; i < numSources; ++i) {
+        pEngine->removeSource(sourceIDs[i]);
+    }
+    return mixTime/1000000.f;
+}
+
+int main(int nargs, char** args)
+{
+    int numSources = 32;
+    float seconds = 10;
+    if (nargs > 1) {
+        numSources = stringToInt(args[1]);
+    }
+    if (nargs > 2) {
+        fromString(args[2], seconds);
+    }
+
+    AudioEngine engine;
+    engine.init(AudioParams(SAMPLE_RATE, CHANNELS, BUFFER_FRAMES), 1);
+    engine.setOffline(true);
+    engine.setAudioEnabled(true);
+
+    float mixTime = runMixBenchmark(numSources, seconds);
+    cerr << "Mixing " << numSources << " sources, " << seconds << " s: " 
+            << mixTime*1000 << " ms, realtime factor " << seconds/mixTime << endl;
+    engine.teardown();
+}
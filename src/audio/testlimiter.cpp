@@ -95,6 +95,63 @@ public:
         // Free memory
         delete d;
         delete[] pSamples;
+
+        testBlockProcessing(std::numeric_limits<float>::infinity());
+        testBlockProcessing(4.f);
+    }
+
+private:
+    void testBlockProcessing(float ratio)
+    {
+        // Processing blocks of arbitrary size must give the same results as processing
+        // frame by frame.
+        const int CHANNELS = 2;
+        float fs = 44100.f;
+        int numFrames = int(fs * 0.1f);
+        float* pFrameSamples = createTestSignal(numFrames, CHANNELS);
+        float* pBlockSamples = createTestSignal(numFrames, CHANNELS);
+
+        Dynamics<float, CHANNELS> frameLimiter(fs);
+        frameLimiter.setRatio(ratio);
+        frameLimiter.setAttackTime(0.001f);
+        Dynamics<float, CHANNELS> blockLimiter(fs);
+        blockLimiter.setRatio(ratio);
+        blockLimiter.setAttackTime(0.001f);
+
+        for (int i = 0; i < numFrames; ++i) {
+            frameLimiter.process(pFrameSamples+i*CHANNELS);
+        }
+        int blockSizes[] = {1, 7, 256, 300, 1024};
+        int curFrame = 0;
+        int i = 0;
+        while (curFrame < numFrames) {
+            int blockSize = min(blockSizes[i%5], numFrames-curFrame);
+            blockLimiter.processBlock(pBlockSamples+curFrame*CHANNELS, blockSize);
+            curFrame += blockSize;
+            i++;
+        }
+
+        float maxDiff = 0;
+        for (int i = 0; i < numFrames*CHANNELS; ++i) {
+            maxDiff = max(maxDiff, fabs(pFrameSamples[i]-pBlockSamples[i]));
+        }
+        TEST(maxDiff < 0.0001f);
+
+        delete[] pFrameSamples;
+        delete[] pBlockSamples;
+    }
+
+    float* createTestSignal(int numFrames, int numChannels)
+    {
+        float* pSamples = new float[numChannels*numFrames];
+        for (int j = 0; j < numFrames; j++) {
+            // Rising amplitude, so the limiter has something to do.
+            float amplitude = 3.f*j/numFrames;
+            for (int i = 0; i < numChannels; i++) {
+                pSamples[j*numChannels+i] = amplitude*sin(j*(440.f/44100)*float(M_PI));
+            }
+        }
+        return pSamples;
     }
 };
 
@@ -0,0 +1,198 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "AsyncLogSink.h"
+#include "Logger.h"
+#include "Exception.h"
+#include "ThreadHelper.h"
+#include "StringHelper.h"
+
+#include <boost/bind.hpp>
+#include <boost/algorithm/string.hpp>
+
+using namespace std;
+
+namespace avg {
+
+typedef boost::unique_lock<boost::mutex> unique_lock;
+
+AsyncLogSink::AsyncLogSink(const LogSinkPtr& pSink, unsigned capacity,
+        OverflowPolicy policy)
+    : m_pSink(pSink),
+      m_Policy(policy),
+      m_Records(capacity),
+      m_Head(0),
+      m_NumPending(0),
+      m_bWriting(false),
+      m_bStop(false),
+      m_NumDropped(0),
+      m_NumDroppedReported(0)
+{
+    if (capacity == 0) {
+        throw Exception(AVG_ERR_INVALID_ARGS, "AsyncLogSink: capacity must be > 0.");
+    }
+    m_pThread = new boost::thread(boost::bind(&AsyncLogSink::run, this));
+}
+
+AsyncLogSink::~AsyncLogSink()
+{
+    {
+        lock_guard lock(m_Mutex);
+        m_bStop = true;
+        m_NotEmptyCond.notify_one();
+    }
+    // The writer thread drains all pending messages before it terminates.
+    m_pThread->join();
+    delete m_pThread;
+}
+
+void AsyncLogSink::logMessage(const tm* pTime, unsigned millis, 
+        const category_t& category, severity_t severity, const UTF8String& sMsg)
+{
+    unique_lock lock(m_Mutex);
+    unsigned capacity = m_Records.size();
+    if (m_NumPending == capacity) {
+        switch (m_Policy) {
+            case DROP_OLDEST:
+                m_Head = (m_Head+1) % capacity;
+                m_NumPending--;
+                m_NumDropped++;
+                break;
+            case DROP_NEWEST:
+                m_NumDropped++;
+                return;
+            case BLOCK:
+                while (m_NumPending == capacity) {
+                    m_NotFullCond.wait(lock);
+                }
+                break;
+        }
+    }
+    // Assigning to the preallocated records reuses their string buffers.
+    LogRecord& record = m_Records[(m_Head+m_NumPending) % capacity];
+    record.m_Time = *pTime;
+    record.m_Millis = millis;
+    record.m_Category = category;
+    record.m_Severity = severity;
+    record.m_sMsg = sMsg;
+    m_NumPending++;
+    m_NotEmptyCond.notify_one();
+}
+
+void AsyncLogSink::flush()
+{
+    unique_lock lock(m_Mutex);
+    while (m_NumPending > 0 || m_bWriting) {
+        m_IdleCond.wait(lock);
+    }
+}
+
+AsyncLogSink::OverflowPolicy AsyncLogSink::getOverflowPolicy() const
+{
+    return m_Policy;
+}
+
+unsigned AsyncLogSink::getCapacity() const
+{
+    return m_Records.size();
+}
+
+unsigned long long AsyncLogSink::getNumDropped() const
+{
+    lock_guard lock(m_Mutex);
+    return m_NumDropped;
+}
+
+AsyncLogSink::OverflowPolicy AsyncLogSink::stringToOverflowPolicy(
+        const string& sPolicy)
+{
+    string sUpperPolicy = boost::to_upper_copy(sPolicy);
+    if (sUpperPolicy == "DROP_OLDEST" || sUpperPolicy == "") {
+        return DROP_OLDEST;
+    } else if (sUpperPolicy == "DROP_NEWEST") {
+        return DROP_NEWEST;
+    } else if (sUpperPolicy == "BLOCK") {
+        return BLOCK;
+    }
+    throw Exception(AVG_ERR_INVALID_ARGS, sPolicy + 
+            " is an invalid log overflow policy");
+}
+
+void AsyncLogSink::run()
+{
+    setAffinityMask(false);
+    unsigned capacity = m_Records.size();
+    vector<LogRecord> batch(capacity);
+    while (true) {
+        unsigned numRecords;
+        unsigned long long numDropped;
+        {
+            unique_lock lock(m_Mutex);
+            while (m_NumPending == 0 && !m_bStop) {
+                m_NotEmptyCond.wait(lock);
+            }
+            if (m_NumPending == 0) {
+                break;
+            }
+            // Swapping moves the pending messages out of the ring buffer without
+            // copying them, so producers are blocked for as short a time as possible.
+            numRecords = m_NumPending;
+            for (unsigned i = 0; i < numRecords; ++i) {
+                swap(batch[i], m_Records[(m_Head+i) % capacity]);
+            }
+            m_Head = (m_Head+numRecords) % capacity;
+            m_NumPending = 0;
+            numDropped = m_NumDropped - m_NumDroppedReported;
+            m_NumDroppedReported = m_NumDropped;
+            m_bWriting = true;
+            m_NotFullCond.notify_all();
+        }
+        writeBatch(batch, numRecords, numDropped);
+        {
+            lock_guard lock(m_Mutex);
+            m_bWriting = false;
+            if (m_NumPending == 0) {
+                m_IdleCond.notify_all();
+            }
+        }
+    }
+}
+
+void AsyncLogSink::writeBatch(vector<LogRecord>& batch, unsigned numRecords,
+        unsigned long long numDropped)
+{
+    if (numDropped > 0) {
+        const LogRecord& firstRecord = batch[0];
+        m_pSink->logMessage(&firstRecord.m_Time, firstRecord.m_Millis, 
+                Logger::category::NONE, Logger::severity::WARNING, 
+                "Log buffer overflow: " + toString(numDropped) + 
+                " messages dropped.");
+    }
+    for (unsigned i = 0; i < numRecords; ++i) {
+        const LogRecord& record = batch[i];
+        m_pSink->logMessage(&record.m_Time, record.m_Millis, record.m_Category,
+                record.m_Severity, record.m_sMsg);
+    }
+    m_pSink->flush();
+}
+
+}
@@ -0,0 +1,98 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _AsyncLogSink_H_
+#define _AsyncLogSink_H_
+
+#include "ILogSink.h"
+#include "../api.h"
+
+#include <boost/thread/thread.hpp>
+#include <boost/thread/mutex.hpp>
+#include <boost/thread/condition.hpp>
+
+#include <vector>
+
+namespace avg {
+
+// Decouples logging threads from a slow sink: logMessage() only copies the message
+// into a bounded ring buffer, holding a mutex just for the copy. A dedicated writer
+// thread forwards the messages in batches to the wrapped sink. Pending messages are
+// written on flush() and when the AsyncLogSink is destroyed.
+class AVG_API AsyncLogSink: public ILogSink
+{
+public:
+    enum OverflowPolicy {
+        DROP_OLDEST,    // Overwrite the oldest pending message.
+        DROP_NEWEST,    // Discard the incoming message.
+        BLOCK           // Wait until the writer thread has made room.
+    };
+
+    AsyncLogSink(const LogSinkPtr& pSink, unsigned capacity=4096,
+            OverflowPolicy policy=DROP_OLDEST);
+    virtual ~AsyncLogSink();
+
+    virtual void logMessage(const tm* pTime, unsigned millis, const category_t& category,
+            severity_t severity, const UTF8String& sMsg);
+    virtual void flush();
+
+    OverflowPolicy getOverflowPolicy() const;
+    unsigned getCapacity() const;
+    unsigned long long getNumDropped() const;
+
+    static OverflowPolicy stringToOverflowPolicy(const std::string& sPolicy);
+
+private:
+    struct LogRecord {
+        tm m_Time;
+        unsigned m_Millis;
+        category_t m_Category;
+        severity_t m_Severity;
+        UTF8String m_sMsg;
+    };
+
+    void run();
+    void writeBatch(std::vector<LogRecord>& batch, unsigned numRecords,
+            unsigned long long numDropped);
+
+    LogSinkPtr m_pSink;
+    OverflowPolicy m_Policy;
+
+    std::vector<LogRecord> m_Records;
+    unsigned m_Head;
+    unsigned m_NumPending;
+    bool m_bWriting;
+    bool m_bStop;
+    unsigned long long m_NumDropped;
+    unsigned long long m_NumDroppedReported;
+
+    mutable boost::mutex m_Mutex;
+    boost::condition m_NotEmptyCond;
+    boost::condition m_NotFullCond;
+    boost::condition m_IdleCond;
+    boost::thread* m_pThread;
+};
+
+typedef boost::shared_ptr<AsyncLogSink> AsyncLogSinkPtr;
+
+}
+#endif
@@ -80,6 +80,8 @@ ConfigMgr::ConfigMgr()
     addOption("scr", "vsyncmode", "auto");
     addOption("scr", "videoaccel", "true");
     addOption("scr", "imgcachesize", "-1,-1");
+    addOption("scr", "bmpdiskcachedir", "");
+    addOption("scr", "bmpdiskcachesize", "1024");
     
     addSubsys("aud");
     addOption("aud", "channels", "2");
@@ -20,6 +20,8 @@
 //
 
 #include "GeomHelper.h"
+#include "Exception.h"
+#include "StringHelper.h"
 
 #include <math.h>
 #include <iostream>
@@ -174,5 +176,58 @@ glm::vec2 getLineLineIntersection(const glm::vec2& p1, const glm::vec2& v1,
 
 }
 
+glm::vec2 getCentroid(const std::vector<glm::vec2>& pts, const std::vector<int>& indexes)
+{
+    if (indexes.empty()) {
+        throw Exception(AVG_ERR_INVALID_ARGS, "getCentroid: indexes must not be empty.");
+    }
+    glm::vec2 sum(0,0);
+    for (unsigned i = 0; i < indexes.size(); ++i) {
+        int index = indexes[i];
+        if (index < 0 || index >= int(pts.size())) {
+            throw Exception(AVG_ERR_OUT_OF_RANGE, "getCentroid: index " + 
+                    toString(index) + " out of range.");
+        }
+        sum += pts[index];
+    }
+    return sum/float(indexes.size());
+}
+
+void calcKMeans(const std::vector<glm::vec2>& pts, std::vector<int>& cluster0,
+        std::vector<int>& cluster1)
+{
+    AVG_ASSERT(pts.size() > 1);
+    glm::vec2 p0 = pts[0];
+    glm::vec2 p1 = pts[1];
+    for (int j = 0; j < 50; ++j) {
+        cluster0.clear();
+        cluster1.clear();
+        glm::vec2 sum0(0,0);
+        glm::vec2 sum1(0,0);
+        for (unsigned i = 0; i < pts.size(); ++i) {
+            glm::vec2 d0 = pts[i]-p0;
+            glm::vec2 d1 = pts[i]-p1;
+            if (glm::dot(d0, d0) < glm::dot(d1, d1)) {
+                cluster0.push_back(i);
+                sum0 += pts[i];
+            } else {
+                cluster1.push_back(i);
+                sum1 += pts[i];
+            }
+        }
+        glm::vec2 oldP0 = p0;
+        glm::vec2 oldP1 = p1;
+        if (!cluster0.empty()) {
+            p0 = sum0/float(cluster0.size());
+        }
+        if (!cluster1.empty()) {
+            p1 = sum1/float(cluster1.size());
+        }
+        if (p0 == oldP0 && p1 == oldP1) {
+            break;
+        }
+    }
+}
+
 
 }
@@ -46,6 +46,14 @@ bool AVG_API pointInPolygon(const glm::vec2& pt, const std::vector<glm::vec2>& p
 glm::vec2 AVG_API getLineLineIntersection(const glm::vec2& p1, const glm::vec2& v1, 
         const glm::vec2& p2, const glm::vec2& v2);
 
+glm::vec2 AVG_API getCentroid(const std::vector<glm::vec2>& pts,
+        const std::vector<int>& indexes);
+
+// Splits pts into two clusters (k-means with k=2). The clusters are returned as lists 
+// of indexes into pts.
+void AVG_API calcKMeans(const std::vector<glm::vec2>& pts, std::vector<int>& cluster0,
+        std::vector<int>& cluster1);
+
 }
 #endif
  
@@ -41,9 +41,11 @@ typedef UTF8String category_t;
 class AVG_API ILogSink
 {
 public:
+    virtual ~ILogSink() {}
+
     virtual void logMessage(const tm* pTime, unsigned millis, const category_t& category,
             severity_t severity, const UTF8String& sMsg) = 0;
-    
+    virtual void flush() {}
 };
 
 typedef boost::shared_ptr<ILogSink> LogSinkPtr;
@@ -22,6 +22,7 @@
 #include "Logger.h"
 #include "Exception.h"
 #include "StandardLogSink.h"
+#include "AsyncLogSink.h"
 #include "OSHelper.h"
 
 #include <boost/algorithm/string.hpp>
@@ -37,6 +38,7 @@
 #endif
 #include <iostream>
 #include <iomanip>
+#include <stdlib.h>
 
 using namespace std;
 namespace ba = boost::algorithm;
@@ -49,39 +51,51 @@ namespace avg {
     const severity_t Logger::severity::DEBUG    = 10;
     const severity_t Logger::severity::NONE  =  0;
 
-    const category_t Logger::category::NONE = UTF8String("NONE");
-    const category_t Logger::category::PROFILE = UTF8String("PROFILE");
-    const category_t Logger::category::PROFILE_VIDEO = UTF8String("PROFILE_V");
-    const category_t Logger::category::EVENTS = UTF8String("EVENTS");
-    const category_t Logger::category::CONFIG = UTF8String("CONFIG");
-    const category_t Logger::category::MEMORY = UTF8String("MEMORY");
-    const category_t Logger::category::APP = UTF8String("APP");
-    const category_t Logger::category::PLUGIN = UTF8String("PLUGIN");
-    const category_t Logger::category::PLAYER = UTF8String("PLAYER");
-    const category_t Logger::category::SHADER = UTF8String("SHADER");
-    const category_t Logger::category::DEPRECATION = UTF8String("DEPREC");
-    const category_t Logger::category::VIDEO = UTF8String("VIDEO");
+    const InternedCategory Logger::category::NONE("NONE", 0);
+    const InternedCategory Logger::category::PROFILE("PROFILE", 1);
+    const InternedCategory Logger::category::PROFILE_VIDEO("PROFILE_V", 2);
+    const InternedCategory Logger::category::EVENTS("EVENTS", 3);
+    const InternedCategory Logger::category::CONFIG("CONFIG", 4);
+    const InternedCategory Logger::category::MEMORY("MEMORY", 5);
+    const InternedCategory Logger::category::APP("APP", 6);
+    const InternedCategory Logger::category::PLUGIN("PLUGIN", 7);
+    const InternedCategory Logger::category::PLAYER("PLAYER", 8);
+    const InternedCategory Logger::category::SHADER("SHADER", 9);
+    const InternedCategory Logger::category::DEPRECATION("DEPREC", 10);
+    const InternedCategory Logger::category::VIDEO("VIDEO", 11);
 
 namespace {
-    Logger* s_pLogger = 0;
+    boost::atomic<Logger*> s_pLogger(0);
     boost::mutex s_logMutex;
     boost::mutex s_traceMutex;
     boost::mutex s_sinkMutex;
     boost::mutex s_removeStdSinkMutex;
+
+    void flushOnExit()
+    {
+        Logger::get()->flush();
+    }
 }
 
 boost::mutex Logger::m_CategoryMutex;
 
 Logger * Logger::get()
 {
-    lock_guard lock(s_logMutex);
-    if (!s_pLogger) {
-        s_pLogger = new Logger;
+    Logger* pLogger = s_pLogger.load(boost::memory_order_acquire);
+    if (!pLogger) {
+        lock_guard lock(s_logMutex);
+        pLogger = s_pLogger.load(boost::memory_order_relaxed);
+        if (!pLogger) {
+            pLogger = new Logger;
+            s_pLogger.store(pLogger, boost::memory_order_release);
+            atexit(flushOnExit);
+        }
     }
-    return s_pLogger;
+    return pLogger;
 }
 
 Logger::Logger()
+    : m_pCategoryIDs(new CategoryIDMap)
 {
     m_Severity = severity::WARNING;
     string sEnvSeverity;
@@ -118,12 +132,21 @@ Logger::Logger()
     bool bEnvOmitStdErr = getEnv("AVG_LOG_OMIT_STDERR", sDummy);
     if (!bEnvOmitStdErr) {
         m_pStdSink = LogSinkPtr(new StandardLogSink);
+        string sAsyncPolicy;
+        if (getEnv("AVG_LOG_ASYNC", sAsyncPolicy)) {
+            m_pStdSink = LogSinkPtr(new AsyncLogSink(m_pStdSink, 4096,
+                    AsyncLogSink::stringToOverflowPolicy(sAsyncPolicy)));
+        }
         addLogSink(m_pStdSink);
     }
 }
 
 Logger::~Logger()
 {
+    delete m_pCategoryIDs.load();
+    for (unsigned i = 0; i < m_pOldCategoryIDs.size(); ++i) {
+        delete m_pOldCategoryIDs[i];
+    }
 }
 
 void Logger::addLogSink(const LogSinkPtr& logSink)
@@ -151,24 +174,62 @@ void Logger::removeStdLogSink()
     }
 }
 
+void Logger::flush()
+{
+    lock_guard lock(s_sinkMutex);
+    std::vector<LogSinkPtr>::const_iterator it;
+    for (it = m_pSinks.begin(); it != m_pSinks.end(); ++it) {
+        (*it)->flush();
+    }
+}
+
 category_t Logger::configureCategory(category_t category, severity_t severity)
 {
     lock_guard lock(m_CategoryMutex);
     severity = (severity == Logger::severity::NONE) ? m_Severity : severity;
     UTF8String sCategory = boost::to_upper_copy(string(category));
-    CatToSeverityMap::iterator it;
-    it = m_CategorySeverities.find(sCategory);
-    if ( it != m_CategorySeverities.end()) {
-        m_CategorySeverities.erase(sCategory);
+    const CategoryIDMap* pCategoryIDs = m_pCategoryIDs.load(boost::memory_order_relaxed);
+    CategoryIDMap::const_iterator it = pCategoryIDs->find(sCategory);
+    if (it != pCategoryIDs->end()) {
+        m_CategorySeverities[it->second].store(severity, boost::memory_order_relaxed);
+    } else {
+        unsigned id = m_CategoryNames.size();
+        if (id >= MAX_CATEGORIES) {
+            throw Exception(AVG_ERR_INVALID_ARGS, 
+                    "Too many log categories. Can't add " + sCategory + ".");
+        }
+        m_CategoryNames.push_back(sCategory);
+        m_CategorySeverities[id].store(severity, boost::memory_order_relaxed);
+        // Readers might still be using the old map, so it can't be deleted. 
+        CategoryIDMap* pNewCategoryIDs = new CategoryIDMap(*pCategoryIDs);
+        (*pNewCategoryIDs)[sCategory] = id;
+        m_pCategoryIDs.store(pNewCategoryIDs, boost::memory_order_release);
+        m_pOldCategoryIDs.push_back(pCategoryIDs);
     }
-    pair<const category_t, const severity_t> element(sCategory, severity);
-    m_CategorySeverities.insert(element);
     return sCategory;
 }
 
 CatToSeverityMap Logger::getCategories()
 {
-    return m_CategorySeverities;
+    lock_guard lock(m_CategoryMutex);
+    CatToSeverityMap categories;
+    for (unsigned i = 0; i < m_CategoryNames.size(); ++i) {
+        pair<const category_t, const severity_t> element(m_CategoryNames[i], 
+                m_CategorySeverities[i].load(boost::memory_order_relaxed));
+        categories.insert(element);
+    }
+    return categories;
+}
+
+unsigned Logger::getCategoryID(const category_t& category) const
+{
+    const CategoryIDMap* pCategoryIDs = m_pCategoryIDs.load(boost::memory_order_acquire);
+    CategoryIDMap::const_iterator it = pCategoryIDs->find(category);
+    if (it == pCategoryIDs->end()) {
+        string msg("Unknown category: " + category);
+        throw Exception(AVG_ERR_INVALID_ARGS, msg);
+    }
+    return it->second;
 }
 
 void Logger::trace(const UTF8String& sMsg, const category_t& category,
@@ -230,18 +291,16 @@ void Logger::log(const UTF8String& msg, const category_t& category,
 
 void Logger::setupCategory()
 {
-    configureCategory(category::NONE);
-    configureCategory(category::PROFILE);
-    configureCategory(category::PROFILE_VIDEO);
-    configureCategory(category::EVENTS);
-    configureCategory(category::CONFIG);
-    configureCategory(category::MEMORY);
-    configureCategory(category::APP);
-    configureCategory(category::PLUGIN);
-    configureCategory(category::PLAYER);
-    configureCategory(category::SHADER);
-    configureCategory(category::DEPRECATION);
-    configureCategory(category::VIDEO);
+    // The order determines the category ids, so it needs to match the ids of the
+    // category constants.
+    const InternedCategory* pCategories[] = {&category::NONE, &category::PROFILE,
+            &category::PROFILE_VIDEO, &category::EVENTS, &category::CONFIG,
+            &category::MEMORY, &category::APP, &category::PLUGIN, &category::PLAYER,
+            &category::SHADER, &category::DEPRECATION, &category::VIDEO};
+    for (unsigned i = 0; i < sizeof(pCategories)/sizeof(*pCategories); ++i) {
+        configureCategory(*pCategories[i]);
+        AVG_ASSERT(getCategoryID(*pCategories[i]) == pCategories[i]->getID());
+    }
 }
 
 severity_t Logger::stringToSeverity(const string& sSeverity)
@@ -31,6 +31,7 @@
 #include <boost/noncopyable.hpp>
 #include <boost/functional/hash.hpp>
 #include <boost/unordered_map.hpp>
+#include <boost/atomic.hpp>
 
 #include <string>
 #include <vector>
@@ -44,6 +45,25 @@ namespace avg {
 
 typedef boost::unordered_map< const category_t, const severity_t > CatToSeverityMap;
 
+// A built-in log category. Its id is fixed at compile time, so AVG_TRACE can check
+// whether to log without looking up the category.
+class AVG_API InternedCategory: public category_t
+{
+public:
+    InternedCategory(const char* pszName, unsigned id)
+        : category_t(pszName),
+          m_ID(id)
+    {}
+
+    unsigned getID() const
+    {
+        return m_ID;
+    }
+
+private:
+    unsigned m_ID;
+};
+
 #ifdef _WIN32
 // non dll-interface class used as base for dll-interface class
 #pragma warning(disable:4275) 
@@ -62,18 +82,18 @@ public:
 
     struct AVG_API category
     {
-        static const category_t NONE;
-        static const category_t PROFILE;
-        static const category_t PROFILE_VIDEO;
-        static const category_t EVENTS;
-        static const category_t CONFIG;
-        static const category_t MEMORY;
-        static const category_t APP;
-        static const category_t PLUGIN;
-        static const category_t PLAYER;
-        static const category_t SHADER;
-        static const category_t DEPRECATION;
-        static const category_t VIDEO;
+        static const InternedCategory NONE;
+        static const InternedCategory PROFILE;
+        static const InternedCategory PROFILE_VIDEO;
+        static const InternedCategory EVENTS;
+        static const InternedCategory CONFIG;
+        static const InternedCategory MEMORY;
+        static const InternedCategory APP;
+        static const InternedCategory PLUGIN;
+        static const InternedCategory PLAYER;
+        static const InternedCategory SHADER;
+        static const InternedCategory DEPRECATION;
+        static const InternedCategory VIDEO;
     };
 
     static Logger* get();
@@ -85,10 +105,12 @@ public:
     void addLogSink(const LogSinkPtr& logSink);
     void removeLogSink(const LogSinkPtr& logSink);
     void removeStdLogSink();
+    void flush();
 
     category_t configureCategory(category_t category,
             severity_t severity=severity::NONE);
     CatToSeverityMap getCategories();
+    unsigned getCategoryID(const category_t& category) const;
 
     void trace(const UTF8String& sMsg, const category_t& category,
             severity_t severity) const;
@@ -105,24 +127,35 @@ public:
     void log(const UTF8String& msg, const category_t& category=category::APP,
             severity_t severity=severity::INFO) const;
 
+    // shouldLog() doesn't lock: Categories are interned to indexes into an array of 
+    // atomic severities, and the category-to-index map is replaced (never changed)
+    // when a category is added. Built-in categories already carry their index.
     inline bool shouldLog(const category_t& category, severity_t severity) const {
-        lock_guard lock(m_CategoryMutex);
-        try {
-            severity_t targetSeverity = m_CategorySeverities.at(category);
-            return (targetSeverity <= severity);
-        } catch (out_of_range e){
-            string msg("Unknown category: " + category);
-            throw Exception(AVG_ERR_INVALID_ARGS, msg);
-        }
+        return shouldLog(getCategoryID(category), severity);
+    }
+
+    inline bool shouldLog(const InternedCategory& category, severity_t severity) const {
+        return shouldLog(category.getID(), severity);
+    }
+
+    inline bool shouldLog(unsigned categoryID, severity_t severity) const {
+        return m_CategorySeverities[categoryID].load(boost::memory_order_relaxed) 
+                <= severity;
     }
 
 private:
     Logger();
     void setupCategory();
 
+    static const unsigned MAX_CATEGORIES = 256;
+    typedef boost::unordered_map<category_t, unsigned> CategoryIDMap;
+
     std::vector<LogSinkPtr> m_pSinks;
     LogSinkPtr m_pStdSink;
-    CatToSeverityMap m_CategorySeverities;
+    boost::atomic<const CategoryIDMap*> m_pCategoryIDs;
+    std::vector<const CategoryIDMap*> m_pOldCategoryIDs;
+    std::vector<category_t> m_CategoryNames;
+    boost::atomic<severity_t> m_CategorySeverities[MAX_CATEGORIES];
     severity_t m_Severity;
     static boost::mutex m_CategoryMutex;
 };
@@ -0,0 +1,138 @@
+//
+//  libavg - Media Playback Engine.
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "TaskPool.h"
+
+#include "Exception.h"
+#include "ThreadHelper.h"
+
+#include <boost/bind.hpp>
+
+using namespace std;
+
+namespace avg {
+
+TaskPool::TaskPool(int numThreads)
+    : m_NumUnfinishedTasks(0),
+      m_bStop(false),
+      m_bFailed(false),
+      m_ErrorCode(0)
+{
+    AVG_ASSERT(numThreads >= 0);
+    for (int i = 0; i < numThreads; ++i) {
+        m_Threads.create_thread(boost::bind(&TaskPool::workerLoop, this));
+    }
+}
+
+TaskPool::~TaskPool()
+{
+    {
+        lock_guard lock(m_Mutex);
+        m_bStop = true;
+    }
+    m_TaskCond.notify_all();
+    m_Threads.join_all();
+}
+
+int TaskPool::getNumThreads() const
+{
+    return int(m_Threads.size());
+}
+
+void TaskPool::run(const vector<Task>& tasks)
+{
+    lock_guard runLock(m_RunMutex);
+    {
+        lock_guard lock(m_Mutex);
+        m_Tasks.insert(m_Tasks.end(), tasks.begin(), tasks.end());
+        m_NumUnfinishedTasks = int(tasks.size());
+        m_bFailed = false;
+    }
+    m_TaskCond.notify_all();
+
+    boost::unique_lock<boost::mutex> lock(m_Mutex);
+    while (!m_Tasks.empty()) {
+        Task task = m_Tasks.front();
+        m_Tasks.pop_front();
+        lock.unlock();
+        execute(task);
+        lock.lock();
+    }
+    while (m_NumUnfinishedTasks > 0) {
+        m_DoneCond.wait(lock);
+    }
+    if (m_bFailed) {
+        throw Exception(m_ErrorCode, m_sError);
+    }
+}
+
+void TaskPool::workerLoop()
+{
+    boost::unique_lock<boost::mutex> lock(m_Mutex);
+    while (true) {
+        while (m_Tasks.empty() && !m_bStop) {
+            m_TaskCond.wait(lock);
+        }
+        if (m_bStop) {
+            return;
+        }
+        Task task = m_Tasks.front();
+        m_Tasks.pop_front();
+        lock.unlock();
+        execute(task);
+        lock.lock();
+    }
+}
+
+void TaskPool::execute(const Task& task)
+{
+    bool bFailed = false;
+    int errorCode = 0;
+    string sError;
+    try {
+        task();
+    } catch (const Exception& e) {
+        bFailed = true;
+        errorCode = e.getCode();
+        sError = e.getStr();
+    } catch (const std::exception& e) {
+        bFailed = true;
+        errorCode = AVG_ERR_UNKNOWN;
+        sError = e.what();
+    }
+    bool bDone;
+    {
+        lock_guard lock(m_Mutex);
+        if (bFailed && !m_bFailed) {
+            m_bFailed = true;
+            m_ErrorCode = errorCode;
+            m_sError = sError;
+        }
+        m_NumUnfinishedTasks--;
+        bDone = (m_NumUnfinishedTasks == 0);
+    }
+    if (bDone) {
+        m_DoneCond.notify_all();
+    }
+}
+
+}
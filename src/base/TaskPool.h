@@ -0,0 +1,78 @@
+//
+//  libavg - Media Playback Engine.
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _TaskPool_H_
+#define _TaskPool_H_
+
+#include "../api.h"
+
+#include <boost/thread.hpp>
+#include <boost/function.hpp>
+#include <boost/shared_ptr.hpp>
+
+#include <string>
+#include <vector>
+#include <deque>
+
+namespace avg {
+
+// A fixed set of worker threads that stay alive for the lifetime of the pool, so 
+// per-frame work can be split across cores without starting threads every frame.
+class AVG_API TaskPool
+{
+public:
+    typedef boost::function<void ()> Task;
+
+    TaskPool(int numThreads);
+    virtual ~TaskPool();
+
+    int getNumThreads() const;
+    // Runs the tasks in parallel and returns when all of them are done. The calling
+    // thread executes tasks as well. If a task throws an Exception, it is rethrown
+    // here once all tasks have finished.
+    void run(const std::vector<Task>& tasks);
+
+private:
+    void workerLoop();
+    void execute(const Task& task);
+
+    boost::thread_group m_Threads;
+    std::deque<Task> m_Tasks;
+    int m_NumUnfinishedTasks;
+    bool m_bStop;
+    // The first error thrown by a task in the current run().
+    bool m_bFailed;
+    int m_ErrorCode;
+    std::string m_sError;
+
+    boost::mutex m_Mutex;
+    boost::condition_variable m_TaskCond;
+    boost::condition_variable m_DoneCond;
+    // Only one run() at a time.
+    boost::mutex m_RunMutex;
+};
+
+typedef boost::shared_ptr<TaskPool> TaskPoolPtr;
+
+}
+
+#endif
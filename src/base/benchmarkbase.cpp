@@ -0,0 +1,104 @@
+//
+//  libavg - Media Playback Engine.
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "Logger.h"
+#include "StringHelper.h"
+#include "TimeSource.h"
+
+#include <boost/thread/thread.hpp>
+#include <boost/bind.hpp>
+
+#include <iostream>
+#include <stdio.h>
+#include <stdlib.h>
+
+using namespace avg;
+using namespace std;
+
+template<class TEST>
+void runPerformanceTest(int numRuns=1)
+{
+    TEST PerfTest;
+    long long StartTime = TimeSource::get()->getCurrentMicrosecs();
+    for (int i = 0; i < numRuns; ++i) {
+        PerfTest.run();
+    }
+    float ActiveTime = (TimeSource::get()->getCurrentMicrosecs()-StartTime)/1000.; 
+    cerr << PerfTest.getName() << ": " << ActiveTime/numRuns << " ms" << endl;
+}
+
+class PerfTestBase {
+public:
+    PerfTestBase(string sName) 
+        : m_sName(sName)
+    {
+    }
+
+    std::string getName()
+    {
+        return m_sName;
+    }
+
+private:
+    std::string m_sName;
+};
+
+static const int NUM_TRACES = 1000000;
+
+// Runs numThreads threads that each emit NUM_TRACES traces that are filtered out.
+template<int numThreads>
+class FilteredTracePerfTest: public PerfTestBase {
+public:
+    FilteredTracePerfTest()
+        : PerfTestBase("FilteredTracePerfTest ("+toString(numThreads)+" threads, "
+                +toString(NUM_TRACES)+" traces each)")
+    {
+        Logger::get()->configureCategory(Logger::category::PROFILE_VIDEO, 
+                Logger::severity::WARNING);
+    }
+
+    void run()
+    {
+        boost::thread_group threads;
+        for (int i = 0; i < numThreads; ++i) {
+            threads.create_thread(&FilteredTracePerfTest::trace);
+        }
+        threads.join_all();
+    }
+
+private:
+    static void trace()
+    {
+        for (int i = 0; i < NUM_TRACES; ++i) {
+            AVG_TRACE(Logger::category::PROFILE_VIDEO, Logger::severity::DEBUG,
+                    "Filtered trace " << i);
+        }
+    }
+};
+
+int main(int nargs, char** args)
+{
+    runPerformanceTest<FilteredTracePerfTest<1> >();
+    runPerformanceTest<FilteredTracePerfTest<2> >();
+    runPerformanceTest<FilteredTracePerfTest<4> >();
+    runPerformanceTest<FilteredTracePerfTest<8> >();
+}
@@ -23,6 +23,7 @@
 #include "Queue.h"
 #include "Command.h"
 #include "WorkerThread.h"
+#include "TaskPool.h"
 #include "ObjectCounter.h"
 #include "Triangulate.h"
 #include "GLMHelper.h"
@@ -42,6 +43,7 @@
 #include "TimeSource.h"
 #include "XMLHelper.h"
 #include "Logger.h"
+#include "AsyncLogSink.h"
 
 #include <boost/thread/thread.hpp>
 
@@ -331,6 +333,68 @@ public:
 };
 
 
+class TaskPoolTest: public Test
+{
+public:
+    TaskPoolTest()
+        : Test("TaskPoolTest", 2)
+    {
+    }
+
+    void runTests() 
+    {
+        TaskPool pool(3);
+        TEST(pool.getNumThreads() == 3);
+        vector<int> results(16, 0);
+        // The same workers are used for every run.
+        for (int run = 1; run <= 3; ++run) {
+            vector<TaskPool::Task> tasks;
+            for (unsigned i = 0; i < results.size(); ++i) {
+                tasks.push_back(boost::bind(&TaskPoolTest::setResult, &results, i, 
+                        run*int(i)));
+            }
+            pool.run(tasks);
+            bool bAllSet = true;
+            for (unsigned i = 0; i < results.size(); ++i) {
+                bAllSet = bAllSet && results[i] == run*int(i);
+            }
+            TEST(bAllSet);
+        }
+
+        vector<TaskPool::Task> tasks;
+        tasks.push_back(boost::bind(&TaskPoolTest::setResult, &results, 0, 1));
+        tasks.push_back(&TaskPoolTest::fail);
+        bool bExceptionThrown = false;
+        try {
+            pool.run(tasks);
+        } catch (const Exception& e) {
+            bExceptionThrown = true;
+            TEST(e.getCode() == AVG_ERR_INVALID_ARGS);
+        }
+        TEST(bExceptionThrown);
+        TEST(results[0] == 1);
+
+        // A pool without threads runs everything in the calling thread.
+        TaskPool emptyPool(0);
+        tasks.clear();
+        tasks.push_back(boost::bind(&TaskPoolTest::setResult, &results, 1, 42));
+        emptyPool.run(tasks);
+        TEST(results[1] == 42);
+    }
+
+private:
+    static void setResult(vector<int>* pResults, int i, int value)
+    {
+        (*pResults)[i] = value;
+    }
+
+    static void fail()
+    {
+        throw Exception(AVG_ERR_INVALID_ARGS, "TaskPoolTest");
+    }
+};
+
+
 class DummyClass
 {
 public:
@@ -433,6 +497,35 @@ public:
             glm::vec2 v2(glm::vec2(1,0));
             TEST(getLineLineIntersection(p1, v1, p2, v2) == glm::vec2(1,1));
         }
+        {
+            vector<glm::vec2> pts;
+            pts.push_back(glm::vec2(0,0));
+            pts.push_back(glm::vec2(0,1));
+            pts.push_back(glm::vec2(10,0));
+            pts.push_back(glm::vec2(10,2));
+            pts.push_back(glm::vec2(1,0));
+            vector<int> cluster0;
+            vector<int> cluster1;
+            calcKMeans(pts, cluster0, cluster1);
+            TEST(cluster0.size() == 3 && cluster0[2] == 4);
+            TEST(cluster1.size() == 2 && cluster1[0] == 2);
+            TEST(almostEqual(getCentroid(pts, cluster1), glm::vec2(10,1)));
+            cluster1.push_back(5);
+            bool bExceptionThrown = false;
+            try {
+                getCentroid(pts, cluster1);
+            } catch (const Exception&) {
+                bExceptionThrown = true;
+            }
+            TEST(bExceptionThrown);
+            bExceptionThrown = false;
+            try {
+                getCentroid(pts, vector<int>());
+            } catch (const Exception&) {
+                bExceptionThrown = true;
+            }
+            TEST(bExceptionThrown);
+        }
         TEST(almostEqual(getRotatedPivot(glm::vec2(10,0), M_PI, glm::vec2(15,5)), 
                 glm::vec2(20,10)));
         TEST(almostEqual(getRotatedPivot(glm::vec2(10,0), M_PI*0.5, glm::vec2(15,5)),
@@ -948,6 +1041,178 @@ public:
                 TEST(buffer.str().find(msg_critical) != string::npos);
             buffer.str(string());
         }
+        {
+            category_t CUSTOM_CAT = logger->configureCategory("CUSTOM_CAT 2",
+                    Logger::severity::INFO);
+            unsigned id = logger->getCategoryID(CUSTOM_CAT);
+            TEST(logger->shouldLog(id, Logger::severity::INFO));
+            logger->configureCategory("custom_cat 2", Logger::severity::ERROR);
+            TEST(logger->getCategoryID(CUSTOM_CAT) == id);
+            TEST(!logger->shouldLog(id, Logger::severity::INFO));
+            TEST(!logger->shouldLog(CUSTOM_CAT, Logger::severity::WARNING));
+            TEST(logger->getCategories()[CUSTOM_CAT] == Logger::severity::ERROR);
+            bool bExceptionThrown = false;
+            try {
+                logger->getCategoryID("UNKNOWN_CAT");
+            } catch (Exception&) {
+                bExceptionThrown = true;
+            }
+            TEST(bExceptionThrown);
+        }
+    }
+};
+
+// Collects messages. While closed, logMessage() blocks, simulating a slow sink.
+class GatedLogSink: public ILogSink
+{
+public:
+    GatedLogSink()
+        : m_bOpen(true),
+          m_bEntered(false)
+    {
+    }
+
+    virtual void logMessage(const tm* pTime, unsigned millis, 
+            const category_t& category, severity_t severity, const UTF8String& sMsg)
+    {
+        boost::mutex::scoped_lock lock(m_Mutex);
+        m_bEntered = true;
+        m_Cond.notify_all();
+        while (!m_bOpen) {
+            m_Cond.wait(lock);
+        }
+        m_sMsgs.push_back(sMsg);
+    }
+
+    void close()
+    {
+        boost::mutex::scoped_lock lock(m_Mutex);
+        m_bOpen = false;
+        m_bEntered = false;
+    }
+
+    void open()
+    {
+        boost::mutex::scoped_lock lock(m_Mutex);
+        m_bOpen = true;
+        m_Cond.notify_all();
+    }
+
+    void waitUntilEntered()
+    {
+        boost::mutex::scoped_lock lock(m_Mutex);
+        while (!m_bEntered) {
+            m_Cond.wait(lock);
+        }
+    }
+
+    vector<string> getMsgs()
+    {
+        boost::mutex::scoped_lock lock(m_Mutex);
+        return m_sMsgs;
+    }
+
+private:
+    boost::mutex m_Mutex;
+    boost::condition m_Cond;
+    bool m_bOpen;
+    bool m_bEntered;
+    vector<string> m_sMsgs;
+};
+
+typedef boost::shared_ptr<GatedLogSink> GatedLogSinkPtr;
+
+class AsyncLogSinkTest: public Test
+{
+public:
+    AsyncLogSinkTest()
+      : Test("AsyncLogSinkTest", 2)
+    {
+    }
+
+    void runTests()
+    {
+        {
+            // Everything logged reaches the wrapped sink, in order.
+            GatedLogSinkPtr pGatedSink(new GatedLogSink);
+            AsyncLogSinkPtr pSink(new AsyncLogSink(pGatedSink, 16, AsyncLogSink::BLOCK));
+            logMsgs(pSink, 0, 100);
+            pSink->flush();
+            vector<string> sMsgs = pGatedSink->getMsgs();
+            TEST(sMsgs.size() == 100);
+            TEST(sMsgs[0] == "0" && sMsgs[99] == "99");
+            TEST(pSink->getNumDropped() == 0);
+        }
+        {
+            // Destroying the sink writes pending messages.
+            GatedLogSinkPtr pGatedSink(new GatedLogSink);
+            {
+                AsyncLogSink sink(pGatedSink, 1000);
+                pGatedSink->close();
+                for (int i = 0; i < 100; ++i) {
+                    logMsg(&sink, i);
+                }
+                pGatedSink->open();
+            }
+            TEST(pGatedSink->getMsgs().size() == 100);
+        }
+        {
+            vector<string> sMsgs = runOverflow(AsyncLogSink::DROP_OLDEST);
+            TEST(sMsgs.size() == 6);
+            TEST(sMsgs[0] == "0");
+            TEST(sMsgs[1].find("6 messages dropped") != string::npos);
+            TEST(sMsgs[2] == "7" && sMsgs[5] == "10");
+        }
+        {
+            vector<string> sMsgs = runOverflow(AsyncLogSink::DROP_NEWEST);
+            TEST(sMsgs.size() == 6);
+            TEST(sMsgs[1].find("6 messages dropped") != string::npos);
+            TEST(sMsgs[2] == "1" && sMsgs[5] == "4");
+        }
+        {
+            vector<string> sMsgs = runOverflow(AsyncLogSink::BLOCK);
+            TEST(sMsgs.size() == 11);
+            TEST(sMsgs[1] == "1" && sMsgs[10] == "10");
+        }
+        TEST(AsyncLogSink::stringToOverflowPolicy("block") == AsyncLogSink::BLOCK);
+        TEST(AsyncLogSink::stringToOverflowPolicy("") == AsyncLogSink::DROP_OLDEST);
+    }
+
+private:
+    // Logs one message that the writer thread gets stuck on and ten more that need to
+    // go into a buffer with capacity 4.
+    vector<string> runOverflow(AsyncLogSink::OverflowPolicy policy)
+    {
+        GatedLogSinkPtr pGatedSink(new GatedLogSink);
+        AsyncLogSinkPtr pSink(new AsyncLogSink(pGatedSink, 4, policy));
+        pGatedSink->close();
+        logMsg(pSink.get(), 0);
+        pGatedSink->waitUntilEntered();
+        boost::thread producer(boost::bind(&AsyncLogSinkTest::logMsgs, pSink, 1, 11));
+        if (policy == AsyncLogSink::BLOCK) {
+            pGatedSink->open();
+            producer.join();
+        } else {
+            producer.join();
+            TEST(pSink->getNumDropped() == 6);
+            pGatedSink->open();
+        }
+        pSink->flush();
+        return pGatedSink->getMsgs();
+    }
+
+    static void logMsgs(AsyncLogSinkPtr pSink, int start, int end)
+    {
+        for (int i = start; i < end; ++i) {
+            logMsg(pSink.get(), i);
+        }
+    }
+
+    static void logMsg(ILogSink* pSink, int i)
+    {
+        time_t now = time(0);
+        pSink->logMessage(localtime(&now), 0, Logger::category::APP, 
+                Logger::severity::INFO, toString(i));
     }
 };
 
@@ -960,6 +1225,7 @@ public:
         addTest(TestPtr(new DAGTest));
         addTest(TestPtr(new QueueTest));
         addTest(TestPtr(new WorkerThreadTest));
+        addTest(TestPtr(new TaskPoolTest));
         addTest(TestPtr(new ObjectCounterTest));
         addTest(TestPtr(new GeomTest));
         addTest(TestPtr(new TriangleTest));
@@ -972,6 +1238,7 @@ public:
         addTest(TestPtr(new BacktraceTest));
         addTest(TestPtr(new XmlParserTest));
         addTest(TestPtr(new StandardLoggerTest));
+        addTest(TestPtr(new AsyncLogSinkTest));
     }
 };
 
@@ -0,0 +1,416 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "BitmapDiskCache.h"
+#include "BitmapLoader.h"
+
+#include "../base/Exception.h"
+#include "../base/Logger.h"
+#include "../base/FileHelper.h"
+#include "../base/Directory.h"
+#include "../base/ThreadHelper.h"
+
+#include <boost/thread/thread.hpp>
+
+#include <sys/types.h>
+#include <sys/stat.h>
+#ifdef _WIN32
+#include <sys/utime.h>
+#else
+#include <sys/mman.h>
+#include <utime.h>
+#include <unistd.h>
+#endif
+#include <stdio.h>
+#include <string.h>
+
+#include <sstream>
+#include <vector>
+#include <algorithm>
+
+using namespace std;
+
+namespace avg {
+
+namespace {
+
+const char CACHE_MAGIC[8] = {'A', 'V', 'G', 'B', 'M', 'P', 'C', '1'};
+const string CACHE_EXTENSION = ".avgbmp";
+// Pixel data starts at a multiple of this offset.
+const int DATA_ALIGNMENT = 64;
+
+struct CacheFileHeader {
+    char m_Magic[8];
+    int m_DataOffset;
+    int m_Width;
+    int m_Height;
+    int m_Stride;
+    int m_PF;
+    int m_KeyLen;
+};
+
+#ifndef _WIN32
+// Bitmap that points into a memory-mapped cache file. The mapping is private, so 
+// changes to the pixels don't end up in the file.
+class MappedBitmap: public Bitmap
+{
+public:
+    MappedBitmap(const IntPoint& size, PixelFormat pf, unsigned char* pBits, 
+            int stride, const UTF8String& sName, void* pMapping, size_t mappingSize)
+        : Bitmap(size, pf, pBits, stride, false, sName),
+          m_pMapping(pMapping),
+          m_MappingSize(mappingSize)
+    {
+    }
+
+    virtual ~MappedBitmap()
+    {
+        munmap(m_pMapping, m_MappingSize);
+    }
+
+private:
+    void* m_pMapping;
+    size_t m_MappingSize;
+};
+#endif
+
+}
+
+BitmapDiskCache::BitmapDiskCache(const string& sDir, long long maxSize)
+    : m_sDir(sDir),
+      m_MaxSize(maxSize),
+      m_Size(0),
+      m_UseCounter(0)
+{
+    scanDir();
+    AVG_TRACE(Logger::category::CONFIG, Logger::severity::INFO,
+            "Bitmap disk cache: " << m_sDir << ", " << m_Entries.size() << " files, " 
+            << m_Size/(1024*1024) << " of " << m_MaxSize/(1024*1024) << " MB used.");
+}
+
+BitmapDiskCache::~BitmapDiskCache()
+{
+}
+
+BitmapPtr BitmapDiskCache::load(const UTF8String& sFName, PixelFormat pf, 
+        bool bBlueFirst)
+{
+    string sKey;
+    if (!getKey(sFName, pf, bBlueFirst, sKey)) {
+        return BitmapPtr();
+    }
+    string sCacheFName = getCacheFilename(sKey);
+    {
+        lock_guard lock(m_Mutex);
+        if (m_Entries.find(sCacheFName) == m_Entries.end()) {
+            return BitmapPtr();
+        }
+    }
+    BitmapPtr pBmp = loadCacheFile(sCacheFName, sKey, sFName);
+    lock_guard lock(m_Mutex);
+    if (pBmp) {
+        touchEntry(sCacheFName);
+    } else {
+        // Damaged file or hash collision.
+        ::unlink((m_sDir+"/"+sCacheFName).c_str());
+        removeEntry(sCacheFName);
+    }
+    return pBmp;
+}
+
+void BitmapDiskCache::store(const UTF8String& sFName, PixelFormat pf, 
+        bool bBlueFirst, BitmapPtr pBmp)
+{
+    string sKey;
+    if (!getKey(sFName, pf, bBlueFirst, sKey)) {
+        return;
+    }
+    string sCacheFName = getCacheFilename(sKey);
+    string sPath = m_sDir+"/"+sCacheFName;
+    stringstream ss;
+    ss << sPath << ".tmp" << boost::this_thread::get_id();
+    string sTempPath = ss.str();
+
+    CacheFileHeader header;
+    memcpy(header.m_Magic, CACHE_MAGIC, sizeof(CACHE_MAGIC));
+    int headerSize = int(sizeof(header) + sKey.size());
+    header.m_DataOffset = (headerSize+DATA_ALIGNMENT-1)/DATA_ALIGNMENT*DATA_ALIGNMENT;
+    header.m_Width = pBmp->getSize().x;
+    header.m_Height = pBmp->getSize().y;
+    // Keep the stride so cached bitmaps have the same memory layout as decoded ones.
+    header.m_Stride = pBmp->getStride();
+    header.m_PF = pBmp->getPixelFormat();
+    header.m_KeyLen = int(sKey.size());
+
+    FILE* pFile = fopen(sTempPath.c_str(), "wb");
+    if (!pFile) {
+        AVG_LOG_WARNING("Can't write bitmap disk cache file " << sTempPath << ".");
+        return;
+    }
+    bool bOk = fwrite(&header, sizeof(header), 1, pFile) == 1;
+    bOk = bOk && fwrite(sKey.c_str(), 1, sKey.size(), pFile) == sKey.size();
+    vector<char> padding(header.m_DataOffset-headerSize, 0);
+    if (!padding.empty()) {
+        bOk = bOk && fwrite(&padding[0], 1, padding.size(), pFile) == padding.size();
+    }
+    size_t dataSize = size_t(header.m_Height)*header.m_Stride;
+    bOk = bOk && fwrite(pBmp->getPixels(), 1, dataSize, pFile) == dataSize;
+    bOk = (fclose(pFile) == 0) && bOk;
+#ifdef _WIN32
+    if (bOk) {
+        ::_unlink(sPath.c_str());
+    }
+#endif
+    bOk = bOk && (rename(sTempPath.c_str(), sPath.c_str()) == 0);
+    if (!bOk) {
+        AVG_LOG_WARNING("Can't write bitmap disk cache file " << sPath << ".");
+        ::unlink(sTempPath.c_str());
+        return;
+    }
+    lock_guard lock(m_Mutex);
+    addEntry(sCacheFName, header.m_DataOffset + 
+            (long long)(header.m_Height)*header.m_Stride);
+    evict();
+}
+
+bool BitmapDiskCache::prewarm(const UTF8String& sFName, PixelFormat pf)
+{
+    BitmapLoader* pLoader = BitmapLoader::get();
+    string sKey;
+    if (!getKey(sFName, pf, pLoader->isBlueFirst(), sKey)) {
+        throw Exception(AVG_ERR_FILEIO, "Can't open '"+sFName+"'.");
+    }
+    {
+        lock_guard lock(m_Mutex);
+        if (m_Entries.find(getCacheFilename(sKey)) != m_Entries.end()) {
+            return false;
+        }
+    }
+    BitmapPtr pBmp = pLoader->load(sFName, pf, false);
+    store(sFName, pf, pLoader->isBlueFirst(), pBmp);
+    return true;
+}
+
+const string& BitmapDiskCache::getDir() const
+{
+    return m_sDir;
+}
+
+void BitmapDiskCache::setMaxSize(long long maxSize)
+{
+    lock_guard lock(m_Mutex);
+    m_MaxSize = maxSize;
+    evict();
+}
+
+long long BitmapDiskCache::getMaxSize() const
+{
+    lock_guard lock(m_Mutex);
+    return m_MaxSize;
+}
+
+long long BitmapDiskCache::getSize() const
+{
+    lock_guard lock(m_Mutex);
+    return m_Size;
+}
+
+int BitmapDiskCache::getNumFiles() const
+{
+    lock_guard lock(m_Mutex);
+    return int(m_Entries.size());
+}
+
+void BitmapDiskCache::clear()
+{
+    lock_guard lock(m_Mutex);
+    for (EntryMap::iterator it = m_Entries.begin(); it != m_Entries.end(); ++it) {
+        ::unlink((m_sDir+"/"+it->first).c_str());
+    }
+    m_Entries.clear();
+    m_UseOrder.clear();
+    m_Size = 0;
+}
+
+bool BitmapDiskCache::getKey(const UTF8String& sFName, PixelFormat pf, 
+        bool bBlueFirst, string& sKey) const
+{
+    struct stat fileStat;
+    if (stat(sFName.c_str(), &fileStat) != 0) {
+        return false;
+    }
+    string sPath = sFName;
+    if (!isAbsPath(sPath)) {
+        sPath = getCWD()+sPath;
+    }
+    stringstream ss;
+    ss << sPath << "|" << (long long)(fileStat.st_mtime) << "|" 
+            << (long long)(fileStat.st_size) << "|" << getPixelFormatString(pf) << "|"
+            << (bBlueFirst ? "bgr" : "rgb");
+    sKey = ss.str();
+    return true;
+}
+
+string BitmapDiskCache::getCacheFilename(const string& sKey) const
+{
+    // 64-bit FNV-1a. Collisions are detected by comparing the key stored in the file.
+    unsigned long long hash = 14695981039346656037ULL;
+    for (unsigned i = 0; i < sKey.size(); ++i) {
+        hash ^= (unsigned char)(sKey[i]);
+        hash *= 1099511628211ULL;
+    }
+    char szHash[17];
+    sprintf(szHash, "%016llx", hash);
+    return string(szHash)+CACHE_EXTENSION;
+}
+
+BitmapPtr BitmapDiskCache::loadCacheFile(const string& sCacheFName, 
+        const string& sKey, const UTF8String& sFName)
+{
+    string sPath = m_sDir+"/"+sCacheFName;
+    FILE* pFile = fopen(sPath.c_str(), "rb");
+    if (!pFile) {
+        return BitmapPtr();
+    }
+    CacheFileHeader header;
+    bool bOk = fread(&header, sizeof(header), 1, pFile) == 1 &&
+            memcmp(header.m_Magic, CACHE_MAGIC, sizeof(CACHE_MAGIC)) == 0 &&
+            header.m_KeyLen == int(sKey.size()) &&
+            header.m_DataOffset >= int(sizeof(header)) + header.m_KeyLen &&
+            header.m_PF >= 0 && header.m_PF < NO_PIXELFORMAT &&
+            header.m_Width > 0 && header.m_Height > 0 &&
+            header.m_Stride >= header.m_Width*getBytesPerPixel(PixelFormat(header.m_PF));
+    if (bOk) {
+        vector<char> key(header.m_KeyLen);
+        bOk = fread(&key[0], 1, key.size(), pFile) == key.size() &&
+                string(key.begin(), key.end()) == sKey;
+    }
+    long long fileSize = header.m_DataOffset + 
+            (long long)(header.m_Height)*header.m_Stride;
+    struct stat fileStat;
+    bOk = bOk && fstat(fileno(pFile), &fileStat) == 0 && fileStat.st_size == fileSize;
+    if (!bOk) {
+        fclose(pFile);
+        return BitmapPtr();
+    }
+
+    IntPoint size(header.m_Width, header.m_Height);
+    PixelFormat pf = PixelFormat(header.m_PF);
+    BitmapPtr pBmp;
+#ifdef _WIN32
+    pBmp = BitmapPtr(new Bitmap(size, pf, sFName, header.m_Stride));
+    fseek(pFile, header.m_DataOffset, SEEK_SET);
+    size_t dataSize = size_t(header.m_Height)*header.m_Stride;
+    if (fread(pBmp->getPixels(), 1, dataSize, pFile) != dataSize) {
+        pBmp = BitmapPtr();
+    }
+#else
+    void* pMapping = mmap(0, size_t(fileSize), PROT_READ | PROT_WRITE, MAP_PRIVATE,
+            fileno(pFile), 0);
+    if (pMapping != MAP_FAILED) {
+        unsigned char* pBits = (unsigned char*)pMapping + header.m_DataOffset;
+        pBmp = BitmapPtr(new MappedBitmap(size, pf, pBits, header.m_Stride, sFName,
+                pMapping, size_t(fileSize)));
+    }
+#endif
+    fclose(pFile);
+    return pBmp;
+}
+
+void BitmapDiskCache::scanDir()
+{
+    Directory dir(m_sDir);
+    if (dir.open(true) != 0) {
+        throw Exception(AVG_ERR_FILEIO, 
+                "Can't open bitmap disk cache directory '"+m_sDir+"'.");
+    }
+    // (modification time, (filename, size))
+    vector<pair<long long, pair<string, long long> > > files;
+    DirEntryPtr pEntry;
+    while ((pEntry = dir.getNextEntry())) {
+        string sName = pEntry->getName();
+        if (sName.find(CACHE_EXTENSION+".tmp") != string::npos) {
+            // Left over from an interrupted store().
+            pEntry->remove();
+        } else if (sName.size() > CACHE_EXTENSION.size() &&
+                sName.compare(sName.size()-CACHE_EXTENSION.size(), 
+                        CACHE_EXTENSION.size(), CACHE_EXTENSION) == 0)
+        {
+            struct stat fileStat;
+            if (stat((m_sDir+"/"+sName).c_str(), &fileStat) == 0) {
+                files.push_back(make_pair((long long)(fileStat.st_mtime), 
+                        make_pair(sName, (long long)(fileStat.st_size))));
+            }
+        }
+    }
+    sort(files.begin(), files.end());
+    for (unsigned i = 0; i < files.size(); ++i) {
+        addEntry(files[i].second.first, files[i].second.second);
+    }
+    evict();
+}
+
+void BitmapDiskCache::addEntry(const string& sCacheFName, long long size)
+{
+    removeEntry(sCacheFName);
+    Entry entry;
+    entry.m_Size = size;
+    entry.m_LastUse = m_UseCounter++;
+    m_Entries[sCacheFName] = entry;
+    m_UseOrder.insert(make_pair(entry.m_LastUse, sCacheFName));
+    m_Size += size;
+}
+
+void BitmapDiskCache::touchEntry(const string& sCacheFName)
+{
+    EntryMap::iterator it = m_Entries.find(sCacheFName);
+    if (it == m_Entries.end()) {
+        return;
+    }
+    m_UseOrder.erase(make_pair(it->second.m_LastUse, sCacheFName));
+    it->second.m_LastUse = m_UseCounter++;
+    m_UseOrder.insert(make_pair(it->second.m_LastUse, sCacheFName));
+    // The modification time preserves the usage order across runs.
+    utime((m_sDir+"/"+sCacheFName).c_str(), 0);
+}
+
+void BitmapDiskCache::removeEntry(const string& sCacheFName)
+{
+    EntryMap::iterator it = m_Entries.find(sCacheFName);
+    if (it != m_Entries.end()) {
+        m_UseOrder.erase(make_pair(it->second.m_LastUse, sCacheFName));
+        m_Size -= it->second.m_Size;
+        m_Entries.erase(it);
+    }
+}
+
+void BitmapDiskCache::evict()
+{
+    while (m_Size > m_MaxSize && !m_UseOrder.empty()) {
+        string sCacheFName = m_UseOrder.begin()->second;
+        // Bitmaps that still use the file keep their mapping.
+        ::unlink((m_sDir+"/"+sCacheFName).c_str());
+        removeEntry(sCacheFName);
+    }
+}
+
+}
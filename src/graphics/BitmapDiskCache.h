@@ -0,0 +1,103 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _BitmapDiskCache_H_
+#define _BitmapDiskCache_H_
+
+#include "../api.h"
+
+#include "Bitmap.h"
+#include "PixelFormat.h"
+
+#include "../base/UTF8String.h"
+
+#include <boost/shared_ptr.hpp>
+#include <boost/thread/mutex.hpp>
+
+#include <string>
+#include <map>
+#include <set>
+#include <utility>
+
+namespace avg {
+
+// On-disk cache of decoded and converted bitmaps. Entries are keyed by the source 
+// file's path, modification time and size as well as the requested pixel format, so
+// changed source files are never served from the cache. On posix systems, cached 
+// bitmaps are memory-mapped and returned without copying the pixels. When the total 
+// size of the cache exceeds maxSize, the least recently used entries are deleted.
+class AVG_API BitmapDiskCache
+{
+public:
+    BitmapDiskCache(const std::string& sDir, long long maxSize);
+    virtual ~BitmapDiskCache();
+
+    // Returns an empty pointer if the bitmap is not in the cache.
+    BitmapPtr load(const UTF8String& sFName, PixelFormat pf, bool bBlueFirst);
+    void store(const UTF8String& sFName, PixelFormat pf, bool bBlueFirst, 
+            BitmapPtr pBmp);
+    // Decodes the file and adds it to the cache if it isn't there already. Returns
+    // false if it was cached already.
+    bool prewarm(const UTF8String& sFName, PixelFormat pf=NO_PIXELFORMAT);
+
+    const std::string& getDir() const;
+    void setMaxSize(long long maxSize);
+    long long getMaxSize() const;
+    long long getSize() const;
+    int getNumFiles() const;
+    void clear();
+
+private:
+    bool getKey(const UTF8String& sFName, PixelFormat pf, bool bBlueFirst, 
+            std::string& sKey) const;
+    std::string getCacheFilename(const std::string& sKey) const;
+    BitmapPtr loadCacheFile(const std::string& sCacheFName, const std::string& sKey, 
+            const UTF8String& sFName);
+    void scanDir();
+    void addEntry(const std::string& sCacheFName, long long size);
+    void touchEntry(const std::string& sCacheFName);
+    void removeEntry(const std::string& sCacheFName);
+    void evict();
+
+    struct Entry {
+        long long m_Size;
+        long long m_LastUse;
+    };
+    typedef std::map<std::string, Entry> EntryMap;
+    // (last use, cache filename)
+    typedef std::set<std::pair<long long, std::string> > UseSet;
+
+    std::string m_sDir;
+    long long m_MaxSize;
+    long long m_Size;
+    long long m_UseCounter;
+    EntryMap m_Entries;
+    UseSet m_UseOrder;
+    mutable boost::mutex m_Mutex;
+};
+
+typedef boost::shared_ptr<BitmapDiskCache> BitmapDiskCachePtr;
+
+}
+
+#endif
+
@@ -36,6 +36,7 @@ using namespace boost;
 namespace avg {
 
 BitmapLoader * BitmapLoader::s_pBitmapLoader = 0;
+BitmapDiskCachePtr BitmapLoader::s_pDiskCache;
     
 void BitmapLoader::init(bool bBlueFirst) 
 {
@@ -86,13 +87,46 @@ PixelFormat BitmapLoader::getDefaultPixelFormat(bool bAlpha)
     } 
 }
 
+void BitmapLoader::setDiskCache(BitmapDiskCachePtr pDiskCache)
+{
+    s_pDiskCache = pDiskCache;
+}
+
+BitmapDiskCachePtr BitmapLoader::getDiskCache()
+{
+    return s_pDiskCache;
+}
+
+static ProfilingZoneID DiskCacheProfilingZone("Bitmap disk cache", true);
 static ProfilingZoneID GDKPixbufProfilingZone("gdk_pixbuf load", true);
 static ProfilingZoneID ConvertProfilingZone("Format conversion", true);
 static ProfilingZoneID RGBFlipProfilingZone("RGB<->BGR flip", true);
 
-BitmapPtr BitmapLoader::load(const UTF8String& sFName, PixelFormat pf) const
+BitmapPtr BitmapLoader::load(const UTF8String& sFName, PixelFormat pf, 
+        bool bUseDiskCache) const
 {
     AVG_ASSERT(s_pBitmapLoader != 0);
+    BitmapDiskCachePtr pDiskCache;
+    if (bUseDiskCache) {
+        pDiskCache = s_pDiskCache;
+    }
+    if (pDiskCache) {
+        ScopeTimer timer(DiskCacheProfilingZone);
+        BitmapPtr pBmp = pDiskCache->load(sFName, pf, m_bBlueFirst);
+        if (pBmp) {
+            return pBmp;
+        }
+    }
+    BitmapPtr pBmp = decode(sFName, pf);
+    if (pDiskCache) {
+        ScopeTimer timer(DiskCacheProfilingZone);
+        pDiskCache->store(sFName, pf, m_bBlueFirst, pBmp);
+    }
+    return pBmp;
+}
+
+BitmapPtr BitmapLoader::decode(const UTF8String& sFName, PixelFormat pf) const
+{
     GError* pError = 0;
     GdkPixbuf* pPixBuf;
     {
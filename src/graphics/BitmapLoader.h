@@ -27,6 +27,7 @@
 
 #include "Bitmap.h"
 #include "PixelFormat.h"
+#include "BitmapDiskCache.h"
 
 #include <string>
 
@@ -38,14 +39,22 @@ public:
     static BitmapLoader* get();
     bool isBlueFirst() const;
     PixelFormat getDefaultPixelFormat(bool bAlpha);
-    BitmapPtr load(const UTF8String& sFName, PixelFormat pf=NO_PIXELFORMAT) const;
+    BitmapPtr load(const UTF8String& sFName, PixelFormat pf=NO_PIXELFORMAT,
+            bool bUseDiskCache=true) const;
+
+    // Bitmaps are loaded from and stored in the disk cache if one is set.
+    static void setDiskCache(BitmapDiskCachePtr pDiskCache);
+    static BitmapDiskCachePtr getDiskCache();
 
 private:
     BitmapLoader(bool bBlueFirst);
     virtual ~BitmapLoader();
 
+    BitmapPtr decode(const UTF8String& sFName, PixelFormat pf) const;
+
     bool m_bBlueFirst;
     static BitmapLoader * s_pBitmapLoader;
+    static BitmapDiskCachePtr s_pDiskCache;
 };
 
 BitmapPtr AVG_API loadBitmap(const UTF8String& sFName, PixelFormat pf=NO_PIXELFORMAT);
@@ -0,0 +1,249 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "BitmapPool.h"
+
+#include "../base/Exception.h"
+#include "../base/ThreadHelper.h"
+
+using namespace std;
+
+namespace avg {
+
+// Default idle memory cap of the shared pool: a few frames each for a dozen 1080p 
+// videos.
+const long long DEFAULT_MAX_MEM = 256*1024*1024;
+
+BitmapPoolPtr BitmapPool::s_pPool;
+boost::mutex BitmapPool::s_PoolMutex;
+
+// Deleter for pooled bitmaps. Holds a weak reference so bitmaps that outlive their 
+// pool are simply deleted.
+class PooledBitmapDeleter
+{
+public:
+    PooledBitmapDeleter(const boost::weak_ptr<BitmapPool>& pPool)
+        : m_pPool(pPool)
+    {
+    }
+
+    void operator()(Bitmap* pBmp)
+    {
+        BitmapPoolPtr pPool = m_pPool.lock();
+        if (pPool) {
+            pPool->returnBitmap(pBmp);
+        } else {
+            delete pBmp;
+        }
+    }
+
+private:
+    boost::weak_ptr<BitmapPool> m_pPool;
+};
+
+BitmapPool::Stats::Stats()
+    : m_NumHits(0),
+      m_NumMisses(0),
+      m_NumEvictions(0)
+{
+}
+
+BitmapPool::Key::Key(const IntPoint& size, PixelFormat pf)
+    : m_Size(size),
+      m_PF(pf)
+{
+}
+
+bool BitmapPool::Key::operator <(const Key& other) const
+{
+    if (m_Size.x != other.m_Size.x) {
+        return m_Size.x < other.m_Size.x;
+    }
+    if (m_Size.y != other.m_Size.y) {
+        return m_Size.y < other.m_Size.y;
+    }
+    return m_PF < other.m_PF;
+}
+
+BitmapPool::Entry::Entry()
+    : m_LastUse(0)
+{
+}
+
+BitmapPoolPtr BitmapPool::get()
+{
+    lock_guard lock(s_PoolMutex);
+    if (!s_pPool) {
+        s_pPool = BitmapPoolPtr(new BitmapPool(DEFAULT_MAX_MEM));
+    }
+    return s_pPool;
+}
+
+BitmapPool::BitmapPool(long long maxMem)
+    : m_MaxMem(maxMem),
+      m_MemUsed(0),
+      m_MemInUse(0),
+      m_NumBitmaps(0),
+      m_UseCounter(0)
+{
+}
+
+BitmapPool::~BitmapPool()
+{
+    deleteBitmaps();
+}
+
+BitmapPtr BitmapPool::getBitmap(const IntPoint& size, PixelFormat pf)
+{
+    Bitmap* pBmp = 0;
+    {
+        lock_guard lock(m_Mutex);
+        EntryMap::iterator it = m_Entries.find(Key(size, pf));
+        if (it != m_Entries.end() && !it->second.m_pBmps.empty()) {
+            pBmp = it->second.m_pBmps.back();
+            it->second.m_pBmps.pop_back();
+            m_MemUsed -= pBmp->getMemNeeded();
+            m_NumBitmaps--;
+            m_Stats.m_NumHits++;
+        } else {
+            m_Stats.m_NumMisses++;
+        }
+    }
+    if (!pBmp) {
+        // Allocate outside of the lock.
+        pBmp = new Bitmap(size, pf);
+    }
+    {
+        lock_guard lock(m_Mutex);
+        m_MemInUse += pBmp->getMemNeeded();
+    }
+    return BitmapPtr(pBmp, PooledBitmapDeleter(shared_from_this()));
+}
+
+void BitmapPool::setMaxMem(long long maxMem)
+{
+    lock_guard lock(m_Mutex);
+    m_MaxMem = maxMem;
+    evict(m_MaxMem);
+}
+
+long long BitmapPool::getMaxMem() const
+{
+    lock_guard lock(m_Mutex);
+    return m_MaxMem;
+}
+
+long long BitmapPool::getMemUsed() const
+{
+    lock_guard lock(m_Mutex);
+    return m_MemUsed;
+}
+
+long long BitmapPool::getMemInUse() const
+{
+    lock_guard lock(m_Mutex);
+    return m_MemInUse;
+}
+
+int BitmapPool::getNumBitmaps() const
+{
+    lock_guard lock(m_Mutex);
+    return m_NumBitmaps;
+}
+
+void BitmapPool::clear()
+{
+    lock_guard lock(m_Mutex);
+    deleteBitmaps();
+}
+
+BitmapPool::Stats BitmapPool::getStats() const
+{
+    lock_guard lock(m_Mutex);
+    return m_Stats;
+}
+
+void BitmapPool::resetStats()
+{
+    lock_guard lock(m_Mutex);
+    m_Stats = Stats();
+}
+
+void BitmapPool::returnBitmap(Bitmap* pBmp)
+{
+    lock_guard lock(m_Mutex);
+    long long memNeeded = pBmp->getMemNeeded();
+    m_MemInUse -= memNeeded;
+    if (memNeeded > m_MaxMem) {
+        delete pBmp;
+        m_Stats.m_NumEvictions++;
+        return;
+    }
+    Entry& entry = m_Entries[Key(pBmp->getSize(), pBmp->getPixelFormat())];
+    entry.m_pBmps.push_back(pBmp);
+    entry.m_LastUse = m_UseCounter++;
+    m_MemUsed += memNeeded;
+    m_NumBitmaps++;
+    evict(m_MaxMem);
+}
+
+void BitmapPool::evict(long long maxMem)
+{
+    // Called with the mutex locked.
+    while (m_MemUsed > maxMem) {
+        EntryMap::iterator lruIt = m_Entries.end();
+        for (EntryMap::iterator it = m_Entries.begin(); it != m_Entries.end(); ++it) {
+            if (!it->second.m_pBmps.empty() && 
+                    (lruIt == m_Entries.end() || 
+                     it->second.m_LastUse < lruIt->second.m_LastUse))
+            {
+                lruIt = it;
+            }
+        }
+        AVG_ASSERT(lruIt != m_Entries.end());
+        Bitmap* pBmp = lruIt->second.m_pBmps.back();
+        lruIt->second.m_pBmps.pop_back();
+        if (lruIt->second.m_pBmps.empty()) {
+            m_Entries.erase(lruIt);
+        }
+        m_MemUsed -= pBmp->getMemNeeded();
+        m_NumBitmaps--;
+        m_Stats.m_NumEvictions++;
+        delete pBmp;
+    }
+}
+
+void BitmapPool::deleteBitmaps()
+{
+    for (EntryMap::iterator it = m_Entries.begin(); it != m_Entries.end(); ++it) {
+        vector<Bitmap*>& pBmps = it->second.m_pBmps;
+        for (unsigned i = 0; i < pBmps.size(); ++i) {
+            delete pBmps[i];
+        }
+    }
+    m_Entries.clear();
+    m_MemUsed = 0;
+    m_NumBitmaps = 0;
+}
+
+}
+
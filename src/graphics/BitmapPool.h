@@ -0,0 +1,120 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _BitmapPool_H_
+#define _BitmapPool_H_
+
+#include "../api.h"
+
+#include "Bitmap.h"
+#include "PixelFormat.h"
+
+#include "../base/GLMHelper.h"
+
+#include <boost/shared_ptr.hpp>
+#include <boost/weak_ptr.hpp>
+#include <boost/enable_shared_from_this.hpp>
+#include <boost/thread/mutex.hpp>
+
+#include <map>
+#include <vector>
+
+namespace avg {
+
+class BitmapPool;
+typedef boost::shared_ptr<BitmapPool> BitmapPoolPtr;
+
+// Pool of bitmaps keyed by size and pixel format. Bitmaps handed out by getBitmap()
+// return to the pool automatically when the last reference to them is released, so
+// decoders can allocate a bitmap per frame without touching the heap in the steady 
+// state. maxMem caps the memory held by idle bitmaps; when it is exceeded, bitmaps of
+// the least recently used size are freed.
+class AVG_API BitmapPool: public boost::enable_shared_from_this<BitmapPool>
+{
+public:
+    struct Stats {
+        Stats();
+
+        long long m_NumHits;
+        long long m_NumMisses;
+        long long m_NumEvictions;
+    };
+
+    // Pool shared by all video decoders.
+    static BitmapPoolPtr get();
+
+    BitmapPool(long long maxMem);
+    virtual ~BitmapPool();
+
+    BitmapPtr getBitmap(const IntPoint& size, PixelFormat pf);
+
+    void setMaxMem(long long maxMem);
+    long long getMaxMem() const;
+    // Memory used by idle bitmaps in the pool.
+    long long getMemUsed() const;
+    // Memory used by bitmaps that have been handed out and not returned yet.
+    long long getMemInUse() const;
+    int getNumBitmaps() const;
+    void clear();
+
+    Stats getStats() const;
+    void resetStats();
+
+private:
+    friend class PooledBitmapDeleter;
+
+    void returnBitmap(Bitmap* pBmp);
+    void evict(long long maxMem);
+    void deleteBitmaps();
+
+    struct Key {
+        Key(const IntPoint& size, PixelFormat pf);
+        bool operator <(const Key& other) const;
+
+        IntPoint m_Size;
+        PixelFormat m_PF;
+    };
+    struct Entry {
+        Entry();
+
+        std::vector<Bitmap*> m_pBmps;
+        long long m_LastUse;
+    };
+    typedef std::map<Key, Entry> EntryMap;
+
+    EntryMap m_Entries;
+    long long m_MaxMem;
+    long long m_MemUsed;
+    long long m_MemInUse;
+    int m_NumBitmaps;
+    long long m_UseCounter;
+    Stats m_Stats;
+    mutable boost::mutex m_Mutex;
+
+    static BitmapPoolPtr s_pPool;
+    static boost::mutex s_PoolMutex;
+};
+
+}
+
+#endif
+
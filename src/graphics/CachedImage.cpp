@@ -51,6 +51,18 @@ CachedImage::CachedImage(const std::string& sFilename, TexCompression compressio
     incBmpRef(m_Compression);
 }
 
+CachedImage::CachedImage(const std::string& sFilename, BitmapPtr pBmp)
+    : m_sFilename(sFilename),
+      m_pBmp(pBmp),
+      m_bUseMipmaps(false),
+      m_Compression(TEXCOMPRESSION_NONE),
+      m_BmpRefCount(0),
+      m_TexRefCount(0)
+{
+    ObjectCounter::get()->incRef(&typeid(*this));
+    incBmpRef(m_Compression);
+}
+
 CachedImage::~CachedImage()
 {
     ObjectCounter::get()->decRef(&typeid(*this));
@@ -96,6 +108,8 @@ void CachedImage::incTexRef(bool bUseMipmaps)
         if (!m_pTex) {
             createTexture();
             ImageCache::get()->onTexLoad(m_sFilename);
+        } else {
+            ImageCache::get()->onTexUsed(m_sFilename);
         }
     } else if (bUseMipmaps && !m_bUseMipmaps) {
         m_bUseMipmaps = true;
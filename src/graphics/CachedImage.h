@@ -45,6 +45,7 @@ class AVG_API CachedImage
         };
 
         CachedImage(const std::string& sFilename, TexCompression compression);
+        CachedImage(const std::string& sFilename, BitmapPtr pBmp);
         virtual ~CachedImage();
 
         std::string getFilename() const;
@@ -27,16 +27,25 @@
 
 #include "../base/Exception.h"
 
+#include <boost/bind.hpp>
+
 #include <cstring>
 #include <iostream>
 #include <sstream>
+#include <algorithm>
 
 using namespace std;
 
 namespace avg {
     
-FilterFastBandpass::FilterFastBandpass()
+FilterFastBandpass::FilterFastBandpass(int numTiles)
+    : m_NumTiles(numTiles)
 {
+    AVG_ASSERT(numTiles >= 1);
+    // The thread that calls apply() filters one of the bands itself.
+    if (numTiles > 1) {
+        m_pTaskPool = TaskPoolPtr(new TaskPool(numTiles-1));
+    }
 }
 
 FilterFastBandpass::~FilterFastBandpass()
@@ -48,12 +57,39 @@ BitmapPtr FilterFastBandpass::apply(BitmapPtr pBmpSrc)
     AVG_ASSERT(pBmpSrc->getPixelFormat() == I8);
     BitmapPtr pBmpDest = BitmapPtr(new Bitmap(pBmpSrc->getSize(), I8,
             pBmpSrc->getName()));
+    IntPoint size = pBmpDest->getSize();
+    int numLines = max(size.y-6, 0);
+    int numTiles = min(m_NumTiles, numLines/8);
+    if (numTiles <= 1) {
+        filterLines(pBmpSrc, pBmpDest, 3, size.y-3);
+    } else {
+        // Lines only depend on the source bitmap, so the tiles are independent.
+        vector<TaskPool::Task> tasks;
+        int startLine = 3;
+        for (int i = 0; i < numTiles; ++i) {
+            int endLine = 3 + (numLines*(i+1))/numTiles;
+            tasks.push_back(boost::bind(&FilterFastBandpass::filterLines, 
+                    pBmpSrc, pBmpDest, startLine, endLine));
+            startLine = endLine;
+        }
+        m_pTaskPool->run(tasks);
+    }
+    // Set top and bottom borders.
+    int destStride = pBmpDest->getStride();
+    memset(pBmpDest->getPixels(), 128, destStride*3);
+    memset(pBmpDest->getPixels()+destStride*(size.y-3), 128, destStride*3);
+    return pBmpDest;
+}
+
+void FilterFastBandpass::filterLines(BitmapPtr pBmpSrc, BitmapPtr pBmpDest, 
+        int startLine, int endLine)
+{
     int srcStride = pBmpSrc->getStride();
     int destStride = pBmpDest->getStride();
-    unsigned char * pSrcLine = pBmpSrc->getPixels()+3*srcStride;
-    unsigned char * pDestLine = pBmpDest->getPixels()+3*destStride;
+    unsigned char * pSrcLine = pBmpSrc->getPixels()+startLine*srcStride;
+    unsigned char * pDestLine = pBmpDest->getPixels()+startLine*destStride;
     IntPoint size = pBmpDest->getSize();
-    for (int y = 3; y < size.y-3; ++y) {
+    for (int y = startLine; y < endLine; ++y) {
         unsigned char * pSrcPixel = pSrcLine+3;
         unsigned char * pDstPixel = pDestLine;
         *pDstPixel++ = 128;
@@ -83,10 +119,6 @@ BitmapPtr FilterFastBandpass::apply(BitmapPtr pBmpSrc)
         pSrcLine += srcStride;
         pDestLine += destStride;
     }
-    // Set top and bottom borders.
-    memset(pBmpDest->getPixels(), 128, destStride*3);
-    memset(pBmpDest->getPixels()+destStride*(size.y-3), 128, destStride*3);
-    return pBmpDest;
 }
 
 }
@@ -26,19 +26,28 @@
 #include "Filter.h"
 #include "Bitmap.h"
 
+#include "../base/TaskPool.h"
+
 #include <boost/shared_ptr.hpp>
 
 namespace avg {
 
 // This is a fast and sloppy bandpass filter that uses a 7x7 kernel. 
+// If numTiles > 1, the bitmap is split into horizontal bands that are filtered
+// in parallel by worker threads that live as long as the filter.
 class AVG_API FilterFastBandpass: public Filter{
     public:
-        FilterFastBandpass();
+        FilterFastBandpass(int numTiles=1);
         virtual ~FilterFastBandpass();
 
         virtual BitmapPtr apply(BitmapPtr pBmpSrc);
 
     private:
+        static void filterLines(BitmapPtr pBmpSrc, BitmapPtr pBmpDest, 
+                int startLine, int endLine);
+
+        int m_NumTiles;
+        TaskPoolPtr m_pTaskPool;
 };
 
 typedef boost::shared_ptr<FilterFastBandpass> FilterFastBandpassPtr;
@@ -21,15 +21,41 @@
 
 #include "ImageCache.h"
 
+#include "Bitmap.h"
+
 #include "../base/Exception.h"
 #include "../base/OSHelper.h"
 #include "../base/ConfigMgr.h"
 #include "../base/Logger.h"
+#include "../base/TimeSource.h"
 
 using namespace std;
 
 namespace avg {
 
+// Limits the memory used to remember evicted files. Reloads of files evicted earlier
+// than that aren't counted in the stats.
+static const unsigned MAX_EVICTED_FILES = 4096;
+
+ImageCache::Stats::Stats()
+    : m_NumHits(0),
+      m_NumMisses(0),
+      m_NumEvictions(0),
+      m_BytesReloaded(0)
+{
+}
+
+ImageCache::CacheEntry::CacheEntry(const CachedImagePtr& pImg, float loadCost,
+        bool bTexEvicted)
+    : m_pImg(pImg),
+      m_Frequency(1),
+      m_LoadCost(loadCost),
+      m_bTexEvicted(bTexEvicted),
+      m_bInCPUQueue(false),
+      m_bInGPUQueue(false)
+{
+}
+
 ImageCache * ImageCache::s_pImageCache = 0;
     
 ImageCache* ImageCache::get() 
@@ -41,8 +67,13 @@ ImageCache* ImageCache::get()
 }
 
 ImageCache::ImageCache()
-    : m_CPUCacheUsed(0),
-      m_GPUCacheUsed(0)
+    : m_CPUInflation(0),
+      m_GPUInflation(0),
+      m_TotalLoadCost(0),
+      m_CPUCacheUsed(0),
+      m_GPUCacheUsed(0),
+      m_NumGPUImages(0),
+      m_bPrefetching(false)
 {
     glm::vec2 sizeOpt = ConfigMgr::get()->getSizeOption("scr", "imgcachesize");
     if (sizeOpt[0] == -1) {
@@ -92,50 +123,85 @@ long long ImageCache::getMemUsed(CachedImage::StorageType st)
 CachedImagePtr ImageCache::getImage(const std::string& sFilename,
         TexCompression compression)
 {
-    ImageMap::iterator it = m_pImageMap.find(sFilename);
+    ImageMap::iterator it = m_ImageMap.find(sFilename);
     CachedImagePtr pImg;
-    if (it == m_pImageMap.end()) {
+    if (it == m_ImageMap.end()) {
+        long long startTime = TimeSource::get()->getCurrentMicrosecs();
         pImg = CachedImagePtr(new CachedImage(sFilename, compression));
-        m_pLRUList.push_front(pImg);
-        m_pImageMap.insert(make_pair(sFilename, m_pLRUList.begin()));
-        m_CPUCacheUsed += pImg->getMemUsed(CachedImage::STORAGE_CPU);
+        float loadCost = float(TimeSource::get()->getCurrentMicrosecs()-startTime);
+        insertImage(sFilename, pImg, loadCost);
+        m_CPUStats.m_NumMisses++;
         checkCPUUnload();
     } else {
-        pImg = *(it->second);
+        CacheEntry& entry = it->second;
+        pImg = entry.m_pImg;
+        m_CPUStats.m_NumHits++;
+        entry.m_Frequency++;
+        dequeue(entry, CachedImage::STORAGE_CPU);
         pImg->incBmpRef(compression);
-        // Move item to front of list
-        m_pLRUList.splice(m_pLRUList.begin(), m_pLRUList, it->second);
     }
     assertValid();
     return pImg;
 }
 
+void ImageCache::addPrefetchedImage(const std::string& sFilename, BitmapPtr pBmp,
+        CachedImage::StorageType st)
+{
+    if (m_ImageMap.find(sFilename) != m_ImageMap.end()) {
+        // Loaded in the meantime.
+        return;
+    }
+    CachedImagePtr pImg = CachedImagePtr(new CachedImage(sFilename, pBmp));
+    // The load happened in a different thread, so we don't know how expensive it
+    // was. We assume the average cost per byte of the images loaded so far.
+    float loadCost = 0;
+    if (m_CPUCacheUsed > 0) {
+        loadCost = float(m_TotalLoadCost*pBmp->getMemNeeded()/m_CPUCacheUsed);
+    }
+    insertImage(sFilename, pImg, loadCost);
+    if (st == CachedImage::STORAGE_GPU) {
+        // Prefetches aren't counted as misses.
+        m_bPrefetching = true;
+        pImg->incTexRef(false);
+        pImg->decTexRef();
+        m_bPrefetching = false;
+    }
+    pImg->decBmpRef();
+    checkCPUUnload();
+}
+
+bool ImageCache::hasImage(const std::string& sFilename) const
+{
+    return m_ImageMap.find(sFilename) != m_ImageMap.end();
+}
+
 void ImageCache::onTexLoad(const std::string& sFilename)
 {
-    CachedImagePtr pImg = *(m_pImageMap[sFilename]);
-    m_GPUCacheUsed += pImg->getMemUsed(CachedImage::STORAGE_GPU);
-    ImageMap::iterator it = m_pImageMap.find(sFilename);
-    // Move item to front of list
-    if (it != m_pImageMap.end()) {
-        m_pLRUList.splice(m_pLRUList.begin(), m_pLRUList, it->second);
+    CacheEntry& entry = findEntry(sFilename);
+    int texSize = entry.m_pImg->getMemUsed(CachedImage::STORAGE_GPU);
+    m_GPUCacheUsed += texSize;
+    m_NumGPUImages++;
+    if (!m_bPrefetching) {
+        m_GPUStats.m_NumMisses++;
+    }
+    if (entry.m_bTexEvicted) {
+        m_GPUStats.m_BytesReloaded += texSize;
+        entry.m_bTexEvicted = false;
     }
     checkGPUUnload();
 }
 
+void ImageCache::onTexUsed(const std::string& sFilename)
+{
+    CacheEntry& entry = findEntry(sFilename);
+    m_GPUStats.m_NumHits++;
+    dequeue(entry, CachedImage::STORAGE_GPU);
+}
+
 void ImageCache::onImageUnused(const std::string& sFilename, CachedImage::StorageType st)
 {
-    // Move image to first pos with use count == 0
-    // This is currently O(n). If that becomes an issue, we need to remember the first
-    // unused image for both CPU and GPU.
-    LRUListType::iterator itOldPos = m_pImageMap.find(sFilename)->second;
-    LRUListType::iterator itNewPos = itOldPos;
-    itNewPos++;
-    while (itNewPos != m_pLRUList.end() &&
-            (*itNewPos)->getRefCount(st) != 0)
-    {
-        itNewPos++;
-    }
-    m_pLRUList.splice(itNewPos, m_pLRUList, itOldPos);
+    CacheEntry& entry = findEntry(sFilename);
+    enqueue(entry, st);
     checkCPUUnload();
 }
 
@@ -151,27 +217,39 @@ void ImageCache::onSizeChange(int sizeDiff, CachedImage::StorageType st)
 
 int ImageCache::getNumCPUImages() const
 {
-    return m_pImageMap.size();
+    return m_ImageMap.size();
 }
 
 int ImageCache::getNumGPUImages() const
 {
-    int numGPUImages = 0;
-    for (LRUListType::const_iterator it=m_pLRUList.begin(); it!=m_pLRUList.end(); ++it) {
-        if ((*it)->hasTex()) {
-            numGPUImages++;
-        }
+    return m_NumGPUImages;
+}
+
+const ImageCache::Stats& ImageCache::getStats(CachedImage::StorageType st) const
+{
+    if (st == CachedImage::STORAGE_CPU) {
+        return m_CPUStats;
+    } else {
+        return m_GPUStats;
     }
-    return numGPUImages;
+}
+
+void ImageCache::resetStats()
+{
+    m_CPUStats = Stats();
+    m_GPUStats = Stats();
 }
 
 void ImageCache::unloadAllTextures()
 {
-    for (LRUListType::const_iterator it=m_pLRUList.begin(); it!=m_pLRUList.end(); ++it) {
-        CachedImagePtr pImg = *it;
+    for (ImageMap::iterator it=m_ImageMap.begin(); it!=m_ImageMap.end(); ++it) {
+        CacheEntry& entry = it->second;
+        CachedImagePtr pImg = entry.m_pImg;
         AVG_ASSERT(pImg->getRefCount(CachedImage::STORAGE_GPU) == 0);
         if (pImg->hasTex()) {
+            dequeue(entry, CachedImage::STORAGE_GPU);
             m_GPUCacheUsed -= pImg->getMemUsed(CachedImage::STORAGE_GPU);
+            m_NumGPUImages--;
             pImg->unloadTex();
         }
     }
@@ -180,26 +258,101 @@ void ImageCache::unloadAllTextures()
 void ImageCache::dump() const
 {
     cerr << "----------------" << endl;
-    cerr << "ImageCache: " << m_pLRUList.size() << ", CPU used: " << m_CPUCacheUsed <<
+    cerr << "ImageCache: " << m_ImageMap.size() << ", CPU used: " << m_CPUCacheUsed <<
             ", GPU used: " << m_GPUCacheUsed << endl;
-    for (LRUListType::const_iterator it=m_pLRUList.begin(); it!=m_pLRUList.end(); ++it) {
-        (*it)->dump();
+    for (ImageMap::const_iterator it=m_ImageMap.begin(); it!=m_ImageMap.end(); ++it) {
+        it->second.m_pImg->dump();
+    }
+}
+
+ImageCache::CacheEntry& ImageCache::insertImage(const std::string& sFilename,
+        CachedImagePtr pImg, float loadCost)
+{
+    int bmpSize = pImg->getMemUsed(CachedImage::STORAGE_CPU);
+    m_CPUCacheUsed += bmpSize;
+    m_TotalLoadCost += loadCost;
+    bool bTexEvicted = false;
+    EvictedMap::iterator evictedIt = m_EvictedFiles.find(sFilename);
+    if (evictedIt != m_EvictedFiles.end()) {
+        m_CPUStats.m_BytesReloaded += bmpSize;
+        bTexEvicted = evictedIt->second.first;
+        m_EvictedOrder.erase(evictedIt->second.second);
+        m_EvictedFiles.erase(evictedIt);
+    }
+    ImageMap::iterator it = m_ImageMap.insert(
+            make_pair(sFilename, CacheEntry(pImg, loadCost, bTexEvicted))).first;
+    return it->second;
+}
+
+ImageCache::CacheEntry& ImageCache::findEntry(const std::string& sFilename)
+{
+    ImageMap::iterator it = m_ImageMap.find(sFilename);
+    AVG_ASSERT(it != m_ImageMap.end());
+    return it->second;
+}
+
+void ImageCache::enqueue(CacheEntry& entry, CachedImage::StorageType st)
+{
+    dequeue(entry, st);
+    if (st == CachedImage::STORAGE_CPU) {
+        int size = max(entry.m_pImg->getMemUsed(CachedImage::STORAGE_CPU), 1);
+        double priority = m_CPUInflation + double(entry.m_Frequency)*
+                max(entry.m_LoadCost, 1.f)/size;
+        entry.m_CPUQueuePos = m_CPUQueue.insert(make_pair(priority, &entry));
+        entry.m_bInCPUQueue = true;
+    } else {
+        if (entry.m_pImg->hasTex()) {
+            double priority = m_GPUInflation + entry.m_Frequency;
+            entry.m_GPUQueuePos = m_GPUQueue.insert(make_pair(priority, &entry));
+            entry.m_bInGPUQueue = true;
+        }
+    }
+}
+
+void ImageCache::dequeue(CacheEntry& entry, CachedImage::StorageType st)
+{
+    if (st == CachedImage::STORAGE_CPU) {
+        if (entry.m_bInCPUQueue) {
+            m_CPUQueue.erase(entry.m_CPUQueuePos);
+            entry.m_bInCPUQueue = false;
+        }
+    } else {
+        if (entry.m_bInGPUQueue) {
+            m_GPUQueue.erase(entry.m_GPUQueuePos);
+            entry.m_bInGPUQueue = false;
+        }
     }
 }
 
 void ImageCache::checkCPUUnload()
 {
-    while (m_CPUCacheUsed > m_CPUCacheCapacity) {
-        CachedImagePtr pImg = *(m_pLRUList.rbegin());
-        if (pImg->getRefCount(CachedImage::STORAGE_CPU) == 0) {
-            m_pImageMap.erase(pImg->getFilename());
-            m_pLRUList.pop_back();
-            m_CPUCacheUsed -= pImg->getMemUsed(CachedImage::STORAGE_CPU);
+    while (m_CPUCacheUsed > m_CPUCacheCapacity && !m_CPUQueue.empty()) {
+        // If the queue is empty, the cache is full but everything's in use.
+        PriorityQueue::iterator queueIt = m_CPUQueue.begin();
+        m_CPUInflation = queueIt->first;
+        CacheEntry& entry = *(queueIt->second);
+        CachedImagePtr pImg = entry.m_pImg;
+        AVG_ASSERT(pImg->getRefCount(CachedImage::STORAGE_CPU) == 0);
+        dequeue(entry, CachedImage::STORAGE_CPU);
+        dequeue(entry, CachedImage::STORAGE_GPU);
+        m_CPUCacheUsed -= pImg->getMemUsed(CachedImage::STORAGE_CPU);
+        m_TotalLoadCost -= entry.m_LoadCost;
+        m_CPUStats.m_NumEvictions++;
+        bool bHadTex = pImg->hasTex();
+        if (bHadTex) {
             m_GPUCacheUsed -= pImg->getMemUsed(CachedImage::STORAGE_GPU);
-        } else {
-            // Cache full, but everything's in use.
-            break;
+            m_NumGPUImages--;
+            m_GPUStats.m_NumEvictions++;
+        }
+        string sFilename = pImg->getFilename();
+        if (m_EvictedOrder.size() >= MAX_EVICTED_FILES) {
+            m_EvictedFiles.erase(m_EvictedOrder.front());
+            m_EvictedOrder.pop_front();
         }
+        m_EvictedOrder.push_back(sFilename);
+        m_EvictedFiles[sFilename] = EvictedInfo(bHadTex || entry.m_bTexEvicted,
+                --m_EvictedOrder.end());
+        m_ImageMap.erase(sFilename);
     }
     assertValid();
     checkGPUUnload();
@@ -207,28 +360,19 @@ void ImageCache::checkCPUUnload()
 
 void ImageCache::checkGPUUnload()
 {
-    if (m_GPUCacheUsed > m_GPUCacheCapacity) {
-        LRUListType::reverse_iterator it = m_pLRUList.rbegin();
-        // Find first item that actually has a texture loaded.
-        while (it != m_pLRUList.rend() && !((*it)->hasTex())) {
-            it++;
-        }
-        if (it != m_pLRUList.rend()) {
-            while (m_GPUCacheUsed > m_GPUCacheCapacity) {
-                assertValid();
-                CachedImagePtr pImg = *it;
-                if (pImg->getRefCount(CachedImage::STORAGE_GPU) == 0) {
-                    if (pImg->hasTex()) {
-                        m_GPUCacheUsed -= pImg->getMemUsed(CachedImage::STORAGE_GPU);
-                        pImg->unloadTex();
-                    }
-                    ++it;
-                } else {
-                    // Cache full, but everything's in use.
-                    break;
-                }
-            }
-        }
+    while (m_GPUCacheUsed > m_GPUCacheCapacity && !m_GPUQueue.empty()) {
+        // If the queue is empty, the cache is full but everything's in use.
+        PriorityQueue::iterator queueIt = m_GPUQueue.begin();
+        m_GPUInflation = queueIt->first;
+        CacheEntry& entry = *(queueIt->second);
+        CachedImagePtr pImg = entry.m_pImg;
+        AVG_ASSERT(pImg->getRefCount(CachedImage::STORAGE_GPU) == 0);
+        dequeue(entry, CachedImage::STORAGE_GPU);
+        m_GPUCacheUsed -= pImg->getMemUsed(CachedImage::STORAGE_GPU);
+        m_NumGPUImages--;
+        m_GPUStats.m_NumEvictions++;
+        entry.m_bTexEvicted = true;
+        pImg->unloadTex();
     }
     assertValid();
 }
@@ -236,17 +380,17 @@ void ImageCache::checkGPUUnload()
 void ImageCache::assertValid()
 {
     if (m_CPUCacheUsed == 0) {
-        AVG_ASSERT(m_pLRUList.size() == 0);
-        AVG_ASSERT(m_pImageMap.size() == 0);
+        AVG_ASSERT(m_ImageMap.size() == 0);
     }
-    if (m_pLRUList.size() == 0) {
+    if (m_ImageMap.size() == 0) {
         AVG_ASSERT(m_CPUCacheUsed == 0);
         AVG_ASSERT(m_GPUCacheUsed == 0);
     }
-    if (getNumGPUImages() == 0) {
+    if (m_NumGPUImages == 0) {
         AVG_ASSERT(m_GPUCacheUsed == 0);
     }
-    AVG_ASSERT(m_pLRUList.size() == m_pImageMap.size());
+    AVG_ASSERT(m_CPUQueue.size() <= m_ImageMap.size());
+    AVG_ASSERT(m_GPUQueue.size() <= (unsigned)m_NumGPUImages);
 }
 
 }
@@ -31,6 +31,7 @@
 
 #include <boost/shared_ptr.hpp>
 #include <string>
+#include <map>
 #include <list>
 
 #ifdef _WIN32
@@ -46,6 +47,15 @@ namespace avg {
 class AVG_API ImageCache
 {
     public:
+        struct Stats {
+            Stats();
+
+            long long m_NumHits;
+            long long m_NumMisses;
+            long long m_NumEvictions;
+            long long m_BytesReloaded;
+        };
+
         static ImageCache* get();
         virtual ~ImageCache();
 
@@ -54,40 +64,89 @@ class AVG_API ImageCache
         long long getMemUsed(CachedImage::StorageType st);
         CachedImagePtr getImage(const std::string& sFilename,
                 TexCompression compression);
+        void addPrefetchedImage(const std::string& sFilename, BitmapPtr pBmp,
+                CachedImage::StorageType st);
+        bool hasImage(const std::string& sFilename) const;
         void onTexLoad(const std::string& sFilename);
+        void onTexUsed(const std::string& sFilename);
         void onImageUnused(const std::string& sFilename, CachedImage::StorageType st);
         void onSizeChange(int sizeDiff, CachedImage::StorageType st);
         int getNumCPUImages() const;
         int getNumGPUImages() const;
+        const Stats& getStats(CachedImage::StorageType st) const;
+        void resetStats();
 
         void unloadAllTextures();
         void dump() const;
 
     private:
         ImageCache();
+
+        struct CacheEntry;
+        // Unused images, sorted by eviction priority (lowest first).
+        typedef std::multimap<double, CacheEntry*> PriorityQueue;
+
+        struct CacheEntry {
+            CacheEntry(const CachedImagePtr& pImg, float loadCost, bool bTexEvicted);
+
+            CachedImagePtr m_pImg;
+            int m_Frequency;
+            // Time needed to load the image from disk in microseconds.
+            float m_LoadCost;
+            bool m_bTexEvicted;
+            bool m_bInCPUQueue;
+            PriorityQueue::iterator m_CPUQueuePos;
+            bool m_bInGPUQueue;
+            PriorityQueue::iterator m_GPUQueuePos;
+        };
+
+        CacheEntry& insertImage(const std::string& sFilename, CachedImagePtr pImg,
+                float loadCost);
+        CacheEntry& findEntry(const std::string& sFilename);
+        void enqueue(CacheEntry& entry, CachedImage::StorageType st);
+        void dequeue(CacheEntry& entry, CachedImage::StorageType st);
         void checkCPUUnload();
         void checkGPUUnload();
 
         void assertValid();
 
-        typedef std::list<CachedImagePtr> LRUListType;
-        // This is a list of all loaded images in three partitions:
-        // 1) Images that have both CPU and GPU refcounts > 0
-        // 2) Images that have only CPU refcount > 0
-        // 3) Images that are unused but cached.
-        // The third partition is sorted by LRU.
-        LRUListType m_pLRUList;
+        typedef std::list<std::string> EvictedList;
+        // Whether the image had a texture when it was evicted, and its position in
+        // m_EvictedOrder.
+        typedef std::pair<bool, EvictedList::iterator> EvictedInfo;
 #ifdef __APPLE__
-        typedef boost::unordered_map<std::string, LRUListType::iterator> ImageMap;
+        typedef boost::unordered_map<std::string, CacheEntry> ImageMap;
+        typedef boost::unordered_map<std::string, EvictedInfo> EvictedMap;
 #else
-        typedef std::tr1::unordered_map<std::string, LRUListType::iterator> ImageMap;
+        typedef std::tr1::unordered_map<std::string, CacheEntry> ImageMap;
+        typedef std::tr1::unordered_map<std::string, EvictedInfo> EvictedMap;
 #endif
-        ImageMap m_pImageMap;
+        // Eviction uses the Greedy-Dual-Size-Frequency policy: An unused image gets the
+        // priority L + frequency*cost/size, where L is the priority of the last image
+        // evicted. Images that are expensive to reload per byte and images that are used
+        // often stay in the cache longer, and L makes sure old images age out.
+        // Textures are reloaded from CPU memory at a cost proportional to their size,
+        // so for the GPU, the priority is L + frequency.
+        ImageMap m_ImageMap;
+        PriorityQueue m_CPUQueue;
+        PriorityQueue m_GPUQueue;
+        double m_CPUInflation;
+        double m_GPUInflation;
+        // Sum of the load costs of all cached images.
+        double m_TotalLoadCost;
+        // The most recently evicted files (oldest first), used to count reloads.
+        EvictedMap m_EvictedFiles;
+        EvictedList m_EvictedOrder;
 
         long long m_CPUCacheCapacity;
         long long m_GPUCacheCapacity;
         long long m_CPUCacheUsed;
         long long m_GPUCacheUsed;
+        int m_NumGPUImages;
+        bool m_bPrefetching;
+
+        Stats m_CPUStats;
+        Stats m_GPUStats;
 
         static ImageCache * s_pImageCache;
 };
@@ -43,10 +43,9 @@ const unsigned VertexArray::POS_INDEX = 1;
 const unsigned VertexArray::COLOR_INDEX = 2;
 
 VertexArray::VertexArray(int reserveVerts, int reserveIndexes)
-    : VertexData(reserveVerts, reserveIndexes)
+    : VertexData(reserveVerts, reserveIndexes),
+      m_NumBytesUploaded(0)
 {
-    GLContext* pContext = GLContext::getCurrent();
-    m_bUseMapBuffer = (!pContext->isGLES());
 }
 
 void VertexArray::initForGLContext(GLContext* pContext)
@@ -59,6 +58,11 @@ void VertexArray::initForGLContext(GLContext* pContext)
     m_VertexBufferIDMap[pContext] = vertexBufferID;
     glproc::GenBuffers(1, &indexBufferID);
     m_IndexBufferIDMap[pContext] = indexBufferID;
+    BufferState state;
+    state.m_VertexBufferSize = 0;
+    state.m_IndexBufferSize = 0;
+    state.m_bUpToDate = false;
+    m_BufferStates[pContext] = state;
 }
 
 VertexArray::~VertexArray()
@@ -70,22 +74,30 @@ VertexArray::~VertexArray()
 void VertexArray::update(GLContext* pContext)
 {
     AVG_ASSERT(!m_VertexBufferIDMap.empty());
-    if (hasDataChanged()) {
-        unsigned vertexBufferID = m_VertexBufferIDMap[pContext];
-        transferBuffer(GL_ARRAY_BUFFER, vertexBufferID, 
-                getReserveVerts()*sizeof(Vertex), 
-                getNumVerts()*sizeof(Vertex), getVertexPointer());
-        unsigned indexBufferID = m_IndexBufferIDMap[pContext];
-#ifdef AVG_ENABLE_EGL        
-        transferBuffer(GL_ELEMENT_ARRAY_BUFFER, indexBufferID, 
-                getReserveIndexes()*sizeof(unsigned short),
-                getNumIndexes()*sizeof(unsigned short), getIndexPointer());
-#else
-        transferBuffer(GL_ELEMENT_ARRAY_BUFFER, indexBufferID, 
-                getReserveIndexes()*sizeof(unsigned int),
-                getNumIndexes()*sizeof(unsigned int), getIndexPointer());
-#endif
-        GLContext::checkError("VertexArray::update()");
+    BufferStateMap::iterator stateIt = m_BufferStates.find(pContext);
+    AVG_ASSERT(stateIt != m_BufferStates.end());
+    BufferState& state = stateIt->second;
+    unsigned vertexBufferID = m_VertexBufferIDMap[pContext];
+    m_NumBytesUploaded += transferBuffer(GL_ARRAY_BUFFER, vertexBufferID, 
+            sizeof(Vertex), getReserveVerts(), state.m_VertexBufferSize,
+            getDirtyVertexRanges(), getVertexPointer());
+    unsigned indexBufferID = m_IndexBufferIDMap[pContext];
+    m_NumBytesUploaded += transferBuffer(GL_ELEMENT_ARRAY_BUFFER, indexBufferID, 
+            sizeof(GL_INDEX_TYPE), getReserveIndexes(), state.m_IndexBufferSize,
+            getDirtyIndexRanges(), getIndexPointer());
+    GLContext::checkError("VertexArray::update()");
+
+    // The dirty ranges can be discarded once all contexts have received them.
+    state.m_bUpToDate = true;
+    BufferStateMap::iterator it;
+    for (it = m_BufferStates.begin(); it != m_BufferStates.end(); ++it) {
+        if (!it->second.m_bUpToDate) {
+            return;
+        }
+    }
+    resetDataChanged();
+    for (it = m_BufferStates.begin(); it != m_BufferStates.end(); ++it) {
+        it->second.m_bUpToDate = false;
     }
 }
 
@@ -141,18 +153,36 @@ void VertexArray::startSubVA(SubVertexArray& subVA)
     subVA.init(this, getNumVerts(), getNumIndexes());
 }
 
-void VertexArray::transferBuffer(GLenum target, unsigned bufferID, unsigned reservedSize, 
-        unsigned usedSize, const void* pData)
+long long VertexArray::getNumBytesUploaded() const
 {
+    return m_NumBytesUploaded;
+}
+
+unsigned VertexArray::transferBuffer(GLenum target, unsigned bufferID, 
+        unsigned elementSize, int reservedSize, int& bufferSize, 
+        const RangeList& dirtyRanges, const void* pData)
+{
+    const char* pBytes = (const char*)pData;
+    if (bufferSize != reservedSize) {
+        // (Re)allocate and upload everything, including the unused part of the 
+        // buffer, so later dirty range uploads see consistent contents.
+        glproc::BindBuffer(target, bufferID);
+        glproc::BufferData(target, reservedSize*elementSize, pData, GL_DYNAMIC_DRAW);
+        bufferSize = reservedSize;
+        return reservedSize*elementSize;
+    }
+    if (dirtyRanges.empty()) {
+        return 0;
+    }
     glproc::BindBuffer(target, bufferID);
-    if (m_bUseMapBuffer) {
-        glproc::BufferData(target, reservedSize, 0, GL_STREAM_DRAW);
-        void * pBuffer = glproc::MapBuffer(target, GL_WRITE_ONLY);
-        memcpy(pBuffer, pData, usedSize);
-        glproc::UnmapBuffer(target);
-    } else {
-        glproc::BufferData(target, usedSize, pData, GL_STREAM_DRAW);
+    unsigned numBytes = 0;
+    for (unsigned i = 0; i < dirtyRanges.size(); ++i) {
+        unsigned offset = dirtyRanges[i].first*elementSize;
+        unsigned size = (dirtyRanges[i].second-dirtyRanges[i].first)*elementSize;
+        glproc::BufferSubData(target, offset, size, pBytes+offset);
+        numBytes += size;
     }
+    return numBytes;
 }
 
 }
@@ -44,6 +44,8 @@ public:
     void initForGLContext(GLContext* pContext);
     virtual ~VertexArray();
 
+    // Uploads changed data to the buffers of pContext. Only dirty ranges are 
+    // transferred unless the buffers need to be reallocated.
     void update(GLContext* pContext);
     void activate(GLContext* pContext);
     void draw(GLContext* pContext);
@@ -52,15 +54,29 @@ public:
 
     void startSubVA(SubVertexArray& subVA);
 
+    // Bytes transferred to GL buffers since the VertexArray was created.
+    long long getNumBytesUploaded() const;
+
 private:
-    void transferBuffer(GLenum target, unsigned bufferID, unsigned reservedSize, 
-            unsigned usedSize, const void* pData);
+    unsigned transferBuffer(GLenum target, unsigned bufferID, unsigned elementSize,
+            int reservedSize, int& bufferSize, const RangeList& dirtyRanges, 
+            const void* pData);
 
     typedef std::map<const GLContext*, unsigned> BufferIDMap;
     BufferIDMap m_VertexBufferIDMap;
     BufferIDMap m_IndexBufferIDMap;
 
-    bool m_bUseMapBuffer;
+    struct BufferState {
+        // Sizes of the GL buffers in elements, 0 if not allocated yet.
+        int m_VertexBufferSize;
+        int m_IndexBufferSize;
+        // True if the context has received the current dirty ranges.
+        bool m_bUpToDate;
+    };
+    typedef std::map<const GLContext*, BufferState> BufferStateMap;
+    BufferStateMap m_BufferStates;
+
+    long long m_NumBytesUploaded;
 };
 
 typedef boost::shared_ptr<VertexArray> VertexArrayPtr;
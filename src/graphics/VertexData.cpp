@@ -30,6 +30,7 @@
 #include <iostream>
 #include <stddef.h>
 #include <string.h>
+#include <algorithm>
 
 using namespace std;
 using namespace boost;
@@ -39,12 +40,16 @@ namespace avg {
 const int VertexData::MIN_VERTEXES = 100;
 const int VertexData::MIN_INDEXES = 100;
 
+// Dirty ranges closer together than this are merged.
+static const int MAX_DIRTY_RANGE_GAP = 64;
+// If there are more dirty ranges, they're collapsed into one.
+static const unsigned MAX_DIRTY_RANGES = 32;
+
 VertexData::VertexData(int reserveVerts, int reserveIndexes)
     : m_NumVerts(0),
       m_NumIndexes(0),
       m_ReserveVerts(reserveVerts),
-      m_ReserveIndexes(reserveIndexes),
-      m_bDataChanged(true)
+      m_ReserveIndexes(reserveIndexes)
 {
     ObjectCounter::get()->incRef(&typeid(*this));
     if (m_ReserveVerts < MIN_VERTEXES) {
@@ -54,9 +59,11 @@ VertexData::VertexData(int reserveVerts, int reserveIndexes)
         m_ReserveIndexes = MIN_INDEXES;
     }
     
+    // Cleared so comparisons against previous contents are well-defined.
     m_pVertexData = new Vertex[m_ReserveVerts];
+    memset(m_pVertexData, 0, sizeof(Vertex)*m_ReserveVerts);
     m_pIndexData = new GL_INDEX_TYPE[m_ReserveIndexes];
-
+    memset(m_pIndexData, 0, sizeof(GL_INDEX_TYPE)*m_ReserveIndexes);
 }
 
 VertexData::~VertexData()
@@ -72,13 +79,17 @@ void VertexData::appendPos(const glm::vec2& pos, const glm::vec2& texPos,
     if (m_NumVerts >= m_ReserveVerts-1) {
         grow();
     }
+    Vertex vertex;
+    vertex.m_Pos[0] = (GLfloat)(pos.x);
+    vertex.m_Pos[1] = (GLfloat)(pos.y);
+    vertex.m_Tex[0] = (GLfloat)(texPos.x);
+    vertex.m_Tex[1] = (GLfloat)(texPos.y);
+    vertex.m_Color = color;
     Vertex* pVertex = &(m_pVertexData[m_NumVerts]);
-    pVertex->m_Pos[0] = (GLfloat)(pos.x);
-    pVertex->m_Pos[1] = (GLfloat)(pos.y);
-    pVertex->m_Tex[0] = (GLfloat)(texPos.x);
-    pVertex->m_Tex[1] = (GLfloat)(texPos.y);
-    pVertex->m_Color = color;
-    m_bDataChanged = true;
+    if (memcmp(pVertex, &vertex, sizeof(Vertex)) != 0) {
+        *pVertex = vertex;
+        addDirtyRange(m_DirtyVertexRanges, m_NumVerts, m_NumVerts+1);
+    }
     m_NumVerts++;
 }
 
@@ -87,9 +98,9 @@ void VertexData::appendTriIndexes(int v0, int v1, int v2)
     if (m_NumIndexes >= m_ReserveIndexes-3) {
         grow();
     }
-    m_pIndexData[m_NumIndexes] = v0;
-    m_pIndexData[m_NumIndexes+1] = v1;
-    m_pIndexData[m_NumIndexes+2] = v2;
+    setIndex(m_NumIndexes, v0);
+    setIndex(m_NumIndexes+1, v1);
+    setIndex(m_NumIndexes+2, v2);
     m_NumIndexes += 3;
 }
 
@@ -98,12 +109,12 @@ void VertexData::appendQuadIndexes(int v0, int v1, int v2, int v3)
     if (m_NumIndexes >= m_ReserveIndexes-6) {
         grow();
     }
-    m_pIndexData[m_NumIndexes] = v0;
-    m_pIndexData[m_NumIndexes+1] = v1;
-    m_pIndexData[m_NumIndexes+2] = v2;
-    m_pIndexData[m_NumIndexes+3] = v1;
-    m_pIndexData[m_NumIndexes+4] = v2;
-    m_pIndexData[m_NumIndexes+5] = v3;
+    setIndex(m_NumIndexes, v0);
+    setIndex(m_NumIndexes+1, v1);
+    setIndex(m_NumIndexes+2, v2);
+    setIndex(m_NumIndexes+3, v1);
+    setIndex(m_NumIndexes+4, v2);
+    setIndex(m_NumIndexes+5, v3);
     m_NumIndexes += 6;
 }
 
@@ -129,30 +140,47 @@ void VertexData::appendVertexData(const VertexDataPtr& pVertexes)
         grow();
     }
 
-    memcpy(&(m_pVertexData[oldNumVerts]), pVertexes->m_pVertexData, 
-            pVertexes->getNumVerts()*sizeof(Vertex));
+    int numVerts = pVertexes->getNumVerts();
+    if (memcmp(&(m_pVertexData[oldNumVerts]), pVertexes->m_pVertexData, 
+            numVerts*sizeof(Vertex)) != 0)
+    {
+        memcpy(&(m_pVertexData[oldNumVerts]), pVertexes->m_pVertexData, 
+                numVerts*sizeof(Vertex));
+        addDirtyRange(m_DirtyVertexRanges, oldNumVerts, m_NumVerts);
+    }
     int numIndexes = pVertexes->getNumIndexes();
     for (int i=0; i<numIndexes; ++i) {
-        m_pIndexData[oldNumIndexes+i] = pVertexes->m_pIndexData[i] + oldNumVerts;
+        setIndex(oldNumIndexes+i, pVertexes->m_pIndexData[i] + oldNumVerts);
     }
-    m_bDataChanged = true;
 }
 
 bool VertexData::hasDataChanged() const
 {
-    return m_bDataChanged;
+    return !m_DirtyVertexRanges.empty() || !m_DirtyIndexRanges.empty();
+}
+
+const VertexData::RangeList& VertexData::getDirtyVertexRanges() const
+{
+    return m_DirtyVertexRanges;
+}
+
+const VertexData::RangeList& VertexData::getDirtyIndexRanges() const
+{
+    return m_DirtyIndexRanges;
 }
 
 void VertexData::resetDataChanged()
 {
-    m_bDataChanged = false;
+    m_DirtyVertexRanges.clear();
+    m_DirtyIndexRanges.clear();
 }
 
 void VertexData::reset()
 {
+    // The data itself is kept so unchanged vertexes aren't marked dirty when they are
+    // appended again.
     m_NumVerts = 0;
     m_NumIndexes = 0;
-    m_bDataChanged = false;
 }
 
 int VertexData::getNumVerts() const
@@ -187,9 +215,7 @@ void VertexData::dump(unsigned startVertex, int numVerts, unsigned startIndex,
 
 void VertexData::grow()
 {
-    bool bChanged = false;
     if (m_NumVerts >= m_ReserveVerts-1) {
-        bChanged = true;
         int oldReserveVerts = m_ReserveVerts;
         m_ReserveVerts = int(m_ReserveVerts*1.5);
 #ifdef AVG_ENABLE_EGL
@@ -204,10 +230,11 @@ void VertexData::grow()
         Vertex* pVertexData = m_pVertexData;
         m_pVertexData = new Vertex[m_ReserveVerts];
         memcpy(m_pVertexData, pVertexData, sizeof(Vertex)*oldReserveVerts);
+        memset(m_pVertexData+oldReserveVerts, 0, 
+                sizeof(Vertex)*(m_ReserveVerts-oldReserveVerts));
         delete[] pVertexData;
     }
     if (m_NumIndexes >= m_ReserveIndexes-6) {
-        bChanged = true;
         int oldReserveIndexes = m_ReserveIndexes;
         m_ReserveIndexes = int(m_ReserveIndexes*1.5);
         if (m_ReserveIndexes < m_NumIndexes) {
@@ -216,10 +243,32 @@ void VertexData::grow()
         GL_INDEX_TYPE * pIndexData = m_pIndexData;
         m_pIndexData = new GL_INDEX_TYPE[m_ReserveIndexes];
         memcpy(m_pIndexData, pIndexData, sizeof(GL_INDEX_TYPE)*oldReserveIndexes);
+        memset(m_pIndexData+oldReserveIndexes, 0, 
+                sizeof(GL_INDEX_TYPE)*(m_ReserveIndexes-oldReserveIndexes));
         delete[] pIndexData;
     }
-    if (bChanged) {
-        m_bDataChanged = true;
+}
+
+void VertexData::addDirtyRange(RangeList& ranges, int start, int end)
+{
+    if (!ranges.empty()) {
+        pair<int, int>& lastRange = ranges.back();
+        if (start >= lastRange.first && start <= lastRange.second+MAX_DIRTY_RANGE_GAP) {
+            if (end > lastRange.second) {
+                lastRange.second = end;
+            }
+            return;
+        }
+    }
+    ranges.push_back(pair<int, int>(start, end));
+    if (ranges.size() > MAX_DIRTY_RANGES) {
+        pair<int, int> allRange = ranges[0];
+        for (unsigned i = 1; i < ranges.size(); ++i) {
+            allRange.first = min(allRange.first, ranges[i].first);
+            allRange.second = max(allRange.second, ranges[i].second);
+        }
+        ranges.clear();
+        ranges.push_back(allRange);
     }
 }
 
@@ -31,6 +31,9 @@
 
 #include <boost/shared_ptr.hpp>
 
+#include <vector>
+#include <utility>
+
 namespace avg {
 
 struct Vertex {
@@ -48,8 +51,15 @@ typedef boost::shared_ptr<VertexData> VertexDataPtr;
 #define GL_INDEX_TYPE unsigned int 
 #endif
 
+// Vertex and index data. Appending data that is identical to what was stored at the
+// same position before doesn't mark it as changed, so rebuilding unchanged geometry 
+// every frame leaves the dirty ranges empty. Dirty ranges accumulate until 
+// resetDataChanged() is called.
 class AVG_API VertexData {
 public:
+    // [start, end) pairs of vertex or index positions.
+    typedef std::vector<std::pair<int, int> > RangeList;
+
     VertexData(int reserveVerts = 0, int reserveIndexes = 0);
     virtual ~VertexData();
 
@@ -61,6 +71,8 @@ public:
             float width, float tc1=0, float tc2=1);
     void appendVertexData(const VertexDataPtr& pVertexes);
     bool hasDataChanged() const;
+    const RangeList& getDirtyVertexRanges() const;
+    const RangeList& getDirtyIndexRanges() const;
     void resetDataChanged();
     void reset();
 
@@ -82,6 +94,8 @@ protected:
 
 private:
     void grow();
+    void setIndex(int i, GL_INDEX_TYPE index);
+    static void addDirtyRange(RangeList& ranges, int start, int end);
 
     int m_NumVerts;
     int m_NumIndexes;
@@ -90,9 +104,18 @@ private:
     Vertex * m_pVertexData;
     GL_INDEX_TYPE * m_pIndexData;
 
-    bool m_bDataChanged;
+    RangeList m_DirtyVertexRanges;
+    RangeList m_DirtyIndexRanges;
 };
 
+inline void VertexData::setIndex(int i, GL_INDEX_TYPE index)
+{
+    if (m_pIndexData[i] != index) {
+        m_pIndexData[i] = index;
+        addDirtyRange(m_DirtyIndexRanges, i, i+1);
+    }
+}
+
 std::ostream& operator<<(std::ostream& os, const Vertex& v);
 
 }
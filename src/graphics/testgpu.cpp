@@ -445,9 +445,14 @@ public:
         ImageCache* pCache = ImageCache::get();
         cerr << "    Testing no cache" << endl;
         pCache->setCapacity(0, 0);
+        pCache->resetStats();
         loadImages();
         TEST(pCache->getNumCPUImages() == 0);
         TEST(pCache->getNumGPUImages() == 0);
+        const ImageCache::Stats& cpuStats = pCache->getStats(CachedImage::STORAGE_CPU);
+        TEST(cpuStats.m_NumHits == 2);
+        TEST(cpuStats.m_NumMisses == 2);
+        TEST(cpuStats.m_NumEvictions == 2);
         cerr << "    Testing CPU cache" << endl;
         pCache->setCapacity(20000, 0);
         loadImages();
@@ -22,6 +22,8 @@
 #include "GraphicsTest.h"
 #include "Bitmap.h"
 #include "BitmapLoader.h"
+#include "BitmapPool.h"
+#include "VertexData.h"
 #include "Pixel32.h"
 #include "Pixel24.h"
 #include "Pixel16.h"
@@ -620,7 +622,7 @@ private:
         unsigned char * pLine1 = pNewBmp->getPixels()+pNewBmp->getStride();
         TEST(*(PIXEL*)(pLine1) == PIXEL(0,0,9));
         TEST(*((PIXEL*)(pLine1)+1) == PIXEL(0,0,16));
-        
+
     }
     
     template<class PIXEL>
@@ -668,7 +670,7 @@ private:
         unsigned char * pLine1 = pNewBmp->getPixels()+pNewBmp->getStride();
         TEST(*(PIXEL*)(pLine1) == PIXEL(0,0,9));
         TEST(*((PIXEL*)(pLine1)+1) == PIXEL(0,0,16));
-        
+
     }
     
     template<class PIXEL>
@@ -799,7 +801,7 @@ public:
         BitmapPtr pBmp = BitmapPtr(new Bitmap(IntPoint(16,16), I8));
         FilterFill<Pixel8>(0).applyInPlace(pBmp);
         *(pBmp->getPixels()+pBmp->getStride()*7+7) = 255;
-        
+
         BitmapPtr pDestBmp = FilterBandpass(1.9,3).apply(pBmp);
         testEqual(*pDestBmp, "BandpassResult", I8);
     }
@@ -1005,6 +1007,204 @@ private:
 
 };
 
+class BitmapDiskCacheTest: public GraphicsTest {
+public:
+    BitmapDiskCacheTest()
+        : GraphicsTest("BitmapDiskCacheTest", 2)
+    {
+    }
+
+    void runTests()
+    {
+        BitmapDiskCachePtr pCache(new BitmapDiskCache("bmpdiskcache", 64*1024*1024));
+        pCache->clear();
+        TEST(pCache->getNumFiles() == 0);
+        BitmapLoader::setDiskCache(pCache);
+
+        string sFName = getTestBmpName("rgb24alpha-64x64");
+        BitmapPtr pBmp = loadBitmap(sFName);
+        TEST(pCache->getNumFiles() == 1);
+        BitmapPtr pCachedBmp = loadBitmap(sFName);
+        TEST(pCache->getNumFiles() == 1);
+        TEST(pCachedBmp->getPixelFormat() == pBmp->getPixelFormat());
+        testEqual(*pCachedBmp, *pBmp, "BitmapDiskCache", 0, 0);
+
+        // Changing the bitmap mustn't change the cache file.
+        FilterFill<Pixel32>(Pixel32(0,0,0,0)).applyInPlace(pCachedBmp);
+        pCachedBmp = loadBitmap(sFName);
+        testEqual(*pCachedBmp, *pBmp, "BitmapDiskCache", 0, 0);
+
+        // Different pixel formats are cached separately.
+        pBmp = loadBitmap(sFName, R8G8B8);
+        TEST(pCache->getNumFiles() == 2);
+        pCachedBmp = loadBitmap(sFName, R8G8B8);
+        TEST(pCachedBmp->getPixelFormat() == R8G8B8);
+        testEqual(*pCachedBmp, *pBmp, "BitmapDiskCacheRGB", 0, 0);
+
+        // The cache contents survive a restart.
+        pCache = BitmapDiskCachePtr(new BitmapDiskCache("bmpdiskcache", 64*1024*1024));
+        TEST(pCache->getNumFiles() == 2);
+        BitmapLoader::setDiskCache(pCache);
+
+        // Eviction
+        pCache->setMaxSize(pCache->getSize()-1);
+        TEST(pCache->getNumFiles() == 1);
+        TEST(pCache->getSize() <= pCache->getMaxSize());
+
+        pCache->clear();
+        TEST(pCache->getNumFiles() == 0);
+        TEST(pCache->prewarm(sFName));
+        TEST(!pCache->prewarm(sFName));
+        TEST(pCache->getNumFiles() == 1);
+
+        pCache->clear();
+        BitmapLoader::setDiskCache(BitmapDiskCachePtr());
+    }
+};
+
+class VertexDataTest: public Test {
+public:
+    VertexDataTest()
+        : Test("VertexDataTest", 2)
+    {
+    }
+
+    void runTests()
+    {
+        VertexData vd;
+        addQuads(vd, 10, 0);
+        TEST(vd.hasDataChanged());
+        vd.resetDataChanged();
+
+        // Rebuilding identical data doesn't produce dirty ranges.
+        vd.reset();
+        addQuads(vd, 10, 0);
+        TEST(!vd.hasDataChanged());
+        TEST(vd.getNumVerts() == 40 && vd.getNumIndexes() == 60);
+
+        // Moving one quad only dirties its vertexes.
+        vd.reset();
+        addQuads(vd, 10, 5);
+        TEST(vd.getDirtyVertexRanges().size() == 1);
+        TEST(vd.getDirtyVertexRanges()[0] == std::make_pair(20, 24));
+        TEST(vd.getDirtyIndexRanges().empty());
+
+        // Ranges accumulate until they are reset.
+        vd.reset();
+        addQuads(vd, 10, 0);
+        TEST(vd.getDirtyVertexRanges()[0] == std::make_pair(20, 24));
+        vd.resetDataChanged();
+        TEST(!vd.hasDataChanged());
+
+        // Fewer quads: no new data, so nothing is dirty.
+        vd.reset();
+        addQuads(vd, 9, 0);
+        TEST(!vd.hasDataChanged());
+
+        // Growing the array keeps the old contents.
+        VertexData smallVD(4, 6);
+        addQuads(smallVD, 100, 0);
+        smallVD.resetDataChanged();
+        smallVD.reset();
+        addQuads(smallVD, 100, 0);
+        TEST(!smallVD.hasDataChanged());
+
+        // Many scattered changes collapse into few ranges.
+        VertexData bigVD;
+        addQuads(bigVD, 2000, 0);
+        bigVD.resetDataChanged();
+        bigVD.reset();
+        for (int i = 0; i < 2000; ++i) {
+            addQuad(bigVD, i, (i%50 == 0)? 1.f : 0.f);
+        }
+        TEST(bigVD.getDirtyVertexRanges().size() <= 32);
+        TEST(bigVD.getDirtyVertexRanges().front().first == 0);
+        TEST(bigVD.getDirtyVertexRanges().back().second == 1950*4+4);
+    }
+
+private:
+    void addQuads(VertexData& vd, int numQuads, int movedQuad)
+    {
+        for (int i = 0; i < numQuads; ++i) {
+            float offset = 0;
+            if (movedQuad != 0 && i == movedQuad) {
+                offset = 1;
+            }
+            addQuad(vd, i, offset);
+        }
+    }
+
+    void addQuad(VertexData& vd, int i, float offset)
+    {
+        int curVertex = vd.getNumVerts();
+        glm::vec2 pos(i*10+offset, 0);
+        vd.appendPos(pos, glm::vec2(0,0));
+        vd.appendPos(pos+glm::vec2(10,0), glm::vec2(1,0));
+        vd.appendPos(pos+glm::vec2(0,10), glm::vec2(0,1));
+        vd.appendPos(pos+glm::vec2(10,10), glm::vec2(1,1));
+        vd.appendQuadIndexes(curVertex, curVertex+1, curVertex+2, curVertex+3);
+    }
+};
+
+class BitmapPoolTest: public GraphicsTest {
+public:
+    BitmapPoolTest()
+        : GraphicsTest("BitmapPoolTest", 2)
+    {
+    }
+
+    void runTests()
+    {
+        IntPoint size(64, 32);
+        int memNeeded = Bitmap(size, I8).getMemNeeded();
+        BitmapPoolPtr pPool(new BitmapPool(4*memNeeded));
+        BitmapPtr pBmp = pPool->getBitmap(size, I8);
+        TEST(pBmp->getSize() == size && pBmp->getPixelFormat() == I8);
+        TEST(pPool->getStats().m_NumMisses == 1);
+        TEST(pPool->getMemInUse() == memNeeded);
+        Bitmap* pRawBmp = pBmp.get();
+
+        // Released bitmaps return to the pool and are reused.
+        pBmp = BitmapPtr();
+        TEST(pPool->getNumBitmaps() == 1);
+        TEST(pPool->getMemUsed() == memNeeded);
+        TEST(pPool->getMemInUse() == 0);
+        pBmp = pPool->getBitmap(size, I8);
+        TEST(pBmp.get() == pRawBmp);
+        TEST(pPool->getStats().m_NumHits == 1);
+        TEST(pPool->getNumBitmaps() == 0);
+
+        // Bitmaps are keyed by size and pixel format.
+        BitmapPtr pOtherBmp = pPool->getBitmap(size, A8);
+        TEST(pOtherBmp.get() != pRawBmp);
+        TEST(pPool->getStats().m_NumMisses == 2);
+
+        // Idle memory is capped. The least recently used size is evicted first.
+        vector<BitmapPtr> pBmps;
+        for (int i = 0; i < 5; ++i) {
+            pBmps.push_back(pPool->getBitmap(size, I8));
+        }
+        pOtherBmp = BitmapPtr();
+        pBmps.clear();
+        TEST(pPool->getNumBitmaps() == 4);
+        TEST(pPool->getMemUsed() <= pPool->getMaxMem());
+        TEST(pPool->getStats().m_NumEvictions == 2);
+        pPool->resetStats();
+        pOtherBmp = pPool->getBitmap(size, A8);
+        TEST(pPool->getStats().m_NumMisses == 1);
+
+        pPool->setMaxMem(memNeeded);
+        TEST(pPool->getNumBitmaps() == 1);
+        pPool->clear();
+        TEST(pPool->getNumBitmaps() == 0);
+        TEST(pPool->getMemUsed() == 0);
+
+        // Bitmaps may outlive their pool.
+        pPool = BitmapPoolPtr();
+        pBmp = BitmapPtr();
+    }
+};
+
 class GraphicsTestSuite: public TestSuite {
 public:
     GraphicsTestSuite() 
@@ -1036,6 +1236,9 @@ public:
         addTest(TestPtr(new FilterAlphaTest));
         addTest(TestPtr(new FilterResizeBilinearTest));
         addTest(TestPtr(new FilterUnmultiplyAlphaTest));
+        addTest(TestPtr(new BitmapDiskCacheTest));
+        addTest(TestPtr(new BitmapPoolTest));
+        addTest(TestPtr(new VertexDataTest));
     }
 };
 
@@ -40,39 +40,77 @@ using namespace std;
 
 namespace avg {
 
-Blob::Blob(const Run& run)
-{
-    ObjectCounter::get()->incRef(&typeid(*this));
-    m_Runs.reserve(50);
-    m_Runs.push_back(run);
-    m_pParent = BlobPtr();
-
-    m_bStatsAvailable = false;
-}
-
-Blob::~Blob() 
-{
-    ObjectCounter::get()->decRef(&typeid(*this));
+BlobMoments::BlobMoments()
+    : m_Area(0),
+      m_SumX(0),
+      m_SumY(0),
+      m_SumXX(0),
+      m_SumYY(0),
+      m_SumXY(0)
+{
+}
+
+void BlobMoments::addRun(const Run& run)
+{
+    long long startCol = run.m_StartCol;
+    long long endCol = run.m_EndCol;
+    long long row = run.m_Row;
+    long long len = endCol-startCol;
+    // Closed forms for sum(x) and sum(x^2) over x = startCol..endCol-1.
+    long long sumX = (startCol+endCol-1)*len/2;
+    long long sumXX = ((endCol-1)*endCol*(2*endCol-1) 
+            - (startCol-1)*startCol*(2*startCol-1))/6;
+    if (m_Area == 0) {
+        m_BoundingBox = IntRect(run.m_StartCol, run.m_Row, run.m_EndCol, run.m_Row);
+    } else {
+        m_BoundingBox.tl.x = min(m_BoundingBox.tl.x, run.m_StartCol);
+        m_BoundingBox.tl.y = min(m_BoundingBox.tl.y, run.m_Row);
+        m_BoundingBox.br.x = max(m_BoundingBox.br.x, run.m_EndCol);
+        m_BoundingBox.br.y = max(m_BoundingBox.br.y, run.m_Row);
+    }
+    m_Area += len;
+    m_SumX += sumX;
+    m_SumY += row*len;
+    m_SumXX += sumXX;
+    m_SumYY += row*row*len;
+    m_SumXY += row*sumX;
 }
 
-RunArray *Blob::getRuns()
+void BlobMoments::add(const BlobMoments& other)
 {
-    return &m_Runs;
-}
-
-void Blob::addRun(const Run& run)
+    if (other.m_Area == 0) {
+        return;
+    }
+    if (m_Area == 0) {
+        *this = other;
+        return;
+    }
+    m_BoundingBox.tl.x = min(m_BoundingBox.tl.x, other.m_BoundingBox.tl.x);
+    m_BoundingBox.tl.y = min(m_BoundingBox.tl.y, other.m_BoundingBox.tl.y);
+    m_BoundingBox.br.x = max(m_BoundingBox.br.x, other.m_BoundingBox.br.x);
+    m_BoundingBox.br.y = max(m_BoundingBox.br.y, other.m_BoundingBox.br.y);
+    m_Area += other.m_Area;
+    m_SumX += other.m_SumX;
+    m_SumY += other.m_SumY;
+    m_SumXX += other.m_SumXX;
+    m_SumYY += other.m_SumYY;
+    m_SumXY += other.m_SumXY;
+}
+
+Blob::Blob(RunArrayPtr pRunPool, int firstRun, int endRun, 
+        const BlobMoments& moments)
+    : m_pRunPool(pRunPool),
+      m_RunsBegin(pRunPool->begin()+firstRun),
+      m_RunsEnd(pRunPool->begin()+endRun),
+      m_bStatsAvailable(false)
 {
-    AVG_ASSERT((m_Runs.end()-1)->m_Row <= run.m_Row);
-    m_Runs.push_back(run);
+    ObjectCounter::get()->incRef(&typeid(*this));
+    calcStats(moments);
 }
 
-
-void Blob::merge(const BlobPtr& pOtherBlob)
+Blob::~Blob() 
 {
-    AVG_ASSERT(pOtherBlob);
-    RunArray * pOtherRuns = pOtherBlob->getRuns();
-    m_Runs.insert(m_Runs.end(), pOtherRuns->begin(), pOtherRuns->end());
-    pOtherRuns->clear();
+    ObjectCounter::get()->decRef(&typeid(*this));
 }
 
 void Blob::render(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, Pixel32 color, 
@@ -87,7 +125,7 @@ void Blob::render(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, Pixel32 color,
     unsigned char *pDest;
     unsigned char *pColor = (unsigned char *)(&color);
     int intensityScale = 2*256/(std::max(max-min, 1));
-    for (RunArray::iterator it = m_Runs.begin(); it != m_Runs.end(); ++it) {
+    for (RunArray::iterator it = m_RunsBegin; it != m_RunsEnd; ++it) {
         AVG_ASSERT(it->m_Row < pSrcBmp->getSize().y);
         AVG_ASSERT(it->m_StartCol >= 0);
         AVG_ASSERT(it->m_EndCol <= pSrcBmp->getSize().x);
@@ -144,7 +182,7 @@ void Blob::render(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, Pixel32 color,
         
 bool Blob::contains(IntPoint pt)
 {
-    for (RunArray::iterator it = m_Runs.begin(); it != m_Runs.end(); ++it) {
+    for (RunArray::iterator it = m_RunsBegin; it != m_RunsEnd; ++it) {
         if (it->m_Row == pt.y && it->m_StartCol <= pt.x && it->m_EndCol > pt.x) {
             return true;
         } 
@@ -152,12 +190,15 @@ bool Blob::contains(IntPoint pt)
     return false;
 }
 
-void Blob::calcStats()
+void Blob::calcStats(const BlobMoments& moments)
 {
-    m_Center = calcCenter();
+    double area = double(moments.m_Area);
+    double centerX = moments.m_SumX/area;
+    double centerY = moments.m_SumY/area;
+    m_Center = glm::vec2(float(centerX), float(centerY));
     m_EstimatedNextCenter = m_Center;
-    m_Area = float(calcArea());
-    m_BoundingBox = calcBBox();
+    m_Area = float(area);
+    m_BoundingBox = moments.m_BoundingBox;
     /*
        more useful numbers that can be calculated from c
        see e.g. 
@@ -167,31 +208,15 @@ void Blob::calcStats()
        Inertia = c_xx + c_yy
        Eccentricity = ...
        */
-    float c_xx = 0;  // Variance in x direction
-    float c_yy =0;   // Variance in y direction
-    float c_xy = 0;  // Covariance
-    float ll=0;
+    // Variance in x and y direction and covariance.
+    float c_xx = float(moments.m_SumXX/area - centerX*centerX);
+    float c_yy = float(moments.m_SumYY/area - centerY*centerY);
+    float c_xy = float(moments.m_SumXY/area - centerX*centerY);
     float l1;
     float l2;
     float tmp_x;
     float tmp_y;
     float mag;
-    for (RunArray::iterator r = m_Runs.begin(); r != m_Runs.end();++r) {
-        //This is the evaluated expression for the variance when using runs...
-        ll = float(r->length());
-        c_yy += ll* (r->m_Row- m_Center.y)*(r->m_Row- m_Center.y);
-        c_xx += ( (r->m_EndCol-1) * r->m_EndCol * (2*r->m_EndCol-1) 
-                - (r->m_StartCol-1) * r->m_StartCol * (2*r->m_StartCol -1))/6.f 
-            - m_Center.x * ((r->m_EndCol-1)*r->m_EndCol-(r->m_StartCol-1)*r->m_StartCol)
-            + ll* m_Center.x*m_Center.x;
-        c_xy += (r->m_Row-m_Center.y)*0.5f*( (r->m_EndCol-1)*r->m_EndCol
-                - (r->m_StartCol-1)*r->m_StartCol) 
-                + ll *(m_Center.x*m_Center.y - m_Center.x*r->m_Row);
-    }
-
-    c_xx /= m_Area;
-    c_yy /= m_Area;
-    c_xy /= m_Area;
 
     m_Inertia = c_xx + c_yy;
 
@@ -324,46 +349,10 @@ const BlobPtr Blob::getFirstRelated()
     }
 }
 
-glm::vec2 Blob::calcCenter()
-{
-    glm::vec2 center(0,0);
-    float c = 0;
-    for (RunArray::iterator r = m_Runs.begin(); r != m_Runs.end(); ++r) {
-        center += r->m_Center * float(r->length());
-        c += r->length();
-    }
-    center = center/c;
-    return center;
-}
-
-IntRect Blob::calcBBox()
-{
-    int x1 = INT_MAX;
-    int y1 = INT_MAX;
-    int x2 = 0;
-    int y2 = 0;
-    for (RunArray::iterator r = m_Runs.begin(); r!=m_Runs.end(); ++r) {
-        x1 = std::min(x1, r->m_StartCol);
-        y1 = std::min(y1, r->m_Row);
-        x2 = std::max(x2, r->m_EndCol);
-        y2 = std::max(y2, r->m_Row);
-    }
-    return IntRect(x1, y1, x2, y2);
-}
-
-int Blob::calcArea()
-{
-    int res = 0;
-    for (RunArray::iterator r = m_Runs.begin(); r != m_Runs.end(); ++r) {
-        res+= r->length();
-    }
-    return res;
-}
-
 void Blob::initRowPositions()
 {
     int offset = m_BoundingBox.tl.y;
-    RunArray::iterator it = m_Runs.begin();
+    RunArray::iterator it = m_RunsBegin;
     for (int i = 0; i < m_BoundingBox.height(); i++) {
         while (it->m_Row-offset < i) {
             it++;
@@ -436,18 +425,12 @@ IntPoint Blob::findNeighborInside(const IntPoint& pt, int& dir)
     return pt;
 }
 
-bool runIsLess(const Run& r1, const Run& r2)
-{
-    return r1.m_Row < r2.m_Row;
-}
-
 void Blob::calcContour(int precision)
 {
-    sort(m_Runs.begin(), m_Runs.end(), runIsLess);
     initRowPositions();
     
     // Moore Neighbor Tracing.
-    IntPoint boundaryPt(m_Runs[0].m_StartCol, m_Runs[0].m_Row);
+    IntPoint boundaryPt(m_RunsBegin->m_StartCol, m_RunsBegin->m_Row);
     IntPoint firstPt(boundaryPt);
     int i = precision;
     int dir = 1;
@@ -470,7 +453,7 @@ bool Blob::ptIsInBlob(const IntPoint& pt)
 {
     if (m_BoundingBox.contains(pt)) {
         RunArray::iterator it = m_RowPositions[pt.y-m_BoundingBox.tl.y];
-        while (it->m_Row == pt.y) {
+        while (it != m_RunsEnd && it->m_Row == pt.y) {
             if (pt.x >= it->m_StartCol && pt.x < it->m_EndCol) {
                 return true;
             }
@@ -480,69 +463,11 @@ bool Blob::ptIsInBlob(const IntPoint& pt)
     return false;
 }
 
-bool areConnected(const Run & run1, const Run & run2)
-{
-    if (run1.m_StartCol > run2.m_StartCol) {
-        return run2.m_EndCol > run1.m_StartCol;
-    } else {
-        return run1.m_EndCol > run2.m_StartCol;
-    }
-}
-
-void storeRuns(BlobVectorPtr pBlobs, RunArray* pUpperRuns, RunArray* pLowerRuns)
-{
-    for (RunArray::iterator run1_it = pUpperRuns->begin(); run1_it != pUpperRuns->end();
-            ++run1_it)
-    {
-        for (RunArray::iterator run2_it = pLowerRuns->begin(); 
-                run2_it != pLowerRuns->end(); ++run2_it)
-        {
-            if (run2_it->m_StartCol > run1_it->m_EndCol) {
-                break;
-            }
-            if (areConnected(*run1_it, *run2_it)) {
-                BlobPtr pBlob = run1_it->m_pBlob.lock();
-                while (pBlob->m_pParent) {
-                    pBlob = pBlob->m_pParent;
-                }
-                if (!(run2_it->m_pBlob.expired())) {
-                    BlobPtr c_blob = run2_it->m_pBlob.lock();
-                    while (c_blob->m_pParent) {
-                        c_blob = c_blob->m_pParent;
-                    }
-                    if (c_blob != pBlob) {
-                        // When we merge, make sure the smaller blob is merged
-                        // into the bigger one to avoid a speed hit.
-                        if (pBlob->getRuns()->size() > c_blob->getRuns()->size()) {
-                            pBlob->merge(c_blob); //destroys c_blobs runs_list
-                            c_blob->m_pParent = pBlob;
-                        } else {
-                            c_blob->merge(pBlob); 
-                            pBlob->m_pParent = c_blob;
-                        }
-                    }
-                } else {
-                    run2_it->m_pBlob = pBlob;
-                    pBlob->addRun(*run2_it);
-                }
-            }
-        }
-    }
-    for (RunArray::iterator run2_it = pLowerRuns->begin(); run2_it != pLowerRuns->end();
-            ++run2_it)
-    {
-        if (run2_it->m_pBlob.expired()) {
-            BlobPtr pBlob = BlobPtr(new Blob(*run2_it));
-            pBlobs->push_back(pBlob);
-            run2_it->m_pBlob = pBlob;
-        }
-    }
-}
-
 void findRunsInLine(BitmapPtr pBmp, int y, RunArray* pRuns, unsigned char threshold)
 {
     int runStart=0;
     int runStop=0;
+    unsigned lineStart = pRuns->size();
     const unsigned char * pPixel = pBmp->getPixels()+y*pBmp->getStride();
     bool bIsInRun = *pPixel > threshold;
 
@@ -559,7 +484,7 @@ void findRunsInLine(BitmapPtr pBmp, int y, RunArray* pRuns, unsigned char thresh
                 }
             } else {
                 runStop = x - 1;
-                if (runStop-runStart == 0 && !pRuns->empty()) {
+                if (runStop-runStart == 0 && pRuns->size() > lineStart) {
                     // Single dark pixel: ignore the pixel, revive the last run.
                     runStart = pRuns->back().m_StartCol;
                     pRuns->pop_back();
@@ -576,39 +501,90 @@ void findRunsInLine(BitmapPtr pBmp, int y, RunArray* pRuns, unsigned char thresh
     }
 }
 
+int findLabelRoot(vector<int>& parents, int label)
+{
+    while (parents[label] != label) {
+        // Path halving
+        parents[label] = parents[parents[label]];
+        label = parents[label];
+    }
+    return label;
+}
+
 BlobVectorPtr findConnectedComponents(BitmapPtr pBmp, unsigned char threshold)
 {
     AVG_ASSERT(pBmp->getPixelFormat() == I8);
-    BlobVectorPtr pBlobs = BlobVectorPtr(new BlobVector);
     IntPoint size = pBmp->getSize();
-    RunArray* pUpperRuns = new RunArray();
-    RunArray* pLowerRuns = new RunArray();
-
-    int y = 0;
-    findRunsInLine(pBmp, 0, pUpperRuns, threshold);
-    for (RunArray::iterator it = pUpperRuns->begin(); it!=pUpperRuns->end(); ++it) {
-        BlobPtr pBlob = BlobPtr(new Blob(*it));
-        pBlobs->push_back(pBlob);
-        it->m_pBlob = pBlob;
+
+    // Single pass: Find the runs in each line and connect them to the overlapping
+    // runs of the line above using union-find on labels. Moments are accumulated 
+    // in the root label as we go.
+    RunArray runs;
+    runs.reserve(size.y*4);
+    vector<int> runLabels;
+    vector<int> parents;
+    vector<BlobMoments> moments;
+    int upperStart = 0;
+    int upperEnd = 0;
+    for (int y = 0; y < size.y; y++) {
+        findRunsInLine(pBmp, y, &runs, threshold);
+        int lowerEnd = int(runs.size());
+        runLabels.resize(lowerEnd);
+        int upperRun = upperStart;
+        for (int i = upperEnd; i < lowerEnd; ++i) {
+            const Run& run = runs[i];
+            while (upperRun < upperEnd && runs[upperRun].m_EndCol <= run.m_StartCol) {
+                upperRun++;
+            }
+            int label = -1;
+            // Every upper run that starts before this run ends overlaps it.
+            for (int j = upperRun; j < upperEnd && runs[j].m_StartCol < run.m_EndCol;
+                    ++j)
+            {
+                int upperLabel = findLabelRoot(parents, runLabels[j]);
+                if (label == -1) {
+                    label = upperLabel;
+                } else if (upperLabel != label) {
+                    parents[upperLabel] = label;
+                    moments[label].add(moments[upperLabel]);
+                }
+            }
+            if (label == -1) {
+                label = int(parents.size());
+                parents.push_back(label);
+                moments.push_back(BlobMoments());
+            }
+            moments[label].addRun(run);
+            runLabels[i] = label;
+        }
+        upperStart = upperEnd;
+        upperEnd = lowerEnd;
     }
-    
-    for (y = 1; y < size.y; y++) {
-        findRunsInLine(pBmp, y, pLowerRuns, threshold);
-        storeRuns(pBlobs, pUpperRuns, pLowerRuns);
-        RunArray* pTmpRuns = pUpperRuns;
-        pUpperRuns = pLowerRuns;
-        pLowerRuns = pTmpRuns;
-        pLowerRuns->clear();
+
+    // Sort the runs by blob into one pool that all blobs share. Runs stay ordered 
+    // by row within each blob.
+    int numLabels = int(parents.size());
+    vector<int> blobStart(numLabels+1, 0);
+    for (unsigned i = 0; i < runs.size(); ++i) {
+        runLabels[i] = findLabelRoot(parents, runLabels[i]);
+        blobStart[runLabels[i]+1]++;
+    }
+    for (int i = 0; i < numLabels; ++i) {
+        blobStart[i+1] += blobStart[i];
     }
+    RunArrayPtr pRunPool(new RunArray(runs.size(), Run(0, 0, 0)));
+    vector<int> insertPos(blobStart.begin(), blobStart.end()-1);
+    for (unsigned i = 0; i < runs.size(); ++i) {
+        (*pRunPool)[insertPos[runLabels[i]]++] = runs[i];
+    }
+
     BlobVectorPtr pResultBlobs = BlobVectorPtr(new BlobVector);
-    for (BlobVector::iterator it = pBlobs->begin(); it != pBlobs->end(); ++it) {
-        if (!(*it)->m_pParent) {
-            pResultBlobs->push_back(*it);
-            (*it)->calcStats();
+    for (int i = 0; i < numLabels; ++i) {
+        if (parents[i] == i) {
+            pResultBlobs->push_back(BlobPtr(new Blob(pRunPool, blobStart[i], 
+                    blobStart[i+1], moments[i])));
         }
     }
-    delete pUpperRuns;
-    delete pLowerRuns;
     return pResultBlobs;
 }
 
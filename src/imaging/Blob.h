@@ -47,21 +47,36 @@ typedef std::vector<BlobWeakPtr> BlobWeakPtrVector;
 typedef boost::shared_ptr<BlobVector> BlobVectorPtr;
 typedef std::vector<IntPoint> ContourSeq;
 
+// Pixel moments of a set of runs. findConnectedComponents() accumulates these while
+// labelling, so blob statistics don't need another pass over the runs.
+struct AVG_API BlobMoments
+{
+    BlobMoments();
+    void addRun(const Run& run);
+    void add(const BlobMoments& other);
+
+    long long m_Area;
+    long long m_SumX;
+    long long m_SumY;
+    long long m_SumXX;
+    long long m_SumYY;
+    long long m_SumXY;
+    IntRect m_BoundingBox; // br.y is the last row, not one past it.
+};
+
 class AVG_API Blob
 {
     public:
-        Blob(const Run& run);
+        // The blob uses the runs in [firstRun, endRun) of the (shared) run pool.
+        Blob(RunArrayPtr pRunPool, int firstRun, int endRun, 
+                const BlobMoments& moments);
         ~Blob();
 
-        void addRun(const Run& run);
-        void merge(const BlobPtr& other);
-        RunArray* getRuns();
         void render(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, Pixel32 Color, 
                 int Min, int Max, bool bFinger, bool bMarkCenter, 
                 Pixel32 CenterColor= Pixel32(0x00, 0x00, 0xFF, 0xFF));
         bool contains(IntPoint pt);
 
-        void calcStats();
         void calcContour(int Precision);
         ContourSeq getContour();
 
@@ -81,18 +96,16 @@ class AVG_API Blob
         void addRelated(BlobPtr pBlob);
         const BlobPtr getFirstRelated(); 
 
-        BlobPtr m_pParent;
-
     private:
         Blob(const Blob &);
-        glm::vec2 calcCenter();
-        IntRect calcBBox();
-        int calcArea();
+        void calcStats(const BlobMoments& moments);
         void initRowPositions();
         IntPoint findNeighborInside(const IntPoint& Pt, int& Dir);
         bool ptIsInBlob(const IntPoint& Pt);
 
-        RunArray m_Runs; // This array is unsorted until contours are calculated.
+        RunArrayPtr m_pRunPool;
+        RunArray::iterator m_RunsBegin; // Runs are sorted by row.
+        RunArray::iterator m_RunsEnd;
         std::vector<RunArray::iterator> m_RowPositions;
         BlobWeakPtrVector m_RelatedBlobs; // For fingers, this contains the hand.
                                           // For hands, this contains the fingers.
@@ -0,0 +1,280 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "BlobMatcher.h"
+
+#include "../base/Exception.h"
+
+#include "../glm/gtx/norm.hpp"
+
+#include <map>
+#include <algorithm>
+#include <limits>
+#include <cmath>
+
+using namespace std;
+
+namespace avg {
+
+namespace {
+
+struct Candidate {
+    Candidate(float dist2, int newIdx, int oldIdx)
+        : m_Dist2(dist2),
+          m_NewIdx(newIdx),
+          m_OldIdx(oldIdx)
+    {}
+
+    bool operator <(const Candidate& other) const
+    {
+        if (m_Dist2 != other.m_Dist2) {
+            return m_Dist2 < other.m_Dist2;
+        }
+        if (m_NewIdx != other.m_NewIdx) {
+            return m_NewIdx < other.m_NewIdx;
+        }
+        return m_OldIdx < other.m_OldIdx;
+    }
+
+    float m_Dist2;
+    int m_NewIdx;
+    int m_OldIdx;
+};
+
+typedef map<long long, vector<int> > BlobGrid;
+
+long long getCellKey(int x, int y)
+{
+    return ((long long)x << 32) ^ (long long)(unsigned int)y;
+}
+
+glm::ivec2 getCell(const glm::vec2& pt, float cellSize)
+{
+    return glm::ivec2(int(floor(pt.x/cellSize)), int(floor(pt.y/cellSize)));
+}
+
+void findCandidates(const BlobVector& oldBlobs, const BlobVector& newBlobs, 
+        float maxDist, vector<Candidate>& candidates)
+{
+    float cellSize = max(maxDist, 1.0f);
+    BlobGrid grid;
+    for (unsigned i = 0; i < oldBlobs.size(); ++i) {
+        glm::ivec2 cell = getCell(oldBlobs[i]->getEstimatedNextCenter(), cellSize);
+        grid[getCellKey(cell.x, cell.y)].push_back(i);
+    }
+    float maxDist2 = maxDist*maxDist;
+    for (unsigned i = 0; i < newBlobs.size(); ++i) {
+        const glm::vec2& center = newBlobs[i]->getCenter();
+        glm::ivec2 cell = getCell(center, cellSize);
+        for (int y = cell.y-1; y <= cell.y+1; ++y) {
+            for (int x = cell.x-1; x <= cell.x+1; ++x) {
+                BlobGrid::const_iterator it = grid.find(getCellKey(x, y));
+                if (it == grid.end()) {
+                    continue;
+                }
+                const vector<int>& cellBlobs = it->second;
+                for (unsigned j = 0; j < cellBlobs.size(); ++j) {
+                    int oldIdx = cellBlobs[j];
+                    float dist2 = glm::distance2(center,
+                            oldBlobs[oldIdx]->getEstimatedNextCenter());
+                    if (dist2 <= maxDist2) {
+                        candidates.push_back(Candidate(dist2, i, oldIdx));
+                    }
+                }
+            }
+        }
+    }
+}
+
+void matchGreedy(const BlobVector& oldBlobs, const BlobVector& newBlobs,
+        vector<Candidate>& candidates, BlobMatchVector& matches)
+{
+    sort(candidates.begin(), candidates.end());
+    vector<bool> bNewMatched(newBlobs.size(), false);
+    vector<bool> bOldMatched(oldBlobs.size(), false);
+    for (unsigned i = 0; i < candidates.size(); ++i) {
+        const Candidate& c = candidates[i];
+        if (!bNewMatched[c.m_NewIdx] && !bOldMatched[c.m_OldIdx]) {
+            bNewMatched[c.m_NewIdx] = true;
+            bOldMatched[c.m_OldIdx] = true;
+            matches.push_back(BlobMatch(oldBlobs[c.m_OldIdx], newBlobs[c.m_NewIdx]));
+        }
+    }
+}
+
+int findRoot(vector<int>& parents, int i)
+{
+    while (parents[i] != i) {
+        parents[i] = parents[parents[i]];
+        i = parents[i];
+    }
+    return i;
+}
+
+// Hungarian algorithm (shortest augmenting paths with potentials) for a square
+// cost matrix. Returns the column assigned to each row.
+vector<int> solveAssignment(const vector<double>& costs, int n)
+{
+    const double inf = numeric_limits<double>::max();
+    // 1-based arrays, index 0 is the virtual start column.
+    vector<double> u(n+1, 0.0);
+    vector<double> v(n+1, 0.0);
+    vector<int> colRow(n+1, 0);
+    vector<int> way(n+1, 0);
+    for (int row = 1; row <= n; ++row) {
+        colRow[0] = row;
+        int col0 = 0;
+        vector<double> minv(n+1, inf);
+        vector<bool> bUsed(n+1, false);
+        do {
+            bUsed[col0] = true;
+            int row0 = colRow[col0];
+            double delta = inf;
+            int col1 = 0;
+            for (int col = 1; col <= n; ++col) {
+                if (!bUsed[col]) {
+                    double cur = costs[(row0-1)*n+col-1] - u[row0] - v[col];
+                    if (cur < minv[col]) {
+                        minv[col] = cur;
+                        way[col] = col0;
+                    }
+                    if (minv[col] < delta) {
+                        delta = minv[col];
+                        col1 = col;
+                    }
+                }
+            }
+            for (int col = 0; col <= n; ++col) {
+                if (bUsed[col]) {
+                    u[colRow[col]] += delta;
+                    v[col] -= delta;
+                } else {
+                    minv[col] -= delta;
+                }
+            }
+            col0 = col1;
+        } while (colRow[col0] != 0);
+        do {
+            int col1 = way[col0];
+            colRow[col0] = colRow[col1];
+            col0 = col1;
+        } while (col0 != 0);
+    }
+    vector<int> rowCol(n, -1);
+    for (int col = 1; col <= n; ++col) {
+        if (colRow[col] != 0) {
+            rowCol[colRow[col]-1] = col-1;
+        }
+    }
+    return rowCol;
+}
+
+void matchOptimal(const BlobVector& oldBlobs, const BlobVector& newBlobs,
+        const vector<Candidate>& candidates, BlobMatchVector& matches)
+{
+    // Old and new blobs that share candidate pairs form clusters that can be solved
+    // independently. Indices < numNew are new blobs, the rest are old blobs.
+    int numNew = int(newBlobs.size());
+    vector<int> parents(newBlobs.size()+oldBlobs.size());
+    for (unsigned i = 0; i < parents.size(); ++i) {
+        parents[i] = i;
+    }
+    for (unsigned i = 0; i < candidates.size(); ++i) {
+        int root1 = findRoot(parents, candidates[i].m_NewIdx);
+        int root2 = findRoot(parents, numNew+candidates[i].m_OldIdx);
+        if (root1 != root2) {
+            parents[max(root1, root2)] = min(root1, root2);
+        }
+    }
+    map<int, vector<Candidate> > clusters;
+    for (unsigned i = 0; i < candidates.size(); ++i) {
+        int root = findRoot(parents, candidates[i].m_NewIdx);
+        clusters[root].push_back(candidates[i]);
+    }
+
+    for (map<int, vector<Candidate> >::iterator it = clusters.begin();
+            it != clusters.end(); ++it)
+    {
+        const vector<Candidate>& clusterCands = it->second;
+        if (clusterCands.size() == 1) {
+            const Candidate& c = clusterCands[0];
+            matches.push_back(BlobMatch(oldBlobs[c.m_OldIdx], newBlobs[c.m_NewIdx]));
+            continue;
+        }
+        // Map blob indices to local rows (new blobs) and columns (old blobs).
+        map<int, int> rows;
+        map<int, int> cols;
+        vector<int> rowBlobs;
+        vector<int> colBlobs;
+        double sumCosts = 0;
+        for (unsigned i = 0; i < clusterCands.size(); ++i) {
+            const Candidate& c = clusterCands[i];
+            if (rows.insert(make_pair(c.m_NewIdx, int(rowBlobs.size()))).second) {
+                rowBlobs.push_back(c.m_NewIdx);
+            }
+            if (cols.insert(make_pair(c.m_OldIdx, int(colBlobs.size()))).second) {
+                colBlobs.push_back(c.m_OldIdx);
+            }
+            sumCosts += c.m_Dist2;
+        }
+        // Non-candidate pairs cost more than all real pairs together, so the 
+        // solution contains as many real pairs as possible.
+        double forbiddenCost = sumCosts+1;
+        int n = int(max(rowBlobs.size(), colBlobs.size()));
+        vector<double> costs(n*n, forbiddenCost);
+        for (unsigned i = 0; i < clusterCands.size(); ++i) {
+            const Candidate& c = clusterCands[i];
+            costs[rows[c.m_NewIdx]*n + cols[c.m_OldIdx]] = c.m_Dist2;
+        }
+        vector<int> rowCol = solveAssignment(costs, n);
+        for (int row = 0; row < int(rowBlobs.size()); ++row) {
+            int col = rowCol[row];
+            if (col < int(colBlobs.size()) && costs[row*n+col] < forbiddenCost) {
+                matches.push_back(BlobMatch(oldBlobs[colBlobs[col]], 
+                        newBlobs[rowBlobs[row]]));
+            }
+        }
+    }
+}
+
+}
+
+BlobMatchVector matchBlobs(const BlobVector& oldBlobs, const BlobVector& newBlobs, 
+        float maxDist, BlobMatchMode mode)
+{
+    vector<Candidate> candidates;
+    findCandidates(oldBlobs, newBlobs, maxDist, candidates);
+    BlobMatchVector matches;
+    switch (mode) {
+        case BLOB_MATCH_GREEDY:
+            matchGreedy(oldBlobs, newBlobs, candidates, matches);
+            break;
+        case BLOB_MATCH_OPTIMAL:
+            matchOptimal(oldBlobs, newBlobs, candidates, matches);
+            break;
+        default:
+            AVG_ASSERT(false);
+    }
+    return matches;
+}
+
+}
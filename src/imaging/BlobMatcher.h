@@ -0,0 +1,56 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _BlobMatcher_H_
+#define _BlobMatcher_H_
+
+#include "../api.h"
+#include "Blob.h"
+
+#include <vector>
+#include <utility>
+
+namespace avg {
+
+enum BlobMatchMode {
+    // Repeatedly pair the closest remaining old and new blobs.
+    BLOB_MATCH_GREEDY,
+    // Maximize the number of pairs, then minimize the sum of squared distances.
+    BLOB_MATCH_OPTIMAL
+};
+
+// (old blob, new blob)
+typedef std::pair<BlobPtr, BlobPtr> BlobMatch;
+typedef std::vector<BlobMatch> BlobMatchVector;
+
+// Pairs blobs of consecutive frames. An old blob can only be paired with new blobs 
+// whose center is at most maxDist away from its estimated next center. Candidate 
+// pairs are found using a uniform grid with a cell size of maxDist. In optimal 
+// mode, the assignment problem is solved separately for each cluster of blobs 
+// that compete for the same partners.
+BlobMatchVector AVG_API matchBlobs(const BlobVector& oldBlobs, 
+        const BlobVector& newBlobs, float maxDist, BlobMatchMode mode);
+
+}
+
+#endif
+
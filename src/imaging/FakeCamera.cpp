@@ -61,6 +61,20 @@ FakeCamera::FakeCamera(std::vector<std::string>& pictures)
     }
 }
 
+FakeCamera::FakeCamera(const std::vector<BitmapPtr>& frames)
+    : Camera(I8, I8, IntPoint(640,480), 60),
+      m_pBmpQ(new std::queue<BitmapPtr>()),
+      m_bIsOpen(false)
+{
+    for (vector<BitmapPtr>::const_iterator it = frames.begin(); it != frames.end();
+            ++it) 
+    {
+        AVG_ASSERT((*it)->getPixelFormat() == I8);
+        setImgSize((*it)->getSize());
+        m_pBmpQ->push(*it);
+    }
+}
+
 FakeCamera::~FakeCamera()
 {
 }
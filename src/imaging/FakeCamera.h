@@ -39,6 +39,7 @@ class AVG_API FakeCamera: public Camera
 public:
     FakeCamera(PixelFormat camPF, PixelFormat destPF);
     FakeCamera(std::vector<std::string>& pictures);
+    FakeCamera(const std::vector<BitmapPtr>& frames);
     virtual ~FakeCamera();
     virtual void open();
     virtual void close();
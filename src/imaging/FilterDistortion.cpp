@@ -23,22 +23,42 @@
 
 #include "FilterDistortion.h"
 
+#include "../base/Exception.h"
+
+#include <boost/bind.hpp>
+
 #include <iostream>
+#include <algorithm>
 #include <math.h>
 
+#if defined(__SSE2__) || defined(_M_X64)
+#include <emmintrin.h>
+#define AVG_DISTORTION_SSE2
+#endif
+
 using namespace std;
 
 namespace avg {
 
 FilterDistortion::FilterDistortion(const IntPoint& srcSize,
-        CoordTransformerPtr pTransformer)
+        CoordTransformerPtr pTransformer, Interpolation interpolation, int numTiles)
     : m_SrcSize(srcSize),
-      m_pTransformer(pTransformer) 
+      m_pTransformer(pTransformer),
+      m_Interpolation(interpolation),
+      m_NumTiles(numTiles),
+      m_OffsetStride(0)
 {
+    AVG_ASSERT(numTiles >= 1);
     // We use the same dimensions for both of src and dest and just crop.
-    // for each pixel at (x,y) in the dest, m_pMap[x][y] contains an IntPoint that gives 
+    // for each pixel at (x,y) in the dest, m_Map[x][y] contains an IntPoint that gives 
     // the coords in the src Bitmap. 
-    m_pMap = new IntPoint[m_SrcSize.y*m_SrcSize.x];
+    int numPixels = m_SrcSize.y*m_SrcSize.x;
+    m_Map.resize(numPixels, IntPoint(0,0));
+    if (m_Interpolation == BILINEAR) {
+        AVG_ASSERT(m_SrcSize.x > 1 && m_SrcSize.y > 1);
+        m_FracX.resize(numPixels, 0);
+        m_FracY.resize(numPixels, 0);
+    }
     for (int y = 0; y < m_SrcSize.y; ++y) {
         for (int x = 0; x < m_SrcSize.x; ++x) {
             glm::dvec2 tmp = m_pTransformer->inverse_transform_point(glm::dvec2(x,y));
@@ -46,38 +66,160 @@ FilterDistortion::FilterDistortion(const IntPoint& srcSize,
             if (tmp2.x < m_SrcSize.x && tmp2.y < m_SrcSize.y &&
                     tmp2.x >= 0 && tmp2.y >= 0)
             {
-                m_pMap[y*m_SrcSize.x+x] = tmp2;
-            } else {
-                m_pMap[y*m_SrcSize.x+x] = IntPoint(0,0);
+                int i = y*m_SrcSize.x+x;
+                if (m_Interpolation == NEAREST) {
+                    m_Map[i] = tmp2;
+                } else {
+                    IntPoint topLeft(int(floor(tmp.x)), int(floor(tmp.y)));
+                    topLeft.x = max(0, min(topLeft.x, m_SrcSize.x-2));
+                    topLeft.y = max(0, min(topLeft.y, m_SrcSize.y-2));
+                    m_Map[i] = topLeft;
+                    m_FracX[i] = (unsigned short)(max(0, min(256, 
+                            int((tmp.x-topLeft.x)*256+0.5))));
+                    m_FracY[i] = (unsigned short)(max(0, min(256, 
+                            int((tmp.y-topLeft.y)*256+0.5))));
+                }
             }
         }
     }
+    // The thread that calls apply() remaps one of the bands itself.
+    int numThreads = min(m_NumTiles, m_SrcSize.y/8)-1;
+    if (numThreads > 0) {
+        m_pTaskPool = TaskPoolPtr(new TaskPool(numThreads));
+    }
 }
 
 FilterDistortion::~FilterDistortion()
 {
-    delete[] m_pMap;
 }
 
 BitmapPtr FilterDistortion::apply(BitmapPtr pBmpSource)
 {
+    AVG_ASSERT(pBmpSource->getPixelFormat() == I8);
     BitmapPtr pDestBmp = BitmapPtr(new Bitmap(m_SrcSize, I8));
-    unsigned char* pDestLine = pDestBmp->getPixels();
-    unsigned char* pSrcPixels = pBmpSource->getPixels();
-    unsigned char* pDestPixel = pDestLine;
-    int destStride = pDestBmp->getStride();
-    int srcStride = pBmpSource->getStride();
-    IntPoint * pMapPos = m_pMap;
-    for (int y = 0; y < m_SrcSize.y; ++y) {
-        for(int x = 0; x < m_SrcSize.x; ++x) {
-            *pDestPixel = pSrcPixels[pMapPos->x + srcStride*pMapPos->y];
-            pDestPixel++;
-            pMapPos++;
+    initOffsets(pBmpSource->getStride());
+    if (!m_pTaskPool) {
+        remapLines(pBmpSource, pDestBmp, 0, m_SrcSize.y);
+    } else {
+        int numTiles = m_pTaskPool->getNumThreads()+1;
+        vector<TaskPool::Task> tasks;
+        int startLine = 0;
+        for (int i = 0; i < numTiles; ++i) {
+            int endLine = (m_SrcSize.y*(i+1))/numTiles;
+            tasks.push_back(boost::bind(&FilterDistortion::remapLines, this,
+                    pBmpSource, pDestBmp, startLine, endLine));
+            startLine = endLine;
         }
-        pDestLine+=destStride;
-        pDestPixel = pDestLine;
+        m_pTaskPool->run(tasks);
     }
     return pDestBmp;
 }
 
+void FilterDistortion::initOffsets(int srcStride)
+{
+    if (srcStride == m_OffsetStride) {
+        return;
+    }
+    m_Offsets.resize(m_Map.size());
+    for (unsigned i = 0; i < m_Map.size(); ++i) {
+        m_Offsets[i] = m_Map[i].x + srcStride*m_Map[i].y;
+    }
+    m_OffsetStride = srcStride;
+}
+
+void FilterDistortion::remapLines(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, 
+        int startLine, int endLine)
+{
+    if (m_Interpolation == NEAREST) {
+        remapLinesNearest(pSrcBmp, pDestBmp, startLine, endLine);
+    } else {
+        remapLinesBilinear(pSrcBmp, pDestBmp, startLine, endLine);
+    }
+}
+
+void FilterDistortion::remapLinesNearest(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, 
+        int startLine, int endLine)
+{
+    const unsigned char* pSrcPixels = pSrcBmp->getPixels();
+    int destStride = pDestBmp->getStride();
+    int width = m_SrcSize.x;
+    for (int y = startLine; y < endLine; ++y) {
+        unsigned char* pDestPixel = pDestBmp->getPixels()+y*destStride;
+        const int* pOffset = &(m_Offsets[y*width]);
+        for (int x = 0; x < width; ++x) {
+            pDestPixel[x] = pSrcPixels[pOffset[x]];
+        }
+    }
+}
+
+inline unsigned char interpolateBilinear(const unsigned char* pSrcPixel, int srcStride,
+        int fracX, int fracY)
+{
+    // Same rounding as the SSE2 version.
+    int top = (pSrcPixel[0]*(256-fracX) + pSrcPixel[1]*fracX + 128) >> 8;
+    int bottom = (pSrcPixel[srcStride]*(256-fracX) + pSrcPixel[srcStride+1]*fracX 
+            + 128) >> 8;
+    return (unsigned char)((top*(256-fracY) + bottom*fracY + 128) >> 8);
+}
+
+void FilterDistortion::remapLinesBilinear(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, 
+        int startLine, int endLine)
+{
+    const unsigned char* pSrcPixels = pSrcBmp->getPixels();
+    int srcStride = pSrcBmp->getStride();
+    int destStride = pDestBmp->getStride();
+    int width = m_SrcSize.x;
+    for (int y = startLine; y < endLine; ++y) {
+        unsigned char* pDestPixel = pDestBmp->getPixels()+y*destStride;
+        int lineStart = y*width;
+        const int* pOffset = &(m_Offsets[lineStart]);
+        const unsigned short* pFracX = &(m_FracX[lineStart]);
+        const unsigned short* pFracY = &(m_FracY[lineStart]);
+        int x = 0;
+#ifdef AVG_DISTORTION_SSE2
+        // SSE2 has no gather, so the source pixels are collected one by one and 
+        // the weighting is done for 8 pixels at a time in 16 bit arithmetic.
+        const __m128i round = _mm_set1_epi16(128);
+        const __m128i one = _mm_set1_epi16(256);
+        const __m128i zero = _mm_setzero_si128();
+        for (; x+8 <= width; x += 8) {
+            unsigned short topLeft[8];
+            unsigned short topRight[8];
+            unsigned short bottomLeft[8];
+            unsigned short bottomRight[8];
+            for (int i = 0; i < 8; ++i) {
+                const unsigned char* pSrcPixel = pSrcPixels+pOffset[x+i];
+                topLeft[i] = pSrcPixel[0];
+                topRight[i] = pSrcPixel[1];
+                bottomLeft[i] = pSrcPixel[srcStride];
+                bottomRight[i] = pSrcPixel[srcStride+1];
+            }
+            __m128i fracX = _mm_loadu_si128((const __m128i*)(pFracX+x));
+            __m128i fracY = _mm_loadu_si128((const __m128i*)(pFracY+x));
+            __m128i invFracX = _mm_sub_epi16(one, fracX);
+            __m128i invFracY = _mm_sub_epi16(one, fracY);
+            // All intermediate sums are <= 255*256+128 and fit into unsigned 16 bit.
+            __m128i top = _mm_add_epi16(
+                    _mm_mullo_epi16(_mm_loadu_si128((const __m128i*)topLeft), invFracX),
+                    _mm_mullo_epi16(_mm_loadu_si128((const __m128i*)topRight), fracX));
+            top = _mm_srli_epi16(_mm_add_epi16(top, round), 8);
+            __m128i bottom = _mm_add_epi16(
+                    _mm_mullo_epi16(_mm_loadu_si128((const __m128i*)bottomLeft), 
+                            invFracX),
+                    _mm_mullo_epi16(_mm_loadu_si128((const __m128i*)bottomRight), 
+                            fracX));
+            bottom = _mm_srli_epi16(_mm_add_epi16(bottom, round), 8);
+            __m128i result = _mm_add_epi16(_mm_mullo_epi16(top, invFracY),
+                    _mm_mullo_epi16(bottom, fracY));
+            result = _mm_srli_epi16(_mm_add_epi16(result, round), 8);
+            _mm_storel_epi64((__m128i*)(pDestPixel+x), _mm_packus_epi16(result, zero));
+        }
+#endif
+        for (; x < width; ++x) {
+            pDestPixel[x] = interpolateBilinear(pSrcPixels+pOffset[x], srcStride, 
+                    pFracX[x], pFracY[x]);
+        }
+    }
+}
+
 }
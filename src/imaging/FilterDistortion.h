@@ -31,22 +31,52 @@
 
 #include "../base/GLMHelper.h"
 #include "../base/Rect.h"
+#include "../base/TaskPool.h"
 
 #include <boost/shared_ptr.hpp>
 
+#include <vector>
+
 namespace avg {
 
-// TODO: This class doesn't have a unit test.
+// Remaps a camera image using the inverse of a CoordTransformer. The remap table is
+// built once in the constructor, so a new FilterDistortion needs to be created
+// whenever the transformation changes. With numTiles > 1, bands of lines are remapped
+// in parallel by worker threads that live as long as the filter.
 class AVG_API FilterDistortion: public Filter 
 {
     public:
-        FilterDistortion(const IntPoint& srcSize, CoordTransformerPtr pTransformer);
+        enum Interpolation {NEAREST, BILINEAR};
+
+        FilterDistortion(const IntPoint& srcSize, CoordTransformerPtr pTransformer,
+                Interpolation interpolation=NEAREST, int numTiles=1);
         virtual ~FilterDistortion();
         BitmapPtr apply(BitmapPtr pBmpSource);
+
     private:
+        void initOffsets(int srcStride);
+        void remapLines(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, int startLine, 
+                int endLine);
+        void remapLinesNearest(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, int startLine, 
+                int endLine);
+        void remapLinesBilinear(BitmapPtr pSrcBmp, BitmapPtr pDestBmp, int startLine, 
+                int endLine);
+
         IntPoint m_SrcSize;
         CoordTransformerPtr m_pTransformer;
-        IntPoint* m_pMap;
+        Interpolation m_Interpolation;
+        int m_NumTiles;
+        TaskPoolPtr m_pTaskPool;
+
+        // One entry per destination pixel. m_Map contains the source pixel (the 
+        // top-left one for bilinear interpolation), m_FracX and m_FracY the weights
+        // of the right and bottom neighbours in 1/256ths.
+        std::vector<IntPoint> m_Map;
+        std::vector<unsigned short> m_FracX;
+        std::vector<unsigned short> m_FracY;
+        // m_Map as byte offsets into a source bitmap with stride m_OffsetStride.
+        std::vector<int> m_Offsets;
+        int m_OffsetStride;
 };
 
 typedef boost::shared_ptr<FilterDistortion> FilterDistortionPtr;
@@ -30,7 +30,6 @@ Run::Run(int row, int startCol, int endCol)
     m_Row = row;
     m_StartCol = startCol;
     m_EndCol = endCol;
-    m_Center = glm::vec2((m_StartCol + m_EndCol-1)/2., m_Row);
 }
  
 }
@@ -27,29 +27,25 @@
 #include "../api.h"
 #include "../base/GLMHelper.h"
 
-#include <boost/weak_ptr.hpp>
+#include <boost/shared_ptr.hpp>
 
 #include <vector>
 
 namespace avg {
 
-class Blob;
-typedef boost::weak_ptr<class Blob> BlobWeakPtr;
-
 struct Run
 {
     Run(int row, int startCol, int end_col);
     int m_Row;
     int m_StartCol;
     int m_EndCol;
-    glm::vec2 m_Center;
     int length() {
         return m_EndCol-m_StartCol;
     };
-    BlobWeakPtr m_pBlob;
 };
 
 typedef std::vector<Run> RunArray;
+typedef boost::shared_ptr<RunArray> RunArrayPtr;
 
 }
 
@@ -0,0 +1,62 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "TrackerBlobThread.h"
+#include "TrackerThread.h"
+
+using namespace std;
+
+namespace avg {
+
+TrackerFrame::TrackerFrame()
+    : m_FrameNum(0),
+      m_Time(0),
+      m_TrackThreshold(0),
+      m_TouchThreshold(0),
+      m_bCreateFingerImage(false),
+      m_bStop(false)
+{
+}
+
+TrackerBlobThread::TrackerBlobThread(CQueue& cmdQ, TrackerThread* pTracker, 
+        TrackerFrameQueuePtr pFrameQ)
+    : WorkerThread<TrackerBlobThread>("TrackerBlobs", cmdQ),
+      m_pTracker(pTracker),
+      m_pFrameQ(pFrameQ)
+{
+}
+
+TrackerBlobThread::~TrackerBlobThread()
+{
+}
+
+bool TrackerBlobThread::work()
+{
+    TrackerFramePtr pFrame = m_pFrameQ->pop(true);
+    if (pFrame->m_bStop) {
+        return false;
+    }
+    m_pTracker->processFrame(pFrame);
+    return true;
+}
+
+}
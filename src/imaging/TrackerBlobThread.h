@@ -0,0 +1,82 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _TrackerBlobThread_H_
+#define _TrackerBlobThread_H_
+
+#include "../api.h"
+#include "TrackerConfig.h"
+
+#include "../base/WorkerThread.h"
+#include "../base/Queue.h"
+
+#include "../graphics/Bitmap.h"
+
+#include <boost/shared_ptr.hpp>
+
+namespace avg {
+
+class TrackerThread;
+
+// One preprocessed camera frame on its way from the TrackerThread to the blob 
+// detection stage. The config and thresholds are snapshots taken when the frame
+// was captured, so the result doesn't depend on which worker handles the frame.
+struct AVG_API TrackerFrame
+{
+    TrackerFrame();
+
+    int m_FrameNum;
+    long long m_Time;
+    BitmapPtr m_pSrcBmp; // Owns the pixels m_pTrackBmp points to.
+    BitmapPtr m_pTrackBmp;
+    BitmapPtr m_pTouchBmp;
+    TrackerConfigPtr m_pConfig;
+    int m_TrackThreshold;
+    int m_TouchThreshold;
+    bool m_bCreateFingerImage;
+    bool m_bStop;
+};
+
+typedef boost::shared_ptr<TrackerFrame> TrackerFramePtr;
+typedef Queue<TrackerFrame> TrackerFrameQueue;
+typedef boost::shared_ptr<TrackerFrameQueue> TrackerFrameQueuePtr;
+
+// Blob detection stage of the pipelined tracker: Pops frames from the queue filled
+// by the TrackerThread and runs connected components analysis on them.
+class AVG_API TrackerBlobThread: public WorkerThread<TrackerBlobThread>
+{
+    public:
+        TrackerBlobThread(CQueue& cmdQ, TrackerThread* pTracker, 
+                TrackerFrameQueuePtr pFrameQ);
+        virtual ~TrackerBlobThread();
+
+        bool work();
+
+    private:
+        TrackerThread* m_pTracker;
+        TrackerFrameQueuePtr m_pFrameQ;
+};
+
+}
+
+#endif
+
@@ -44,6 +44,7 @@
 #include "../graphics/BitmapLoader.h"
 
 #include <iostream>
+#include <algorithm>
 #include <stdlib.h>
 
 using namespace std;
@@ -58,9 +59,12 @@ static ProfilingZoneID ProfilingZoneDistort("Distort");
 static ProfilingZoneID ProfilingZoneHistogram("Histogram");
 static ProfilingZoneID ProfilingZoneDownscale("Downscale");
 static ProfilingZoneID ProfilingZoneBandpass("Bandpass");
-static ProfilingZoneID ProfilingZoneComps("ConnectedComps");
-static ProfilingZoneID ProfilingZoneUpdate("Update");
-static ProfilingZoneID ProfilingZoneDraw("Draw");
+static ProfilingZoneID ProfilingZonePipelinePush("Pipeline push");
+// These zones are shared by all blob detection threads.
+static ProfilingZoneID ProfilingZoneComps("ConnectedComps", true);
+static ProfilingZoneID ProfilingZoneDeliveryWait("Delivery wait", true);
+static ProfilingZoneID ProfilingZoneUpdate("Update", true);
+static ProfilingZoneID ProfilingZoneDraw("Draw", true);
 
 TrackerThread::TrackerThread(IntRect roi, CameraPtr pCamera,
         BitmapPtr ppBitmaps[NUM_TRACKER_IMAGES], MutexPtr pMutex, CQueue& cmdQ,
@@ -78,7 +82,14 @@ TrackerThread::TrackerThread(IntRect roi, CameraPtr pCamera,
       m_bCreateFingerImage(false),
       m_NumFrames(0),
       m_NumCamFramesDiscarded(0),
-      m_pImagingContext(0)
+      m_pImagingContext(0),
+      m_NumBandpassTiles(1),
+      m_NumDistortTiles(1),
+      m_NumBlobThreads(0),
+      m_PipelineQueueSize(2),
+      m_NumPipelineFrames(0),
+      m_NumPipelineFramesDropped(0),
+      m_NextFrameToDeliver(0)
 {
     m_bTrackBrighter = config.getBoolParam("/tracker/brighterregions/@value");
     if (bSubtractHistory) {
@@ -87,11 +98,36 @@ TrackerThread::TrackerThread(IntRect roi, CameraPtr pCamera,
                 m_bTrackBrighter));
     }
     m_Prescale = config.getIntParam("/tracker/prescale/@value");
+    try {
+        m_NumBlobThreads = config.getIntParam("/tracker/pipeline/@workers");
+    } catch (Exception&) {
+        m_NumBlobThreads = 0;
+    }
+    try {
+        m_PipelineQueueSize = config.getIntParam("/tracker/pipeline/@queuesize");
+    } catch (Exception&) {
+        m_PipelineQueueSize = max(m_NumBlobThreads, 2);
+    }
+    try {
+        m_NumBandpassTiles = config.getIntParam("/tracker/pipeline/@bandpasstiles");
+    } catch (Exception&) {
+        m_NumBandpassTiles = 1;
+    }
+    try {
+        m_NumDistortTiles = config.getIntParam("/tracker/pipeline/@distorttiles");
+    } catch (Exception&) {
+        m_NumDistortTiles = 1;
+    }
+    m_NumBlobThreads = max(m_NumBlobThreads, 0);
+    m_PipelineQueueSize = max(m_PipelineQueueSize, 1);
+    m_NumBandpassTiles = max(m_NumBandpassTiles, 1);
+    m_NumDistortTiles = max(m_NumDistortTiles, 1);
     setBitmaps(roi, ppBitmaps);
 
     DeDistortPtr pDeDistort = config.getTransform();
     m_pDistorter = FilterDistortionPtr(new FilterDistortion(
-                m_pBitmaps[TRACKER_IMG_CAMERA]->getSize()/m_Prescale, pDeDistort));
+                m_pBitmaps[TRACKER_IMG_CAMERA]->getSize()/m_Prescale, pDeDistort,
+                FilterDistortion::NEAREST, m_NumDistortTiles));
 
     m_pConfig = TrackerConfigPtr(new TrackerConfig(config));
     m_pCamera->startCapture();
@@ -114,7 +150,7 @@ bool TrackerThread::init()
         AVG_TRACE(Logger::category::CONFIG, Logger::severity::WARNING,
                 "Using CPU for imaging operations (slow and inaccurate).");
         m_pImagingContext = 0;
-        m_pBandpassFilter = FilterPtr(new FilterFastBandpass());
+        m_pBandpassFilter = FilterPtr(new FilterFastBandpass(m_NumBandpassTiles));
     }
     try {
         m_StartTime = TimeSource::get()->getCurrentMillisecs(); 
@@ -122,6 +158,9 @@ bool TrackerThread::init()
     } catch (Exception& e) {
         AVG_LOG_WARNING(e.getStr());
     }
+    if (m_NumBlobThreads > 0) {
+        startPipeline();
+    }
     
     // Done in TrackerInputDevice::ctor to work around Leopard/libdc1394 threading issue.
     //    m_pCamera->open();
@@ -152,6 +191,12 @@ bool TrackerThread::work()
     if (pCamBmp) {
         m_NumFrames++;
         ScopeTimer timer(ProfilingZoneTracker);
+        TrackerFramePtr pFrame(new TrackerFrame);
+        pFrame->m_Time = time;
+        pFrame->m_pConfig = m_pConfig;
+        pFrame->m_TrackThreshold = m_TrackThreshold;
+        pFrame->m_TouchThreshold = m_TouchThreshold;
+        pFrame->m_bCreateFingerImage = m_bCreateFingerImage;
         if (m_pCameraMaskBmp) {
             ScopeTimer timer(ProfilingZoneMask);
             FilterMask(m_pCameraMaskBmp).applyInPlace(pCamBmp);
@@ -199,7 +244,14 @@ bool TrackerThread::work()
                     *(m_pBitmaps[TRACKER_IMG_HIGHPASS]) = *pBmpBandpass;
                 }
             }
-            calcBlobs(pCroppedBmp, pBmpBandpass, time);
+            pFrame->m_pSrcBmp = pDistortedBmp;
+            pFrame->m_pTrackBmp = pCroppedBmp;
+            pFrame->m_pTouchBmp = pBmpBandpass;
+        }
+        if (m_NumBlobThreads == 0) {
+            processFrame(pFrame);
+        } else {
+            pushFrame(pFrame);
         }
         ThreadProfiler::get()->reset();
     }
@@ -208,11 +260,18 @@ bool TrackerThread::work()
 
 void TrackerThread::deinit()
 {
+    if (m_NumBlobThreads > 0) {
+        stopPipeline();
+    }
     m_pCamera = CameraPtr();
     AVG_TRACE(Logger::category::PROFILE, Logger::severity::INFO,
             "Total camera frames: " << m_NumFrames);
     AVG_TRACE(Logger::category::PROFILE, Logger::severity::INFO,
             "Camera frames discarded: " << m_NumCamFramesDiscarded);
+    if (m_NumBlobThreads > 0) {
+        AVG_TRACE(Logger::category::PROFILE, Logger::severity::INFO,
+                "Frames dropped by tracker pipeline: " << m_NumPipelineFramesDropped);
+    }
     if (m_pBandpassFilter) {
         m_pBandpassFilter.reset();
     }
@@ -244,7 +303,8 @@ void TrackerThread::setConfig(TrackerConfig config, IntRect roi,
     DeDistortPtr pDeDistort = config.getTransform();
     if (!(*m_pTrafo == *pDeDistort)) {
         m_pDistorter = FilterDistortionPtr(new FilterDistortion(
-                m_pBitmaps[TRACKER_IMG_CAMERA]->getSize()/m_Prescale, pDeDistort));
+                m_pBitmaps[TRACKER_IMG_CAMERA]->getSize()/m_Prescale, pDeDistort,
+                FilterDistortion::NEAREST, m_NumDistortTiles));
         *m_pTrafo = *pDeDistort;
     }
     int brightness = config.getIntParam("/camera/brightness/@value");
@@ -264,7 +324,7 @@ void TrackerThread::setConfig(TrackerConfig config, IntRect roi,
              int(m_pCamera->getFeature(CAM_FEATURE_STROBE_DURATION)) != strobeDuration ||
              bNewCameraMask)
     {
-        m_pHistoryPreProcessor->reset();
+        resetHistory();
     }
 
     m_pCamera->setFeature(CAM_FEATURE_BRIGHTNESS, brightness);
@@ -383,7 +443,8 @@ bool TrackerThread::isRelevant(BlobPtr pBlob, int minArea, int maxArea,
     return res;
 }
 
-BlobVectorPtr TrackerThread::findRelevantBlobs(BlobVectorPtr pBlobs, bool bTouch) 
+BlobVectorPtr TrackerThread::findRelevantBlobs(const TrackerConfig& config,
+        BlobVectorPtr pBlobs, bool bTouch) 
 {
     string sConfigPrefix;
     if (bTouch) {
@@ -391,11 +452,11 @@ BlobVectorPtr TrackerThread::findRelevantBlobs(BlobVectorPtr pBlobs, bool bTouch
     } else {
         sConfigPrefix = "/tracker/track/";
     }
-    int minArea = m_pConfig->getIntParam(sConfigPrefix+"areabounds/@min");
-    int maxArea = m_pConfig->getIntParam(sConfigPrefix+"areabounds/@max");
-    float minEccentricity = m_pConfig->getFloatParam(sConfigPrefix+
+    int minArea = config.getIntParam(sConfigPrefix+"areabounds/@min");
+    int maxArea = config.getIntParam(sConfigPrefix+"areabounds/@max");
+    float minEccentricity = config.getFloatParam(sConfigPrefix+
             "eccentricitybounds/@min");
-    float maxEccentricity = m_pConfig->getFloatParam(sConfigPrefix+
+    float maxEccentricity = config.getFloatParam(sConfigPrefix+
             "eccentricitybounds/@max");
     
     BlobVectorPtr pRelevantBlobs(new BlobVector());
@@ -410,8 +471,8 @@ BlobVectorPtr TrackerThread::findRelevantBlobs(BlobVectorPtr pBlobs, bool bTouch
     return pRelevantBlobs;
 }
 
-void TrackerThread::drawBlobs(BlobVectorPtr pBlobs, BitmapPtr pSrcBmp, 
-        BitmapPtr pDestBmp, int Offset, bool bTouch)
+void TrackerThread::drawBlobs(const TrackerConfig& config, BlobVectorPtr pBlobs,
+        BitmapPtr pSrcBmp, BitmapPtr pDestBmp, int Offset, bool bTouch)
 {
     if (!pDestBmp) {
         return;
@@ -423,11 +484,11 @@ void TrackerThread::drawBlobs(BlobVectorPtr pBlobs, BitmapPtr pSrcBmp,
     } else {
         sConfigPrefix = "/tracker/track/";
     }
-    int minArea = m_pConfig->getIntParam(sConfigPrefix+"areabounds/@min");
-    int maxArea = m_pConfig->getIntParam(sConfigPrefix+"areabounds/@max");
-    float minEccentricity = m_pConfig->getFloatParam(
+    int minArea = config.getIntParam(sConfigPrefix+"areabounds/@min");
+    int maxArea = config.getIntParam(sConfigPrefix+"areabounds/@max");
+    float minEccentricity = config.getFloatParam(
             sConfigPrefix+"eccentricitybounds/@min");
-    float maxEccentricity = m_pConfig->getFloatParam(
+    float maxEccentricity = config.getFloatParam(
             sConfigPrefix+"eccentricitybounds/@max");
     
     // Get max. pixel value in Bitmap
@@ -464,19 +525,19 @@ void TrackerThread::drawBlobs(BlobVectorPtr pBlobs, BitmapPtr pSrcBmp,
     }
 }
 
-void TrackerThread::calcContours(BlobVectorPtr pBlobs)
+void TrackerThread::calcContours(const TrackerConfig& config, BlobVectorPtr pBlobs)
 {
     ScopeTimer timer(ProfilingZoneDraw);
     string sConfigPrefix;
     sConfigPrefix = "/tracker/track/";
-    int minArea = m_pConfig->getIntParam(sConfigPrefix+"areabounds/@min");
-    int maxArea = m_pConfig->getIntParam(sConfigPrefix+"areabounds/@max");
-    float minEccentricity = m_pConfig->getFloatParam(
+    int minArea = config.getIntParam(sConfigPrefix+"areabounds/@min");
+    int maxArea = config.getIntParam(sConfigPrefix+"areabounds/@max");
+    float minEccentricity = config.getFloatParam(
             sConfigPrefix+"eccentricitybounds/@min");
-    float maxEccentricity = m_pConfig->getFloatParam(
+    float maxEccentricity = config.getFloatParam(
             sConfigPrefix+"eccentricitybounds/@max");
     
-    int ContourPrecision = m_pConfig->getIntParam("/tracker/contourprecision/@value");
+    int ContourPrecision = config.getIntParam("/tracker/contourprecision/@value");
     if (ContourPrecision != 0) {
         for (BlobVector::iterator it = pBlobs->begin(); it != pBlobs->end(); ++it) {
             if (isRelevant(*it, minArea, maxArea, minEccentricity, maxEccentricity)) {
@@ -509,41 +570,141 @@ void TrackerThread::correlateHands(BlobVectorPtr pTrackBlobs, BlobVectorPtr pTou
     }
 }
 
-void TrackerThread::calcBlobs(BitmapPtr pTrackBmp, BitmapPtr pTouchBmp, long long time) 
+void TrackerThread::processFrame(TrackerFramePtr pFrame) 
 {
+    const TrackerConfig& config = *(pFrame->m_pConfig);
+    BitmapPtr pTrackBmp = pFrame->m_pTrackBmp;
+    BitmapPtr pTouchBmp = pFrame->m_pTouchBmp;
     BlobVectorPtr pTrackComps;
     BlobVectorPtr pTouchComps;
-    {
+    try {
         ScopeTimer timer(ProfilingZoneComps);
+        if (pFrame->m_TrackThreshold != 0) {
+            pTrackComps = findConnectedComponents(pTrackBmp, pFrame->m_TrackThreshold);
+            calcContours(config, pTrackComps);
+        }
+        if (pFrame->m_TouchThreshold != 0) {
+            pTouchComps = findConnectedComponents(pTouchBmp, pFrame->m_TouchThreshold);
+        }
+    } catch (...) {
+        // The frame still needs to take its turn, or all later frames block forever.
+        if (m_NumBlobThreads > 0) {
+            waitForDeliveryTurn(pFrame->m_FrameNum);
+            finishDelivery();
+        }
+        throw;
+    }
+    if (m_NumBlobThreads > 0) {
+        waitForDeliveryTurn(pFrame->m_FrameNum);
+    }
+    try {
         lock_guard lock(*m_pMutex);
         BitmapPtr pDestBmp;
-        if (m_bCreateFingerImage) {
+        // After a config change, frames still in the pipeline can have a different
+        // size than the debug bitmaps.
+        if (pFrame->m_bCreateFingerImage && 
+                m_pBitmaps[TRACKER_IMG_FINGERS]->getSize() == pTrackBmp->getSize())
+        {
             Pixel32 Black(0x00, 0x00, 0x00, 0x00);
             FilterFill<Pixel32>(Black).applyInPlace(
                     m_pBitmaps[TRACKER_IMG_FINGERS]);
             pDestBmp = m_pBitmaps[TRACKER_IMG_FINGERS];
         }
-        {
-            if (m_TrackThreshold != 0) {
-                pTrackComps = findConnectedComponents(pTrackBmp, m_TrackThreshold);
-                calcContours(pTrackComps);
-                drawBlobs(pTrackComps, pTrackBmp, pDestBmp, m_TrackThreshold, false);
-                pTrackComps = findRelevantBlobs(pTrackComps, false);
-            }
-            if (m_TouchThreshold != 0) {
-                pTouchComps = findConnectedComponents(pTouchBmp, m_TouchThreshold);
-                pTouchComps = findRelevantBlobs(pTouchComps, true);
-                correlateHands(pTrackComps, pTouchComps);
-                drawBlobs(pTouchComps, pTouchBmp, pDestBmp, m_TouchThreshold, true);
-            }
+        if (pTrackComps) {
+            drawBlobs(config, pTrackComps, pTrackBmp, pDestBmp, 
+                    pFrame->m_TrackThreshold, false);
+            pTrackComps = findRelevantBlobs(config, pTrackComps, false);
+        }
+        if (pTouchComps) {
+            pTouchComps = findRelevantBlobs(config, pTouchComps, true);
+            correlateHands(pTrackComps, pTouchComps);
+            drawBlobs(config, pTouchComps, pTouchBmp, pDestBmp, 
+                    pFrame->m_TouchThreshold, true);
         }
         // Send the blobs to the BlobTarget.
         {
             ScopeTimer timer(ProfilingZoneUpdate);
-            m_pTarget->update(pTrackComps, pTouchComps, time);
+            m_pTarget->update(pTrackComps, pTouchComps, pFrame->m_Time);
+        }
+    } catch (...) {
+        if (m_NumBlobThreads > 0) {
+            finishDelivery();
         }
+        throw;
+    }
+    if (m_NumBlobThreads > 0) {
+        finishDelivery();
     }
-    
 }
-        
+
+void TrackerThread::startPipeline()
+{
+    m_pFrameQ = TrackerFrameQueuePtr(new TrackerFrameQueue(m_PipelineQueueSize));
+    m_pDeliveryMutex = MutexPtr(new boost::mutex);
+    m_pDeliveryCond = boost::shared_ptr<boost::condition>(new boost::condition);
+    m_NextFrameToDeliver = 0;
+    for (int i = 0; i < m_NumBlobThreads; ++i) {
+        TrackerBlobThread::CQueuePtr pCmdQ(new TrackerBlobThread::CQueue);
+        m_BlobCmdQueues.push_back(pCmdQ);
+        m_BlobThreads.push_back(new boost::thread(
+                TrackerBlobThread(*pCmdQ, this, m_pFrameQ)));
+    }
+    AVG_TRACE(Logger::category::CONFIG, Logger::severity::INFO,
+            "Tracker pipeline: " << m_NumBlobThreads << " blob detection threads, "
+            << "queue size " << m_PipelineQueueSize << ", " << m_NumBandpassTiles 
+            << " bandpass tiles, " << m_NumDistortTiles << " distortion tiles.");
+}
+
+void TrackerThread::stopPipeline()
+{
+    // Every blob thread exits after popping one stop frame. Frames queued before 
+    // the stop frames are still processed and delivered.
+    for (unsigned i = 0; i < m_BlobThreads.size(); ++i) {
+        TrackerFramePtr pStopFrame(new TrackerFrame);
+        pStopFrame->m_bStop = true;
+        while (m_pFrameQ->size() >= m_PipelineQueueSize) {
+            msleep(1);
+        }
+        m_pFrameQ->push(pStopFrame);
+    }
+    for (unsigned i = 0; i < m_BlobThreads.size(); ++i) {
+        m_BlobThreads[i]->join();
+        delete m_BlobThreads[i];
+    }
+    m_BlobThreads.clear();
+    m_BlobCmdQueues.clear();
+    m_pFrameQ = TrackerFrameQueuePtr();
+}
+
+void TrackerThread::pushFrame(TrackerFramePtr pFrame)
+{
+    ScopeTimer timer(ProfilingZonePipelinePush);
+    // This is the only thread that pushes, so the queue can't fill up between the
+    // check and the push. If the blob threads can't keep up, we drop the newest
+    // frame instead of blocking capture.
+    if (m_pFrameQ->size() >= m_PipelineQueueSize) {
+        m_NumPipelineFramesDropped++;
+    } else {
+        pFrame->m_FrameNum = m_NumPipelineFrames;
+        m_NumPipelineFrames++;
+        m_pFrameQ->push(pFrame);
+    }
+}
+
+void TrackerThread::waitForDeliveryTurn(int frameNum)
+{
+    ScopeTimer timer(ProfilingZoneDeliveryWait);
+    boost::mutex::scoped_lock lock(*m_pDeliveryMutex);
+    while (m_NextFrameToDeliver != frameNum) {
+        m_pDeliveryCond->wait(lock);
+    }
+}
+
+void TrackerThread::finishDelivery()
+{
+    boost::mutex::scoped_lock lock(*m_pDeliveryMutex);
+    m_NextFrameToDeliver++;
+    m_pDeliveryCond->notify_all();
+}
+
 }
@@ -27,6 +27,7 @@
 #include "Blob.h"
 #include "FilterDistortion.h"
 #include "DeDistort.h"
+#include "TrackerBlobThread.h"
 
 #include "../base/WorkerThread.h"
 #include "../base/Command.h"
@@ -40,6 +41,7 @@
 
 #include <string>
 #include <list>
+#include <vector>
 
 namespace avg {
 
@@ -81,6 +83,10 @@ class AVG_API TrackerThread: public WorkerThread<TrackerThread>
                 BitmapPtr ppBitmaps[NUM_TRACKER_IMAGES]);
         void setDebugImages(bool bImg, bool bFinger);
         void resetHistory();
+
+        // Blob detection stage. Called either directly by work() or, if the 
+        // pipeline is enabled, by the TrackerBlobThreads.
+        void processFrame(TrackerFramePtr pFrame);
     
     private:
         void setBitmaps(IntRect roi, BitmapPtr ppBitmaps[NUM_TRACKER_IMAGES]);
@@ -88,13 +94,18 @@ class AVG_API TrackerThread: public WorkerThread<TrackerThread>
         void checkMessages();
         void calcHistory();
         void drawHistogram(BitmapPtr pDestBmp, BitmapPtr pSrcBmp);
-        void calcBlobs(BitmapPtr pTrackBmp, BitmapPtr pTouchBmp, long long time);
+        void startPipeline();
+        void stopPipeline();
+        void pushFrame(TrackerFramePtr pFrame);
+        void waitForDeliveryTurn(int frameNum);
+        void finishDelivery();
         bool isRelevant(BlobPtr pBlob, int minArea, int maxArea,
                 float minEccentricity, float maxEccentricity);
-        BlobVectorPtr findRelevantBlobs(BlobVectorPtr pBlobs, bool bTouch);
-        void drawBlobs(BlobVectorPtr pBlobs, BitmapPtr pSrcBmp, BitmapPtr pDestBmp,
-                int Offset, bool bTouch);
-        void calcContours(BlobVectorPtr pBlobs);
+        BlobVectorPtr findRelevantBlobs(const TrackerConfig& config,
+                BlobVectorPtr pBlobs, bool bTouch);
+        void drawBlobs(const TrackerConfig& config, BlobVectorPtr pBlobs,
+                BitmapPtr pSrcBmp, BitmapPtr pDestBmp, int Offset, bool bTouch);
+        void calcContours(const TrackerConfig& config, BlobVectorPtr pBlobs);
         void correlateHands(BlobVectorPtr pTrackBlobs, BlobVectorPtr pTouchBlobs);
 
         std::string m_sDevice;
@@ -127,6 +138,20 @@ class AVG_API TrackerThread: public WorkerThread<TrackerThread>
         
         GLContext* m_pImagingContext;
         FilterPtr m_pBandpassFilter;
+        int m_NumBandpassTiles;
+        int m_NumDistortTiles;
+
+        // Pipeline state. m_NumBlobThreads == 0 => all stages run in this thread.
+        int m_NumBlobThreads;
+        int m_PipelineQueueSize;
+        int m_NumPipelineFrames;
+        int m_NumPipelineFramesDropped;
+        TrackerFrameQueuePtr m_pFrameQ;
+        std::vector<TrackerBlobThread::CQueuePtr> m_BlobCmdQueues;
+        std::vector<boost::thread*> m_BlobThreads;
+        MutexPtr m_pDeliveryMutex;
+        boost::shared_ptr<boost::condition> m_pDeliveryCond;
+        int m_NextFrameToDeliver;
 };
 
 }
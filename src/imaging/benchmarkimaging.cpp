@@ -0,0 +1,169 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "Blob.h"
+#include "FilterDistortion.h"
+#include "DeDistort.h"
+
+#include "../graphics/Bitmap.h"
+#include "../graphics/BitmapLoader.h"
+#include "../graphics/Filterfill.h"
+#include "../graphics/Filterfillrect.h"
+#include "../graphics/Pixel8.h"
+
+#include "../base/TimeSource.h"
+
+#include <iostream>
+#include <sstream>
+#include <vector>
+#include <stdio.h>
+#include <stdlib.h>
+
+using namespace avg;
+using namespace std;
+
+template<class TEST>
+void runPerformanceTest(int numRuns=500)
+{
+    TEST PerfTest;
+    long long StartTime = TimeSource::get()->getCurrentMicrosecs();
+    for (int i = 0; i < numRuns; ++i) {
+        PerfTest.run();
+    }
+    float ActiveTime = (TimeSource::get()->getCurrentMicrosecs()-StartTime)/1000.; 
+    cerr << PerfTest.getName() << ": " << ActiveTime/numRuns << " ms" << endl;
+    
+}
+
+class PerfTestBase {
+public:
+    PerfTestBase(string sName) 
+        : m_sName(sName)
+    {
+    }
+
+    std::string getName()
+    {
+        return m_sName;
+    }
+
+private:
+    std::string m_sName;
+};
+
+string getConnectedCompsTestName(int width, int height, int numBlobs)
+{
+    stringstream ss;
+    ss << "ConnectedCompsPerfTest(" << width << "x" << height << ", " << numBlobs 
+            << " blobs)";
+    return ss.str();
+}
+
+// Finds the blobs in a dark I8 frame with numBlobs bright 12x12 squares in a grid.
+template<int WIDTH, int HEIGHT, int NUMBLOBS>
+class ConnectedCompsPerfTest: public PerfTestBase {
+public:
+    ConnectedCompsPerfTest()
+        : PerfTestBase(getConnectedCompsTestName(WIDTH, HEIGHT, NUMBLOBS))
+    {
+        m_pBmp = BitmapPtr(new Bitmap(IntPoint(WIDTH, HEIGHT), I8));
+        FilterFill<Pixel8>(Pixel8(0)).applyInPlace(m_pBmp);
+        int blobsPerLine = WIDTH/20;
+        for (int i = 0; i < NUMBLOBS; ++i) {
+            IntPoint pos((i%blobsPerLine)*20+4, (i/blobsPerLine)*20+4);
+            FilterFillRect<Pixel8>(IntRect(pos, pos+IntPoint(12, 12)), Pixel8(255))
+                    .applyInPlace(m_pBmp);
+        }
+    }
+
+    void run()
+    {
+        BlobVectorPtr pBlobs = findConnectedComponents(m_pBmp, 128);
+    }
+
+private:
+    BitmapPtr m_pBmp;
+};
+
+string getDistortionTestName(FilterDistortion::Interpolation interpolation, 
+        int numTiles)
+{
+    stringstream ss;
+    ss << "DistortionPerfTest(";
+    if (interpolation == FilterDistortion::NEAREST) {
+        ss << "nearest";
+    } else {
+        ss << "bilinear";
+    }
+    ss << ", " << numTiles << " tiles)";
+    return ss.str();
+}
+
+// Remaps a 1280x1024 camera frame with a barrel distortion and trapezoid correction.
+template<FilterDistortion::Interpolation INTERPOLATION, int NUMTILES>
+class DistortionPerfTest: public PerfTestBase {
+public:
+    DistortionPerfTest()
+        : PerfTestBase(getDistortionTestName(INTERPOLATION, NUMTILES))
+    {
+        IntPoint size(1280, 1024);
+        m_pBmp = BitmapPtr(new Bitmap(size, I8));
+        FilterFill<Pixel8>(Pixel8(128)).applyInPlace(m_pBmp);
+        std::vector<double> params;
+        params.push_back(0);
+        params.push_back(0.7);
+        DeDistortPtr pTrafo(new DeDistort(glm::vec2(size), params, 0.002, 0.15, 
+                glm::dvec2(0, 0), glm::dvec2(1, 1)));
+        m_pFilter = FilterDistortionPtr(new FilterDistortion(size, pTrafo, 
+                INTERPOLATION, NUMTILES));
+    }
+
+    void run()
+    {
+        BitmapPtr pDestBmp = m_pFilter->apply(m_pBmp);
+    }
+
+private:
+    BitmapPtr m_pBmp;
+    FilterDistortionPtr m_pFilter;
+};
+
+void runPerformanceTests()
+{
+    runPerformanceTest<ConnectedCompsPerfTest<640, 480, 0> >();
+    runPerformanceTest<ConnectedCompsPerfTest<640, 480, 20> >();
+    runPerformanceTest<ConnectedCompsPerfTest<640, 480, 200> >();
+    runPerformanceTest<ConnectedCompsPerfTest<1280, 1024, 0> >();
+    runPerformanceTest<ConnectedCompsPerfTest<1280, 1024, 20> >();
+    runPerformanceTest<ConnectedCompsPerfTest<1280, 1024, 200> >();
+    runPerformanceTest<DistortionPerfTest<FilterDistortion::NEAREST, 1> >();
+    runPerformanceTest<DistortionPerfTest<FilterDistortion::NEAREST, 4> >();
+    runPerformanceTest<DistortionPerfTest<FilterDistortion::BILINEAR, 1> >();
+    runPerformanceTest<DistortionPerfTest<FilterDistortion::BILINEAR, 4> >();
+}
+
+int main(int nargs, char** args)
+{
+    BitmapLoader::init(true);
+    runPerformanceTests();
+}
+
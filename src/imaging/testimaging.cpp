@@ -25,15 +25,21 @@
 #include "DeDistort.h"
 #include "FilterWipeBorder.h"
 #include "FilterClearBorder.h"
+#include "BlobMatcher.h"
 
 #include "../graphics/GraphicsTest.h"
 #include "../graphics/Filtergrayscale.h"
+#include "../graphics/Filterfill.h"
+#include "../graphics/Filterfillrect.h"
+#include "../graphics/Pixel8.h"
+#include "../graphics/Pixel32.h"
 #include "../graphics/BitmapLoader.h"
 
 #include "../base/TestSuite.h"
 #include "../base/Exception.h"
 #include "../base/FileHelper.h"
 #include "../base/MathHelper.h"
+#include "../base/TimeSource.h"
 
 #include <boost/thread/thread.hpp>
 #include <boost/bind.hpp>
@@ -42,6 +48,7 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <sstream>
+#include <algorithm>
 
 #include <glib-object.h>
 
@@ -209,6 +216,432 @@ public:
     }
 };
 
+class FilterDistortionTest: public Test
+{
+public:
+    FilterDistortionTest()
+        : Test("FilterDistortionTest", 2)
+    {
+    }
+
+    void runTests() 
+    {
+        IntPoint size(101, 77);
+        BitmapPtr pSrcBmp(new Bitmap(size, I8));
+        for (int y = 0; y < size.y; ++y) {
+            unsigned char* pPixel = pSrcBmp->getPixels()+y*pSrcBmp->getStride();
+            for (int x = 0; x < size.x; ++x) {
+                pPixel[x] = (x*7+y*13+(x*y)%17) & 0xFF;
+            }
+        }
+        vector<double> params;
+        params.push_back(0.1);
+        params.push_back(0.3);
+        DeDistortPtr pTrafo(new DeDistort(glm::vec2(size), params, 0.05, 0.1, 
+                glm::dvec2(3, -2), glm::dvec2(1.1, 0.9)));
+
+        BitmapPtr pNearestBmp = FilterDistortion(size, pTrafo).apply(pSrcBmp);
+        TEST(*pNearestBmp == *calcNearest(pSrcBmp, pTrafo));
+        BitmapPtr pTiledBmp = FilterDistortion(size, pTrafo, FilterDistortion::NEAREST,
+                3).apply(pSrcBmp);
+        TEST(*pTiledBmp == *pNearestBmp);
+
+        BitmapPtr pBilinearBmp = FilterDistortion(size, pTrafo, 
+                FilterDistortion::BILINEAR).apply(pSrcBmp);
+        TEST(maxDiff(pBilinearBmp, calcBilinear(pSrcBmp, pTrafo)) <= 1);
+        pTiledBmp = FilterDistortion(size, pTrafo, FilterDistortion::BILINEAR, 4)
+                .apply(pSrcBmp);
+        TEST(*pTiledBmp == *pBilinearBmp);
+    }
+
+private:
+    // Reference implementations that sample the transformation directly.
+    BitmapPtr calcNearest(BitmapPtr pSrcBmp, DeDistortPtr pTrafo)
+    {
+        IntPoint size = pSrcBmp->getSize();
+        BitmapPtr pDestBmp(new Bitmap(size, I8));
+        for (int y = 0; y < size.y; ++y) {
+            for (int x = 0; x < size.x; ++x) {
+                glm::dvec2 srcPt = pTrafo->inverse_transform_point(glm::dvec2(x, y));
+                IntPoint srcPos(int(srcPt.x+0.5), int(srcPt.y+0.5));
+                if (srcPos.x < 0 || srcPos.y < 0 || srcPos.x >= size.x || 
+                        srcPos.y >= size.y)
+                {
+                    srcPos = IntPoint(0, 0);
+                }
+                *getPixel(pDestBmp, IntPoint(x, y)) = *getPixel(pSrcBmp, srcPos);
+            }
+        }
+        return pDestBmp;
+    }
+
+    BitmapPtr calcBilinear(BitmapPtr pSrcBmp, DeDistortPtr pTrafo)
+    {
+        IntPoint size = pSrcBmp->getSize();
+        BitmapPtr pDestBmp(new Bitmap(size, I8));
+        for (int y = 0; y < size.y; ++y) {
+            for (int x = 0; x < size.x; ++x) {
+                glm::dvec2 srcPt = pTrafo->inverse_transform_point(glm::dvec2(x, y));
+                IntPoint srcPos(int(srcPt.x+0.5), int(srcPt.y+0.5));
+                unsigned char* pDestPixel = getPixel(pDestBmp, IntPoint(x, y));
+                if (srcPos.x < 0 || srcPos.y < 0 || srcPos.x >= size.x || 
+                        srcPos.y >= size.y)
+                {
+                    *pDestPixel = *getPixel(pSrcBmp, IntPoint(0, 0));
+                } else {
+                    IntPoint topLeft(int(floor(srcPt.x)), int(floor(srcPt.y)));
+                    topLeft.x = max(0, min(topLeft.x, size.x-2));
+                    topLeft.y = max(0, min(topLeft.y, size.y-2));
+                    double fx = max(0., min(1., srcPt.x-topLeft.x));
+                    double fy = max(0., min(1., srcPt.y-topLeft.y));
+                    unsigned char* pSrcPixel = getPixel(pSrcBmp, topLeft);
+                    int stride = pSrcBmp->getStride();
+                    double top = pSrcPixel[0]*(1-fx) + pSrcPixel[1]*fx;
+                    double bottom = pSrcPixel[stride]*(1-fx) + pSrcPixel[stride+1]*fx;
+                    *pDestPixel = (unsigned char)(top*(1-fy) + bottom*fy + 0.5);
+                }
+            }
+        }
+        return pDestBmp;
+    }
+
+    unsigned char* getPixel(BitmapPtr pBmp, const IntPoint& pos)
+    {
+        return pBmp->getPixels()+pos.y*pBmp->getStride()+pos.x;
+    }
+
+    int maxDiff(BitmapPtr pBmp1, BitmapPtr pBmp2)
+    {
+        int diff = 0;
+        IntPoint size = pBmp1->getSize();
+        for (int y = 0; y < size.y; ++y) {
+            for (int x = 0; x < size.x; ++x) {
+                IntPoint pos(x, y);
+                diff = max(diff, abs(*getPixel(pBmp1, pos) - *getPixel(pBmp2, pos)));
+            }
+        }
+        return diff;
+    }
+};
+
+class ConnectedCompsTest: public Test
+{
+public:
+    ConnectedCompsTest()
+        : Test("ConnectedCompsTest", 2)
+    {
+    }
+
+    void runTests() 
+    {
+        BitmapPtr pBmp(new Bitmap(IntPoint(100, 80), I8));
+        FilterFill<Pixel8>(Pixel8(0)).applyInPlace(pBmp);
+        BlobVectorPtr pBlobs = findConnectedComponents(pBmp, 128);
+        TEST(pBlobs->empty());
+
+        // A rectangle and a U shape. The arms of the U only get connected in the 
+        // last lines, so the labels need to be merged.
+        fillRect(pBmp, IntRect(10, 10, 30, 20));
+        fillRect(pBmp, IntRect(50, 10, 55, 40));
+        fillRect(pBmp, IntRect(70, 10, 75, 40));
+        fillRect(pBmp, IntRect(50, 40, 75, 45));
+        pBlobs = findConnectedComponents(pBmp, 128);
+        TEST(pBlobs->size() == 2);
+        BlobPtr pRectBlob = (*pBlobs)[0];
+        BlobPtr pUBlob = (*pBlobs)[1];
+        if (pRectBlob->getArea() > pUBlob->getArea()) {
+            swap(pRectBlob, pUBlob);
+        }
+        TEST(pRectBlob->getArea() == 200);
+        TEST(almostEqual(pRectBlob->getCenter(), glm::vec2(19.5, 14.5)));
+        TEST(pRectBlob->getBoundingBox() == IntRect(10, 10, 30, 19));
+        TEST(pRectBlob->contains(IntPoint(10, 10)));
+        TEST(!pRectBlob->contains(IntPoint(30, 10)));
+        TEST(almostEqual(pRectBlob->getOrientation(), 0.f));
+        
+        TEST(pUBlob->getArea() == 425);
+        TEST(pUBlob->getBoundingBox() == IntRect(50, 10, 75, 44));
+        TEST(pUBlob->contains(IntPoint(72, 12)));
+        TEST(!pUBlob->contains(IntPoint(60, 12)));
+        // Center: Weighted average of the two arms and the base.
+        glm::vec2 center = (glm::vec2(52, 24.5f)*150.f + glm::vec2(72, 24.5f)*150.f +
+                glm::vec2(62, 42)*125.f)/425.f;
+        TEST(almostEqual(pUBlob->getCenter(), center));
+        pUBlob->calcContour(1);
+        TEST(!pUBlob->getContour().empty());
+    }
+
+private:
+    void fillRect(BitmapPtr pBmp, const IntRect& rect)
+    {
+        FilterFillRect<Pixel8>(rect, Pixel8(255)).applyInPlace(pBmp);
+    }
+};
+
+class BlobMatchingTest: public Test
+{
+public:
+    BlobMatchingTest()
+        : Test("BlobMatchingTest", 2)
+    {
+    }
+
+    void runTests() 
+    {
+        // Well-separated moving blobs: Both strategies produce the same ids.
+        vector<string> greedyIDs = trackIDs(createFrames(), 10, BLOB_MATCH_GREEDY);
+        vector<string> optimalIDs = trackIDs(createFrames(), 10, BLOB_MATCH_OPTIMAL);
+        TEST(greedyIDs == optimalIDs);
+
+        // Ambiguous configuration: The closest pair steals the only partner of 
+        // another blob. Greedy matching loses a blob, optimal matching doesn't.
+        {
+            vector<IntPoint> oldPositions;
+            oldPositions.push_back(IntPoint(20, 20));
+            oldPositions.push_back(IntPoint(30, 20));
+            BlobVectorPtr pOldBlobs = createBlobs(oldPositions);
+            vector<IntPoint> newPositions;
+            newPositions.push_back(IntPoint(26, 20));
+            newPositions.push_back(IntPoint(36, 20));
+            BlobVectorPtr pNewBlobs = createBlobs(newPositions);
+            TEST(pOldBlobs->size() == 2 && pNewBlobs->size() == 2);
+            
+            BlobMatchVector matches = matchBlobs(*pOldBlobs, *pNewBlobs, 8, 
+                    BLOB_MATCH_GREEDY);
+            TEST(matches.size() == 1);
+            TEST(almostEqual(matches[0].first->getCenter().x, 31.5f));
+            TEST(almostEqual(matches[0].second->getCenter().x, 27.5f));
+
+            matches = matchBlobs(*pOldBlobs, *pNewBlobs, 8, BLOB_MATCH_OPTIMAL);
+            TEST(matches.size() == 2);
+            for (unsigned i = 0; i < matches.size(); ++i) {
+                float dist = matches[i].second->getCenter().x - 
+                        matches[i].first->getCenter().x;
+                TEST(almostEqual(dist, 6.f));
+            }
+        }
+
+        // Nothing in range.
+        BlobVectorPtr pBlobs = createBlobs(vector<IntPoint>(1, IntPoint(20, 20)));
+        BlobVectorPtr pFarBlobs = createBlobs(vector<IntPoint>(1, IntPoint(60, 60)));
+        TEST(matchBlobs(*pBlobs, *pFarBlobs, 10, BLOB_MATCH_GREEDY).empty());
+        TEST(matchBlobs(*pBlobs, *pFarBlobs, 10, BLOB_MATCH_OPTIMAL).empty());
+    }
+
+private:
+    vector<BlobVectorPtr> createFrames()
+    {
+        vector<BlobVectorPtr> frames;
+        for (int i = 0; i < 20; ++i) {
+            vector<IntPoint> positions;
+            for (int j = 0; j < 6; ++j) {
+                positions.push_back(IntPoint(10+j*40+2*i, 10+(j%2)*60+3*i));
+            }
+            if (i > 5) {
+                // Appears in the middle of the sequence.
+                positions.push_back(IntPoint(120, 150-i*3));
+            }
+            if (i > 12) {
+                // Disappears.
+                positions.erase(positions.begin()+2);
+            }
+            frames.push_back(createBlobs(positions));
+        }
+        return frames;
+    }
+
+    BlobVectorPtr createBlobs(const vector<IntPoint>& positions)
+    {
+        BitmapPtr pBmp(new Bitmap(IntPoint(320, 240), I8));
+        FilterFill<Pixel8>(Pixel8(0)).applyInPlace(pBmp);
+        for (unsigned i = 0; i < positions.size(); ++i) {
+            IntRect rect(positions[i], positions[i]+IntPoint(4, 4));
+            FilterFillRect<Pixel8>(rect, Pixel8(255)).applyInPlace(pBmp);
+        }
+        return findConnectedComponents(pBmp, 128);
+    }
+
+    // Simplified version of TrackerInputDevice::trackBlobIDs. Returns the ids 
+    // and positions of all blobs in each frame.
+    vector<string> trackIDs(const vector<BlobVectorPtr>& frames, float maxDist,
+            BlobMatchMode mode)
+    {
+        vector<string> results;
+        map<BlobPtr, int> ids;
+        int nextID = 0;
+        for (unsigned i = 0; i < frames.size(); ++i) {
+            BlobVector oldBlobs;
+            for (map<BlobPtr, int>::iterator it = ids.begin(); it != ids.end(); ++it) {
+                oldBlobs.push_back(it->first);
+            }
+            BlobVector& newBlobs = *frames[i];
+            BlobMatchVector matches = matchBlobs(oldBlobs, newBlobs, maxDist, mode);
+            map<BlobPtr, int> newIDs;
+            for (unsigned j = 0; j < matches.size(); ++j) {
+                BlobPtr pOldBlob = matches[j].first;
+                BlobPtr pNewBlob = matches[j].second;
+                pNewBlob->calcNextCenter(pOldBlob->getCenter());
+                newIDs[pNewBlob] = ids[pOldBlob];
+            }
+            stringstream ss;
+            for (unsigned j = 0; j < newBlobs.size(); ++j) {
+                BlobPtr pBlob = newBlobs[j];
+                if (newIDs.find(pBlob) == newIDs.end()) {
+                    newIDs[pBlob] = nextID++;
+                }
+                ss << newIDs[pBlob] << ":" << pBlob->getCenter().x << "," 
+                        << pBlob->getCenter().y << " ";
+            }
+            results.push_back(ss.str());
+            ids = newIDs;
+        }
+        TEST(nextID == 7);
+        return results;
+    }
+};
+
+class BlobRecorder: public IBlobTarget
+{
+public:
+    virtual void update(BlobVectorPtr pTrackBlobs, BlobVectorPtr pTouchBlobs,
+            long long time)
+    {
+        boost::mutex::scoped_lock lock(m_Mutex);
+        m_Results.push_back(describe(pTrackBlobs) + " | " + describe(pTouchBlobs));
+    }
+
+    vector<string> getResults()
+    {
+        boost::mutex::scoped_lock lock(m_Mutex);
+        return m_Results;
+    }
+
+private:
+    string describe(BlobVectorPtr pBlobs)
+    {
+        if (!pBlobs) {
+            return "-";
+        }
+        stringstream ss;
+        for (BlobVector::iterator it = pBlobs->begin(); it != pBlobs->end(); ++it) {
+            ss << "(" << (*it)->getCenter().x << "," << (*it)->getCenter().y << ","
+                    << (*it)->getArea() << ")";
+        }
+        return ss.str();
+    }
+
+    boost::mutex m_Mutex;
+    vector<string> m_Results;
+};
+
+class TrackerPipelineTest: public Test
+{
+public:
+    TrackerPipelineTest()
+        : Test("TrackerPipelineTest", 2)
+    {
+    }
+
+    void runTests() 
+    {
+        TrackerConfig config;
+        copyFile(getSrcDirName()+"avgtrackerrc.minimal", "avgtrackerrc");
+        config.load();
+        unlink("avgtrackerrc");
+        config.setParam("/transform/distortionparams/@p2", "0");
+        config.setParam("/transform/distortionparams/@p3", "0");
+        config.setParam("/transform/trapezoid/@value", "0");
+        config.setParam("/transform/angle/@value", "0");
+        config.setParam("/transform/displaydisplacement/@x", "0");
+        config.setParam("/transform/displaydisplacement/@y", "0");
+        config.setParam("/transform/displayscale/@x", "1");
+        config.setParam("/transform/displayscale/@y", "1");
+        config.setParam("/camera/size/@x", "160");
+        config.setParam("/camera/size/@y", "120");
+        config.setParam("/tracker/track/eccentricitybounds/@min", "0");
+        config.setParam("/tracker/pipeline/@queuesize", "16");
+
+        vector<BitmapPtr> frames = createFrames(10);
+        vector<string> sequentialResults = runTracker(config, frames);
+        TEST(sequentialResults.size() == frames.size());
+        // The first frame is processed before setConfig() sets the thresholds.
+        for (unsigned i = 1; i < sequentialResults.size(); ++i) {
+            TEST(countBlobs(sequentialResults[i]) >= 2);
+        }
+
+        config.setParam("/tracker/pipeline/@workers", "2");
+        config.setParam("/tracker/pipeline/@bandpasstiles", "3");
+        config.setParam("/tracker/pipeline/@distorttiles", "2");
+        vector<string> pipelineResults = runTracker(config, frames);
+        TEST(pipelineResults == sequentialResults);
+    }
+
+private:
+    vector<BitmapPtr> createFrames(int numFrames)
+    {
+        vector<BitmapPtr> frames;
+        for (int i = 0; i < numFrames; ++i) {
+            BitmapPtr pBmp(new Bitmap(IntPoint(160, 120), I8));
+            FilterFill<Pixel8>(Pixel8(0)).applyInPlace(pBmp);
+            if (i > 0) {
+                IntPoint pos(10+i*5, 20+i*3);
+                FilterFillRect<Pixel8>(IntRect(pos, pos+IntPoint(30, 30)), 
+                        Pixel8(200)).applyInPlace(pBmp);
+                pos = IntPoint(120-i*4, 80);
+                FilterFillRect<Pixel8>(IntRect(pos, pos+IntPoint(28, 34)), 
+                        Pixel8(255)).applyInPlace(pBmp);
+            }
+            frames.push_back(pBmp);
+        }
+        return frames;
+    }
+
+    vector<string> runTracker(TrackerConfig& config, const vector<BitmapPtr>& frames)
+    {
+        boost::shared_ptr<FakeCamera> pFakeCamera(new FakeCamera(frames));
+        pFakeCamera->open();
+        CameraPtr pCamera = pFakeCamera;
+        IntPoint size = pCamera->getImgSize();
+        IntRect roi(IntPoint(0,0), size);
+        BitmapPtr pBitmaps[NUM_TRACKER_IMAGES];
+        for (int i = 0; i < NUM_TRACKER_IMAGES; ++i) {
+            switch (i) {
+                case TRACKER_IMG_HISTOGRAM:
+                    pBitmaps[i] = BitmapPtr(new Bitmap(IntPoint(256, 256), I8));
+                    break;
+                case TRACKER_IMG_FINGERS:
+                    pBitmaps[i] = BitmapPtr(new Bitmap(size, B8G8R8A8));
+                    break;
+                default:
+                    pBitmaps[i] = BitmapPtr(new Bitmap(size, I8));
+            }
+        }
+        MutexPtr pMutex(new boost::mutex);
+        TrackerThread::CQueuePtr pCmdQ(new TrackerThread::CQueue);
+        BlobRecorder recorder;
+        boost::thread thread(TrackerThread(roi, pCamera, pBitmaps, pMutex, *pCmdQ,
+                &recorder, false, config));
+        pCmdQ->pushCmd(boost::bind(&TrackerThread::setConfig, _1, config, roi, 
+                pBitmaps));
+        pCmdQ->pushCmd(boost::bind(&TrackerThread::setDebugImages, _1, true, true));
+        for (int i = 0; i < 100; ++i) {
+            if (recorder.getResults().size() >= frames.size()) {
+                break;
+            }
+            msleep(50);
+        }
+        pCmdQ->pushCmd(boost::bind(&TrackerThread::stop, _1));
+        thread.join();
+        return recorder.getResults();
+    }
+
+    int countBlobs(const string& sResult)
+    {
+        string sTrackResult = sResult.substr(0, sResult.find(" | "));
+        return int(count(sTrackResult.begin(), sTrackResult.end(), '('));
+    }
+};
+
 class ImagingTestSuite: public TestSuite
 {
 public:
@@ -218,7 +651,11 @@ public:
         addTest(TestPtr(new FilterWipeBorderTest));
         addTest(TestPtr(new FilterClearBorderTest));
         addTest(TestPtr(new DeDistortTest));
+        addTest(TestPtr(new FilterDistortionTest));
         addTest(TestPtr(new SerializeTest));
+        addTest(TestPtr(new ConnectedCompsTest));
+        addTest(TestPtr(new BlobMatchingTest));
+        addTest(TestPtr(new TrackerPipelineTest));
     }
 };
 
@@ -32,7 +32,8 @@ const char * g_pTrackerConfigDTD =
 "<!ELEMENT camera (driver|device|fw800|format|size|framerate|brightness|gamma|exposure|"
 "       gain|shutter|strobeduration)* >\n"
 "<!ELEMENT tracker (mask|prescale|historyupdateinterval|brighterregions|"
-"       contourprecision|historydelay|touch|track|findfingertips)* >\n"
+"       contourprecision|historydelay|touch|track|findfingertips|pipeline|"
+"       blobmatching)* >\n"
 "<!ELEMENT touch (threshold|similarity|areabounds|eccentricitybounds|bandpass|"
 "       bandpasspostmult)* >\n"
 "<!ELEMENT track (threshold|similarity|areabounds|eccentricitybounds)* >\n"
@@ -103,6 +104,10 @@ const char * g_pTrackerConfigDTD =
 "<!ATTLIST findfingertips\n"
 "   value CDATA #REQUIRED >\n"
 
+"<!ELEMENT blobmatching EMPTY>\n"
+"<!ATTLIST blobmatching\n"
+"   value (greedy|optimal) #REQUIRED >\n"
+
 "<!ELEMENT prescale EMPTY>\n"
 "<!ATTLIST prescale\n"
 "   value CDATA #REQUIRED >\n"
@@ -119,6 +124,13 @@ const char * g_pTrackerConfigDTD =
 "<!ATTLIST historydelay\n"
 "   value CDATA #REQUIRED >\n"
 
+"<!ELEMENT pipeline EMPTY>\n"
+"<!ATTLIST pipeline\n"
+"   workers CDATA #REQUIRED\n"
+"   queuesize CDATA #IMPLIED\n"
+"   bandpasstiles CDATA #IMPLIED\n"
+"   distorttiles CDATA #IMPLIED >\n"
+
 "<!ELEMENT similarity EMPTY>\n"
 "<!ATTLIST similarity\n"
 "   value CDATA #REQUIRED >\n"
@@ -103,9 +103,10 @@ void AreaNode::connectDisplay()
         m_RelViewport.setHeight(float(m_UserSize.y));
     }
     if (m_UserSize.x == 0.0 || m_UserSize.y == 0) {
-        notifySubscribers("SIZE_CHANGED", m_RelViewport.size());
+        notifySizeChanged(m_RelViewport.size());
     }
     m_bTransformChanged = true;
+    pickRectChanged();
     Node::connectDisplay();
 }
 
@@ -181,6 +182,7 @@ void AreaNode::setAngle(float angle)
 {
     m_Angle = fmod(angle, 2*(float)M_PI);
     m_bTransformChanged = true;
+    pickRectChanged();
 }
 
 glm::vec2 AreaNode::getPivot() const
@@ -198,6 +200,7 @@ void AreaNode::setPivot(const glm::vec2& pt)
     m_Pivot.y = pt.y;
     m_bHasCustomPivot = true;
     m_bTransformChanged = true;
+    pickRectChanged();
 }
 
 const std::string& AreaNode::getElementOutlineColor() const
@@ -236,6 +239,21 @@ void AreaNode::getElementsByPos(const glm::vec2& pos, vector<NodePtr>& pElements
     }
 }
 
+bool AreaNode::getPickRect(FRect& rect) const
+{
+    glm::vec2 size = getSize();
+    glm::vec2 corners[4] = {glm::vec2(0,0), glm::vec2(size.x,0), glm::vec2(0,size.y),
+            size};
+    rect.tl = toGlobal(corners[0]);
+    rect.br = rect.tl;
+    for (int i = 1; i < 4; ++i) {
+        glm::vec2 pt = toGlobal(corners[i]);
+        rect.tl = glm::min(rect.tl, pt);
+        rect.br = glm::max(rect.br, pt);
+    }
+    return true;
+}
+
 void AreaNode::preRender(const VertexArrayPtr& pVA, bool bIsParentActive,
         float parentEffectiveOpacity)
 {
@@ -298,9 +316,10 @@ void AreaNode::setViewport(float x, float y, float width, float height)
     }
     m_RelViewport = FRect(x, y, x+width, y+height);
     if (oldSize != m_RelViewport.size()) {
-        notifySubscribers("SIZE_CHANGED", m_RelViewport.size());
+        notifySizeChanged(m_RelViewport.size());
     }
     m_bTransformChanged = true;
+    pickRectChanged();
 }
 
 const FRect& AreaNode::getRelViewport() const
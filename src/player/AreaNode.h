@@ -86,6 +86,7 @@ class AVG_API AreaNode: public Node
         
         virtual void getElementsByPos(const glm::vec2& pos, 
                 std::vector<NodePtr>& pElements);
+        virtual bool getPickRect(FRect& rect) const;
 
         virtual void preRender(const VertexArrayPtr& pVA, bool bIsParentActive,
                 float parentEffectiveOpacity);
@@ -59,20 +59,18 @@ ArgList::ArgList(const ArgList& argTemplates, const py::dict& PyDict)
 {
     // TODO: Check if all required args are being set.
     copyArgsFrom(argTemplates);
-    py::list keys = PyDict.keys();
-    int nKeys = py::len(keys);
-    for (int i = 0; i < nKeys; i++)
-    {
-        py::object keyObj = keys[i];
-        py::object valObj = PyDict[keyObj];
-        
+    PyObject* pKey;
+    PyObject* pValue;
+    Py_ssize_t pos = 0;
+    while (PyDict_Next(PyDict.ptr(), &pos, &pKey, &pValue)) {
+        py::object keyObj(py::handle<>(py::borrowed(pKey)));
         py::extract<string> keyStrProxy(keyObj);
         if (!keyStrProxy.check()) {
             throw Exception(AVG_ERR_INVALID_ARGS, "Argument name must be a string.");
         }
         string keyStr = keyStrProxy();
 
-        setArgValue(keyStr, valObj);
+        setArgValue(keyStr, py::object(py::handle<>(py::borrowed(pValue))));
     }
 }
 
@@ -96,6 +94,19 @@ const ArgBasePtr ArgList::getArg(const string& sName) const
     return valIt->second;
 }
 
+ArgBasePtr& ArgList::getWritableArg(const string& sName)
+{
+    ArgMap::iterator valIt = m_Args.find(sName);
+    if (valIt == m_Args.end()) {
+        throw Exception(AVG_ERR_INVALID_ARGS, string("Argument ")+sName+" is not valid.");
+    }
+    // Args are shared with the template they were copied from until they are changed.
+    if (!valIt->second.unique()) {
+        valIt->second = ArgBasePtr(valIt->second->createCopy());
+    }
+    return valIt->second;
+}
+
 void ArgList::getOverlayedArgVal(glm::vec2* pResult, const string& sName, 
         const string& sOverlay1, const string& sOverlay2, const string& sID) const
 {
@@ -149,54 +160,48 @@ void setArgValue(Arg<T>* pArg, const std::string & sName, const py::object& valu
 
 void ArgList::setArgValue(const std::string & sName, const py::object& value)
 {
-    ArgBasePtr pArg = getArg(sName);
-    Arg<string>* pStringArg = dynamic_cast<Arg<string>* >(&*pArg);
-    Arg<UTF8String>* pUTF8StringArg = dynamic_cast<Arg<UTF8String>* >(&*pArg);
-    Arg<int>* pIntArg = dynamic_cast<Arg<int>* >(&*pArg);
-    Arg<float>* pFloatArg = dynamic_cast<Arg<float>* >(&*pArg);
-    Arg<bool>* pBoolArg = dynamic_cast<Arg<bool>* >(&*pArg);
-    Arg<glm::vec2>* pVec2Arg = dynamic_cast<Arg<glm::vec2>* >(&*pArg);
-    Arg<glm::vec3>* pVec3Arg = dynamic_cast<Arg<glm::vec3>* >(&*pArg);
-    Arg<glm::ivec3>* pIVec3Arg = dynamic_cast<Arg<glm::ivec3>* >(&*pArg);
-    Arg<vector<float> >* pFVectorArg = dynamic_cast<Arg<vector<float> >* >(&*pArg);
-    Arg<vector<int> >* pIVectorArg = dynamic_cast<Arg<vector<int> >* >(&*pArg);
-    Arg<vector<glm::vec2> >* pVec2VectorArg = 
-            dynamic_cast<Arg<vector<glm::vec2> >* >(&*pArg);
-    Arg<vector<glm::ivec3> >* pIVec3VectorArg = 
-            dynamic_cast<Arg<vector<glm::ivec3> >* >(&*pArg);
-    Arg<CollVec2Vector>* pCollVec2VectorArg =
-            dynamic_cast<Arg<CollVec2Vector>* >(&*pArg);
-    Arg<FontStyle>* pFontStyleArg = dynamic_cast<Arg<FontStyle>* >(&*pArg);
-    Arg<FontStylePtr>* pFontStylePtrArg = dynamic_cast<Arg<FontStylePtr>* >(&*pArg);
-    if(pStringArg) {
+    ArgBase* pArg = getWritableArg(sName).get();
+    if (Arg<float>* pFloatArg = dynamic_cast<Arg<float>* >(pArg)) {
+        avg::setArgValue(pFloatArg, sName, value);
+    } else if (Arg<glm::vec2>* pVec2Arg = dynamic_cast<Arg<glm::vec2>* >(pArg)) {
+        avg::setArgValue(pVec2Arg, sName, value);
+    } else if (Arg<string>* pStringArg = dynamic_cast<Arg<string>* >(pArg)) {
         avg::setArgValue(pStringArg, sName, value);
-    } else if (pUTF8StringArg) {
+    } else if (Arg<UTF8String>* pUTF8StringArg = dynamic_cast<Arg<UTF8String>* >(pArg))
+    {
         avg::setArgValue(pUTF8StringArg, sName, value);
-    } else if (pIntArg) {
+    } else if (Arg<int>* pIntArg = dynamic_cast<Arg<int>* >(pArg)) {
         avg::setArgValue(pIntArg, sName, value);
-    } else if (pFloatArg) {
-        avg::setArgValue(pFloatArg, sName, value);
-    } else if (pBoolArg) {
+    } else if (Arg<bool>* pBoolArg = dynamic_cast<Arg<bool>* >(pArg)) {
         avg::setArgValue(pBoolArg, sName, value);
-    } else if (pVec2Arg) {
-        avg::setArgValue(pVec2Arg, sName, value);
-    } else if (pVec3Arg) {
+    } else if (Arg<glm::vec3>* pVec3Arg = dynamic_cast<Arg<glm::vec3>* >(pArg)) {
         avg::setArgValue(pVec3Arg, sName, value);
-    } else if (pIVec3Arg) {
+    } else if (Arg<glm::ivec3>* pIVec3Arg = dynamic_cast<Arg<glm::ivec3>* >(pArg)) {
         avg::setArgValue(pIVec3Arg, sName, value);
-    } else if (pFVectorArg) {
+    } else if (Arg<vector<float> >* pFVectorArg = 
+            dynamic_cast<Arg<vector<float> >* >(pArg))
+    {
         avg::setArgValue(pFVectorArg, sName, value);
-    } else if (pIVectorArg) {
+    } else if (Arg<vector<int> >* pIVectorArg = dynamic_cast<Arg<vector<int> >* >(pArg))
+    {
         avg::setArgValue(pIVectorArg, sName, value);
-    } else if (pVec2VectorArg) {
+    } else if (Arg<vector<glm::vec2> >* pVec2VectorArg = 
+            dynamic_cast<Arg<vector<glm::vec2> >* >(pArg))
+    {
         avg::setArgValue(pVec2VectorArg, sName, value);
-    } else if (pIVec3VectorArg) {
+    } else if (Arg<vector<glm::ivec3> >* pIVec3VectorArg = 
+            dynamic_cast<Arg<vector<glm::ivec3> >* >(pArg))
+    {
         avg::setArgValue(pIVec3VectorArg, sName, value);
-    } else if (pCollVec2VectorArg) {
+    } else if (Arg<CollVec2Vector>* pCollVec2VectorArg =
+            dynamic_cast<Arg<CollVec2Vector>* >(pArg))
+    {
         avg::setArgValue(pCollVec2VectorArg, sName, value);
-    } else if (pFontStyleArg) {
+    } else if (Arg<FontStyle>* pFontStyleArg = dynamic_cast<Arg<FontStyle>* >(pArg)) {
         avg::setArgValue(pFontStyleArg, sName, value);
-    } else if (pFontStylePtrArg) {
+    } else if (Arg<FontStylePtr>* pFontStylePtrArg = 
+            dynamic_cast<Arg<FontStylePtr>* >(pArg))
+    {
         avg::setArgValue(pFontStylePtrArg, sName, value);
     } else {
         AVG_ASSERT(false);
@@ -205,7 +210,7 @@ void ArgList::setArgValue(const std::string & sName, const py::object& value)
 
 void ArgList::setArgValue(const std::string & sName, const std::string & sValue)
 {
-    ArgBasePtr pArg = getArg(sName);
+    ArgBasePtr pArg = getWritableArg(sName);
     Arg<string>* pStringArg = dynamic_cast<Arg<string>* >(&*pArg);
     Arg<UTF8String>* pUTF8StringArg = dynamic_cast<Arg<UTF8String>* >(&*pArg);
     Arg<int>* pIntArg = dynamic_cast<Arg<int>* >(&*pArg);
@@ -265,12 +270,15 @@ void ArgList::setArgValue(const std::string & sName, const std::string & sValue)
 
 void ArgList::copyArgsFrom(const ArgList& argTemplates)
 {
-    for (ArgMap::const_iterator it = argTemplates.m_Args.begin();
-            it != argTemplates.m_Args.end(); it++)
-    {
-        string sKey = it->first;
-        ArgBasePtr pArg = ArgBasePtr(it->second->createCopy());
-        m_Args[sKey] = pArg;
+    // The args themselves are only cloned when they're written to (see getWritableArg).
+    if (m_Args.empty()) {
+        m_Args = argTemplates.m_Args;
+    } else {
+        for (ArgMap::const_iterator it = argTemplates.m_Args.begin();
+                it != argTemplates.m_Args.end(); it++)
+        {
+            m_Args[it->first] = it->second;
+        }
     }
 }
 
@@ -67,6 +67,7 @@ public:
     void copyArgsFrom(const ArgList& argTemplates);
 
 private:
+    ArgBasePtr& getWritableArg(const std::string& sName);
     void setArgValue(const std::string & sName, const py::object& value);
     void setArgValue(const std::string & sName, const std::string & sValue);
     ArgMap m_Args;
@@ -21,6 +21,7 @@
 
 #include "BitmapManager.h"
 #include "IBitmapLoadedListener.h"
+#include "Player.h"
 
 #ifdef WIN32
 #include  <io.h>
@@ -29,6 +30,12 @@
 #include  <stdlib.h>
 
 #include "../base/OSHelper.h"
+#include "../base/Logger.h"
+#include "../base/TimeSource.h"
+
+#include "../graphics/ImageCache.h"
+
+#include <algorithm>
 
 using namespace std;
 
@@ -37,21 +44,26 @@ namespace avg {
 BitmapManager * BitmapManager::s_pBitmapManager=0;
 
 BitmapManager::BitmapManager()
+    : m_NextID(1),
+      m_CallbackTimeBudget(0)
 {
     if (s_pBitmapManager) {
         throw Exception(AVG_ERR_UNKNOWN, "BitmapMananger has already been instantiated.");
     }
     
     m_pCmdQueue = BitmapManagerThread::CQueuePtr(new BitmapManagerThread::CQueue);
-    m_pMsgQueue = BitmapManagerMsgQueuePtr(new BitmapManagerMsgQueue(8));
+    m_pRequestQueue = BitmapRequestQueuePtr(new BitmapRequestQueue);
+    m_pMsgQueue = BitmapManagerMsgQueuePtr(new BitmapManagerMsgQueue);
+    resetStats();
 
-    startThreads(1);
+    startThreads(getDefaultNumThreads());
 
     s_pBitmapManager = this;
 }
 
 BitmapManager::~BitmapManager()
 {
+    m_pRequestQueue->clear();
     while (!m_pCmdQueue->empty()) {
         m_pCmdQueue->pop();
     }
@@ -70,36 +82,202 @@ BitmapManager* BitmapManager::get()
     return s_pBitmapManager;
 }
 
-void BitmapManager::loadBitmapPy(const UTF8String& sUtf8FileName,
-        const boost::python::object& pyFunc, PixelFormat pf)
+int BitmapManager::loadBitmapPy(const UTF8String& sUtf8FileName,
+        const boost::python::object& pyFunc, PixelFormat pf, int priority)
 {
     std::string sFileName = convertUTF8ToFilename(sUtf8FileName);
     BitmapManagerMsgPtr pMsg = BitmapManagerMsgPtr(
-            new BitmapManagerMsg(sUtf8FileName, pyFunc, pf));
+            new BitmapManagerMsg(sUtf8FileName, pyFunc, pf, m_NextID++, priority));
     internalLoadBitmap(pMsg);
+    return pMsg->getID();
 }
 
-void BitmapManager::loadBitmap(const UTF8String& sUtf8FileName,
-        IBitmapLoadedListener* pLoadedListener, PixelFormat pf)
+int BitmapManager::loadBitmap(const UTF8String& sUtf8FileName,
+        IBitmapLoadedListener* pLoadedListener, PixelFormat pf, int priority)
 {
     std::string sFileName = convertUTF8ToFilename(sUtf8FileName);
-    BitmapManagerMsgPtr pMsg = BitmapManagerMsgPtr(
-            new BitmapManagerMsg(sUtf8FileName, pLoadedListener, pf));
+    BitmapManagerMsgPtr pMsg = BitmapManagerMsgPtr(new BitmapManagerMsg(
+            sUtf8FileName, pLoadedListener, pf, m_NextID++, priority));
     internalLoadBitmap(pMsg);
+    return pMsg->getID();
+}
+
+bool BitmapManager::cancelLoad(int id)
+{
+    set<int>::iterator it = m_PendingIDs.find(id);
+    if (it == m_PendingIDs.end()) {
+        return false;
+    }
+    m_PendingIDs.erase(it);
+    if (!m_pRequestQueue->remove(id)) {
+        // Already being loaded or waiting for the callback.
+        m_CancelledIDs.insert(id);
+    }
+    m_NumCancelled++;
+    return true;
 }
 
 void BitmapManager::setNumThreads(int numThreads)
 {
+    if (numThreads < 0) {
+        throw Exception(AVG_ERR_OUT_OF_RANGE, 
+                "BitmapManager::setNumThreads: numThreads must be >= 0.");
+    }
+    if (numThreads == 0) {
+        numThreads = getDefaultNumThreads();
+    }
     stopThreads();
     startThreads(numThreads);
 }
 
+int BitmapManager::getNumThreads() const
+{
+    return int(m_pBitmapManagerThreads.size());
+}
+
+void BitmapManager::setCallbackTimeBudget(float budget)
+{
+    m_CallbackTimeBudget = budget;
+}
+
+float BitmapManager::getCallbackTimeBudget() const
+{
+    return m_CallbackTimeBudget;
+}
+
+void BitmapManager::prefetchImages(const vector<UTF8String>& sUtf8FileNames,
+        CachedImage::StorageType st)
+{
+    ImageCache* pCache = ImageCache::get();
+    for (unsigned i=0; i<sUtf8FileNames.size(); ++i) {
+        string sFileName = convertUTF8ToFilename(sUtf8FileNames[i]);
+        // Resolve relative paths like the hrefs of nodes in the main canvas so the
+        // cache entries match.
+        bool bAbsDir = sFileName != "" && sFileName[0] == '/';
+#ifdef _WIN32
+        if (!bAbsDir && sFileName.size() > 1) {
+            bAbsDir = (sFileName[0] == '\\' || sFileName[1] == ':');
+        }
+#endif
+        if (!bAbsDir) {
+            sFileName = Player::get()->getRootMediaDir()+sFileName;
+        }
+        if (pCache->hasImage(sFileName)) {
+            continue;
+        }
+        PrefetchMap::iterator it = m_PendingPrefetches.find(sFileName);
+        if (it == m_PendingPrefetches.end()) {
+            ImagePrefetchPtr pPrefetch(new ImagePrefetch(this, sFileName, st));
+            m_PendingPrefetches[sFileName] = pPrefetch;
+            loadBitmap(sFileName, pPrefetch.get());
+        } else if (st == CachedImage::STORAGE_GPU) {
+            it->second->m_StorageType = st;
+        }
+    }
+}
+
+int BitmapManager::getNumPendingPrefetches() const
+{
+    return m_PendingPrefetches.size();
+}
+
 void BitmapManager::onFrameEnd()
 {
+    long long startTime = TimeSource::get()->getCurrentMicrosecs();
+    bool bCallbackInvoked = false;
     while (!m_pMsgQueue->empty()) {
+        if (bCallbackInvoked && m_CallbackTimeBudget > 0) {
+            float elapsed = (TimeSource::get()->getCurrentMicrosecs()-startTime)/1000.f;
+            if (elapsed > m_CallbackTimeBudget) {
+                break;
+            }
+        }
         BitmapManagerMsgPtr pMsg = m_pMsgQueue->pop();
+        set<int>::iterator it = m_CancelledIDs.find(pMsg->getID());
+        if (it != m_CancelledIDs.end()) {
+            m_CancelledIDs.erase(it);
+            continue;
+        }
+        m_PendingIDs.erase(pMsg->getID());
+        float now = TimeSource::get()->getCurrentMicrosecs()/1000.f;
+        m_NumLoaded++;
+        m_TotalQueueTime += pMsg->getQueueTime();
+        m_MaxQueueTime = max(m_MaxQueueTime, pMsg->getQueueTime());
+        m_TotalLoadTime += pMsg->getLoadTime();
+        m_TotalLatency += now-pMsg->getStartTime();
+        bCallbackInvoked = true;
         pMsg->executeCallback();
     }
+    m_FinishedPrefetches.clear();
+}
+
+BitmapManager::Stats::Stats()
+    : m_NumQueued(0),
+      m_NumPendingCallbacks(0),
+      m_MaxQueueDepth(0),
+      m_NumLoaded(0),
+      m_NumCancelled(0),
+      m_AvgQueueTime(0),
+      m_MaxQueueTime(0),
+      m_AvgLoadTime(0),
+      m_AvgLatency(0)
+{
+}
+
+BitmapManager::Stats BitmapManager::getStats() const
+{
+    Stats stats;
+    stats.m_NumQueued = m_pRequestQueue->size();
+    stats.m_NumPendingCallbacks = m_pMsgQueue->size();
+    stats.m_MaxQueueDepth = m_MaxQueueDepth;
+    stats.m_NumLoaded = m_NumLoaded;
+    stats.m_NumCancelled = m_NumCancelled;
+    if (m_NumLoaded > 0) {
+        stats.m_AvgQueueTime = float(m_TotalQueueTime/m_NumLoaded);
+        stats.m_AvgLoadTime = float(m_TotalLoadTime/m_NumLoaded);
+        stats.m_AvgLatency = float(m_TotalLatency/m_NumLoaded);
+    }
+    stats.m_MaxQueueTime = m_MaxQueueTime;
+    return stats;
+}
+
+void BitmapManager::resetStats()
+{
+    m_MaxQueueDepth = 0;
+    m_NumLoaded = 0;
+    m_NumCancelled = 0;
+    m_TotalQueueTime = 0;
+    m_MaxQueueTime = 0;
+    m_TotalLoadTime = 0;
+    m_TotalLatency = 0;
+}
+
+BitmapManager::ImagePrefetch::ImagePrefetch(BitmapManager* pManager,
+        const string& sFilename, CachedImage::StorageType st)
+    : m_sFilename(sFilename),
+      m_StorageType(st),
+      m_pManager(pManager)
+{
+}
+
+void BitmapManager::ImagePrefetch::onBitmapLoaded(BitmapPtr pBmp)
+{
+    ImageCache::get()->addPrefetchedImage(m_sFilename, pBmp, m_StorageType);
+    m_pManager->onPrefetchDone(m_sFilename);
+}
+
+void BitmapManager::ImagePrefetch::onBitmapLoadError(const Exception* e)
+{
+    AVG_LOG_WARNING("Prefetching '" << m_sFilename << "' failed: " << e->getStr());
+    m_pManager->onPrefetchDone(m_sFilename);
+}
+
+void BitmapManager::onPrefetchDone(const string& sFilename)
+{
+    PrefetchMap::iterator it = m_PendingPrefetches.find(sFilename);
+    AVG_ASSERT(it != m_PendingPrefetches.end());
+    m_FinishedPrefetches.push_back(it->second);
+    m_PendingPrefetches.erase(it);
 }
 
 void BitmapManager::internalLoadBitmap(BitmapManagerMsgPtr pMsg)
@@ -117,15 +295,20 @@ void BitmapManager::internalLoadBitmap(BitmapManagerMsgPtr pMsg)
                 strerror(errno)));
         m_pMsgQueue->push(pMsg);
     } else {
-        m_pCmdQueue->pushCmd(boost::bind(&BitmapManagerThread::loadBitmap, _1, pMsg));
+        // The command doesn't carry the request, so the thread that executes it 
+        // picks the pending request with the highest priority.
+        m_pRequestQueue->push(pMsg);
+        m_MaxQueueDepth = max(m_MaxQueueDepth, m_pRequestQueue->size());
+        m_pCmdQueue->pushCmd(boost::bind(&BitmapManagerThread::loadNextBitmap, _1));
     }
+    m_PendingIDs.insert(pMsg->getID());
 }
 
 void BitmapManager::startThreads(int numThreads)
 {
     for (int i=0; i<numThreads; ++i) {
-        boost::thread* pThread = new boost::thread(
-                BitmapManagerThread(*m_pCmdQueue, *m_pMsgQueue));
+        boost::thread* pThread = new boost::thread(BitmapManagerThread(*m_pCmdQueue, 
+                *m_pRequestQueue, *m_pMsgQueue));
         m_pBitmapManagerThreads.push_back(pThread);
     }
 }
@@ -144,4 +327,11 @@ void BitmapManager::stopThreads()
     m_pBitmapManagerThreads.clear();
 }
 
+int BitmapManager::getDefaultNumThreads()
+{
+    // Leave one core for the main thread.
+    int numCores = boost::thread::hardware_concurrency();
+    return max(1, min(numCores-1, 4));
+}
+
 }
@@ -26,13 +26,20 @@
 
 #include "BitmapManagerThread.h"
 #include "BitmapManagerMsg.h"
+#include "BitmapRequestQueue.h"
+#include "IBitmapLoadedListener.h"
 
 #include "../base/Queue.h"
 #include "../base/IFrameEndListener.h"
 
+#include "../graphics/CachedImage.h"
+
 #include <boost/thread.hpp>
+#include <boost/shared_ptr.hpp>
 
 #include <vector>
+#include <map>
+#include <set>
 
 namespace avg {
 
@@ -42,24 +49,99 @@ class AVG_API BitmapManager : public IFrameEndListener
         BitmapManager();
         ~BitmapManager();
         static BitmapManager* get();
-        void loadBitmapPy(const UTF8String& sUtf8FileName,
-                const boost::python::object& pyFunc, PixelFormat pf=NO_PIXELFORMAT);
-        void loadBitmap(const UTF8String& sUtf8FileName,
-                IBitmapLoadedListener* pLoadedListener, PixelFormat pf=NO_PIXELFORMAT);
+        // Requests with higher priority are loaded first. Returns an id that can be 
+        // passed to cancelLoad().
+        int loadBitmapPy(const UTF8String& sUtf8FileName,
+                const boost::python::object& pyFunc, PixelFormat pf=NO_PIXELFORMAT,
+                int priority=0);
+        int loadBitmap(const UTF8String& sUtf8FileName,
+                IBitmapLoadedListener* pLoadedListener, PixelFormat pf=NO_PIXELFORMAT,
+                int priority=0);
+        // Returns false if the callback has already been invoked.
+        bool cancelLoad(int id);
+        // numThreads == 0 selects a thread count based on the number of cores.
         void setNumThreads(int numThreads);
+        int getNumThreads() const;
+        // Maximum time in milliseconds spent invoking callbacks per frame. At least one
+        // callback is invoked per frame. 0 means no limit.
+        void setCallbackTimeBudget(float budget);
+        float getCallbackTimeBudget() const;
+        void prefetchImages(const std::vector<UTF8String>& sUtf8FileNames,
+                CachedImage::StorageType st);
+        int getNumPendingPrefetches() const;
 
         virtual void onFrameEnd();
+
+        struct Stats {
+            Stats();
+
+            int m_NumQueued;
+            int m_NumPendingCallbacks;
+            int m_MaxQueueDepth;
+            int m_NumLoaded;
+            int m_NumCancelled;
+            // Milliseconds
+            float m_AvgQueueTime;
+            float m_MaxQueueTime;
+            float m_AvgLoadTime;
+            float m_AvgLatency;
+        };
+        Stats getStats() const;
+        void resetStats();
         
     private:
+        // Receives the bitmap for one prefetched image and hands it to the ImageCache.
+        class ImagePrefetch: public IBitmapLoadedListener
+        {
+            public:
+                ImagePrefetch(BitmapManager* pManager, const std::string& sFilename,
+                        CachedImage::StorageType st);
+
+                virtual void onBitmapLoaded(BitmapPtr pBmp);
+                virtual void onBitmapLoadError(const Exception* e);
+
+                std::string m_sFilename;
+                CachedImage::StorageType m_StorageType;
+
+            private:
+                BitmapManager* m_pManager;
+        };
+        typedef boost::shared_ptr<ImagePrefetch> ImagePrefetchPtr;
+
+        void onPrefetchDone(const std::string& sFilename);
+
         void internalLoadBitmap(BitmapManagerMsgPtr pMsg);
         void startThreads(int numThreads);
         void stopThreads();
+        static int getDefaultNumThreads();
 
         static BitmapManager * s_pBitmapManager;
 
         std::vector<boost::thread*> m_pBitmapManagerThreads;
         BitmapManagerThread::CQueuePtr m_pCmdQueue;
+        BitmapRequestQueuePtr m_pRequestQueue;
         BitmapManagerMsgQueuePtr m_pMsgQueue;
+
+        int m_NextID;
+        // Requests whose callbacks haven't been invoked yet.
+        std::set<int> m_PendingIDs;
+        // Requests that were cancelled while being loaded. Their results are dropped.
+        std::set<int> m_CancelledIDs;
+        float m_CallbackTimeBudget;
+
+        int m_MaxQueueDepth;
+        int m_NumLoaded;
+        int m_NumCancelled;
+        double m_TotalQueueTime;
+        float m_MaxQueueTime;
+        double m_TotalLoadTime;
+        double m_TotalLatency;
+
+        typedef std::map<std::string, ImagePrefetchPtr> PrefetchMap;
+        PrefetchMap m_PendingPrefetches;
+        // Finished prefetches can't delete themselves while their callback is running,
+        // so they're kept here until the end of onFrameEnd().
+        std::vector<ImagePrefetchPtr> m_FinishedPrefetches;
 };
 
 }
@@ -30,19 +30,21 @@
 namespace avg {
 
 BitmapManagerMsg::BitmapManagerMsg(const UTF8String& sFilename,
-        const boost::python::object& onLoadedCb, PixelFormat pf) 
+        const boost::python::object& onLoadedCb, PixelFormat pf, int id,
+        int priority)
 {
     ObjectCounter::get()->incRef(&typeid(*this));
-    init(sFilename, pf);
+    init(sFilename, pf, id, priority);
     m_OnLoadedCb = onLoadedCb;
     m_pLoadedListener = 0;
 }
 
 BitmapManagerMsg::BitmapManagerMsg(const UTF8String& sFilename,
-        IBitmapLoadedListener* pLoadedListener, PixelFormat pf)
+        IBitmapLoadedListener* pLoadedListener, PixelFormat pf, int id,
+        int priority)
 {
     ObjectCounter::get()->incRef(&typeid(*this));
-    init(sFilename, pf);
+    init(sFilename, pf, id, priority);
     m_OnLoadedCb = boost::python::object();
     m_pLoadedListener = pLoadedListener;
 }
@@ -55,10 +57,15 @@ BitmapManagerMsg::~BitmapManagerMsg()
     ObjectCounter::get()->decRef(&typeid(*this));
 }
 
-void BitmapManagerMsg::init(const UTF8String& sFilename, PixelFormat pf)
+void BitmapManagerMsg::init(const UTF8String& sFilename, PixelFormat pf, int id,
+        int priority)
 {
     m_sFilename = sFilename;
     m_StartTime = TimeSource::get()->getCurrentMicrosecs()/1000.0f;
+    m_LoadStartTime = m_StartTime;
+    m_LoadEndTime = m_StartTime;
+    m_ID = id;
+    m_Priority = priority;
     m_PF = pf;
     m_MsgType = REQUEST;
     m_pEx = 0;
@@ -109,6 +116,7 @@ void BitmapManagerMsg::setBitmap(BitmapPtr pBmp)
     AVG_ASSERT(m_MsgType == REQUEST);
     m_pBmp = pBmp;
     m_MsgType = BITMAP;
+    m_LoadEndTime = TimeSource::get()->getCurrentMicrosecs()/1000.0f;
 }
 
 void BitmapManagerMsg::setError(const Exception& ex)
@@ -116,6 +124,33 @@ void BitmapManagerMsg::setError(const Exception& ex)
     AVG_ASSERT(m_MsgType == REQUEST);
     m_MsgType = ERROR;
     m_pEx = new Exception(ex);
+    m_LoadEndTime = TimeSource::get()->getCurrentMicrosecs()/1000.0f;
+}
+
+int BitmapManagerMsg::getID() const
+{
+    return m_ID;
+}
+
+int BitmapManagerMsg::getPriority() const
+{
+    return m_Priority;
+}
+
+void BitmapManagerMsg::setLoadStartTime(float time)
+{
+    AVG_ASSERT(m_MsgType == REQUEST);
+    m_LoadStartTime = time;
+}
+
+float BitmapManagerMsg::getQueueTime() const
+{
+    return m_LoadStartTime - m_StartTime;
+}
+
+float BitmapManagerMsg::getLoadTime() const
+{
+    return m_LoadEndTime - m_LoadStartTime;
 }
 
 }
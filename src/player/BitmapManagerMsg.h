@@ -47,11 +47,13 @@ public:
     enum MsgType {REQUEST, BITMAP, ERROR};
 
     BitmapManagerMsg(const UTF8String& sFilename,
-            const boost::python::object& onLoadedCb, PixelFormat pf);
+            const boost::python::object& onLoadedCb, PixelFormat pf, int id=0,
+            int priority=0);
     BitmapManagerMsg(const UTF8String& sFilename,
-            IBitmapLoadedListener* pLoadedListener, PixelFormat pf);
+            IBitmapLoadedListener* pLoadedListener, PixelFormat pf, int id=0,
+            int priority=0);
     virtual ~BitmapManagerMsg();
-    void init(const UTF8String& sFilename, PixelFormat pf);
+    void init(const UTF8String& sFilename, PixelFormat pf, int id, int priority);
 
     void executeCallback();
     const UTF8String getFilename();
@@ -60,11 +62,22 @@ public:
     void setBitmap(BitmapPtr pBmp);
     void setError(const Exception& ex);
 
+    int getID() const;
+    int getPriority() const;
+    // Timestamps in milliseconds, set by the loader thread.
+    void setLoadStartTime(float time);
+    float getQueueTime() const;
+    float getLoadTime() const;
+
     MsgType getType() { return m_MsgType; };
 
 private:
     UTF8String m_sFilename;
     float m_StartTime;
+    float m_LoadStartTime;
+    float m_LoadEndTime;
+    int m_ID;
+    int m_Priority;
     BitmapPtr m_pBmp;
     boost::python::object m_OnLoadedCb;
     IBitmapLoadedListener* m_pLoadedListener;
@@ -32,8 +32,10 @@
 
 namespace avg {
 
-BitmapManagerThread::BitmapManagerThread(CQueue& cmdQ, BitmapManagerMsgQueue& MsgQueue)
+BitmapManagerThread::BitmapManagerThread(CQueue& cmdQ,
+        BitmapRequestQueue& requestQueue, BitmapManagerMsgQueue& MsgQueue)
     : WorkerThread<BitmapManagerThread>("BitmapManager", cmdQ),
+      m_RequestQueue(requestQueue),
       m_MsgQueue(MsgQueue),
       m_TotalLatency(0),
       m_NumBmpsLoaded(0)
@@ -57,11 +59,16 @@ void BitmapManagerThread::deinit()
 
 static ProfilingZoneID LoaderProfilingZone("loadBitmap", true);
 
-void BitmapManagerThread::loadBitmap(BitmapManagerMsgPtr pRequest)
+void BitmapManagerThread::loadNextBitmap()
 {
+    BitmapManagerMsgPtr pRequest = m_RequestQueue.pop();
+    if (!pRequest) {
+        return;
+    }
     BitmapPtr pBmp;
     ScopeTimer timer(LoaderProfilingZone);
     float startTime = pRequest->getStartTime();
+    pRequest->setLoadStartTime(TimeSource::get()->getCurrentMicrosecs()/1000.0f);
     try {
         pBmp = avg::loadBitmap(pRequest->getFilename(), pRequest->getPixelFormat());
         pRequest->setBitmap(pBmp);
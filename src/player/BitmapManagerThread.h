@@ -25,6 +25,7 @@
 #include "../api.h"
 
 #include "BitmapManagerMsg.h"
+#include "BitmapRequestQueue.h"
 
 #include "../base/WorkerThread.h"
 
@@ -36,13 +37,17 @@ namespace avg {
 class AVG_API BitmapManagerThread : public WorkerThread<BitmapManagerThread>
 {
     public:
-        BitmapManagerThread(CQueue& cmdQ, BitmapManagerMsgQueue& MsgQueue);
+        BitmapManagerThread(CQueue& cmdQ, BitmapRequestQueue& requestQueue,
+                BitmapManagerMsgQueue& MsgQueue);
                 
-        void loadBitmap(BitmapManagerMsgPtr pRequest);
+        // Loads the pending request with the highest priority. Does nothing if the
+        // request has been cancelled in the meantime.
+        void loadNextBitmap();
         
     private:
         virtual bool work();
         virtual void deinit();
+        BitmapRequestQueue& m_RequestQueue;
         BitmapManagerMsgQueue& m_MsgQueue;
 
         float m_TotalLatency;
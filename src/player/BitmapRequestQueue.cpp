@@ -0,0 +1,87 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "BitmapRequestQueue.h"
+
+#include "../base/Exception.h"
+#include "../base/ThreadHelper.h"
+
+using namespace std;
+
+namespace avg {
+
+BitmapRequestQueue::BitmapRequestQueue()
+{
+}
+
+BitmapRequestQueue::~BitmapRequestQueue()
+{
+}
+
+void BitmapRequestQueue::push(BitmapManagerMsgPtr pMsg)
+{
+    lock_guard lock(m_Mutex);
+    int id = pMsg->getID();
+    AVG_ASSERT(m_Priorities.find(id) == m_Priorities.end());
+    m_Requests[RequestKey(-pMsg->getPriority(), id)] = pMsg;
+    m_Priorities[id] = pMsg->getPriority();
+}
+
+BitmapManagerMsgPtr BitmapRequestQueue::pop()
+{
+    lock_guard lock(m_Mutex);
+    if (m_Requests.empty()) {
+        return BitmapManagerMsgPtr();
+    }
+    RequestMap::iterator it = m_Requests.begin();
+    BitmapManagerMsgPtr pMsg = it->second;
+    m_Requests.erase(it);
+    m_Priorities.erase(pMsg->getID());
+    return pMsg;
+}
+
+bool BitmapRequestQueue::remove(int id)
+{
+    lock_guard lock(m_Mutex);
+    map<int, int>::iterator it = m_Priorities.find(id);
+    if (it == m_Priorities.end()) {
+        return false;
+    }
+    m_Requests.erase(RequestKey(-it->second, id));
+    m_Priorities.erase(it);
+    return true;
+}
+
+void BitmapRequestQueue::clear()
+{
+    lock_guard lock(m_Mutex);
+    m_Requests.clear();
+    m_Priorities.clear();
+}
+
+int BitmapRequestQueue::size() const
+{
+    lock_guard lock(m_Mutex);
+    return int(m_Requests.size());
+}
+
+}
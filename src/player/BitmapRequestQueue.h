@@ -0,0 +1,69 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _BitmapRequestQueue_H_
+#define _BitmapRequestQueue_H_
+
+#include "../api.h"
+
+#include "BitmapManagerMsg.h"
+
+#include <boost/thread/mutex.hpp>
+#include <boost/shared_ptr.hpp>
+
+#include <map>
+#include <utility>
+
+namespace avg {
+
+// Thread-safe queue of pending bitmap load requests. pop() returns the request with
+// the highest priority. Requests with equal priority are returned in the order of 
+// their ids.
+class AVG_API BitmapRequestQueue
+{
+public:
+    BitmapRequestQueue();
+    virtual ~BitmapRequestQueue();
+
+    void push(BitmapManagerMsgPtr pMsg);
+    // Returns an empty pointer if the queue is empty.
+    BitmapManagerMsgPtr pop();
+    bool remove(int id);
+    void clear();
+    int size() const;
+
+private:
+    // (-priority, id)
+    typedef std::pair<int, int> RequestKey;
+    typedef std::map<RequestKey, BitmapManagerMsgPtr> RequestMap;
+
+    RequestMap m_Requests;
+    std::map<int, int> m_Priorities;
+    mutable boost::mutex m_Mutex;
+};
+
+typedef boost::shared_ptr<BitmapRequestQueue> BitmapRequestQueuePtr;
+
+}
+
+#endif
+
@@ -49,7 +49,8 @@ Canvas::Canvas(Player * pPlayer)
       m_PlaybackEndSignal(&IPlaybackEndListener::onPlaybackEnd),
       m_FrameEndSignal(&IFrameEndListener::onFrameEnd),
       m_PreRenderSignal(&IPreRenderListener::onPreRender),
-      m_ClipLevel(0)
+      m_ClipLevel(0),
+      m_VertexBytesUploaded(0)
 {
 }
 
@@ -149,6 +150,10 @@ void Canvas::doFrame(bool bPythonAvailable)
     if (!m_pPlayer->isStopping()) {
         ScopeTimer Timer(RenderProfilingZone);
         Player::get()->startTraversingTree();
+        long long bytesUploaded = 0;
+        if (m_pVertexArray) {
+            bytesUploaded = m_pVertexArray->getNumBytesUploaded();
+        }
         if (bPythonAvailable) {
             Py_BEGIN_ALLOW_THREADS;
             try {
@@ -162,6 +167,9 @@ void Canvas::doFrame(bool bPythonAvailable)
         } else {
             renderTree();
         }
+        if (m_pVertexArray) {
+            m_VertexBytesUploaded = m_pVertexArray->getNumBytesUploaded()-bytesUploaded;
+        }
         Player::get()->endTraversingTree();
     }
     resetFXSchedule();
@@ -292,6 +300,11 @@ SubVertexArray& Canvas::getStdSubVA()
     return m_StdSubVA;
 }
 
+long long Canvas::getVertexBytesUploaded() const
+{
+    return m_VertexBytesUploaded;
+}
+
 void Canvas::renderOutlines(GLContext* pContext, const glm::mat4& transform)
 {
     VertexArrayPtr pVA = GLContextManager::get()->createVertexArray();
@@ -106,6 +106,8 @@ class AVG_API Canvas: public ExportedObject
                 const IntRect& viewport);
         void scheduleFXRender(const RasterNodePtr& pNode);
         SubVertexArray& getStdSubVA();
+        // Vertex and index bytes sent to the GPU while rendering the last frame.
+        long long getVertexBytesUploaded() const;
 
     protected:
         Player * getPlayer() const;
@@ -137,6 +139,7 @@ class AVG_API Canvas: public ExportedObject
 
         int m_MultiSampleSamples;
         int m_ClipLevel;
+        long long m_VertexBytesUploaded;
 
         std::vector<RasterNodePtr> m_pScheduledFXNodes;
 };
@@ -67,6 +67,7 @@ void CircleNode::setPos(const glm::vec2& pt)
 {
     m_Pos = pt;
     setTranslate(m_Pos);
+    pickRectChanged();
 }
 
 float CircleNode::getR() const 
@@ -81,6 +82,7 @@ void CircleNode::setR(float r)
     }
     m_Radius = r;
     setDrawNeeded();
+    pickRectChanged();
 }
 
 float CircleNode::getTexCoord1() const
@@ -112,6 +114,12 @@ void CircleNode::getElementsByPos(const glm::vec2& pos, vector<NodePtr>& pElemen
     }
 }
 
+bool CircleNode::getPickRect(FRect& rect) const
+{
+    rect = FRect(m_Pos-m_Radius, m_Pos+m_Radius);
+    return true;
+}
+
 void CircleNode::calcVertexes(const VertexDataPtr& pVertexData, Pixel32 color)
 {
     glm::vec2 firstPt1 = getCirclePt(0, m_Radius+getStrokeWidth()/2);
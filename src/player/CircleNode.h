@@ -50,6 +50,7 @@ class AVG_API CircleNode : public FilledVectorNode
         void setTexCoord2(float tc);
 
         void getElementsByPos(const glm::vec2& pos, std::vector<NodePtr>& pElements);
+        virtual bool getPickRect(FRect& rect) const;
         virtual void calcVertexes(const VertexDataPtr& pVertexData, Pixel32 color);
         virtual void calcFillVertexes(const VertexDataPtr& pVertexData, Pixel32 color);
 
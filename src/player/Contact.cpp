@@ -37,12 +37,16 @@ using namespace std;
 namespace avg {
 
 int Contact::s_LastListenerID = 0;
+MessageID Contact::s_MotionMessageID("CURSOR_MOTION", -1);
+MessageID Contact::s_UpMessageID("CURSOR_UP", -1);
 
 void Contact::registerType()
 {
     PublisherDefinitionPtr pPubDef = PublisherDefinition::create("Contact");
     pPubDef->addMessage("CURSOR_MOTION");
     pPubDef->addMessage("CURSOR_UP");
+    s_MotionMessageID = pPubDef->getMessageID("CURSOR_MOTION");
+    s_UpMessageID = pPubDef->getMessageID("CURSOR_UP");
 }
 
 Contact::Contact(CursorEventPtr pEvent)
@@ -137,10 +141,10 @@ void Contact::sendEventToListeners(CursorEventPtr pCursorEvent)
         case Event::CURSOR_DOWN:
             break;
         case Event::CURSOR_MOTION:
-            notifySubscribers("CURSOR_MOTION", pCursorEvent);
+            notifySubscribers(s_MotionMessageID, pCursorEvent);
             break;
         case Event::CURSOR_UP:
-            notifySubscribers("CURSOR_UP", pCursorEvent);
+            notifySubscribers(s_UpMessageID, pCursorEvent);
             removeSubscribers();
             break;
         default:
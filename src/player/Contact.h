@@ -82,6 +82,8 @@ private:
     };
 
     static int s_LastListenerID;
+    static MessageID s_MotionMessageID;
+    static MessageID s_UpMessageID;
     std::map<int, Listener> m_ListenerMap;
     int m_CurListenerID;
     bool m_bCurListenerIsDead;
@@ -55,13 +55,17 @@ void DivNode::registerType()
             ExportedObject::buildObject<DivNode>)
         .addChildren(sChildren)
         .addArg(Arg<bool>("crop", false, false, offsetof(DivNode, m_bCrop)))
-        .addArg(Arg<UTF8String>("mediadir", "", false, offsetof(DivNode, m_sMediaDir)));
+        .addArg(Arg<UTF8String>("mediadir", "", false, offsetof(DivNode, m_sMediaDir)))
+        .addArg(Arg<bool>("pickgrid", false, false, offsetof(DivNode, m_bPickGrid)));
     TypeRegistry::get()->registerType(def);
 }
 
 DivNode::DivNode(const ArgList& args)
 {
     args.setMembers(this);
+    if (m_bPickGrid) {
+        m_pPickGrid = PickGridPtr(new PickGrid());
+    }
     ObjectCounter::get()->incRef(&typeid(*this));
 }
 
@@ -175,6 +179,9 @@ void DivNode::insertChild(NodePtr pChild, unsigned i)
         m_Children.erase(m_Children.begin()+i);
         throw;
     }
+    if (m_pPickGrid) {
+        m_pPickGrid->addChild(pChild.get());
+    }
     if (getState() == NS_CANRENDER) {
         pChild->connectDisplay();
     }
@@ -190,6 +197,9 @@ void DivNode::reorderChild(NodePtr pChild, unsigned j)
     m_Children.erase(m_Children.begin()+i);
     std::vector<NodePtr>::iterator pos = m_Children.begin()+j;
     m_Children.insert(pos, pChild);
+    if (m_pPickGrid) {
+        m_pPickGrid->setOrderChanged();
+    }
 }
 
 void DivNode::reorderChild(unsigned i, unsigned j)
@@ -202,6 +212,9 @@ void DivNode::reorderChild(unsigned i, unsigned j)
     m_Children.erase(m_Children.begin()+i);
     std::vector<NodePtr>::iterator pos = m_Children.begin()+j;
     m_Children.insert(pos, pChild);
+    if (m_pPickGrid) {
+        m_pPickGrid->setOrderChanged();
+    }
 }
 
 unsigned DivNode::indexOf(NodePtr pChild)
@@ -242,6 +255,9 @@ void DivNode::removeChild(NodePtr pChild, bool bKill)
                 getID()+"::removeChild: index "+toString(i)+" out of bounds."));
     }
     m_Children.erase(m_Children.begin()+i);
+    if (m_pPickGrid) {
+        m_pPickGrid->removeChild(pChild.get());
+    }
 }
 
 void DivNode::removeChild(unsigned i, bool bKill)
@@ -272,19 +288,53 @@ void DivNode::setMediaDir(const UTF8String& sMediaDir)
     checkReload();
 }
 
+bool DivNode::getPickGrid() const
+{
+    return m_bPickGrid;
+}
+
+void DivNode::setPickGrid(bool bPickGrid)
+{
+    m_bPickGrid = bPickGrid;
+    if (m_bPickGrid) {
+        if (!m_pPickGrid) {
+            m_pPickGrid = PickGridPtr(new PickGrid());
+            m_pPickGrid->setChildren(m_Children);
+        }
+    } else {
+        m_pPickGrid = PickGridPtr();
+    }
+}
+
 void DivNode::getElementsByPos(const glm::vec2& pos, vector<NodePtr>& pElements)
 {
     if (reactsToMouseEvents() &&
             ((getSize() == glm::vec2(0,0) ||
              (pos.x >= 0 && pos.y >= 0 && pos.x < getSize().x && pos.y < getSize().y))))
     {
-        for (int i = getNumChildren()-1; i >= 0; i--) {
-            NodePtr pCurChild = getChild(i);
-            glm::vec2 relPos = pCurChild->toLocal(pos);
-            pCurChild->getElementsByPos(relPos, pElements);
-            if (!pElements.empty()) {
-                pElements.push_back(getSharedThis());
-                return;
+        if (m_pPickGrid) {
+            // Same traversal as below, restricted to the children that can contain 
+            // pos.
+            vector<Node*> candidates;
+            m_pPickGrid->getCandidates(pos, m_Children, candidates);
+            for (unsigned i = 0; i < candidates.size(); ++i) {
+                Node* pCurChild = candidates[i];
+                glm::vec2 relPos = pCurChild->toLocal(pos);
+                pCurChild->getElementsByPos(relPos, pElements);
+                if (!pElements.empty()) {
+                    pElements.push_back(getSharedThis());
+                    return;
+                }
+            }
+        } else {
+            for (int i = getNumChildren()-1; i >= 0; i--) {
+                NodePtr pCurChild = getChild(i);
+                glm::vec2 relPos = pCurChild->toLocal(pos);
+                pCurChild->getElementsByPos(relPos, pElements);
+                if (!pElements.empty()) {
+                    pElements.push_back(getSharedThis());
+                    return;
+                }
             }
         }
         // pos isn't in any of the children.
@@ -295,6 +345,23 @@ void DivNode::getElementsByPos(const glm::vec2& pos, vector<NodePtr>& pElements)
     }
 }
 
+bool DivNode::getPickRect(FRect& rect) const
+{
+    if (getSize() == glm::vec2(0,0)) {
+        // Children can be anywhere.
+        return false;
+    } else {
+        return AreaNode::getPickRect(rect);
+    }
+}
+
+void DivNode::childPickRectChanged(Node* pChild)
+{
+    if (m_pPickGrid) {
+        m_pPickGrid->updateChild(pChild);
+    }
+}
+
 void DivNode::preRender(const VertexArrayPtr& pVA, bool bIsParentActive, 
         float parentEffectiveOpacity)
 {
@@ -24,6 +24,7 @@
 
 #include "../api.h"
 #include "AreaNode.h"
+#include "PickGrid.h"
 
 #include "../graphics/SubVertexArray.h"
 
@@ -68,7 +69,12 @@ class AVG_API DivNode : public AreaNode
         const UTF8String& getMediaDir() const;
         void setMediaDir(const UTF8String& mediaDir);
 
+        bool getPickGrid() const;
+        void setPickGrid(bool bPickGrid);
+
         void getElementsByPos(const glm::vec2& pos, std::vector<NodePtr>& pElements);
+        virtual bool getPickRect(FRect& rect) const;
+        void childPickRectChanged(Node* pChild);
         virtual void preRender(const VertexArrayPtr& pVA, bool bIsParentActive, 
                 float parentEffectiveOpacity);
         virtual void render(GLContext* pContext, const glm::mat4& transform);
@@ -85,6 +91,8 @@ class AVG_API DivNode : public AreaNode
 
         UTF8String m_sMediaDir;
         bool m_bCrop;
+        bool m_bPickGrid;
+        PickGridPtr m_pPickGrid;
 
         SubVertexArray m_ClipVA;
 
@@ -44,6 +44,101 @@ using namespace boost;
 
 namespace avg {
 
+vector<MessageID> Node::s_EventMessageIDs;
+MessageID Node::s_SizeChangedMessageID("SIZE_CHANGED", -1);
+
+static string getEventMessageName(Event::Source source, Event::Type type)
+{
+    switch (source) {
+        case Event::MOUSE:
+        case Event::TOUCH:
+            switch (type) {
+                case Event::CURSOR_DOWN:
+                    return "CURSOR_DOWN";
+                case Event::CURSOR_MOTION:
+                    return "CURSOR_MOTION";
+                case Event::CURSOR_UP:
+                    return "CURSOR_UP";
+                case Event::CURSOR_OVER:
+                    return "CURSOR_OVER";
+                case Event::CURSOR_OUT:
+                    return "CURSOR_OUT";
+                default:
+                    break;
+            }
+            break;
+        case Event::TANGIBLE:
+            switch (type) {
+                case Event::CURSOR_DOWN:
+                    return "TANGIBLE_DOWN";
+                case Event::CURSOR_MOTION:
+                    return "TANGIBLE_MOTION";
+                case Event::CURSOR_UP:
+                    return "TANGIBLE_UP";
+                case Event::CURSOR_OVER:
+                    return "TANGIBLE_OVER";
+                case Event::CURSOR_OUT:
+                    return "TANGIBLE_OUT";
+                default:
+                    break;
+            }
+            break;
+        case Event::PEN:
+            switch (type) {
+                case Event::CURSOR_DOWN:
+                    return "PEN_DOWN";
+                case Event::CURSOR_MOTION:
+                    return "PEN_MOTION";
+                case Event::CURSOR_UP:
+                    return "PEN_UP";
+                case Event::CURSOR_OVER:
+                    return "PEN_OVER";
+                case Event::CURSOR_OUT:
+                    return "PEN_OUT";
+                default:
+                    break;
+            }
+            break;
+        case Event::TRACK:
+            switch (type) {
+                case Event::CURSOR_DOWN:
+                    return "HOVER_DOWN";
+                case Event::CURSOR_MOTION:
+                    return "HOVER_MOTION";
+                case Event::CURSOR_UP:
+                    return "HOVER_UP";
+                case Event::CURSOR_OVER:
+                    return "HOVER_OVER";
+                case Event::CURSOR_OUT:
+                    return "HOVER_OUT";
+                default:
+                    break;
+            }
+            break;
+        default:
+            break;
+    }
+    return "";
+}
+
+static const Event::Source s_EventSources[] =
+        {Event::MOUSE, Event::TOUCH, Event::TRACK, Event::TANGIBLE, Event::PEN};
+static const int NUM_EVENT_SOURCES = sizeof(s_EventSources)/sizeof(Event::Source);
+static const int NUM_CURSOR_EVENT_TYPES = Event::CURSOR_OUT-Event::CURSOR_MOTION+1;
+
+static int getEventMessageIndex(Event::Source source, Event::Type type)
+{
+    if (type < Event::CURSOR_MOTION || type > Event::CURSOR_OUT) {
+        return -1;
+    }
+    for (int i=0; i<NUM_EVENT_SOURCES; ++i) {
+        if (s_EventSources[i] == source) {
+            return i*NUM_CURSOR_EVENT_TYPES + (type-Event::CURSOR_MOTION);
+        }
+    }
+    return -1;
+}
+
 void Node::registerType()
 {
     PublisherDefinitionPtr pPubDef = PublisherDefinition::create("Node");
@@ -71,6 +166,18 @@ void Node::registerType()
     pPubDef->addMessage("SIZE_CHANGED");
     pPubDef->addMessage("KILLED");
 
+    // Event messages are sent for every cursor event, so we look up their ids once.
+    // Derived node types inherit the message ids, so the table is valid for all nodes.
+    s_EventMessageIDs.clear();
+    for (int i=0; i<NUM_EVENT_SOURCES; ++i) {
+        for (int j=0; j<NUM_CURSOR_EVENT_TYPES; ++j) {
+            Event::Type type = Event::Type(Event::CURSOR_MOTION+j);
+            string sName = getEventMessageName(s_EventSources[i], type);
+            s_EventMessageIDs.push_back(pPubDef->getMessageID(sName));
+        }
+    }
+    s_SizeChangedMessageID = pPubDef->getMessageID("SIZE_CHANGED");
+
     TypeDefinition def = TypeDefinition("node")
         .addArg(Arg<string>("id", "", false, offsetof(Node, m_ID)))
         .addArg(Arg<bool>("active", true, false, offsetof(Node, m_bActive)))
@@ -322,6 +429,11 @@ bool Node::reactsToMouseEvents()
     return m_bActive && m_bSensitive;
 }
 
+void Node::notifySizeChanged(const glm::vec2& size)
+{
+    notifySubscribers(s_SizeChangedMessageID, size);
+}
+
 glm::vec2 Node::getRelPos(const glm::vec2& absPos) const 
 {
     glm::vec2 parentPos;
@@ -370,6 +482,13 @@ void Node::getElementsByPos(const glm::vec2& pos, vector<NodePtr>& pElements)
 {
 }
 
+bool Node::getPickRect(FRect& rect) const
+{
+    // Returns the rectangle (in parent coordinates) outside of which getElementsByPos
+    // never finds anything. The default is to assume no such rectangle exists.
+    return false;
+}
+
 void Node::preRender(const VertexArrayPtr& pVA, bool bIsParentActive, 
         float parentEffectiveOpacity)
 {
@@ -390,8 +509,7 @@ CanvasPtr Node::getCanvas() const
 bool Node::handleEvent(EventPtr pEvent)
 {
     if (pEvent->getSource() != Event::NONE && pEvent->getSource() != Event::CUSTOM) {
-        string messageID = getEventMessageID(pEvent);
-        notifySubscribers(messageID, pEvent);
+        notifySubscribers(getEventMessageID(pEvent), pEvent);
     }
 
     EventID id(pEvent->getType(), pEvent->getSource());
@@ -508,6 +626,13 @@ NodePtr Node::getSharedThis()
     return dynamic_pointer_cast<Node>(ExportedObject::getSharedThis());
 }
 
+void Node::pickRectChanged()
+{
+    if (m_pParent) {
+        m_pParent->childPickRectChanged(this);
+    }
+}
+
 void Node::logFileNotFoundWarning(const string& sWarn) const
 {
     unsigned int sev;
@@ -552,80 +677,12 @@ void Node::dumpEventHandlers()
     cerr << "-----" << endl;
 }
 
-string Node::getEventMessageID(const EventPtr& pEvent)
+const MessageID& Node::getEventMessageID(const EventPtr& pEvent)
 {
-    Event::Source source = pEvent->getSource();
-    switch (source) {
-        case Event::MOUSE:
-        case Event::TOUCH:
-            switch (pEvent->getType()) {
-                case Event::CURSOR_DOWN:
-                    return "CURSOR_DOWN";
-                case Event::CURSOR_MOTION:
-                    return "CURSOR_MOTION";
-                case Event::CURSOR_UP:
-                    return "CURSOR_UP";
-                case Event::CURSOR_OVER:
-                    return "CURSOR_OVER";
-                case Event::CURSOR_OUT:
-                    return "CURSOR_OUT";
-                default:
-                    break;
-            }
-            break;
-        case Event::TANGIBLE:
-            switch (pEvent->getType()) {
-                case Event::CURSOR_DOWN:
-                    return "TANGIBLE_DOWN";
-                case Event::CURSOR_MOTION:
-                    return "TANGIBLE_MOTION";
-                case Event::CURSOR_UP:
-                    return "TANGIBLE_UP";
-                case Event::CURSOR_OVER:
-                    return "TANGIBLE_OVER";
-                case Event::CURSOR_OUT:
-                    return "TANGIBLE_OUT";
-                default:
-                    break;
-            }
-            break;
-        case Event::PEN:
-            switch (pEvent->getType()) {
-                case Event::CURSOR_DOWN:
-                    return "PEN_DOWN";
-                case Event::CURSOR_MOTION:
-                    return "PEN_MOTION";
-                case Event::CURSOR_UP:
-                    return "PEN_UP";
-                case Event::CURSOR_OVER:
-                    return "PEN_OVER";
-                case Event::CURSOR_OUT:
-                    return "PEN_OUT";
-                default:
-                    break;
-            }
-            break;
-        case Event::TRACK:
-            switch (pEvent->getType()) {
-                case Event::CURSOR_DOWN:
-                    return "HOVER_DOWN";
-                case Event::CURSOR_MOTION:
-                    return "HOVER_MOTION";
-                case Event::CURSOR_UP:
-                    return "HOVER_UP";
-                case Event::CURSOR_OVER:
-                    return "HOVER_OVER";
-                case Event::CURSOR_OUT:
-                    return "HOVER_OUT";
-                default:
-                    break;
-            }
-            break;
-        default:
-            break;
-    }
-    AVG_ASSERT_MSG(false, (string("Unknown message type ")+pEvent->typeStr()).c_str());
-    return "";
+    int i = getEventMessageIndex(pEvent->getSource(), pEvent->getType());
+    AVG_ASSERT_MSG(i != -1, 
+            (string("Unknown message type ")+pEvent->typeStr()).c_str());
+    return s_EventMessageIDs[i];
 }
 
 bool Node::callPython(PyObject * pFunc, EventPtr pEvent)
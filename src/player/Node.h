@@ -31,6 +31,7 @@
 #include "../graphics/TexInfo.h"
 
 #include "../base/GLMHelper.h"
+#include "../base/Rect.h"
 
 #include <boost/shared_ptr.hpp>
 #include <boost/weak_ptr.hpp>
@@ -115,6 +116,7 @@ class AVG_API Node: public Publisher
         NodePtr getElementByPos(const glm::vec2& pos);
         virtual void getElementsByPos(const glm::vec2& pos, 
                 std::vector<NodePtr>& pElements);
+        virtual bool getPickRect(FRect& rect) const;
 
         virtual void preRender(const VertexArrayPtr& pVA, bool bIsParentActive, 
                 float parentEffectiveOpacity);
@@ -137,6 +139,7 @@ class AVG_API Node: public Publisher
         Node(const std::string& sPublisherName="Node");
 
         bool reactsToMouseEvents();
+        void notifySizeChanged(const glm::vec2& size);
             
         void setState(NodeState state);
         void initFilename(std::string& sFilename);
@@ -145,6 +148,7 @@ class AVG_API Node: public Publisher
         virtual bool isVisible() const;
         bool getEffectiveActive() const;
         NodePtr getSharedThis();
+        void pickRectChanged();
 
         void logFileNotFoundWarning(const std::string& sWarn) const;
 
@@ -177,10 +181,12 @@ class AVG_API Node: public Publisher
 
         void connectOneEventHandler(const EventID& id, PyObject * pObj, PyObject * pFunc);
         void dumpEventHandlers();
-        std::string getEventMessageID(const EventPtr& pEvent);
+        const MessageID& getEventMessageID(const EventPtr& pEvent);
         bool callPython(PyObject * pFunc, avg::EventPtr pEvent);
 
         EventHandlerMap m_EventHandlerMap;
+        static std::vector<MessageID> s_EventMessageIDs;
+        static MessageID s_SizeChangedMessageID;
 
         CanvasWeakPtr m_pCanvas;
 
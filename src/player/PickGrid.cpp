@@ -0,0 +1,233 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "PickGrid.h"
+
+#include "Node.h"
+
+#include <algorithm>
+#include <cmath>
+
+using namespace std;
+
+namespace avg {
+
+// Children that span more cells than this are treated like unbounded children.
+static const int MAX_CELLS_PER_CHILD = 256;
+// Pick rects are enlarged by this amount to absorb rounding differences between
+// the pick rect and the node's own hit test.
+static const float PICK_RECT_MARGIN = 1.f;
+// Cell coordinates must fit into an int.
+static const float MAX_CELL_COORD = 1e9f;
+
+PickGrid::Entry::Entry()
+    : m_bInGrid(false),
+      m_Index(0)
+{
+}
+
+PickGrid::PickGrid()
+    : m_CellSize(64),
+      m_NumChildrenAtBuild(0),
+      m_bOrderChanged(false)
+{
+}
+
+PickGrid::~PickGrid()
+{
+}
+
+void PickGrid::setChildren(const vector<NodePtr>& children)
+{
+    m_Entries.clear();
+    m_Cells.clear();
+    m_UnboundedChildren.clear();
+
+    // Use the median child extent as cell size so a typical child covers few cells.
+    vector<float> extents;
+    extents.reserve(children.size());
+    for (unsigned i = 0; i < children.size(); ++i) {
+        FRect rect;
+        if (children[i]->getPickRect(rect)) {
+            extents.push_back(max(rect.width(), rect.height()));
+        }
+    }
+    if (extents.empty()) {
+        m_CellSize = 64;
+    } else {
+        nth_element(extents.begin(), extents.begin()+extents.size()/2, extents.end());
+        m_CellSize = max(8.f, min(extents[extents.size()/2], 4096.f));
+    }
+
+    for (unsigned i = 0; i < children.size(); ++i) {
+        Entry& entry = m_Entries[children[i].get()];
+        entry.m_Index = i;
+        insertEntry(children[i].get(), entry);
+    }
+    m_NumChildrenAtBuild = children.size();
+    m_bOrderChanged = false;
+}
+
+void PickGrid::addChild(Node* pChild)
+{
+    Entry& entry = m_Entries[pChild];
+    insertEntry(pChild, entry);
+    m_bOrderChanged = true;
+}
+
+void PickGrid::removeChild(Node* pChild)
+{
+    EntryMap::iterator it = m_Entries.find(pChild);
+    if (it != m_Entries.end()) {
+        removeEntry(pChild, it->second);
+        m_Entries.erase(it);
+        m_bOrderChanged = true;
+    }
+}
+
+void PickGrid::updateChild(Node* pChild)
+{
+    EntryMap::iterator it = m_Entries.find(pChild);
+    if (it != m_Entries.end()) {
+        removeEntry(pChild, it->second);
+        insertEntry(pChild, it->second);
+    }
+}
+
+void PickGrid::setOrderChanged()
+{
+    m_bOrderChanged = true;
+}
+
+void PickGrid::getCandidates(const glm::vec2& pos, const vector<NodePtr>& children,
+        vector<Node*>& candidates)
+{
+    if (m_Entries.size() > 2*m_NumChildrenAtBuild+16) {
+        // The cell size was chosen for a much smaller set of children.
+        setChildren(children);
+    } else if (m_bOrderChanged) {
+        updateOrder(children);
+    }
+
+    vector<pair<unsigned, Node*> > sortedCandidates;
+    vector<Node*>::iterator it;
+    for (it = m_UnboundedChildren.begin(); it != m_UnboundedChildren.end(); ++it) {
+        sortedCandidates.push_back(make_pair(m_Entries[*it].m_Index, *it));
+    }
+    glm::vec2 cellPos = pos/m_CellSize;
+    if (fabs(cellPos.x) < MAX_CELL_COORD && fabs(cellPos.y) < MAX_CELL_COORD) {
+        IntPoint cell = getCell(pos);
+        CellMap::iterator cellIt = m_Cells.find(getCellKey(cell.x, cell.y));
+        if (cellIt != m_Cells.end()) {
+            vector<Node*>& cellChildren = cellIt->second;
+            for (it = cellChildren.begin(); it != cellChildren.end(); ++it) {
+                sortedCandidates.push_back(make_pair(m_Entries[*it].m_Index, *it));
+            }
+        }
+    }
+    sort(sortedCandidates.begin(), sortedCandidates.end(), isPickIndexBefore);
+
+    candidates.clear();
+    candidates.reserve(sortedCandidates.size());
+    for (unsigned i = 0; i < sortedCandidates.size(); ++i) {
+        candidates.push_back(sortedCandidates[i].second);
+    }
+}
+
+void PickGrid::insertEntry(Node* pChild, Entry& entry)
+{
+    FRect rect;
+    entry.m_bInGrid = false;
+    if (pChild->getPickRect(rect)) {
+        glm::vec2 tl = (rect.tl-PICK_RECT_MARGIN)/m_CellSize;
+        glm::vec2 br = (rect.br+PICK_RECT_MARGIN)/m_CellSize;
+        // Negated comparisons also catch NaNs.
+        if (!(tl.x > -MAX_CELL_COORD && tl.y > -MAX_CELL_COORD &&
+                br.x < MAX_CELL_COORD && br.y < MAX_CELL_COORD))
+        {
+            m_UnboundedChildren.push_back(pChild);
+            return;
+        }
+        IntPoint tlCell = getCell(rect.tl-PICK_RECT_MARGIN);
+        IntPoint brCell = getCell(rect.br+PICK_RECT_MARGIN);
+        long long numCells = (long long)(brCell.x-tlCell.x+1)*(brCell.y-tlCell.y+1);
+        if (numCells <= MAX_CELLS_PER_CHILD) {
+            entry.m_bInGrid = true;
+            entry.m_Cells = IntRect(tlCell, brCell+IntPoint(1,1));
+            for (int y = tlCell.y; y <= brCell.y; ++y) {
+                for (int x = tlCell.x; x <= brCell.x; ++x) {
+                    m_Cells[getCellKey(x, y)].push_back(pChild);
+                }
+            }
+            return;
+        }
+    }
+    m_UnboundedChildren.push_back(pChild);
+}
+
+void PickGrid::removeEntry(Node* pChild, Entry& entry)
+{
+    if (entry.m_bInGrid) {
+        const IntRect& cells = entry.m_Cells;
+        for (int y = cells.tl.y; y < cells.br.y; ++y) {
+            for (int x = cells.tl.x; x < cells.br.x; ++x) {
+                CellMap::iterator it = m_Cells.find(getCellKey(x, y));
+                vector<Node*>& cellChildren = it->second;
+                cellChildren.erase(find(cellChildren.begin(), cellChildren.end(), 
+                        pChild));
+                if (cellChildren.empty()) {
+                    m_Cells.erase(it);
+                }
+            }
+        }
+        entry.m_bInGrid = false;
+    } else {
+        m_UnboundedChildren.erase(find(m_UnboundedChildren.begin(), 
+                m_UnboundedChildren.end(), pChild));
+    }
+}
+
+void PickGrid::updateOrder(const vector<NodePtr>& children)
+{
+    for (unsigned i = 0; i < children.size(); ++i) {
+        m_Entries[children[i].get()].m_Index = i;
+    }
+    m_bOrderChanged = false;
+}
+
+long long PickGrid::getCellKey(int x, int y) const
+{
+    return ((long long)x << 32) | (unsigned)y;
+}
+
+IntPoint PickGrid::getCell(const glm::vec2& pos) const
+{
+    return IntPoint(int(floor(pos.x/m_CellSize)), int(floor(pos.y/m_CellSize)));
+}
+
+bool PickGrid::isPickIndexBefore(const pair<unsigned, Node*>& a,
+        const pair<unsigned, Node*>& b)
+{
+    return a.first > b.first;
+}
+
+}
@@ -0,0 +1,93 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _PickGrid_H_
+#define _PickGrid_H_
+
+#include "../api.h"
+
+#include "../base/Rect.h"
+#include "../base/GLMHelper.h"
+
+#include <boost/shared_ptr.hpp>
+#include <boost/unordered_map.hpp>
+
+#include <vector>
+
+namespace avg {
+
+class Node;
+typedef boost::shared_ptr<Node> NodePtr;
+
+// Uniform grid of the pick rects of a DivNode's children. Used to restrict 
+// DivNode::getElementsByPos to the children that can possibly contain a point. 
+// Children without a bounded pick rect (and children that span too many cells) are 
+// returned as candidates for every point.
+class AVG_API PickGrid
+{
+    public:
+        PickGrid();
+        virtual ~PickGrid();
+
+        void setChildren(const std::vector<NodePtr>& children);
+        void addChild(Node* pChild);
+        void removeChild(Node* pChild);
+        void updateChild(Node* pChild);
+        void setOrderChanged();
+
+        // Returns the candidates in picking order, i.e. topmost child first.
+        void getCandidates(const glm::vec2& pos, const std::vector<NodePtr>& children,
+                std::vector<Node*>& candidates);
+
+    private:
+        struct Entry {
+            Entry();
+
+            bool m_bInGrid;
+            IntRect m_Cells;
+            unsigned m_Index;
+        };
+
+        typedef boost::unordered_map<Node*, Entry> EntryMap;
+        typedef boost::unordered_map<long long, std::vector<Node*> > CellMap;
+
+        void insertEntry(Node* pChild, Entry& entry);
+        void removeEntry(Node* pChild, Entry& entry);
+        void updateOrder(const std::vector<NodePtr>& children);
+        long long getCellKey(int x, int y) const;
+        IntPoint getCell(const glm::vec2& pos) const;
+        static bool isPickIndexBefore(const std::pair<unsigned, Node*>& a, 
+                const std::pair<unsigned, Node*>& b);
+
+        EntryMap m_Entries;
+        CellMap m_Cells;
+        std::vector<Node*> m_UnboundedChildren;
+        float m_CellSize;
+        unsigned m_NumChildrenAtBuild;
+        bool m_bOrderChanged;
+};
+
+typedef boost::shared_ptr<PickGrid> PickGridPtr;
+
+}
+
+#endif
@@ -84,6 +84,8 @@
 #include "../graphics/GLContextManager.h"
 #include "../graphics/ImageCache.h"
 
+#include "../video/SampleCache.h"
+
 #include "../imaging/Camera.h"
 
 #include "../audio/AudioEngine.h"
@@ -117,8 +119,6 @@ Player::Player()
       m_bDisplayEngineBroken(false),
       m_bIsTraversingTree(false),
       m_pMultitouchInputDevice(),
-      m_bInHandleTimers(false),
-      m_bCurrentTimeoutDeleted(false),
       m_bKeepWindowOpen(false),
       m_bStopOnEscape(true),
       m_bIsPlaying(false),
@@ -126,11 +126,15 @@ Player::Player()
       m_FakeFPS(0),
       m_FrameTime(0),
       m_Volume(1),
+      m_bOfflineAudio(false),
       m_bPythonAvailable(true),
       m_pLastMouseEvent(new MouseEvent(Event::CURSOR_MOTION, false, false, false, 
             IntPoint(-1, -1), MouseEvent::NO_BUTTON, glm::vec2(-1, -1), 0)),
       m_EventHookPyFunc(Py_None),
-      m_bMouseEnabled(true)
+      m_bMouseEnabled(true),
+      m_KeyDownMessageID(getMessageID("KEY_DOWN")),
+      m_KeyUpMessageID(getMessageID("KEY_UP")),
+      m_OnFrameMessageID(getMessageID("ON_FRAME"))
 {
     string sDummy;
 #ifdef _WIN32
@@ -301,6 +305,13 @@ void Player::setAudioOptions(int samplerate, int channels)
     m_AP.m_Channels = channels;
 }
 
+void Player::setOfflineAudio(bool bOffline, const std::string& sWAVFilename)
+{
+    errorIfPlaying("Player.setOfflineAudio");
+    m_bOfflineAudio = bOffline;
+    m_sAudioWAVFilename = sWAVFilename;
+}
+
 void Player::enableGLErrorChecks(bool bEnable)
 {
     GLContext::enableErrorChecks(bEnable);
@@ -331,6 +342,11 @@ ImageCache* Player::getImageCache()
     return ImageCache::get();
 }
 
+SampleCache* Player::getSampleCache()
+{
+    return SampleCache::get();
+}
+
 CanvasPtr Player::loadFile(const string& sFilename)
 {
     errorIfPlaying("Player.loadFile");
@@ -617,7 +633,7 @@ void Player::setFakeFPS(float fps)
     }
 
     if (AudioEngine::get()) {
-        AudioEngine::get()->setAudioEnabled(!m_bFakeFPS);
+        AudioEngine::get()->setAudioEnabled(!m_bFakeFPS || m_bOfflineAudio);
     }
 }
 
@@ -807,25 +823,7 @@ int Player::setOnFrameHandler(PyObject * pyfunc)
 
 bool Player::clearInterval(int id)
 {
-    vector<Timeout*>::iterator it;
-    for (it = m_PendingTimeouts.begin(); it != m_PendingTimeouts.end(); it++) {
-        if (id == (*it)->getID()) {
-            if (it == m_PendingTimeouts.begin() && m_bInHandleTimers) {
-                m_bCurrentTimeoutDeleted = true;
-            }
-            delete *it;
-            m_PendingTimeouts.erase(it);
-            return true;
-        }
-    }
-    for (it = m_NewTimeouts.begin(); it != m_NewTimeouts.end(); it++) {
-        if (id == (*it)->getID()) {
-            delete *it;
-            m_NewTimeouts.erase(it);
-            return true;
-        }
-    }
-    return false;
+    return m_Timeouts.remove(id);
 }
 
 void Player::callFromThread(PyObject * pyfunc)
@@ -1007,10 +1005,10 @@ bool Player::handleEvent(EventPtr pEvent)
         pEvent->trace();
         switch (pEvent->getType()) {
             case Event::KEY_DOWN:
-                notifySubscribers("KEY_DOWN", pEvent);
+                notifySubscribers(m_KeyDownMessageID, pEvent);
                 break;
             case Event::KEY_UP:
-                notifySubscribers("KEY_UP", pEvent);
+                notifySubscribers(m_KeyUpMessageID, pEvent);
                 break;
             default:
                 AVG_ASSERT(false);
@@ -1040,6 +1038,7 @@ static ProfilingZoneID TimersProfilingZone("Player - handleTimers");
 static ProfilingZoneID EventsProfilingZone("Dispatch events");
 static ProfilingZoneID MainCanvasProfilingZone("Main canvas rendering");
 static ProfilingZoneID OffscreenProfilingZone("Offscreen rendering");
+static ProfilingZoneID OfflineAudioProfilingZone("Offline audio mixing");
 
 void Player::doFrame(bool bFirstFrame)
 {
@@ -1052,6 +1051,11 @@ void Player::doFrame(bool bFirstFrame)
             } else {
                 m_FrameTime = m_pDisplayEngine->getDisplayTime();
             }
+            AudioEngine* pAudioEngine = AudioEngine::get();
+            if (pAudioEngine && pAudioEngine->isOffline()) {
+                ScopeTimer Timer(OfflineAudioProfilingZone);
+                mixOfflineAudio(pAudioEngine);
+            }
             {
                 ScopeTimer Timer(TimersProfilingZone);
                 handleTimers();
@@ -1200,6 +1204,13 @@ void Player::initConfig()
     m_GLConfig.m_bGLES = true;
 #endif
     BitmapLoader::init(!m_GLConfig.m_bGLES);
+    const string* psDiskCacheDir = pMgr->getOption("scr", "bmpdiskcachedir");
+    if (psDiskCacheDir && *psDiskCacheDir != "") {
+        long long diskCacheSize = 
+                atoi(pMgr->getOption("scr", "bmpdiskcachesize")->c_str());
+        BitmapLoader::setDiskCache(BitmapDiskCachePtr(new BitmapDiskCache(
+                *psDiskCacheDir, diskCacheSize*1024*1024)));
+    }
 
     float gamma[3];
     pMgr->getGammaOption("scr", "gamma", gamma);
@@ -1250,7 +1261,8 @@ void Player::initAudio()
         pAudioEngine = new AudioEngine();
         pAudioEngine->init(m_AP, m_Volume);
     }
-    pAudioEngine->setAudioEnabled(!m_bFakeFPS);
+    pAudioEngine->setOffline(m_bOfflineAudio, m_sAudioWAVFilename);
+    pAudioEngine->setAudioEnabled(!m_bFakeFPS || m_bOfflineAudio);
     pAudioEngine->play();
 }
 
@@ -1327,6 +1339,31 @@ NodePtr Player::createNode(const string& sType,
     return pNode;
 }
 
+py::list Player::createNodes(const string& sType, const py::list& attrList,
+        const DivNodePtr& pParent)
+{
+    TypeRegistry* pRegistry = TypeRegistry::get();
+    const TypeDefinition& def = pRegistry->getTypeDef(sType);
+    py::list nodes;
+    int numNodes = py::len(attrList);
+    for (int i = 0; i < numNodes; ++i) {
+        py::extract<py::dict> attrsProxy(attrList[i]);
+        if (!attrsProxy.check()) {
+            throw Exception(AVG_ERR_INVALID_ARGS,
+                    "Player.createNodes: attrList must contain only dicts.");
+        }
+        NodePtr pNode = dynamic_pointer_cast<Node>(
+                pRegistry->createObject(def, attrsProxy()));
+        if (!pNode) {
+            throw Exception(AVG_ERR_INVALID_ARGS,
+                    string("Player.createNodes: ") + sType + " is not a node type.");
+        }
+        pNode->registerInstance(0, pParent);
+        nodes.append(pNode);
+    }
+    return nodes;
+}
+
 NodePtr Player::createNodeFromXmlString(const string& sXML)
 {
     xmlPedanticParserDefault(1);
@@ -1571,38 +1608,36 @@ void Player::errorIfMultiDisplay(const string& sFunc) const
 
 
 
-void Player::handleTimers()
+void Player::mixOfflineAudio(AudioEngine* pAudioEngine)
 {
-    vector<Timeout *>::iterator it;
-    m_bInHandleTimers = true;
-
-    it = m_PendingTimeouts.begin();
-    while (it != m_PendingTimeouts.end() && (*it)->isReady(getFrameTime())
-            && !m_bStopping)
-    {
-        m_bCurrentTimeoutDeleted = false;
-        (*it)->fire(getFrameTime());
-        if (m_bCurrentTimeoutDeleted) {
-            it = m_PendingTimeouts.begin();
-        } else {
-            if ((*it)->isInterval()) {
-                Timeout* pTempTimeout = *it;
-                it = m_PendingTimeouts.erase(it);
-                m_NewTimeouts.insert(m_NewTimeouts.begin(), pTempTimeout);
-            } else {
-                delete *it;
-                it = m_PendingTimeouts.erase(it);
-            }
+    // Mixing waits for the audio decoder threads, so other threads get to run 
+    // python code in the meantime.
+    if (m_bPythonAvailable) {
+        Py_BEGIN_ALLOW_THREADS;
+        try {
+            pAudioEngine->mixOffline(m_FrameTime);
+        } catch(...) {
+            Py_BLOCK_THREADS;
+            throw;
         }
+        Py_END_ALLOW_THREADS;
+    } else {
+        pAudioEngine->mixOffline(m_FrameTime);
     }
-    for (it = m_NewTimeouts.begin(); it != m_NewTimeouts.end(); ++it) {
-        addTimeout(*it);
+}
+
+void Player::handleTimers()
+{
+    m_Timeouts.beginPass();
+    Timeout* pTimeout = m_Timeouts.getNextReady(getFrameTime());
+    while (pTimeout && !m_bStopping) {
+        pTimeout->fire(getFrameTime());
+        pTimeout = m_Timeouts.getNextReady(getFrameTime());
     }
-    m_NewTimeouts.clear();
     
-    notifySubscribers("ON_FRAME");
+    notifySubscribers(m_OnFrameMessageID);
     
-    m_bInHandleTimers = false;
+    m_Timeouts.endPass();
 
     if (m_bPythonAvailable) {
         std::vector<Timeout *> tempAsyncCalls;
@@ -1613,6 +1648,7 @@ void Player::handleTimers()
             m_AsyncCalls.clear();
         }
         Py_END_ALLOW_THREADS;
+        vector<Timeout *>::iterator it;
         for (it = tempAsyncCalls.begin(); it != tempAsyncCalls.end(); ++it) {
             (*it)->fire(getFrameTime());
             delete *it;
@@ -1697,11 +1733,7 @@ OffscreenCanvasPtr Player::getCanvasFromURL(const std::string& sURL)
 void Player::cleanup(bool bIsAbort)
 {
     // Kill all timeouts.
-    vector<Timeout*>::iterator it;
-    for (it = m_PendingTimeouts.begin(); it != m_PendingTimeouts.end(); it++) {
-        delete *it;
-    }
-    m_PendingTimeouts.clear();
+    m_Timeouts.clear();
     m_EventCaptureInfoMap.clear();
     m_pLastCursorStates.clear();
     m_pTestHelper->reset();
@@ -1749,22 +1781,7 @@ void Player::cleanup(bool bIsAbort)
 int Player::internalSetTimeout(int time, PyObject * pyfunc, bool bIsInterval)
 {
     Timeout* pTimeout = new Timeout(time, pyfunc, bIsInterval, getFrameTime());
-    if (m_bInHandleTimers) {
-        m_NewTimeouts.push_back(pTimeout);
-    } else {
-        addTimeout(pTimeout);
-    }
-    return pTimeout->getID();
-}
-
-
-int Player::addTimeout(Timeout* pTimeout)
-{
-    vector<Timeout*>::iterator it = m_PendingTimeouts.begin();
-    while (it != m_PendingTimeouts.end() && (**it)<*pTimeout) {
-        it++;
-    }
-    m_PendingTimeouts.insert(it, pTimeout);
+    m_Timeouts.add(pTimeout);
     return pTimeout->getID();
 }
 
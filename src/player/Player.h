@@ -27,6 +27,7 @@
 #include "DisplayParams.h"
 #include "BoostPython.h"
 #include "Event.h"
+#include "TimeoutQueue.h"
 
 #include "../audio/AudioParams.h"
 #include "../graphics/GLConfig.h"
@@ -42,6 +43,7 @@ namespace avg {
 
 class AudioEngine;
 class Node;
+class DivNode;
 class Canvas;
 class MainCanvas;
 class OffscreenCanvas;
@@ -64,9 +66,11 @@ class InputDevice;
 class Bitmap;
 class AVGNode;
 class ImageCache;
+class SampleCache;
 
 typedef boost::shared_ptr<Node> NodePtr;
 typedef boost::weak_ptr<Node> NodeWeakPtr;
+typedef boost::shared_ptr<DivNode> DivNodePtr;
 typedef boost::shared_ptr<Canvas> CanvasPtr;
 typedef boost::shared_ptr<MainCanvas> MainCanvasPtr;
 typedef boost::shared_ptr<OffscreenCanvas> OffscreenCanvasPtr;
@@ -105,12 +109,14 @@ class AVG_API Player: public Publisher
                 bool bUseDebugContext);
         void setMultiSampleSamples(int multiSampleSamples);
         void setAudioOptions(int samplerate, int channels);
+        void setOfflineAudio(bool bOffline, const std::string& sWAVFilename="");
         void enableGLErrorChecks(bool bEnable);
         glm::vec2 getScreenResolution();
         float getPixelsPerMM();
         glm::vec2 getPhysicalScreenDimensions();
         void assumePixelsPerMM(float ppmm);
         ImageCache* getImageCache();
+        SampleCache* getSampleCache();
 
         CanvasPtr loadFile(const std::string& sFilename);
         CanvasPtr loadString(const std::string& sAVG);
@@ -140,6 +146,8 @@ class AVG_API Player: public Publisher
 
         NodePtr createNode(const std::string& sType, const py::dict& PyDict,
                 const py::object& self=py::object());
+        py::list createNodes(const std::string& sType, const py::list& attrList,
+                const DivNodePtr& pParent=DivNodePtr());
         NodePtr createNodeFromXmlString(const std::string& sXML);
         
         int setInterval(int time, PyObject * pyfunc);
@@ -234,6 +242,7 @@ class AVG_API Player: public Publisher
         void handleCursorEvent(CursorEventPtr pEvent, bool bOnlyCheckCursorOver=false);
 
         void dispatchOffscreenRendering(OffscreenCanvas* pOffscreenCanvas);
+        void mixOfflineAudio(AudioEngine* pAudioEngine);
 
         void errorIfPlaying(const std::string& sFunc) const;
         void errorIfMultiDisplay(const std::string& sFunc) const;
@@ -253,13 +262,9 @@ class AVG_API Player: public Publisher
 
         // Timeout handling
         int internalSetTimeout(int time, PyObject * pyfunc, bool bIsInterval);
-        int addTimeout(Timeout* pTimeout);
         void handleTimers();
-        bool m_bInHandleTimers;
-        bool m_bCurrentTimeoutDeleted;
 
-        std::vector<Timeout *> m_PendingTimeouts;
-        std::vector<Timeout *> m_NewTimeouts; // Timeouts to be added this frame.
+        TimeoutQueue m_Timeouts;
         std::vector<Timeout *> m_AsyncCalls;
         boost::mutex m_AsyncCallMutex;
 
@@ -280,6 +285,8 @@ class AVG_API Player: public Publisher
         long long m_NumFrames;
 
         float m_Volume;
+        bool m_bOfflineAudio;
+        std::string m_sAudioWAVFilename;
 
         bool m_bPythonAvailable;
 
@@ -307,6 +314,10 @@ class AVG_API Player: public Publisher
 
         PyObject * m_EventHookPyFunc;
         bool m_bMouseEnabled;
+
+        MessageID m_KeyDownMessageID;
+        MessageID m_KeyUpMessageID;
+        MessageID m_OnFrameMessageID;
 };
 
 }
@@ -82,6 +82,7 @@ void PolygonNode::setPos(const vector<glm::vec2>& pts)
     m_EffTexCoords.clear();
     calcPolyLineCumulDist(m_CumulDist, m_Pts, true);
     setDrawNeeded();
+    pickRectChanged();
 }
         
 const vector<float>& PolygonNode::getTexCoords() const
@@ -118,6 +119,20 @@ void PolygonNode::getElementsByPos(const glm::vec2& pos, vector<NodePtr>& pEleme
     }
 }
 
+bool PolygonNode::getPickRect(FRect& rect) const
+{
+    if (m_Pts.empty()) {
+        rect = FRect(0, 0, 0, 0);
+    } else {
+        rect = FRect(m_Pts[0], m_Pts[0]);
+        for (unsigned i = 1; i < m_Pts.size(); ++i) {
+            rect.tl = glm::min(rect.tl, m_Pts[i]);
+            rect.br = glm::max(rect.br, m_Pts[i]);
+        }
+    }
+    return true;
+}
+
 void PolygonNode::calcVertexes(const VertexDataPtr& pVertexData, Pixel32 color)
 {
     if (getNumDifferentPts(m_Pts) < 3) {
@@ -52,6 +52,7 @@ class AVG_API PolygonNode : public FilledVectorNode
         void setLineJoin(const std::string& s);
 
         void getElementsByPos(const glm::vec2& pos, std::vector<NodePtr>& pElements);
+        virtual bool getPickRect(FRect& rect) const;
 
         virtual void calcVertexes(const VertexDataPtr& pVertexData, Pixel32 color);
         virtual void calcFillVertexes(const VertexDataPtr& pVertexData, Pixel32 color);
@@ -178,29 +178,67 @@ void Publisher::removeSubscribers()
     }
 }
 
-void Publisher::notifySubscribers(MessageID messageID)
+void Publisher::notifySubscribers(const MessageID& messageID)
 {
     SubscriberInfoList& subscribers = safeFindSubscribers(messageID);
     if (!subscribers.empty()) {
-        py::list args;
-        notifySubscribersPy(messageID, args);
+        invokeSubscribers(messageID, subscribers, py::tuple());
     }
 }
     
 void Publisher::notifySubscribers(const string& sMsgName)
 {
-    MessageID messageID = m_pPublisherDef->getMessageID(sMsgName);
-    notifySubscribers(messageID);
+    notifySubscribers(getMessageID(sMsgName));
 }
 
 void Publisher::notifySubscribersPy(MessageID messageID, const py::list& args)
+{
+    SubscriberInfoList& subscribers = safeFindSubscribers(messageID);
+    if (!subscribers.empty()) {
+        invokeSubscribers(messageID, subscribers, py::tuple(args));
+    }
+}
+
+MessageID Publisher::genMessageID()
+{
+    return PublisherDefinitionRegistry::get()->genMessageID();
+}
+
+void Publisher::unsubscribeIterator(MessageID messageID, SubscriberInfoList::iterator it)
+{
+    m_SignalMap[messageID].erase(it);
+}
+
+
+const MessageID& Publisher::getMessageID(const string& sMsgName) const
+{
+    return m_pPublisherDef->getMessageID(sMsgName);
+}
+
+void Publisher::invokeSubscribers(const MessageID& messageID,
+        SubscriberInfoList& subscribers, const py::tuple& args)
 {
 //    cerr << this << " notifySubscribers " << messageID << endl;
 //    cerr << "  ";
 //    dumpSubscribers(messageID);
     AVG_ASSERT(!(Player::get()->isTraversingTree()));
-    SubscriberInfoList& subscribers = safeFindSubscribers(messageID);
+    if (++subscribers.begin() == subscribers.end()) {
+        // Single subscriber: No need to snapshot the list. The local reference keeps
+        // the subscriber alive even if it unsubscribes itself during the call.
+        SubscriberInfoPtr pSub = subscribers.front();
+        if (pSub->hasExpired()) {
+            // Python subscriber doesn't exist anymore -> auto-unsubscribe.
+            unsubscribe(messageID, pSub->getID());
+        } else {
+            pSub->invoke(args);
+        }
+        return;
+    }
+
+    // Subscribers can unsubscribe (themselves or others) during the invoke, so we
+    // work on a snapshot of weak references.
     WeakSubscriberInfoList subRefs;
+    subRefs.reserve(8);
     for (SubscriberInfoList::iterator it = subscribers.begin(); it != subscribers.end();
             ++it)
     {
@@ -209,8 +247,8 @@ void Publisher::notifySubscribersPy(MessageID messageID, const py::list& args)
     WeakSubscriberInfoList::iterator it;
     for (it = subRefs.begin(); it != subRefs.end(); ++it) {
 //        cerr << "  next" << endl;
-        if (!(*it).expired()) {
-            SubscriberInfoPtr pSub = (*it).lock();
+        SubscriberInfoPtr pSub = (*it).lock();
+        if (pSub) {
             if (pSub->hasExpired()) {
                 // Python subscriber doesn't exist anymore -> auto-unsubscribe.
                 unsubscribe(messageID, pSub->getID());
@@ -223,24 +261,13 @@ void Publisher::notifySubscribersPy(MessageID messageID, const py::list& args)
 //    cerr << "  end notify" << endl;
 }
 
-MessageID Publisher::genMessageID()
-{
-    return PublisherDefinitionRegistry::get()->genMessageID();
-}
-
-void Publisher::unsubscribeIterator(MessageID messageID, SubscriberInfoList::iterator it)
-{
-    m_SignalMap[messageID].erase(it);
-}
-
-
-Publisher::SubscriberInfoList& Publisher::safeFindSubscribers(MessageID messageID)
+Publisher::SubscriberInfoList& Publisher::safeFindSubscribers(const MessageID& messageID)
 {
-    if (m_SignalMap.find(messageID) == m_SignalMap.end()) {
+    SignalMap::iterator it = m_SignalMap.find(messageID);
+    if (it == m_SignalMap.end()) {
         throw Exception(AVG_ERR_INVALID_ARGS, "No signal with ID "+toString(messageID));
     }
-    SubscriberInfoList& subscribers = m_SignalMap[messageID];
-    return subscribers;
+    return it->second;
 }
 
 void Publisher::throwSubscriberNotFound(MessageID messageID, int subscriberID)
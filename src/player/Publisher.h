@@ -36,6 +36,7 @@
 
 #include <list>
 #include <map>
+#include <vector>
 
 namespace avg {
 
@@ -65,11 +66,16 @@ public:
     // to call them too.
     void publish(MessageID messageID);
    
-    void notifySubscribers(MessageID messageID);
+    void notifySubscribers(const MessageID& messageID);
     void notifySubscribers(const std::string& sMsgName);
     template<class ARG_TYPE>
+    void notifySubscribers(const MessageID& messageID, const ARG_TYPE& arg);
+    template<class ARG_TYPE>
     void notifySubscribers(const std::string& sMsgName, const ARG_TYPE& arg);
     template<class ARG1_TYPE, class ARG2_TYPE>
+    void notifySubscribers(const MessageID& messageID, const ARG1_TYPE& arg1, 
+            const ARG2_TYPE& arg2);
+    template<class ARG1_TYPE, class ARG2_TYPE>
     void notifySubscribers(const std::string& sMsgName, const ARG1_TYPE& arg1, 
             const ARG2_TYPE& arg2);
     void notifySubscribersPy(MessageID messageID, const py::list& args);
@@ -78,14 +84,19 @@ public:
 
 protected:
     void removeSubscribers();
+    // Hot paths should look up MessageIDs once and use the MessageID overloads of
+    // notifySubscribers() to avoid the string compares done here.
+    const MessageID& getMessageID(const std::string& sMsgName) const;
 
 private:
-    typedef std::list<SubscriberInfoWeakPtr> WeakSubscriberInfoList;
+    typedef std::vector<SubscriberInfoWeakPtr> WeakSubscriberInfoList;
     typedef std::list<SubscriberInfoPtr> SubscriberInfoList;
     typedef std::map<MessageID, SubscriberInfoList> SignalMap;
     
+    void invokeSubscribers(const MessageID& messageID, SubscriberInfoList& subscribers,
+            const py::tuple& args);
     void unsubscribeIterator(MessageID messageID, SubscriberInfoList::iterator it);
-    SubscriberInfoList& safeFindSubscribers(MessageID messageID);
+    SubscriberInfoList& safeFindSubscribers(const MessageID& messageID);
     void throwSubscriberNotFound(MessageID messageID, int subscriberID);
     void dumpSubscribers(MessageID messageID);
 
@@ -97,34 +108,37 @@ private:
 };
 
 template<class ARG_TYPE>
-void Publisher::notifySubscribers(const std::string& sMsgName, const ARG_TYPE& arg)
+void Publisher::notifySubscribers(const MessageID& messageID, const ARG_TYPE& arg)
 {
-    MessageID messageID = m_pPublisherDef->getMessageID(sMsgName);
     SubscriberInfoList& subscribers = safeFindSubscribers(messageID);
     if (!subscribers.empty()) {
-        py::list args;
-        py::object pyArg(arg);
-        args.append(pyArg);
-        notifySubscribersPy(messageID, args);
+        invokeSubscribers(messageID, subscribers, py::make_tuple(arg));
     }
 }
 
+template<class ARG_TYPE>
+void Publisher::notifySubscribers(const std::string& sMsgName, const ARG_TYPE& arg)
+{
+    notifySubscribers(getMessageID(sMsgName), arg);
+}
+
 template<class ARG1_TYPE, class ARG2_TYPE>
-void Publisher::notifySubscribers(const std::string& sMsgName, const ARG1_TYPE& arg1,
+void Publisher::notifySubscribers(const MessageID& messageID, const ARG1_TYPE& arg1,
         const ARG2_TYPE& arg2)
 {
-    MessageID messageID = m_pPublisherDef->getMessageID(sMsgName);
     SubscriberInfoList& subscribers = safeFindSubscribers(messageID);
     if (!subscribers.empty()) {
-        py::list args;
-        py::object pyArg1(arg1);
-        args.append(pyArg1);
-        py::object pyArg2(arg2);
-        args.append(pyArg2);
-        notifySubscribersPy(messageID, args);
+        invokeSubscribers(messageID, subscribers, py::make_tuple(arg1, arg2));
     }
 }
 
+template<class ARG1_TYPE, class ARG2_TYPE>
+void Publisher::notifySubscribers(const std::string& sMsgName, const ARG1_TYPE& arg1,
+        const ARG2_TYPE& arg2)
+{
+    notifySubscribers(getMessageID(sMsgName), arg1, arg2);
+}
+
 
 }
 
@@ -75,6 +75,7 @@ void RectNode::setPos(const glm::vec2& pt)
     m_Rect.setWidth(w);
     m_Rect.setHeight(h);
     setDrawNeeded();
+    pickRectChanged();
 }
 
 glm::vec2 RectNode::getSize() const 
@@ -86,8 +87,9 @@ void RectNode::setSize(const glm::vec2& pt)
 {
     m_Rect.setWidth(pt.x);
     m_Rect.setHeight(pt.y);
-    notifySubscribers("SIZE_CHANGED", m_Rect.size());
+    notifySizeChanged(m_Rect.size());
     setDrawNeeded();
+    pickRectChanged();
 }
 
 const vector<float>& RectNode::getTexCoords() const
@@ -114,6 +116,7 @@ void RectNode::setAngle(float angle)
 {
     m_Angle = fmod(angle, 2*(float)M_PI);
     setDrawNeeded();
+    pickRectChanged();
 }
 
 glm::vec2 RectNode::toLocal(const glm::vec2& globalPos) const
@@ -139,6 +142,23 @@ void RectNode::getElementsByPos(const glm::vec2& pos, vector<NodePtr>& pElements
     }
 }
 
+bool RectNode::getPickRect(FRect& rect) const
+{
+    // Inverse of toLocal().
+    glm::vec2 size = m_Rect.size();
+    glm::vec2 pivot = size/2.f;
+    glm::vec2 corners[4] = {glm::vec2(0,0), glm::vec2(size.x,0), glm::vec2(0,size.y),
+            size};
+    rect.tl = getRotatedPivot(corners[0], m_Angle, pivot) + m_Rect.tl;
+    rect.br = rect.tl;
+    for (int i = 1; i < 4; ++i) {
+        glm::vec2 pt = getRotatedPivot(corners[i], m_Angle, pivot) + m_Rect.tl;
+        rect.tl = glm::min(rect.tl, pt);
+        rect.br = glm::max(rect.br, pt);
+    }
+    return true;
+}
+
 void RectNode::calcVertexes(const VertexDataPtr& pVertexData, Pixel32 color)
 {
     glm::vec2 pivot = m_Rect.tl+m_Rect.size()/2.f;
@@ -53,6 +53,7 @@ class AVG_API RectNode : public FilledVectorNode
         glm::vec2 toLocal(const glm::vec2& globalPos) const;
         glm::vec2 toGlobal(const glm::vec2& localPos) const;
         void getElementsByPos(const glm::vec2& pos, std::vector<NodePtr>& pElements);
+        virtual bool getPickRect(FRect& rect) const;
 
         virtual void calcVertexes(const VertexDataPtr& pVertexData, Pixel32 color);
         virtual void calcFillVertexes(const VertexDataPtr& pVertexData, Pixel32 color);
@@ -33,6 +33,8 @@
 #include "../audio/AudioEngine.h"
 
 #include "../video/AsyncVideoDecoder.h"
+#include "../video/SampleCache.h"
+#include "../video/SampleVoice.h"
 
 #include <iostream>
 #include <sstream>
@@ -89,31 +91,37 @@ SoundNode::~SoundNode()
 long long SoundNode::getDuration() const
 {
     exceptionIfUnloaded("getDuration");
-    return (long long)(m_pDecoder->getVideoInfo().m_Duration*1000);
+    return (long long)(getVideoInfo().m_Duration*1000);
 }
 
 std::string SoundNode::getAudioCodec() const
 {
     exceptionIfUnloaded("getAudioCodec");
-    return m_pDecoder->getVideoInfo().m_sACodec;
+    return getVideoInfo().m_sACodec;
 }
 
 int SoundNode::getAudioSampleRate() const
 {
     exceptionIfUnloaded("getAudioSampleRate");
-    return m_pDecoder->getVideoInfo().m_SampleRate;
+    return getVideoInfo().m_SampleRate;
 }
 
 int SoundNode::getNumAudioChannels() const
 {
     exceptionIfUnloaded("getNumAudioChannels");
-    return m_pDecoder->getVideoInfo().m_NumAudioChannels;
+    return getVideoInfo().m_NumAudioChannels;
 }
 
 long long SoundNode::getCurTime() const
 {
     exceptionIfUnloaded("getCurTime");
-    return (long long)(m_pDecoder->getCurTime()*1000);
+    if (m_pVoice) {
+        return (long long)(m_pVoice->getCurTime()*1000);
+    } else if (m_pSample) {
+        return 0;
+    } else {
+        return (long long)(m_pDecoder->getCurTime()*1000);
+    }
 }
 
 void SoundNode::seekToTime(long long Time)
@@ -241,10 +249,17 @@ void SoundNode::checkReload()
 
 void SoundNode::onFrameEnd()
 {
+    bool bEOF = false;
     if (m_State == Playing) {
-        m_pDecoder->updateAudioStatus();
+        if (m_pVoice) {
+            m_pVoice->updateAudioStatus();
+            bEOF = m_pVoice->isEOF();
+        } else {
+            m_pDecoder->updateAudioStatus();
+            bEOF = m_pDecoder->isEOF();
+        }
     }
-    if (m_State == Playing && m_pDecoder->isEOF()) {
+    if (bEOF) {
         NodePtr pTempThis = getSharedThis();
         onEOF();
     }
@@ -283,7 +298,11 @@ void SoundNode::seek(long long destTime)
 {
     if (getState() == NS_CANRENDER) {    
         AudioEngine::get()->notifySeek(m_AudioID);
-        m_pDecoder->seek(float(destTime)/1000);
+        if (m_pVoice) {
+            m_pVoice->seek(float(destTime)/1000);
+        } else {
+            m_pDecoder->seek(float(destTime)/1000);
+        }
         m_StartTime = Player::get()->getFrameTime() - destTime;
         m_PauseTime = 0;
         m_PauseStartTime = Player::get()->getFrameTime();
@@ -296,6 +315,14 @@ void SoundNode::seek(long long destTime)
 
 void SoundNode::open()
 {
+    // Short sounds are played from the SampleCache if possible.
+    AudioEngine* pEngine = AudioEngine::get();
+    if (pEngine && pEngine->getParams()) {
+        m_pSample = SampleCache::get()->getSample(m_Filename, *pEngine->getParams());
+    }
+    if (m_pSample) {
+        return;
+    }
     m_pDecoder->open(m_Filename, false, true);
     VideoInfo videoInfo = m_pDecoder->getVideoInfo();
     if (!videoInfo.m_bHasAudio) {
@@ -308,9 +335,22 @@ void SoundNode::open()
 void SoundNode::startDecoding()
 {
     AudioEngine* pEngine = AudioEngine::get();
-    m_pDecoder->startDecoding(false, pEngine->getParams());
-    m_AudioID = pEngine->addSource(*m_pDecoder->getAudioMsgQ(), 
-            *m_pDecoder->getAudioStatusQ());
+    const AudioParams* pAP = pEngine->getParams();
+    if (m_pSample && pAP && !m_pSample->hasFormat(*pAP)) {
+        // The audio output format has changed since the sound was opened.
+        m_pSample = CachedSamplePtr();
+        open();
+    }
+    if (m_pSample) {
+        m_pVoice = SampleVoicePtr(new SampleVoice(m_pSample));
+        m_pVoice->start();
+        m_AudioID = pEngine->addSource(m_pVoice->getAudioMsgQ(), 
+                m_pVoice->getAudioStatusQ());
+    } else {
+        m_pDecoder->startDecoding(false, pAP);
+        m_AudioID = pEngine->addSource(*m_pDecoder->getAudioMsgQ(), 
+                *m_pDecoder->getAudioStatusQ());
+    }
     pEngine->setSourceVolume(m_AudioID, m_Volume);
     if (m_SeekBeforeCanRenderTime != 0) {
         seek(m_SeekBeforeCanRenderTime);
@@ -324,7 +364,12 @@ void SoundNode::close()
         AudioEngine::get()->removeSource(m_AudioID);
         m_AudioID = -1;
     }
-    m_pDecoder->close();
+    if (m_pSample) {
+        m_pVoice = SampleVoicePtr();
+        m_pSample = CachedSamplePtr();
+    } else {
+        m_pDecoder->close();
+    }
 }
 
 void SoundNode::exceptionIfUnloaded(const std::string& sFuncName) const
@@ -335,6 +380,15 @@ void SoundNode::exceptionIfUnloaded(const std::string& sFuncName) const
     }
 }
 
+const VideoInfo& SoundNode::getVideoInfo() const
+{
+    if (m_pSample) {
+        return m_pSample->getVideoInfo();
+    } else {
+        return m_pDecoder->getVideoInfo();
+    }
+}
+
 void SoundNode::onEOF()
 {
     seek(0);
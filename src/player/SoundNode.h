@@ -29,9 +29,16 @@
 #include "../base/IFrameEndListener.h"
 #include "../base/UTF8String.h"
 
+#include <boost/shared_ptr.hpp>
+
 namespace avg {
 
 class AsyncVideoDecoder;
+class CachedSample;
+typedef boost::shared_ptr<CachedSample> CachedSamplePtr;
+class SampleVoice;
+typedef boost::shared_ptr<SampleVoice> SampleVoicePtr;
+struct VideoInfo;
 
 class AVG_API SoundNode : public AreaNode, IFrameEndListener
 {
@@ -77,6 +84,7 @@ class AVG_API SoundNode : public AreaNode, IFrameEndListener
         void startDecoding();
         void close();
         void exceptionIfUnloaded(const std::string& sFuncName) const;
+        const VideoInfo& getVideoInfo() const;
 
         UTF8String m_href;
         std::string m_Filename;
@@ -89,6 +97,9 @@ class AVG_API SoundNode : public AreaNode, IFrameEndListener
         long long m_PauseStartTime;
 
         AsyncVideoDecoder* m_pDecoder;
+        // Set instead of the decoder being used if the file is in the SampleCache.
+        CachedSamplePtr m_pSample;
+        SampleVoicePtr m_pVoice;
         float m_Volume;
         SoundState m_State;
         int m_AudioID;
@@ -82,7 +82,7 @@ bool SubscriberInfo::hasExpired() const
 
 static ProfilingZoneID InvokeSubscriberProfilingZone("SubscriberInfo: invoke");
 
-void SubscriberInfo::invoke(py::list args) const
+void SubscriberInfo::invoke(const py::tuple& args) const
 {
     ScopeTimer timer(InvokeSubscriberProfilingZone);
 
@@ -99,16 +99,14 @@ void SubscriberInfo::invoke(py::list args) const
         PyObject * pCallable = PyMethod_New(pFunction, pSelf);  //Bind function to self --> creating a bound method
 #endif
         AVG_ASSERT(pCallable != Py_None);
-        py::tuple argsTuple(args);
-        PyObject* pyResult = PyObject_CallObject(pCallable, argsTuple.ptr());
+        PyObject* pyResult = PyObject_CallObject(pCallable, args.ptr());
+        Py_DECREF(pCallable);
         if (pyResult == NULL) {
             throw py::error_already_set();
         }
-        Py_DECREF(pCallable);
         Py_DECREF(pyResult);
     }else{ //unbound method case
-        py::tuple argsTuple(args);
-        PyObject* pyResult = PyObject_CallObject(m_pPyFunction, argsTuple.ptr());
+        PyObject* pyResult = PyObject_CallObject(m_pPyFunction, args.ptr());
         if (pyResult == NULL) {
             throw py::error_already_set();
         }
@@ -38,7 +38,7 @@ public:
     virtual ~SubscriberInfo();
 
     bool hasExpired() const;
-    void invoke(py::list args) const;
+    void invoke(const py::tuple& args) const;
     int getID() const;
     bool isCallable(const PyObject* pCallable) const;
 
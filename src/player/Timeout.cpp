@@ -71,8 +71,6 @@ void Timeout::fire(long long curTime)
     }
     PyObject * arglist = Py_BuildValue("()");
     PyObject * result = PyEval_CallObject(m_PyFunc, arglist);
-    // XXX: After the call to python, this might have been deleted 
-    // by a call to clearTimeout()!
     Py_DECREF(arglist);    
     if (!result) {
         throw py::error_already_set();
@@ -80,6 +78,11 @@ void Timeout::fire(long long curTime)
     Py_DECREF(result);
 }
 
+long long Timeout::getNextTimeout() const
+{
+    return m_NextTimeout;
+}
+
 int Timeout::getID() const
 {
     return m_ID;
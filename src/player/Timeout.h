@@ -36,6 +36,7 @@ class AVG_API Timeout
 
         bool isReady(long long time) const;
         bool isInterval() const;
+        long long getNextTimeout() const;
         void fire(long long curTime);
         int getID() const;
         bool operator <(const Timeout& other) const;
@@ -0,0 +1,197 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "TimeoutQueue.h"
+
+#include "Timeout.h"
+
+#include <algorithm>
+
+using namespace std;
+
+namespace avg {
+
+TimeoutQueue::Entry::Entry(Timeout* pTimeout, long long time, unsigned long long seq)
+    : m_pTimeout(pTimeout),
+      m_Time(time),
+      m_Seq(seq)
+{
+}
+
+bool TimeoutQueue::Entry::operator <(const Entry& other) const
+{
+    // std::push_heap & co. build max-heaps, so the earliest entry must compare 
+    // greatest.
+    if (m_Time != other.m_Time) {
+        return m_Time > other.m_Time;
+    }
+    return m_Seq > other.m_Seq;
+}
+
+TimeoutQueue::TimeoutQueue()
+    : m_pCurrent(0),
+      m_bInPass(false),
+      m_NextSeq(0)
+{
+}
+
+TimeoutQueue::~TimeoutQueue()
+{
+    clear();
+}
+
+void TimeoutQueue::add(Timeout* pTimeout)
+{
+    m_Timeouts[pTimeout->getID()] = pTimeout;
+    if (m_bInPass) {
+        m_Deferred.push_back(pTimeout);
+    } else {
+        schedule(pTimeout);
+    }
+}
+
+bool TimeoutQueue::remove(int id)
+{
+    TimeoutMap::iterator it = m_Timeouts.find(id);
+    if (it == m_Timeouts.end()) {
+        return false;
+    }
+    m_Timeouts.erase(it);
+    if (m_Heap.size() > 64 && m_Heap.size() > 2*m_Timeouts.size()) {
+        compact();
+    }
+    return true;
+}
+
+void TimeoutQueue::clear()
+{
+    vector<Entry>::iterator it;
+    for (it = m_Heap.begin(); it != m_Heap.end(); ++it) {
+        delete it->m_pTimeout;
+    }
+    m_Heap.clear();
+    vector<Timeout*>::iterator deferredIt;
+    for (deferredIt = m_Deferred.begin(); deferredIt != m_Deferred.end(); ++deferredIt) {
+        delete *deferredIt;
+    }
+    m_Deferred.clear();
+    delete m_pCurrent;
+    m_pCurrent = 0;
+    m_Timeouts.clear();
+    m_bInPass = false;
+}
+
+unsigned TimeoutQueue::size() const
+{
+    return m_Timeouts.size();
+}
+
+void TimeoutQueue::beginPass()
+{
+    m_bInPass = true;
+}
+
+Timeout* TimeoutQueue::getNextReady(long long time)
+{
+    finishCurrent();
+    while (!m_Heap.empty()) {
+        Timeout* pTimeout = m_Heap.front().m_pTimeout;
+        bool bAlive = isAlive(pTimeout);
+        if (bAlive && !pTimeout->isReady(time)) {
+            break;
+        }
+        pop_heap(m_Heap.begin(), m_Heap.end());
+        m_Heap.pop_back();
+        if (bAlive) {
+            m_pCurrent = pTimeout;
+            return pTimeout;
+        } else {
+            delete pTimeout;
+        }
+    }
+    return 0;
+}
+
+void TimeoutQueue::endPass()
+{
+    finishCurrent();
+    vector<Timeout*>::iterator it;
+    for (it = m_Deferred.begin(); it != m_Deferred.end(); ++it) {
+        if (isAlive(*it)) {
+            schedule(*it);
+        } else {
+            delete *it;
+        }
+    }
+    m_Deferred.clear();
+    m_bInPass = false;
+}
+
+bool TimeoutQueue::isInPass() const
+{
+    return m_bInPass;
+}
+
+void TimeoutQueue::schedule(Timeout* pTimeout)
+{
+    m_Heap.push_back(Entry(pTimeout, pTimeout->getNextTimeout(), m_NextSeq));
+    m_NextSeq++;
+    push_heap(m_Heap.begin(), m_Heap.end());
+}
+
+void TimeoutQueue::finishCurrent()
+{
+    // Called after the current timeout has fired (or its callback has thrown).
+    if (m_pCurrent) {
+        if (isAlive(m_pCurrent) && m_pCurrent->isInterval()) {
+            m_Deferred.push_back(m_pCurrent);
+        } else {
+            m_Timeouts.erase(m_pCurrent->getID());
+            delete m_pCurrent;
+        }
+        m_pCurrent = 0;
+    }
+}
+
+bool TimeoutQueue::isAlive(const Timeout* pTimeout) const
+{
+    TimeoutMap::const_iterator it = m_Timeouts.find(pTimeout->getID());
+    return it != m_Timeouts.end() && it->second == pTimeout;
+}
+
+void TimeoutQueue::compact()
+{
+    vector<Entry> liveEntries;
+    liveEntries.reserve(m_Timeouts.size());
+    vector<Entry>::iterator it;
+    for (it = m_Heap.begin(); it != m_Heap.end(); ++it) {
+        if (isAlive(it->m_pTimeout)) {
+            liveEntries.push_back(*it);
+        } else {
+            delete it->m_pTimeout;
+        }
+    }
+    m_Heap.swap(liveEntries);
+    make_heap(m_Heap.begin(), m_Heap.end());
+}
+
+}
@@ -0,0 +1,84 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _TimeoutQueue_H_
+#define _TimeoutQueue_H_
+
+#include "../api.h"
+
+#include <boost/unordered_map.hpp>
+
+#include <vector>
+
+namespace avg {
+
+class Timeout;
+
+// Priority queue of pending timeouts. Timeouts are kept in a binary heap ordered
+// by due time (and insertion order for equal due times), so adding and firing a 
+// timeout is O(log n). Removing a timeout only unregisters its id; the heap entry 
+// is discarded when it reaches the top or when the heap is compacted.
+class AVG_API TimeoutQueue
+{
+    public:
+        TimeoutQueue();
+        virtual ~TimeoutQueue();
+
+        void add(Timeout* pTimeout);
+        bool remove(int id);
+        void clear();
+        unsigned size() const;
+
+        // Timeouts are fired in passes. Timeouts added or re-armed during a pass
+        // are scheduled when the pass ends, so they can't fire in the same pass.
+        void beginPass();
+        Timeout* getNextReady(long long time);
+        void endPass();
+        bool isInPass() const;
+
+    private:
+        struct Entry {
+            Entry(Timeout* pTimeout, long long time, unsigned long long seq);
+            bool operator <(const Entry& other) const;
+
+            Timeout* m_pTimeout;
+            long long m_Time;
+            unsigned long long m_Seq;
+        };
+
+        void schedule(Timeout* pTimeout);
+        void finishCurrent();
+        bool isAlive(const Timeout* pTimeout) const;
+        void compact();
+
+        typedef boost::unordered_map<int, Timeout*> TimeoutMap;
+        TimeoutMap m_Timeouts;
+        std::vector<Entry> m_Heap;
+        std::vector<Timeout*> m_Deferred;
+        Timeout* m_pCurrent;
+        bool m_bInPass;
+        unsigned long long m_NextSeq;
+};
+
+}
+
+#endif
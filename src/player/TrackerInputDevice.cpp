@@ -48,7 +48,6 @@
 #include <map>
 #include <list>
 #include <vector>
-#include <queue>
 #include <set>
 #include <iostream>
 
@@ -124,7 +123,7 @@ TrackerInputDevice::TrackerInputDevice(const DivNodePtr& pEventReceiverNode)
     } catch(Exception) {
         m_bFindFingertips = false;
     }
-
+    readBlobMatchMode();
 }
 
 TrackerInputDevice::~TrackerInputDevice()
@@ -201,6 +200,25 @@ void TrackerInputDevice::setConfig()
     createBitmaps(area);
     m_pCmdQueue->pushCmd(boost::bind(&TrackerThread::setConfig, _1, m_TrackerConfig, 
             area, m_pBitmaps));
+    readBlobMatchMode();
+}
+
+void TrackerInputDevice::readBlobMatchMode()
+{
+    string sMode;
+    try {
+        sMode = m_TrackerConfig.getParam("/tracker/blobmatching/@value");
+    } catch (Exception) {
+        sMode = "greedy";
+    }
+    if (sMode == "greedy") {
+        m_BlobMatchMode = BLOB_MATCH_GREEDY;
+    } else if (sMode == "optimal") {
+        m_BlobMatchMode = BLOB_MATCH_OPTIMAL;
+    } else {
+        throw Exception(AVG_ERR_INVALID_ARGS,
+                "Unknown blob matching mode "+sMode+".");
+    }
 }
 
 void TrackerInputDevice::createBitmaps(const IntRect& area)
@@ -259,29 +277,6 @@ void TrackerInputDevice::update(BlobVectorPtr pTrackBlobs,
     }
 }
 
-// Temporary structure to be put into heap of blob distances. Used only in 
-// trackBlobIDs.
-struct BlobDistEntry {
-    BlobDistEntry(float dist, BlobPtr pNewBlob, BlobPtr pOldBlob) 
-        : m_Dist(dist),
-          m_pNewBlob(pNewBlob),
-          m_pOldBlob(pOldBlob)
-    {
-    }
-
-    float m_Dist;
-    BlobPtr m_pNewBlob;
-    BlobPtr m_pOldBlob;
-};
-typedef boost::shared_ptr<struct BlobDistEntry> BlobDistEntryPtr;
-
-// The heap is sorted by least distance, so this operator does the
-// _opposite_ of what is expected!
-bool operator < (const BlobDistEntryPtr& e1, const BlobDistEntryPtr& e2) 
-{
-    return e1->m_Dist > e2->m_Dist;
-}
-
 void TrackerInputDevice::trackBlobIDs(BlobVectorPtr pNewBlobs, long long time, 
         bool bTouch)
 {
@@ -302,50 +297,24 @@ void TrackerInputDevice::trackBlobIDs(BlobVectorPtr pNewBlobs, long long time,
         (*it).second->setStale();
         oldBlobs.push_back((*it).first);
     }
-    // Create a heap that contains all distances of old to new blobs < MaxDist
-    float MaxDist = m_TrackerConfig.getFloatParam(sConfigPath+"similarity/@value");
-    float MaxDistSquared = MaxDist*MaxDist;
-    priority_queue<BlobDistEntryPtr> distHeap;
-    for (BlobVector::iterator it = pNewBlobs->begin(); it != pNewBlobs->end(); ++it) {
-        BlobPtr pNewBlob = *it;
-        for(BlobVector::iterator it2 = oldBlobs.begin(); it2 != oldBlobs.end(); ++it2) { 
-            BlobPtr pOldBlob = *it2;
-            float distSquared = glm::distance2(pNewBlob->getCenter(),
-                    pOldBlob->getEstimatedNextCenter());
-            if (distSquared <= MaxDistSquared) {
-                BlobDistEntryPtr pEntry = BlobDistEntryPtr(
-                        new BlobDistEntry(distSquared, pNewBlob, pOldBlob));
-                distHeap.push(pEntry);
-            }
-        }
-    }
-    // Match up the closest blobs.
+    float maxDist = m_TrackerConfig.getFloatParam(sConfigPath+"similarity/@value");
+    BlobMatchVector matches = matchBlobs(oldBlobs, *pNewBlobs, maxDist, 
+            m_BlobMatchMode);
     set<BlobPtr> matchedNewBlobs;
-    set<BlobPtr> matchedOldBlobs;
-    int numMatchedBlobs = 0;
-    while (!distHeap.empty()) {
-        BlobDistEntryPtr pEntry = distHeap.top();
-        distHeap.pop();
-        if (matchedNewBlobs.find(pEntry->m_pNewBlob) == matchedNewBlobs.end() &&
-            matchedOldBlobs.find(pEntry->m_pOldBlob) == matchedOldBlobs.end())
-        {
-            // Found a pair of matched blobs.
-            numMatchedBlobs++;
-            BlobPtr pNewBlob = pEntry->m_pNewBlob; 
-            BlobPtr pOldBlob = pEntry->m_pOldBlob; 
-            matchedNewBlobs.insert(pNewBlob);
-            matchedOldBlobs.insert(pOldBlob);
-            AVG_ASSERT (pEvents->find(pOldBlob) != pEvents->end());
-            TrackerTouchStatusPtr pTouchStatus;
-            pTouchStatus = pEvents->find(pOldBlob)->second;
-            // Make sure we don't discard any events that have related info.
-            bool bKeepAllEvents = pNewBlob->getFirstRelated() && !bTouch;
-            pTouchStatus->blobChanged(pNewBlob, time, bKeepAllEvents);
-            pNewBlob->calcNextCenter(pOldBlob->getCenter());
-            // Update the mapping.
-            (*pEvents)[pNewBlob] = pTouchStatus;
-            pEvents->erase(pOldBlob);
-        }
+    for (BlobMatchVector::iterator it = matches.begin(); it != matches.end(); ++it) {
+        BlobPtr pOldBlob = it->first;
+        BlobPtr pNewBlob = it->second;
+        matchedNewBlobs.insert(pNewBlob);
+        AVG_ASSERT (pEvents->find(pOldBlob) != pEvents->end());
+        TrackerTouchStatusPtr pTouchStatus;
+        pTouchStatus = pEvents->find(pOldBlob)->second;
+        // Make sure we don't discard any events that have related info.
+        bool bKeepAllEvents = pNewBlob->getFirstRelated() && !bTouch;
+        pTouchStatus->blobChanged(pNewBlob, time, bKeepAllEvents);
+        pNewBlob->calcNextCenter(pOldBlob->getCenter());
+        // Update the mapping.
+        (*pEvents)[pNewBlob] = pTouchStatus;
+        pEvents->erase(pOldBlob);
     }
     // Blobs have been matched. Left-overs are new blobs.
     for (BlobVector::iterator it = pNewBlobs->begin(); it != pNewBlobs->end(); ++it) {
@@ -29,6 +29,7 @@
 
 #include "../imaging/TrackerThread.h"
 #include "../imaging/Blob.h"
+#include "../imaging/BlobMatcher.h"
 
 #include "../graphics/Bitmap.h"
 #include "../graphics/Filter.h"
@@ -78,6 +79,7 @@ class AVG_API TrackerInputDevice: public IBlobTarget, public InputDevice
 
     private:
         void setConfig();
+        void readBlobMatchMode();
         void createBitmaps(const IntRect& area);
 
         boost::thread* m_pTrackerThread;
@@ -107,6 +109,7 @@ class AVG_API TrackerInputDevice: public IBlobTarget, public InputDevice
         TouchStatusMap m_TouchEvents;
         TouchStatusMap m_TrackEvents;
         TrackerConfig m_TrackerConfig;
+        BlobMatchMode m_BlobMatchMode;
 
         MutexPtr m_pMutex;
         BitmapPtr m_pBitmaps[NUM_TRACKER_IMAGES];
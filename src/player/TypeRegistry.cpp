@@ -90,10 +90,13 @@ ExportedObjectPtr TypeRegistry::createObject(const string& sType,
 
 ExportedObjectPtr TypeRegistry::createObject(const string& sType, const py::dict& pyDict)
 {
-    const TypeDefinition& def = getTypeDef(sType);
-    py::dict effParams;
-    effParams = pyDict;
-    ArgList args(def.getDefaultArgs(), effParams);
+    return createObject(getTypeDef(sType), pyDict);
+}
+
+ExportedObjectPtr TypeRegistry::createObject(const TypeDefinition& def,
+        const py::dict& pyDict)
+{
+    ArgList args(def.getDefaultArgs(), pyDict);
     ObjectBuilder builder = def.getBuilder();
     ExportedObjectPtr pObj = builder(args);
     pObj->setTypeInfo(&def);
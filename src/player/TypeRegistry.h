@@ -44,6 +44,7 @@ public:
     TypeDefinition& getTypeDef(const std::string& Type);
     ExportedObjectPtr createObject(const std::string& Type, const xmlNodePtr xmlNode);
     ExportedObjectPtr createObject(const std::string& Type, const py::dict& PyDict);
+    ExportedObjectPtr createObject(const TypeDefinition& def, const py::dict& PyDict);
     
     std::string getDTD() const;
     
@@ -30,6 +30,7 @@
 #include "../base/ScopeTimer.h"
 #include "../base/XMLHelper.h"
 #include "../base/ObjectCounter.h"
+#include "../base/TimeSource.h"
 
 #include "../graphics/Filterfill.h"
 #include "../graphics/GLTexture.h"
@@ -45,6 +46,7 @@
 
 #include <iostream>
 #include <sstream>
+#include <algorithm>
 
 #ifndef _WIN32
 #include <unistd.h>
@@ -55,6 +57,9 @@ using namespace std;
 
 namespace avg {
 
+// Number of seek latencies kept for getSeekStats().
+static const unsigned MAX_SEEK_LATENCIES = 1000;
+
 void VideoNode::registerType()
 {
     TypeDefinition def = TypeDefinition("video", "rasternode", 
@@ -70,6 +75,9 @@ void VideoNode::registerType()
                 offsetof(VideoNode, m_bUsesHardwareAcceleration)))
         .addArg(Arg<bool>("enablesound", true, false,
                 offsetof(VideoNode, m_bEnableSound)))
+        .addArg(Arg<bool>("fastseek", false, false, offsetof(VideoNode, m_bFastSeek)))
+        .addArg(Arg<int>("framecachesize", 0, false,
+                offsetof(VideoNode, m_FrameCacheSize)))
         ;
     TypeRegistry::get()->registerType(def);
 }
@@ -88,7 +96,14 @@ VideoNode::VideoNode(const ArgList& args)
       m_Volume(1.0),
       m_bUsesHardwareAcceleration(false),
       m_bEnableSound(true),
-      m_AudioID(-1)
+      m_AudioID(-1),
+      m_bFastSeek(false),
+      m_FrameCacheSize(0),
+      m_CachedFrame(-1),
+      m_SeekStartTime(-1),
+      m_NumSeeks(0),
+      m_NumCacheSeeks(0),
+      m_NumForwardSeeks(0)
 {
     args.setMembers(this);
     m_Filename = m_href;
@@ -97,11 +112,16 @@ VideoNode::VideoNode(const ArgList& args)
         throw Exception(AVG_ERR_INVALID_ARGS, 
                 "Can't set queue length for unthreaded videos because there is no decoder queue in this case.");
     }
+    if (m_FrameCacheSize < 0) {
+        throw Exception(AVG_ERR_OUT_OF_RANGE, 
+                "Video frame cache size must not be negative.");
+    }
     if (m_bThreaded) {
         m_pDecoder = new AsyncVideoDecoder(m_QueueLength);
     } else {
         m_pDecoder = new SyncVideoDecoder();
     }
+    m_pFrameCache = VideoFrameCachePtr(new VideoFrameCache(m_FrameCacheSize));
 
     ObjectCounter::get()->incRef(&typeid(*this));
 }
@@ -175,6 +195,9 @@ int VideoNode::getNumFrames() const
 int VideoNode::getCurFrame() const
 {
     exceptionIfUnloaded("getCurFrame");
+    if (m_CachedFrame != -1) {
+        return m_CachedFrame;
+    }
     int curFrame = m_pDecoder->getCurFrame();
     if (curFrame > 0) {
         return curFrame;
@@ -198,7 +221,9 @@ void VideoNode::seekToFrame(int frameNum)
     exceptionIfUnloaded("seekToFrame");
     if (getCurFrame() != frameNum) {
         long long destTime = (long long)(frameNum*1000.0/m_pDecoder->getStreamFPS());
-        seek(destTime);
+        if (!seekToCachedFrame(frameNum, destTime)) {
+            seek(destTime);
+        }
     }
 }
 
@@ -269,6 +294,8 @@ long long VideoNode::getCurTime() const
 {
     if (m_VideoState == Unloaded) {
         return 0;
+    } else if (m_CachedFrame != -1) {
+        return (long long)(m_CachedFrame*1000.0/m_pDecoder->getStreamFPS());
     } else {
         long long curTime = (long long)(m_pDecoder->getCurTime()*1000);
         if (curTime > 0) {
@@ -334,6 +361,57 @@ bool VideoNode::isAccelerated() const
     return m_bUsesHardwareAcceleration;
 }
 
+bool VideoNode::getFastSeek() const
+{
+    return m_bFastSeek;
+}
+
+int VideoNode::getFrameCacheSize() const
+{
+    return m_FrameCacheSize;
+}
+
+void VideoNode::setFrameCacheSize(int frameCacheSize)
+{
+    if (frameCacheSize < 0) {
+        throw Exception(AVG_ERR_OUT_OF_RANGE, 
+                "Video frame cache size must not be negative.");
+    }
+    m_FrameCacheSize = frameCacheSize;
+    m_pFrameCache->setMaxFrames(frameCacheSize);
+}
+
+VideoNode::SeekStats VideoNode::getSeekStats() const
+{
+    SeekStats stats;
+    stats.m_NumSeeks = m_NumSeeks;
+    stats.m_NumCacheHits = m_NumCacheSeeks;
+    stats.m_NumForwardDecodes = m_NumForwardSeeks;
+    vector<float> latencies = m_SeekLatencies;
+    sort(latencies.begin(), latencies.end());
+    if (latencies.empty()) {
+        stats.m_P50Latency = 0;
+        stats.m_P90Latency = 0;
+        stats.m_P99Latency = 0;
+        stats.m_MaxLatency = 0;
+    } else {
+        int maxIndex = int(latencies.size())-1;
+        stats.m_P50Latency = latencies[int(maxIndex*0.5f+0.5f)];
+        stats.m_P90Latency = latencies[int(maxIndex*0.9f+0.5f)];
+        stats.m_P99Latency = latencies[int(maxIndex*0.99f+0.5f)];
+        stats.m_MaxLatency = latencies[maxIndex];
+    }
+    return stats;
+}
+
+void VideoNode::resetSeekStats()
+{
+    m_NumSeeks = 0;
+    m_NumCacheSeeks = 0;
+    m_NumForwardSeeks = 0;
+    m_SeekLatencies.clear();
+}
+
 const UTF8String& VideoNode::getHRef() const
 {
     return m_href;
@@ -437,10 +515,23 @@ void VideoNode::changeVideoState(VideoState newVideoState)
 void VideoNode::seek(long long destTime) 
 {
     if (getState() == NS_CANRENDER) {    
-        if (m_AudioID != -1) {
-            AudioEngine::get()->notifySeek(m_AudioID);
+        m_NumSeeks++;
+        m_SeekStartTime = TimeSource::get()->getCurrentMicrosecs();
+        // If the target is in the same group of pictures as the current frame,
+        // decoding forward is cheaper than a seek followed by decoding from the 
+        // keyframe. The decoder skips to the target time on its own when the next 
+        // frame is requested. Videos with audio always seek so audio stays in sync.
+        if (m_AudioID == -1 && !m_bSeekPending && m_CachedFrame == -1 &&
+                m_pDecoder->isSeekByDecodingFaster(float(destTime)/1000.0f))
+        {
+            m_NumForwardSeeks++;
+        } else {
+            if (m_AudioID != -1) {
+                AudioEngine::get()->notifySeek(m_AudioID);
+            }
+            m_pDecoder->seek(float(destTime)/1000.0f);
         }
-        m_pDecoder->seek(float(destTime)/1000.0f);
+        m_CachedFrame = -1;
         m_StartTime = Player::get()->getFrameTime() - destTime;
         m_JitterCompensation = 0.5;
         m_PauseTime = 0;
@@ -454,11 +545,44 @@ void VideoNode::seek(long long destTime)
     }
 }
 
+bool VideoNode::seekToCachedFrame(int frameNum, long long destTime)
+{
+    if (getState() != NS_CANRENDER || m_pFrameCache->getMaxFrames() == 0) {
+        return false;
+    }
+    vector<BitmapPtr> pBmps;
+    if (!m_pFrameCache->get(frameNum, pBmps)) {
+        return false;
+    }
+    // The decoder still needs to seek so playback continues from the new position, 
+    // but the cached frame can be displayed right away.
+    seek(destTime);
+    for (unsigned i = 0; i < pBmps.size(); ++i) {
+        GLContextManager::get()->scheduleTexUpload(m_pTextures[i], pBmps[i]);
+    }
+    m_CachedFrame = frameNum;
+    m_bFrameAvailable = true;
+    m_bFirstFrameDecoded = true;
+    m_NumCacheSeeks++;
+    m_SeekStartTime = -1;
+    addSeekLatency(0);
+    return true;
+}
+
+void VideoNode::addSeekLatency(float latency)
+{
+    if (m_SeekLatencies.size() >= MAX_SEEK_LATENCIES) {
+        m_SeekLatencies.erase(m_SeekLatencies.begin());
+    }
+    m_SeekLatencies.push_back(latency);
+}
+
 void VideoNode::open() 
 {
     m_FramesTooLate = 0;
     m_FramesInRowTooLate = 0;
     m_FramesPlayed = 0;
+    m_pDecoder->enableKeyframeIndex(m_bFastSeek);
     m_pDecoder->open(m_Filename, m_bUsesHardwareAcceleration, m_bEnableSound);
     VideoInfo videoInfo = m_pDecoder->getVideoInfo();
     if (!videoInfo.m_bHasVideo) {
@@ -553,6 +677,9 @@ void VideoNode::close()
         m_AudioID = -1;
     }
     m_pDecoder->close();
+    m_pFrameCache->clear();
+    m_CachedFrame = -1;
+    m_SeekStartTime = -1;
     if (m_FramesTooLate > 0) {
         string sID;
         if (getID() == "") {
@@ -714,6 +841,12 @@ bool VideoNode::renderFrame()
             m_FramesPlayed++;
             m_FramesInRowTooLate = 0;
             m_bSeekPending = false;
+            m_CachedFrame = -1;
+            if (m_SeekStartTime != -1) {
+                long long curTime = TimeSource::get()->getCurrentMicrosecs();
+                addSeekLatency((curTime-m_SeekStartTime)/1000.f);
+                m_SeekStartTime = -1;
+            }
             setMaskCoords();
 //            AVG_TRACE(Logger::category::PROFILE, "New frame.");
             break;
@@ -779,6 +912,7 @@ FrameAvailableCode VideoNode::renderToSurface()
         for (unsigned i=0; i<getNumPixelFormatPlanes(pf); ++i) {
             GLContextManager::get()->scheduleTexUpload(m_pTextures[i], pBmps[i]);
         }
+        m_pFrameCache->add(m_pDecoder->getCurFrame(), pBmps);
     }
 
     // Even with vsync, frame duration has a bit of jitter. If the video frames rendered
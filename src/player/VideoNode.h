@@ -34,6 +34,9 @@
 #include "../base/UTF8String.h"
 
 #include "../video/VideoDecoder.h"
+#include "../video/VideoFrameCache.h"
+
+#include <vector>
 
 namespace avg {
 
@@ -48,6 +51,17 @@ class AVG_API VideoNode: public RasterNode, IFrameEndListener
     public:
         enum VideoAccelType {NONE, VDPAU};
 
+        struct SeekStats {
+            int m_NumSeeks;
+            int m_NumCacheHits;
+            int m_NumForwardDecodes;
+            // Latencies from the seek call to the first new frame, in milliseconds.
+            float m_P50Latency;
+            float m_P90Latency;
+            float m_P99Latency;
+            float m_MaxLatency;
+        };
+
         static void registerType();
         
         VideoNode(const ArgList& args);
@@ -92,6 +106,11 @@ class AVG_API VideoNode: public RasterNode, IFrameEndListener
         bool hasAlpha() const;
         void setEOFCallback(PyObject * pEOFCallback);
         bool isAccelerated() const;
+        bool getFastSeek() const;
+        int getFrameCacheSize() const;
+        void setFrameCacheSize(int frameCacheSize);
+        SeekStats getSeekStats() const;
+        void resetSeekStats();
 
         virtual void preRender(const VertexArrayPtr& pVA, bool bIsParentActive, 
                 float parentEffectiveOpacity);
@@ -106,6 +125,8 @@ class AVG_API VideoNode: public RasterNode, IFrameEndListener
         bool renderFrame();
         FrameAvailableCode renderToSurface();
         void seek(long long destTime);
+        bool seekToCachedFrame(int frameNum, long long destTime);
+        void addSeekLatency(float latency);
         void onEOF();
         void updateStatusDueToDecoderEOF();
         void dumpFramesTooLate();
@@ -151,6 +172,18 @@ class AVG_API VideoNode: public RasterNode, IFrameEndListener
         bool m_bEnableSound;
         int m_AudioID;
 
+        bool m_bFastSeek;
+        int m_FrameCacheSize;
+        VideoFrameCachePtr m_pFrameCache;
+        // Frame displayed from the frame cache while the decoder hasn't delivered a 
+        // frame since the seek, -1 otherwise.
+        int m_CachedFrame;
+        long long m_SeekStartTime;
+        int m_NumSeeks;
+        int m_NumCacheSeeks;
+        int m_NumForwardSeeks;
+        std::vector<float> m_SeekLatencies;
+
         MCTexturePtr m_pTextures[4];
 };
 
@@ -682,6 +682,7 @@ void WordsNode::renderText()
                 default:
                     AVG_ASSERT(false);
             }
+            pickRectChanged();
             setRenderColor(m_FontStyle.getColorVal());
 
             GLContextManager* pCM = GLContextManager::get();
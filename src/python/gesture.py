@@ -23,9 +23,105 @@ from libavg import avg, statemachine, player, filter
 
 import weakref
 import warnings
+import collections
+import time
 
 import math
 
+
+class FrameDispatcher(object):
+    """
+    Calls the per-frame handlers of all active recognizers from a single 
+    Player.ON_FRAME subscription, so a frame costs one call from C++ into python 
+    instead of one per recognizer. Like Publisher subscriptions, handlers that are
+    bound methods don't keep their objects alive.
+    """
+    def __init__(self):
+        self.__handlers = collections.OrderedDict()
+        self.__nextID = 1
+        self.__playerHandlerID = None
+        self.__isProfiling = False
+
+    def subscribe(self, handler):
+        if (self.__playerHandlerID is None or 
+                not(player.isSubscribed(player.ON_FRAME, self.__playerHandlerID))):
+            # Player.cleanup() removes all subscriptions. Do the same here.
+            self.__handlers.clear()
+            self.__playerHandlerID = player.subscribe(player.ON_FRAME, self.__onFrame)
+        handlerID = self.__nextID
+        self.__nextID += 1
+        if hasattr(handler, "im_self") and handler.im_self is not None:
+            self.__handlers[handlerID] = _FrameHandler(weakref.ref(handler.im_self),
+                    handler.im_func)
+        else:
+            self.__handlers[handlerID] = _FrameHandler(None, handler)
+        return handlerID
+
+    def unsubscribe(self, handlerID):
+        if handlerID not in self.__handlers:
+            raise RuntimeError("FrameDispatcher: Handler %s not subscribed."%handlerID)
+        del self.__handlers[handlerID]
+
+    def isSubscribed(self, handlerID):
+        return handlerID in self.__handlers
+
+    def getNumHandlers(self):
+        return len(self.__handlers)
+
+    def enableProfiling(self, isProfiling):
+        self.__isProfiling = isProfiling
+
+    def getTickTimes(self):
+        # Returns (object, time in ms) tuples for the active handlers in the last frame.
+        # object is the recognizer (or handler) ticked.
+        if not(self.__isProfiling):
+            raise RuntimeError("FrameDispatcher: Profiling is not enabled.")
+        return [(handler.getOwner(), handler.tickTime) 
+                for handler in self.__handlers.itervalues()]
+
+    def __onFrame(self):
+        # Handlers subscribed during this frame are called in the next frame, handlers
+        # unsubscribed during this frame aren't called anymore.
+        for handlerID, handler in self.__handlers.items():
+            if handlerID in self.__handlers:
+                if self.__isProfiling:
+                    startTime = time.time()
+                    isAlive = handler.call()
+                    handler.tickTime = (time.time()-startTime)*1000
+                else:
+                    isAlive = handler.call()
+                if not(isAlive):
+                    self.__handlers.pop(handlerID, None)
+
+
+class _FrameHandler(object):
+    __slots__ = ("ownerRef", "func", "tickTime")
+
+    def __init__(self, ownerRef, func):
+        self.ownerRef = ownerRef
+        self.func = func
+        self.tickTime = 0
+
+    def getOwner(self):
+        if self.ownerRef is None:
+            return self.func
+        else:
+            return self.ownerRef()
+
+    def call(self):
+        if self.ownerRef is None:
+            self.func()
+        else:
+            owner = self.ownerRef()
+            if owner is None:
+                return False
+            self.func(owner)
+        return True
+
+
+frameDispatcher = FrameDispatcher()
+
+
 class Recognizer(avg.Publisher):
 
     POSSIBLE = avg.Publisher.genMessageID()
@@ -138,8 +234,7 @@ class Recognizer(avg.Publisher):
                         avg.Contact.CURSOR_UP, self.__onUp)
                 self._contacts.add(event.contact)
                 if len(self._contacts) == 1:
-                    self.__frameHandlerID = player.subscribe(player.ON_FRAME, 
-                            self._onFrame)
+                    self.__frameHandlerID = frameDispatcher.subscribe(self._onFrame)
                 self.__dirty = True
                 return self._handleDown(event)
 
@@ -155,7 +250,7 @@ class Recognizer(avg.Publisher):
             self.__dirty = True
             self._contacts.remove(event.contact)
             if len(self._contacts) == 0:
-                player.unsubscribe(player.ON_FRAME, self.__frameHandlerID)
+                frameDispatcher.unsubscribe(self.__frameHandlerID)
                 self.__frameHandlerID = None
             self._handleUp(event)
 
@@ -176,7 +271,7 @@ class Recognizer(avg.Publisher):
         self.__upHandlerID = {}
         self._contacts = set()
         if self.__frameHandlerID:
-            player.unsubscribe(player.ON_FRAME, self.__frameHandlerID)
+            frameDispatcher.unsubscribe(self.__frameHandlerID)
             self.__frameHandlerID = None
 
     def _handleDown(self, event):
@@ -288,7 +383,7 @@ class DoubletapRecognizer(Recognizer):
     def _handleDown(self, event):
         self.__startTime = player.getFrameTime()
         if self.__stateMachine.state == "IDLE":
-            self.__frameHandlerID = player.subscribe(player.ON_FRAME, self.__onFrame)
+            self.__frameHandlerID = frameDispatcher.subscribe(self.__onFrame)
             self.__stateMachine.changeState("DOWN1")
             self.__startPos = event.pos
             self._setPossible(event)
@@ -332,7 +427,7 @@ class DoubletapRecognizer(Recognizer):
             self.__stateMachine.changeState("IDLE")
 
     def __enterIdle(self):
-        player.unsubscribe(player.ON_FRAME, self.__frameHandlerID)
+        frameDispatcher.unsubscribe(self.__frameHandlerID)
 
 
 class SwipeRecognizer(Recognizer):
@@ -602,19 +697,33 @@ class DragRecognizer(Recognizer):
 
 class Mat3x3(object):
     # Internal class. Will be removed again.
+    # The matrix is stored as a flat tuple in row-major order. All operations are
+    # unrolled, since loops and nested lists dominate the cost for 3x3 matrices.
 
     def __init__(self, row0=(1, 0, 0), row1=(0, 1, 0), row2=(0, 0, 1)):
-        self.m = [row0, row1, row2]
+        self.m = (row0[0], row0[1], row0[2],
+                  row1[0], row1[1], row1[2],
+                  row2[0], row2[1], row2[2])
+
+    @classmethod
+    def fromTuple(cls, m):
+        result = Mat3x3.__new__(Mat3x3)
+        result.m = m
+        return result
 
     @classmethod
     def translate(cls, t):
-        return Mat3x3([1, 0, t[0]],
-            [0, 1, t[1]])
+        return Mat3x3.fromTuple((1, 0, t[0],
+                                 0, 1, t[1],
+                                 0, 0, 1))
 
     @classmethod
     def rotate(cls, a):
-        return Mat3x3([math.cos(a), -math.sin(a), 0],
-            [math.sin(a), math.cos(a), 0])
+        c = math.cos(a)
+        s = math.sin(a)
+        return Mat3x3.fromTuple((c, -s, 0,
+                                 s, c, 0,
+                                 0, 0, 1))
 
     @classmethod
     def pivotRotate(cls, t, a):
@@ -624,8 +733,9 @@ class Mat3x3(object):
 
     @classmethod
     def scale(cls, s):
-        return Mat3x3([s[0], 0, 0],
-                      [0, s[1], 0])
+        return Mat3x3.fromTuple((s[0], 0, 0,
+                                 0, s[1], 0,
+                                 0, 0, 1))
 
     @classmethod
     def fromNode(cls, node):
@@ -636,99 +746,72 @@ class Mat3x3(object):
                 Mat3x3.scale(node.size)))))
 
     def setNodeTransform(self, node):
-        v = self.applyVec([1,0,0])
-        rot = avg.Point2D(v[0], v[1]).getAngle()
+        m = self.m
+        rot = avg.Point2D(m[0], m[3]).getAngle()
         node.angle = rot
         node.size = self.getScale()
         node.pivot = node.size/2
-        v = self.applyVec([0,0,1])
-        node.pos = (avg.Point2D(v[0], v[1]) + (node.pivot).getRotated(node.angle) -
+        node.pos = (avg.Point2D(m[2], m[5]) + (node.pivot).getRotated(node.angle) -
                 node.pivot)
 
     def getScale(self):
-        v = self.applyVec([1,0,0])
-        xscale = avg.Point2D(v[0], v[1]).getNorm()
-        v = self.applyVec([0,1,0])
-        yscale = avg.Point2D(v[0], v[1]).getNorm()
-        return avg.Point2D(xscale, yscale)
+        m = self.m
+        return avg.Point2D(math.hypot(m[0], m[3]), math.hypot(m[1], m[4]))
 
     def __str__(self):
-        return self.m.__str__()
+        return [self.m[0:3], self.m[3:6], self.m[6:9]].__str__()
 
     def applyVec(self, v):
         m = self.m
-        v1 = []
-        for i in range(3):
-            v1.append(m[i][0]*v[0] + m[i][1]*v[1] + m[i][2]*v[2])
-        return v1
+        return [m[0]*v[0] + m[1]*v[1] + m[2]*v[2],
+                m[3]*v[0] + m[4]*v[1] + m[5]*v[2],
+                m[6]*v[0] + m[7]*v[1] + m[8]*v[2]]
 
     def applyMat(self, m1):
-        m0 = self.m
-        result = Mat3x3()
-        for i in range(3):
-            v = []
-            for j in range(3):
-                v.append(m0[i][0]*m1.m[0][j] + m0[i][1]*m1.m[1][j] + m0[i][2]*m1.m[2][j])
-            result.m[i] = v
-        return result
+        a = self.m
+        b = m1.m
+        return Mat3x3.fromTuple((
+                a[0]*b[0] + a[1]*b[3] + a[2]*b[6],
+                a[0]*b[1] + a[1]*b[4] + a[2]*b[7],
+                a[0]*b[2] + a[1]*b[5] + a[2]*b[8],
+                a[3]*b[0] + a[4]*b[3] + a[5]*b[6],
+                a[3]*b[1] + a[4]*b[4] + a[5]*b[7],
+                a[3]*b[2] + a[4]*b[5] + a[5]*b[8],
+                a[6]*b[0] + a[7]*b[3] + a[8]*b[6],
+                a[6]*b[1] + a[7]*b[4] + a[8]*b[7],
+                a[6]*b[2] + a[7]*b[5] + a[8]*b[8]))
 
     def det(self):
         m = self.m
-        return float(m[0][0] * (m[2][2] * m[1][1] - m[2][1] * m[1][2])
-                     -m[1][0] * (m[2][2]*m[0][1]-m[2][1]*m[0][2])
-                     +m[2][0] * (m[1][2]*m[0][1]-m[1][1]*m[0][2]))
+        return float(m[0] * (m[8]*m[4] - m[7]*m[5])
+                     -m[3] * (m[8]*m[1] - m[7]*m[2])
+                     +m[6] * (m[5]*m[1] - m[4]*m[2]))
 
     def scalarMult(self, s):
-        m = self.m
-        result = Mat3x3()
-        for i in range(3):
-            v = []
-            for j in range(3):
-                v.append(m[i][j] * s)
-            result.m[i] = v
-        return result
+        return Mat3x3.fromTuple(tuple(x*s for x in self.m))
 
     def inverse(self):
         m = self.m
-        temp = Mat3x3([  m[2][2]*m[1][1]-m[2][1]*m[1][2],  -(m[2][2]*m[0][1]-m[2][1]*m[0][2]),   m[1][2]*m[0][1]-m[1][1]*m[0][2] ],
-                      [-(m[2][2]*m[1][0]-m[2][0]*m[1][2]),   m[2][2]*m[0][0]-m[2][0]*m[0][2] , -(m[1][2]*m[0][0]-m[1][0]*m[0][2])],
-                      [  m[2][1]*m[1][0]-m[2][0]*m[1][1],  -(m[2][1]*m[0][0]-m[2][0]*m[0][1]),   m[1][1]*m[0][0]-m[1][0]*m[0][1] ])
-        return temp.scalarMult(1/self.det())
+        invDet = 1/self.det()
+        return Mat3x3.fromTuple((
+                 (m[8]*m[4] - m[7]*m[5]) * invDet,
+                -(m[8]*m[1] - m[7]*m[2]) * invDet,
+                 (m[5]*m[1] - m[4]*m[2]) * invDet,
+                -(m[8]*m[3] - m[6]*m[5]) * invDet,
+                 (m[8]*m[0] - m[6]*m[2]) * invDet,
+                -(m[5]*m[0] - m[3]*m[2]) * invDet,
+                 (m[7]*m[3] - m[6]*m[4]) * invDet,
+                -(m[7]*m[0] - m[6]*m[1]) * invDet,
+                 (m[4]*m[0] - m[3]*m[1]) * invDet))
 
 
 def getCentroid(indexes, pts):
-    c = avg.Point2D(0, 0)
-    for i in indexes:
-        c += pts[i]
-    return c/len(indexes)
+    return avg.getCentroid(pts, indexes)
 
 def calcKMeans(pts):
-
     # in: List of points
     # out: Two lists, each containing indexes into the input list
-    assert(len(pts) > 1)
-    p1 = pts[0]
-    p2 = pts[1]
-    oldP1 = None
-    oldP2 = None
-    j = 0
-    while not(p1 == oldP1 and p2 == oldP2) and j < 50:
-        l1 = []
-        l2 = []
-        # Group points
-        for i, pt in enumerate(pts):
-            dist1 = (pt-p1).getNorm()
-            dist2 = (pt-p2).getNorm()
-            if dist1 < dist2:
-                l1.append(i)
-            else:
-                l2.append(i)
-        oldP1 = p1
-        oldP2 = p2
-        p1 = getCentroid(l1, pts)
-        p2 = getCentroid(l2, pts)
-        j += 1
-    return l1, l2
+    return avg.calcKMeans(pts)
 
 
 class Transform(object):
@@ -808,7 +891,7 @@ class TransformRecognizer(Recognizer):
                 self.__inertiaHandler.abort()
                 self._setEnd(event)
             self._setDetected(event)
-            self.__frameHandlerID = player.subscribe(player.ON_FRAME, self.__onFrame)
+            self.__frameHandlerID = frameDispatcher.subscribe(self.__onFrame)
             if self.__friction != -1:
                 self.__inertiaHandler = InertiaHandler(self.__friction, 
                         self.__onInertiaMove, self.__onInertiaStop)
@@ -819,7 +902,7 @@ class TransformRecognizer(Recognizer):
             contact = event.contact
             transform = Transform(self.__filteredRelContactPos(contact)
                     - self.__lastPosns[0])
-            player.unsubscribe(player.ON_FRAME, self.__frameHandlerID)
+            frameDispatcher.unsubscribe(self.__frameHandlerID)
             self.__frameHandlerID = None
             if self.__friction != -1:
                 self.__inertiaHandler.onDrag(transform)
@@ -928,7 +1011,7 @@ class TransformRecognizer(Recognizer):
 
     def __abort(self):
         if self.__frameHandlerID:
-            player.unsubscribe(player.ON_FRAME, self.__frameHandlerID)
+            frameDispatcher.unsubscribe(self.__frameHandlerID)
             self.__frameHandlerID = None
         if self.__inertiaHandler:
             self.__inertiaHandler.abort()
@@ -945,10 +1028,10 @@ class InertiaHandler(object):
         self.__curPivot = avg.Point2D(0, 0)
         self.__angVel = 0
         self.__sizeVel = avg.Point2D(0, 0)
-        self.__frameHandlerID = player.subscribe(player.ON_FRAME, self.__onDragFrame)
+        self.__frameHandlerID = frameDispatcher.subscribe(self.__onDragFrame)
 
     def abort(self):
-        player.unsubscribe(player.ON_FRAME, self.__frameHandlerID)
+        frameDispatcher.unsubscribe(self.__frameHandlerID)
         self.__stopHandler = None
         self.__moveHandler = None
 
@@ -964,8 +1047,8 @@ class InertiaHandler(object):
             self.__angVel += 0.1*transform.rot/frameDuration
 
     def onUp(self):
-        player.unsubscribe(player.ON_FRAME, self.__frameHandlerID)
-        self.__frameHandlerID = player.subscribe(player.ON_FRAME, self.__onInertiaFrame)
+        frameDispatcher.unsubscribe(self.__frameHandlerID)
+        self.__frameHandlerID = frameDispatcher.subscribe(self.__onInertiaFrame)
         self.__onInertiaFrame()
 
     def __onDragFrame(self):
@@ -997,7 +1080,7 @@ class InertiaHandler(object):
             self.__stop()
 
     def __stop(self):
-        player.unsubscribe(player.ON_FRAME, self.__frameHandlerID)
+        frameDispatcher.unsubscribe(self.__frameHandlerID)
         self.__stopHandler()
         self.__stopHandler = None
         self.__moveHandler = None
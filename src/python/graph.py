@@ -17,12 +17,113 @@
 #
 # Current versions can be found at www.libavg.de
 
+import array
 import math
 import time
 
 from libavg import avg, player, Point2D
 
 
+class RingBuffer(object):
+    """
+    Fixed-capacity circular buffer of floats. Every value is stored twice, so the
+    buffer contents are always available as one contiguous slice and appending is
+    O(1).
+    """
+    def __init__(self, capacity):
+        assert(capacity > 0)
+        self.__capacity = capacity
+        self.__data = array.array('d', [0.0]) * (2 * capacity)
+        self.__start = 0
+        self.__len = 0
+
+    def __len__(self):
+        return self.__len
+
+    def append(self, value):
+        if self.__len < self.__capacity:
+            i = self.__start + self.__len
+            if i >= self.__capacity:
+                i -= self.__capacity
+            self.__len += 1
+        else:
+            i = self.__start
+            self.__start = (self.__start + 1) % self.__capacity
+        self.__data[i] = value
+        self.__data[i + self.__capacity] = value
+
+    def getValues(self):
+        return self.__data[self.__start:self.__start + self.__len]
+
+    def getCapacity(self):
+        return self.__capacity
+
+    def getLast(self):
+        return self.__data[self.__start + self.__len - 1]
+
+
+class DownsampledSeries(object):
+    """
+    Time series that only keeps the minimum, maximum and average of each run of
+    samplesPerBucket consecutive samples, for at most numBuckets buckets. Appending a
+    sample is O(1), and the series never has more than numBuckets + 1 points (the
+    last bucket can be partially filled).
+    """
+    def __init__(self, numBuckets, samplesPerBucket):
+        assert(samplesPerBucket > 0)
+        self.__minima = RingBuffer(numBuckets)
+        self.__maxima = RingBuffer(numBuckets)
+        self.__averages = RingBuffer(numBuckets)
+        self.__samplesPerBucket = samplesPerBucket
+        self.__startBucket()
+
+    def __len__(self):
+        if self.__count > 0:
+            return len(self.__averages) + 1
+        else:
+            return len(self.__averages)
+
+    def append(self, value):
+        if self.__count == 0:
+            self.__min = value
+            self.__max = value
+        elif value < self.__min:
+            self.__min = value
+        elif value > self.__max:
+            self.__max = value
+        self.__sum += value
+        self.__count += 1
+        if self.__count == self.__samplesPerBucket:
+            self.__minima.append(self.__min)
+            self.__maxima.append(self.__max)
+            self.__averages.append(self.__sum / self.__count)
+            self.__startBucket()
+
+    def getMinima(self):
+        return self.__getValues(self.__minima, self.__min)
+
+    def getMaxima(self):
+        return self.__getValues(self.__maxima, self.__max)
+
+    def getAverages(self):
+        if self.__count > 0:
+            return self.__getValues(self.__averages, self.__sum / self.__count)
+        else:
+            return self.__averages.getValues()
+
+    def __getValues(self, buckets, curValue):
+        values = buckets.getValues()
+        if self.__count > 0:
+            values.append(curValue)
+        return values
+
+    def __startBucket(self):
+        self.__count = 0
+        self.__sum = 0.0
+        self.__min = 0.0
+        self.__max = 0.0
+
+
 class Graph(avg.DivNode):
     def __init__(self, title='', getValue=None, parent=None, **kwargs):
         super(Graph, self).__init__(**kwargs)
@@ -63,16 +164,23 @@ class AveragingGraph(Graph):
     def _setup(self):
         self.__interval = player.setInterval(1000, self._nextMemSample)
         self.__numSamples = 0
-        self._usage = [0]
-        self._maxUsage = [0]
-        self._minutesUsage = [0]
-        self._minutesMaxUsage = [0]
+        self.__minuteSum = 0.0
+        self.__maxUsage = 0
+        # One hour of samples, then one week of per-minute averages. Both are
+        # downsampled to about one point per pixel column.
+        numBuckets = max(1, int((self.size.x - 10) / self._xSkip))
+        hourBucketSize = int(math.ceil(60.0 * 60 / numBuckets))
+        weekBucketSize = int(math.ceil(60.0 * 24 * 7 / numBuckets))
+        self._usage = DownsampledSeries(numBuckets, hourBucketSize)
+        self._maxUsage = DownsampledSeries(numBuckets, hourBucketSize)
+        self._minutesUsage = DownsampledSeries(numBuckets, weekBucketSize)
+        self._minutesMaxUsage = DownsampledSeries(numBuckets, weekBucketSize)
         self._nextMemSample()
 
     def _nextMemSample(self):
         curUsage = self._getValue()
         self._usage.append(curUsage)
-        maxUsage = self._maxUsage[-1]
+        maxUsage = self.__maxUsage
 
         if curUsage > maxUsage:
             maxUsage = curUsage
@@ -80,35 +188,34 @@ class AveragingGraph(Graph):
             self._textNode1.text = ("Last increase in maximum: "
                     + time.strftime("%d.%m.%Y %H:%M:%S",
                     time.localtime(lastMaxChangeTime)))
+        self.__maxUsage = maxUsage
         self._maxUsage.append(maxUsage)
         self.__numSamples += 1
 
+        self.__minuteSum += curUsage
         if self.__numSamples % 60 == 0:
-            lastMinuteAverage = sum(self._usage[-60:]) / 60
-            self._minutesUsage.append(lastMinuteAverage)
+            self._minutesUsage.append(self.__minuteSum / 60)
             self._minutesMaxUsage.append(maxUsage)
+            self.__minuteSum = 0.0
 
         if self.__numSamples < 60 * 60:
-            self._plotLine(self._usage, self._lineNode, maxUsage)
-            self._plotLine(self._maxUsage, self._maxLineNode, maxUsage)
+            self._plotLine(self._usage.getAverages(), self._lineNode, maxUsage)
+            self._plotLine(self._maxUsage.getMaxima(), self._maxLineNode, maxUsage)
         else:
-            self._plotLine(self._minutesUsage, self._lineNode, maxUsage)
-            self._plotLine(self._minutesMaxUsage, self._maxLineNode, maxUsage)
+            self._plotLine(self._minutesUsage.getAverages(), self._lineNode, maxUsage)
+            self._plotLine(self._minutesMaxUsage.getMaxima(), self._maxLineNode,
+                    maxUsage)
 
         self._textNode0.text = ("Max. memory usage: %(size).2f MB" %
                 {"size": maxUsage / (1024 * 1024.0)})
 
-        if self.__numSamples % 3600 == 0:
-            del self._usage[0:3600]
-            del self._maxUsage[0:3599]
-            if self.__numSamples == 604800:
-                self.__numSamples = 0
-
-    def _plotLine(self, data, node, maxy):
+    def _plotLine(self, values, node, maxy):
+        if maxy == 0:
+            return
         yfactor = (self.size.y - 10.0) / float(maxy)
-        xfactor = (self.size.x - 10.0) / float(len(data) - 1)
-        node.pos = [(pos[0] * xfactor + 10, (maxy - pos[1]) * yfactor + 10.0)
-                    for pos in enumerate(data)]
+        xfactor = (self.size.x - 10.0) / float(max(1, len(values) - 1))
+        node.pos = [(i * xfactor + 10, (maxy - y) * yfactor + 10.0)
+                    for i, y in enumerate(values)]
 
 
 class SlidingGraph(Graph):
@@ -123,7 +230,7 @@ class SlidingGraph(Graph):
         self._numSamples = 0
         self._lastCurUsage = 0
         self._maxFrameTime = 0
-        self._values = []
+        self._values = None
 
     def _nextFrameTimeSample(self):
         val = self._frameTimeSample()
@@ -134,10 +241,20 @@ class SlidingGraph(Graph):
         maxValue = min(self._limitValue, value)
         y = self.height - (self.height * (maxValue / self._limitValue))
         y = max(0, y)
-        numValues = int(self.width / self._xSkip)
-        self._values = (self._values + [y])[-numValues:]
+        numValues = max(1, int(self.width / self._xSkip))
+        if self._values is None or self._values.getCapacity() != numValues:
+            self.__resizeValues(numValues)
+        self._values.append(y)
         self._plotGraph()
 
+    def __resizeValues(self, numValues):
+        values = RingBuffer(numValues)
+        if self._values is not None:
+            for y in self._values.getValues()[-numValues:]:
+                values.append(y)
+        self._values = values
+        self._xCoords = range(0, numValues * self._xSkip, self._xSkip)
+
     def _frameTimeSample(self):
         frameTime = self._getValue()
         diff = frameTime - self._lastCurUsage
@@ -158,7 +275,9 @@ class SlidingGraph(Graph):
         self._lineNode.pos = self._getCoords()
 
     def _getCoords(self):
-        return zip(xrange(0, len(self._values) * self._xSkip, self._xSkip), self._values)
+        # zip() stops at the shorter sequence, so this works for a partially filled
+        # buffer as well.
+        return zip(self._xCoords, self._values.getValues())
 
 
 class BinBar(avg.DivNode):
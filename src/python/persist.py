@@ -25,6 +25,9 @@
 
 import os
 import time
+import functools
+import threading
+import Queue
 import cPickle as pickle
 
 import libavg
@@ -111,6 +114,259 @@ class Persist(object):
                 return True
 
 
+class JournaledPersist(object):
+    """
+    A key-value store that doesn't block the main thread when committing.
+
+    Values are pickled individually. commit() only serializes the values that have
+    changed since the last commit and hands them to a worker thread, which appends
+    them to a journal file. When the journal grows larger than the store file, the
+    worker thread compacts both into a new store file (written to a temporary file
+    and renamed). Values are unpickled on first access.
+    """
+    _MIN_COMPACT_SIZE = 64 * 1024
+
+    def __init__(self, storeFile, initialData=None, autoCommit=False,
+            minCompactSize=_MIN_COMPACT_SIZE):
+        self.__storeFile = storeFile
+        self.__journalFile = storeFile + '.journal'
+        self.__minCompactSize = minCompactSize
+
+        if hasattr(initialData, '__call__'):
+            initialData = initialData()
+        elif initialData is None:
+            initialData = dict()
+
+        self.__values = {}
+        self.__pickledValues = None
+        self.__changedKeys = set()
+        self.__queue = Queue.Queue()
+        self.__thread = None
+
+        storeCorrupted = self.__loadStore(initialData)
+        if self.__pickledValues is None:
+            self.__pickledValues = {}
+            for key, value in initialData.iteritems():
+                self[key] = value
+            self.commit()
+        else:
+            self.__replayJournal()
+            if storeCorrupted:
+                # Replace the corrupted store so the next start doesn't hit it again.
+                self.__compact(dict((key, value) for key, value in
+                        self.__pickledValues.iteritems() if value is not None))
+            else:
+                libavg.logger.debug('%s successfully loaded' % self)
+
+        if autoCommit:
+            import atexit
+            atexit.register(self.__commitAndWait)
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.__storeFile)
+
+    @property
+    def storeFile(self):
+        return self.__storeFile
+
+    def __getitem__(self, key):
+        try:
+            return self.__values[key]
+        except KeyError:
+            value = pickle.loads(self.__pickledValues[key])
+            self.__values[key] = value
+            return value
+
+    def __setitem__(self, key, value):
+        self.__values[key] = value
+        self.__pickledValues[key] = None
+        self.__changedKeys.add(key)
+
+    def __delitem__(self, key):
+        del self.__pickledValues[key]
+        self.__values.pop(key, None)
+        self.__changedKeys.add(key)
+
+    def __contains__(self, key):
+        return key in self.__pickledValues
+
+    def __iter__(self):
+        return iter(self.__pickledValues)
+
+    def __len__(self):
+        return len(self.__pickledValues)
+
+    def keys(self):
+        return self.__pickledValues.keys()
+
+    def get(self, key, default=None):
+        if key in self.__pickledValues:
+            return self[key]
+        else:
+            return default
+
+    def markChanged(self, key):
+        if key not in self.__pickledValues:
+            raise KeyError(key)
+        self.__changedKeys.add(key)
+
+    def commit(self, onCommitted=None):
+        records = []
+        for key in self.__changedKeys:
+            if key in self.__pickledValues:
+                pickledValue = pickle.dumps(self.__values[key], pickle.HIGHEST_PROTOCOL)
+            else:
+                pickledValue = None
+            records.append((key, pickledValue))
+        self.__changedKeys = set()
+
+        if self.__thread is None:
+            self.__startThread()
+        self.__queue.put((records, onCommitted))
+
+    def wait(self):
+        self.__queue.join()
+
+    def __commitAndWait(self):
+        self.commit()
+        self.wait()
+
+    def __loadStore(self, initialData):
+        try:
+            f = open(self.__storeFile, 'rb')
+        except IOError:
+            if os.path.exists(self.__journalFile):
+                # Nothing has been compacted yet.
+                self.__pickledValues = {}
+            else:
+                libavg.logger.debug('Initializing %s' % self)
+            return False
+        try:
+            self.__pickledValues = pickle.load(f)
+            return False
+        except:
+            # Start over from initialData. The journal is kept, so changes committed
+            # since the last compaction are replayed on top.
+            libavg.logger.warning('Persist %s is corrupted or unreadable, '
+                    'reinitializing' % self)
+            self.__pickledValues = dict((key,
+                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+                    for key, value in initialData.iteritems())
+            return True
+        finally:
+            f.close()
+
+    def __replayJournal(self):
+        try:
+            f = open(self.__journalFile, 'rb')
+        except IOError:
+            return
+        tornRecordPos = None
+        try:
+            journalSize = os.fstat(f.fileno()).st_size
+            while True:
+                recordPos = f.tell()
+                try:
+                    key, pickledValue = pickle.load(f)
+                except:
+                    if recordPos < journalSize:
+                        # A record that was only partially written when the process
+                        # died.
+                        libavg.logger.warning('Ignoring incomplete journal record in %s'
+                                % self)
+                        tornRecordPos = recordPos
+                    break
+                if pickledValue is None:
+                    self.__pickledValues.pop(key, None)
+                else:
+                    self.__pickledValues[key] = pickledValue
+        finally:
+            f.close()
+        if tornRecordPos is not None:
+            # Records are appended to the journal, so they would end up behind the
+            # incomplete record and be lost on the next load.
+            try:
+                with open(self.__journalFile, 'r+b') as f:
+                    f.truncate(tornRecordPos)
+            except Exception, e:
+                libavg.logger.warning('Cannot truncate journal of %s (%s)'
+                        % (self, str(e)))
+
+    def __startThread(self):
+        # The worker thread keeps its own copy of the store contents, so it never
+        # touches state owned by the main thread.
+        workerValues = dict((key, value) for key, value in
+                self.__pickledValues.iteritems() if value is not None)
+        self.__thread = threading.Thread(target=self.__writeLoop, args=(workerValues,))
+        self.__thread.daemon = True
+        self.__thread.start()
+        import atexit
+        atexit.register(self.wait)
+
+    def __writeLoop(self, workerValues):
+        while True:
+            records, onCommitted = self.__queue.get()
+            try:
+                success = self.__writeRecords(records, workerValues)
+            except Exception, e:
+                # Keep the thread alive, otherwise later commits are never processed.
+                libavg.logger.warning('Cannot save %s (%s)' % (self, str(e)))
+                success = False
+            finally:
+                self.__queue.task_done()
+            if onCommitted is not None:
+                libavg.player.callFromThread(functools.partial(onCommitted, success))
+
+    def __writeRecords(self, records, workerValues):
+        try:
+            with open(self.__journalFile, 'ab') as f:
+                for record in records:
+                    pickle.dump(record, f, pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception, e:
+            libavg.logger.warning('Cannot save %s (%s)' % (self, str(e)))
+            return False
+
+        for key, pickledValue in records:
+            if pickledValue is None:
+                workerValues.pop(key, None)
+            else:
+                workerValues[key] = pickledValue
+
+        if os.path.exists(self.__storeFile):
+            storeSize = os.path.getsize(self.__storeFile)
+        else:
+            storeSize = 0
+        if os.path.getsize(self.__journalFile) > max(storeSize, self.__minCompactSize):
+            return self.__compact(workerValues)
+        else:
+            libavg.logger.debug('%s saved' % self)
+            return True
+
+    def __compact(self, workerValues):
+        tempFile = self.__storeFile + '.tmp.' + str(int(time.time() * 1000))
+        try:
+            with open(tempFile, 'wb') as f:
+                pickle.dump(workerValues, f, pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.name == 'nt' and os.path.exists(self.__storeFile):
+                os.remove(self.__storeFile)
+            os.rename(tempFile, self.__storeFile)
+        except Exception, e:
+            libavg.logger.warning('Cannot compact %s (%s)' % (self, str(e)))
+            if os.path.exists(tempFile):
+                os.remove(tempFile)
+            # The journal is still intact, so nothing is lost.
+            return True
+        # If the process dies before the journal is truncated, replaying the journal
+        # on top of the new store file yields the same data.
+        open(self.__journalFile, 'wb').close()
+        libavg.logger.debug('%s compacted' % self)
+        return True
+
+
 class UserPersistentData(Persist):
     def __init__(self, appName, fileName, *args, **kargs):
         basePath = os.path.join(self._getUserDataPath(), appName)
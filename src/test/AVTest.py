@@ -23,6 +23,11 @@
 from libavg import avg, player
 from testcase import *
 
+import os
+import shutil
+import wave
+import audioop
+
 class AVTestCase(AVGTestCase):
     def __init__(self, testFuncName):
         AVGTestCase.__init__(self, testFuncName)
@@ -306,6 +311,46 @@ class AVTestCase(AVGTestCase):
                      lambda: self.compareImage("testVideoSeek3")
                     ))
 
+    def testVideoFastSeek(self):
+        def seek(frame):
+            videoNode.seekToFrame(frame)
+
+        def checkCurFrame(frame):
+            self.assertEqual(videoNode.getCurFrame(), frame)
+
+        def checkStats():
+            stats = videoNode.getSeekStats()
+            self.assertEqual(stats["cachehits"], 1)
+            self.assert_(stats["numseeks"] >= 2)
+            self.assert_(stats["p50"] <= stats["max"])
+            videoNode.resetSeekStats()
+            self.assertEqual(videoNode.getSeekStats()["numseeks"], 0)
+
+        player.setFakeFPS(25)
+        root = self.loadEmptyScene()
+        videoNode = avg.VideoNode(parent=root, loop=True, size=(96,96), threaded=False,
+                fastseek=True, framecachesize=100, href="mjpeg-48x48.avi")
+        self.assert_(videoNode.fastseek)
+        self.assertEqual(videoNode.framecachesize, 100)
+        self.assertRaises(RuntimeError, lambda: setattr(videoNode, "framecachesize", -1))
+        videoNode.play()
+        seek(26)
+        self.start(False,
+                (lambda: checkCurFrame(26),
+                 lambda: self.compareImage("testVideoSeek0"),
+                 lambda: seek(100),
+                 lambda: self.compareImage("testVideoSeek1"),
+                 lambda: videoNode.pause(),
+                 # Frame 26 is served from the frame cache.
+                 lambda: seek(26),
+                 lambda: checkCurFrame(26),
+                 lambda: self.compareImage("testVideoSeek2"),
+                 checkStats,
+                ))
+        indexFilename = "media/mjpeg-48x48.avi.avgkfi"
+        if os.path.exists(indexFilename):
+            os.remove(indexFilename)
+
     def testVideoFPS(self):
         player.setFakeFPS(25)
         root = self.loadEmptyScene()
@@ -539,6 +584,110 @@ class AVTestCase(AVGTestCase):
         node = avg.SoundNode(href="44.1kHz_16bit_mono.wav")
         self.testEOF(node)
 
+    def testSampleCache(self):
+        def playSounds():
+            for node in nodes:
+                node.play()
+
+        def checkCache():
+            self.assertEqual(cache.getNumSamples(), 1)
+            self.assert_(cache.getMemUsed() > 0)
+            self.assertEqual(cache.getStats(), {"hits":2, "misses":1, "evictions":0})
+            for node in nodes:
+                self.assertEqual(node.duration, 2000)
+                self.assertEqual(node.getAudioSampleRate(), 44100)
+                self.assertEqual(node.getNumAudioChannels(), 2)
+
+        def checkEviction():
+            cache.capacity = 1
+            self.assertEqual(cache.getNumSamples(), 0)
+            self.assertEqual(cache.getMemUsed(), 0)
+            self.assertEqual(cache.getStats()["evictions"], 1)
+            # Sounds that are already playing aren't affected.
+            nodes[1].seekToTime(1500)
+            # The file doesn't fit into the cache anymore.
+            nodes[0].stop()
+            nodes[0].play()
+            self.assertEqual(cache.getNumSamples(), 0)
+
+        def checkMaxDuration():
+            cache.capacity = 16*1024*1024
+            cache.maxDuration = 1000
+            nodes[0].stop()
+            nodes[0].play()
+            self.assertEqual(cache.getNumSamples(), 0)
+            cache.maxDuration = 5000
+
+        def checkFileChange():
+            shutil.copyfile("media/44.1kHz_16bit_stereo.wav", "media/samplecache.wav")
+            node = avg.SoundNode(href="samplecache.wav", parent=root)
+            cache.resetStats()
+            node.play()
+            node.stop()
+            node.play()
+            self.assertEqual(cache.getStats()["misses"], 1)
+            # A file that changed on disk is decoded again.
+            mtime = os.stat("media/samplecache.wav").st_mtime
+            os.utime("media/samplecache.wav", (mtime+10, mtime+10))
+            node.stop()
+            node.play()
+            self.assertEqual(cache.getStats()["misses"], 2)
+            node.unlink(True)
+            os.remove("media/samplecache.wav")
+
+        player.setFakeFPS(-1)
+        player.volume = 0
+        cache = player.sampleCache
+        cache.clear()
+        cache.resetStats()
+        root = self.loadEmptyScene()
+        nodes = [avg.SoundNode(href="44.1kHz_16bit_stereo.wav", parent=root)
+                for i in range(3)]
+        self.start(False,
+                (playSounds,
+                 checkCache,
+                 checkEviction,
+                 None,
+                 checkMaxDuration,
+                 None,
+                 checkFileChange
+                ))
+        cache.clear()
+
+    def testOfflineAudio(self):
+        def checkSync():
+            # The audio clock follows the frame time.
+            self.assert_(abs(videoNode.getCurTime()-player.getFrameTime()) < 100)
+
+        def checkWAV():
+            wavFile = wave.open("offline.wav", "rb")
+            self.assertEqual(wavFile.getsampwidth(), 2)
+            numFrames = wavFile.getnframes()
+            # Audio is mixed in whole buffers up to the last frame time.
+            self.assert_(numFrames >= wavFile.getframerate()*(NUM_FRAMES-2)/25)
+            self.assert_(numFrames < wavFile.getframerate()*(NUM_FRAMES+5)/25)
+            data = wavFile.readframes(numFrames)
+            self.assert_(audioop.max(data, 2) > 1000)
+            wavFile.close()
+            os.remove("offline.wav")
+
+        if not(self._isCurrentDirWriteable()):
+            self.skip("Current dir not writeable.")
+            return
+        NUM_FRAMES = 20
+        player.setFakeFPS(25)
+        player.setOfflineAudio(True, "offline.wav")
+        root = self.loadEmptyScene()
+        soundNode = avg.SoundNode(href="44.1kHz_16bit_stereo.wav", parent=root)
+        videoNode = avg.VideoNode(href="mpeg1-48x48-sound.avi", parent=root)
+        soundNode.play()
+        videoNode.play()
+        actions = [None]*(NUM_FRAMES-2)
+        actions.append(checkSync)
+        self.start(False, actions)
+        player.setOfflineAudio(False)
+        checkWAV()
+
     def testVideoWriter(self):
         
         def startWriter(fps, syncToPlayback):
@@ -642,6 +791,28 @@ class AVTestCase(AVGTestCase):
         self.start(False,
                 [lambda: self.compareImage("test2VideosAtOnce1"),])
 
+    def testBitmapPool(self):
+        def checkStats():
+            stats = pool.getStats()
+            self.assert_(stats["hits"] > 0)
+            self.assert_(pool.getMemUsed() <= pool.maxmem)
+
+        pool = avg.BitmapPool.get()
+        pool.resetStats()
+        player.setFakeFPS(25)
+        root = self.loadEmptyScene()
+        for threaded in (False, True):
+            video = avg.VideoNode(threaded=threaded, accelerated=False,
+                    href="mpeg1-48x48.mov", parent=root)
+            video.play()
+        self.start(False,
+                (None,
+                 None,
+                 None,
+                 None,
+                 checkStats,
+                ))
+
     # noinspection PyArgumentList
     def testVideoAccel(self):
         accelConfig = avg.VideoNode.getVideoAccelConfig()
@@ -660,6 +831,8 @@ def AVTestSuite(tests):
             "testSoundSeek",
             "testBrokenSound",
             "testSoundEOF",
+            "testOfflineAudio",
+            "testSampleCache",
             "testVideoInfo",
             "testVideoFiles",
             "testPlayBeforeConnect",
@@ -668,6 +841,7 @@ def AVTestSuite(tests):
             "testVideoHRef",
             "testVideoOpacity",
             "testVideoSeek",
+            "testVideoFastSeek",
             "testVideoFPS",
             "testLoop",
             "testVideoMask",
@@ -676,6 +850,7 @@ def AVTestSuite(tests):
             "testException",
             "testVideoWriter",
             "test2VideosAtOnce",
+            "testBitmapPool",
             "testVideoAccel",
             ]
     return createAVGTestSuite(availableTests, AVTestCase, tests)
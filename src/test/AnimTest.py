@@ -495,6 +495,69 @@ class AnimTestCase(AVGTestCase):
         genericObject3 = None
 
 
+    def testSchedulerStats(self):
+        class TrackingNode(avg.DivNode):
+            def __init__(self, parent=None, **kwargs):
+                avg.DivNode.__init__(self, **kwargs)
+                self.registerInstance(self, parent)
+                self.numXChanges = 0
+
+            def getX(self):
+                return avg.DivNode.x.fget(self)
+
+            def setX(self, x):
+                self.numXChanges += 1
+                avg.DivNode.x.fset(self, x)
+
+            x = property(getX, setX)
+
+        def startAnims():
+            for anim in anims:
+                anim.start()
+
+        def checkRunning():
+            stats = avg.Anim.getSchedulerStats()
+            self.assertEqual(stats["numanims"], 4)
+            # The python attribute and the redefined x are set through python.
+            self.assertEqual(stats["numnativeanims"], 2)
+            self.assert_(stats["steptime"] >= 0)
+            self.assert_(0 < self.__node.x < 100)
+            self.assert_(0 < rectNode.pos.x < 100)
+            self.assert_(trackingNode.numXChanges > 0)
+
+        def checkStopped():
+            stats = avg.Anim.getSchedulerStats()
+            self.assertEqual(stats["numanims"], 0)
+            self.assertEqual(stats["numnativeanims"], 0)
+            self.assertEqual(stats["steptime"], 0)
+            self.assertEqual(self.__node.x, 100)
+            self.assertEqual(rectNode.pos, (100, 50))
+            self.assertEqual(trackingNode.x, 100)
+            self.assertEqual(genericObject.value, 100)
+
+        class GenericClass(object):
+            def __init__(self):
+                self.value = 0
+
+        self.initScene()
+        root = player.getRootNode()
+        rectNode = avg.RectNode(size=(10,10), parent=root)
+        trackingNode = TrackingNode(parent=root)
+        genericObject = GenericClass()
+        anims = [avg.LinearAnim(self.__node, "x", 300, 0, 100),
+                avg.LinearAnim(rectNode, "pos", 300, (0,50), (100,50)),
+                avg.LinearAnim(trackingNode, "x", 300, 0, 100),
+                avg.LinearAnim(genericObject, "value", 300, 0, 100)]
+        self.start(False,
+                (startAnims,
+                 None,
+                 checkRunning,
+                 None,
+                 None,
+                 checkStopped
+                ))
+        anims = None
+
     def _testPointAnim(self, startPos, endPos, keepAttrPos, startPosImgSrc, endPosImgSrc,
             keepAttrPosImgSrc):
         def startAnim():
@@ -538,7 +601,8 @@ def animTestSuite(tests):
         "testParallelAnimRegistry",
         "testStateAnim",
         "testStateAnimRegistry",
-        "testNonNodeAttrAnim"
+        "testNonNodeAttrAnim",
+        "testSchedulerStats"
         )
     return createAVGTestSuite(availableTests, AnimTestCase, tests)
 
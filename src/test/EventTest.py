@@ -479,6 +479,39 @@ class EventTestCase(AVGTestCase):
                 ))
         self.assert_(not(self.event2Called))
 
+    def testPublisherArgs(self):
+
+        class TestPublisher(avg.Publisher):
+
+            EVENT = avg.Publisher.genMessageID()
+
+            def __init__(self):
+                super(TestPublisher, self).__init__()
+                self.publish(TestPublisher.EVENT)
+
+        def onEvent(*args):
+            self.receivedArgs.append(args)
+
+        def onEventUnsubscribe(*args):
+            self.receivedArgs.append(args)
+            publisher.unsubscribe(TestPublisher.EVENT, onEventUnsubscribe)
+
+        publisher = TestPublisher()
+        self.receivedArgs = []
+        publisher.subscribe(TestPublisher.EVENT, onEvent)
+        publisher.notifySubscribers(TestPublisher.EVENT, [])
+        publisher.notifySubscribers(TestPublisher.EVENT, [1, "a"])
+        self.assertEqual(self.receivedArgs, [(), (1, "a")])
+
+        # Single subscriber that unsubscribes itself during the call.
+        publisher.unsubscribe(TestPublisher.EVENT, onEvent)
+        publisher.subscribe(TestPublisher.EVENT, onEventUnsubscribe)
+        self.receivedArgs = []
+        publisher.notifySubscribers(TestPublisher.EVENT, [2])
+        publisher.notifySubscribers(TestPublisher.EVENT, [3])
+        self.assertEqual(self.receivedArgs, [(2,)])
+        self.assertEqual(publisher.getNumSubscribers(TestPublisher.EVENT), 0)
+
 
     def testObscuringEvents(self):
         root = self.loadEmptyScene()
@@ -1107,6 +1140,7 @@ def eventTestSuite(tests):
             "testComplexPublisher",
             "testPublisherAutoDelete",
             "testPublisherNestedUnsubscribe",
+            "testPublisherArgs",
             "testObscuringEvents",
             "testSensitive",
             "testChangingHandlers",
@@ -1049,6 +1049,28 @@ class GestureTestCase(AVGTestCase):
                 ))
         player.setFakeFPS(-1)
 
+    def testFrameDispatcher(self):
+
+        def checkActive():
+            dispatcher = gesture.frameDispatcher
+            self.assertEqual(dispatcher.getNumHandlers(), 3)
+            tickedRecognizers = [owner for owner, time in dispatcher.getTickTimes()]
+            self.assertEqual(tickedRecognizers, self.__recognizers)
+
+        self.__initImageScene()
+        self.__recognizers = [gesture.HoldRecognizer(self.image, delay=1000)
+                for i in xrange(3)]
+        gesture.frameDispatcher.enableProfiling(True)
+        self.start(False,
+                (lambda: self._sendTouchEvent(1, avg.Event.CURSOR_DOWN, 30, 30),
+                 None,
+                 checkActive,
+                 lambda: self._sendTouchEvent(1, avg.Event.CURSOR_UP, 30, 30),
+                 lambda: self.assertEqual(gesture.frameDispatcher.getNumHandlers(), 0),
+                ))
+        gesture.frameDispatcher.enableProfiling(False)
+        self.__recognizers = None
+
     def testKMeans(self):
         pts = [avg.Point2D(0,0), avg.Point2D(0,1)]
         means = gesture.calcKMeans(pts)
@@ -1132,6 +1154,7 @@ def gestureTestSuite(tests):
         "testDragRecognizerMinDist",
         "testTransformRecognizer",
         "testTwoRecognizers",
+        "testFrameDispatcher",
         "testKMeans",
         "testMat3x3",
         )
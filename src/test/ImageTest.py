@@ -202,6 +202,49 @@ class ImageTestCase(AVGTestCase):
         self.assert_(cache.getMemUsed() == (0,0))
         cache.capacity = oldCapacity
 
+    def testImageCacheStats(self):
+        WAIT_TIMEOUT = 5000
+        def prefetch():
+            cache.prefetch(["rgb24-32x32.png", "rgb24alpha-32x32.png"], gpu=True)
+            cache.prefetch(["rgb24-32x32.png"])
+            self.assertEqual(cache.getNumPendingPrefetches(), 2)
+            player.subscribe(player.ON_FRAME, checkPrefetchDone)
+
+        def checkPrefetchDone():
+            if cache.getNumPendingPrefetches() == 0:
+                player.unsubscribe(player.ON_FRAME, checkPrefetchDone)
+                self.assertEqual(cache.getNumImages()[0], 2)
+                avg.ImageNode(href="rgb24-32x32.png", parent=root)
+                avg.ImageNode(href="rgb24-65x65.png", parent=root)
+                player.setTimeout(0, checkStats)
+
+        def checkStats():
+            cpuStats, gpuStats = cache.getStats()
+            self.assertEqual(cpuStats["hits"], 1)
+            self.assertEqual(cpuStats["misses"], 1)
+            self.assertEqual(cpuStats["evictions"], 0)
+            self.assertEqual(gpuStats["hits"], 1)
+            self.assertEqual(gpuStats["misses"], 1)
+            cache.resetStats()
+            self.assertEqual(cache.getStats()[0]["hits"], 0)
+            player.stop()
+
+        def reportStuck():
+            raise RuntimeError("Prefetch didn't finish within %dms timeout" 
+                    % WAIT_TIMEOUT)
+
+        cache = player.imageCache
+        oldCapacity = cache.capacity
+        cache.capacity = (0, 0)
+        cache.capacity = (10000000, 10000000)
+        cache.resetStats()
+        player.setFakeFPS(-1)
+        root = self.loadEmptyScene()
+        player.setTimeout(0, prefetch)
+        player.setTimeout(WAIT_TIMEOUT, reportStuck)
+        player.play()
+        cache.capacity = oldCapacity
+
     def testBitmap(self):
         def getBitmap(node):
             bmp = node.getBitmap()
@@ -325,6 +368,71 @@ class ImageTestCase(AVGTestCase):
                  testSubBitmap,
                 ))
 
+    def testBitmapBuffer(self):
+        import mmap
+        buf = bytearray(8*4*4)
+        bmp = avg.Bitmap(buf, (8,4), avg.R8G8B8A8)
+        self.assertEqual(bmp.getSize(), (8,4))
+        buf[(2*8+1)*4:(2*8+2)*4] = "\xff\x80\x40\xff"
+        self.assertEqual(bmp.getPixel((1,2)), (255,128,64,255))
+        self.assertEqual(str(bmp.getPixels()), str(buf))
+
+        bmp = avg.Bitmap(buf, (4,4), avg.R8G8B8A8, 32)
+        self.assertEqual(bmp.getPixel((1,2)), (255,128,64,255))
+        self.assertRaises(avg.Exception, lambda: avg.Bitmap(buf, (8,5), avg.R8G8B8A8))
+        self.assertRaises(avg.Exception, lambda: avg.Bitmap(buf, (8,4), avg.R8G8B8A8, 16))
+        self.assertRaises(avg.Exception, lambda: avg.Bitmap(13, (8,4), avg.I8))
+        
+        # Old-style buffers are copied, since their memory isn't pinned.
+        region = mmap.mmap(-1, 64*64)
+        region[64*3+5] = "\x7f"
+        bmp = avg.Bitmap(region, (64,64), avg.I8)
+        region[64*3+5] = "\x10"
+        region.close()
+        self.assertEqual(bmp.getPixel((5,3)), (127,127,127,255))
+
+        bmp = avg.Bitmap('media/rgb24-65x65.png')
+        interface = bmp.__array_interface__
+        self.assertEqual(interface["shape"], (65,65,4))
+        self.assertEqual(interface["strides"][1:], (4,1))
+        self.assertEqual(interface["typestr"], "|u1")
+        try:
+            import numpy
+        except ImportError:
+            return
+        pixels = numpy.asarray(bmp)
+        self.assertEqual(pixels.shape, (65,65,4))
+        pixels[0,0] = (1,2,3,255)
+        self.assertEqual(bmp.getPixel((0,0))[3], 255)
+        self.assertEqual(sorted(bmp.getPixel((0,0))[:3]), [1,2,3])
+        del bmp
+        self.assertEqual(pixels[0,0,3], 255)
+
+    def testBitmapDiskCache(self):
+        import shutil
+        import tempfile
+        cacheDir = tempfile.mkdtemp()
+        cache = avg.BitmapDiskCache(cacheDir, 10000000)
+        self.assertEqual(cache.dir, cacheDir)
+        avg.BitmapDiskCache.set(cache)
+        try:
+            bmp = avg.Bitmap("media/rgb24-65x65.png")
+            self.assertEqual(cache.getNumFiles(), 1)
+            cachedBmp = avg.Bitmap("media/rgb24-65x65.png")
+            self.assertEqual(cache.getNumFiles(), 1)
+            self.assertEqual(cachedBmp.getSize(), (65,65))
+            self.assertEqual(bmp.getPixels(), cachedBmp.getPixels())
+            self.assert_(not cache.prewarm("media/rgb24-65x65.png"))
+            self.assert_(cache.prewarm("media/rgb24-65x65.png", avg.R8G8B8))
+            self.assertEqual(cache.getNumFiles(), 2)
+            cache.maxsize = 0
+            self.assertEqual(cache.getNumFiles(), 0)
+            self.assertEqual(cache.getSize(), 0)
+        finally:
+            avg.BitmapDiskCache.set(None)
+            shutil.rmtree(cacheDir)
+        self.assertEqual(avg.BitmapDiskCache.get(), None)
+
     def testBitmapManager(self):
         WAIT_TIMEOUT = 5000
         def expectException(returnValue, nextAction):
@@ -385,6 +493,56 @@ class ImageTestCase(AVGTestCase):
             player.play()
         avg.BitmapManager.get().setNumThreads(1)
         
+    def testBitmapManagerPriority(self):
+        WAIT_TIMEOUT = 5000
+        def loadBitmaps():
+            for i in range(10):
+                bitmapManager.loadBitmap("media/rgb24-65x65.png", 
+                        lambda bmp, i=i: onLoaded(i, bmp))
+            bitmapManager.loadBitmap("media/rgb24-65x65.png", 
+                    lambda bmp: onLoaded("high", bmp), priority=10)
+            cancelledID = bitmapManager.loadBitmap("media/rgb24-65x65.png", 
+                    lambda bmp: onLoaded("cancelled", bmp))
+            self.assert_(bitmapManager.cancelLoad(cancelledID))
+            self.assert_(not bitmapManager.cancelLoad(cancelledID))
+
+        def onLoaded(name, bmp):
+            self.assert_(not isinstance(bmp, Exception))
+            self.assert_(name != "cancelled")
+            loaded.append(name)
+            if len(loaded) == 11:
+                # The first request can be started before the others are queued.
+                self.assert_(loaded.index("high") <= 1)
+                stats = bitmapManager.getStats()
+                self.assertEqual(stats["loaded"], 11)
+                self.assertEqual(stats["cancelled"], 1)
+                self.assertEqual(stats["queued"], 0)
+                self.assert_(stats["maxqueuedepth"] >= 10)
+                self.assert_(stats["avglatency"] >= stats["avgloadtime"])
+                bitmapManager.resetStats()
+                self.assertEqual(bitmapManager.getStats()["loaded"], 0)
+                player.setTimeout(100, player.stop)
+
+        def reportStuck():
+            raise RuntimeError("BitmapManager didn't reply "
+                    "within %dms timeout" % WAIT_TIMEOUT)
+
+        loaded = []
+        bitmapManager = avg.BitmapManager.get()
+        bitmapManager.setNumThreads(1)
+        self.assertEqual(bitmapManager.getNumThreads(), 1)
+        bitmapManager.callbacktimebudget = 0.001
+        bitmapManager.resetStats()
+        player.setFakeFPS(-1)
+        self.loadEmptyScene()
+        player.setTimeout(0, loadBitmaps)
+        player.setTimeout(WAIT_TIMEOUT, reportStuck)
+        player.play()
+        self.assertEqual(len(loaded), 11)
+        bitmapManager.callbacktimebudget = 0
+        bitmapManager.setNumThreads(0)
+        self.assert_(bitmapManager.getNumThreads() >= 1)
+
     def testBitmapManagerException(self):
         def bitmapCb(bitmap):
             raise RuntimeError
@@ -620,8 +778,12 @@ def imageTestSuite(tests):
             "testImageSize",
             "testImageWarp",
             "testImageCache",
+            "testImageCacheStats",
             "testBitmap",
+            "testBitmapBuffer",
+            "testBitmapDiskCache",
             "testBitmapManager",
+            "testBitmapManagerPriority",
             "testBitmapManagerException",
             "testBlendMode",
             "testImageMask",
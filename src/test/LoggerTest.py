@@ -83,6 +83,12 @@ class LoggerTestCase(AVGTestCase):
         logger.info(self.testMsg)
         self._assertMsg()
 
+    def testFlush(self):
+        logger.configureCategory(logger.Category.APP, logger.Severity.INFO)
+        logger.info(self.testMsg)
+        logger.flush()
+        self._assertMsg()
+
     def testUnknownCategoryWarning(self):
         self.assertRaises(RuntimeError, lambda: logger.error("Foo", "Bar"))
 
@@ -94,6 +100,7 @@ def loggerTestSuite(tests):
             "testReconfigureCategory",
             "testOmitCategory",
             "testLogCategory",
+            "testFlush",
             "testUnknownCategoryWarning",
             )
     return createAVGTestSuite(availableTests, LoggerTestCase, tests)
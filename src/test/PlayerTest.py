@@ -20,6 +20,7 @@
 #
 
 import math
+import random
 import threading
 
 from libavg import avg, player
@@ -129,6 +130,32 @@ class PlayerTestCase(AVGTestCase):
                  lambda: player.showCursor(1),
                 ))
 
+    def testCreateNodes(self):
+        root = self.loadEmptyScene()
+        attrList = [{"pos":(i*10,0), "size":(5,5)} for i in xrange(10)]
+        nodes = player.createNodes("rect", attrList, root)
+        self.assertEqual(len(nodes), 10)
+        self.assertEqual(root.getNumChildren(), 10)
+        for i, node in enumerate(nodes):
+            self.assert_(isinstance(node, avg.RectNode))
+            self.assertEqual(node.parent, root)
+            self.assertEqual(root.getChild(i), node)
+            self.assertEqual(node.pos, (i*10,0))
+            self.assertEqual(node.size, (5,5))
+
+        # Setting args must not change the defaults for subsequently created nodes.
+        node = player.createNodes("rect", [{}])[0]
+        self.assertEqual(node.parent, None)
+        self.assertEqual(node.pos, (0,0))
+        self.assertEqual(node.size, (0,0))
+        self.assertEqual(avg.RectNode().pos, (0,0))
+
+        self.assertEqual(player.createNodes("words", []), [])
+        self.assertRaises(avg.Exception, 
+                lambda: player.createNodes("rect", [{"parent":root}]))
+        self.assertRaises(avg.Exception, lambda: player.createNodes("rect", [1]))
+        self.assertRaises(avg.Exception, lambda: player.createNodes("foo", [{}]))
+
     def testSetResolution(self):
         root = self.loadEmptyScene()
         avg.ImageNode(href="rgb24-65x65.png", parent=root)
@@ -189,6 +216,72 @@ class PlayerTestCase(AVGTestCase):
                  lambda: checkSize(23,22),
                 ))
 
+    def testPickGrid(self):
+        def createChildren(parent):
+            nodes = []
+            random.seed(1)
+            for i in xrange(200):
+                pos = (random.uniform(-20, 160), random.uniform(-20, 120))
+                nodeType = i%4
+                if nodeType == 0:
+                    node = avg.RectNode(pos=pos, size=(random.uniform(1, 40), 20),
+                            angle=random.uniform(0, 3), parent=parent)
+                elif nodeType == 1:
+                    node = avg.CircleNode(pos=pos, r=random.uniform(1, 20), 
+                            parent=parent)
+                elif nodeType == 2:
+                    node = avg.ImageNode(pos=pos, href="rgb24-65x65.png", 
+                            angle=random.uniform(0, 3), parent=parent)
+                else:
+                    node = avg.DivNode(pos=pos, parent=parent)
+                    avg.RectNode(pos=(-5, -5), size=(10, 10), parent=node)
+                nodes.append(node)
+            return nodes
+
+        def getPickedIndex(div, nodes, pos):
+            node = div.getElementByPos(pos)
+            while node and node not in nodes:
+                node = node.parent
+            if node:
+                return nodes.index(node)
+            else:
+                return None
+
+        def comparePicking():
+            for y in xrange(-30, 130, 3):
+                for x in xrange(-30, 170, 3):
+                    self.assertEqual(getPickedIndex(linearDiv, linearNodes, (x, y)),
+                            getPickedIndex(gridDiv, gridNodes, (x, y)))
+
+        def changeChildren():
+            for nodes, div in ((linearNodes, linearDiv), (gridNodes, gridDiv)):
+                for i in xrange(0, 200, 7):
+                    nodes[i].pos += (13, -7)
+                for i in xrange(2, 200, 12):
+                    nodes[i].angle += 0.5
+                    nodes[i].size *= 1.5
+                div.reorderChild(0, 150)
+                nodes.insert(150, nodes.pop(0))
+                for i in xrange(5):
+                    div.removeChild(nodes.pop(10))
+
+        root = self.loadEmptyScene()
+        linearDiv = avg.DivNode(parent=root)
+        gridDiv = avg.DivNode(pickgrid=True, parent=root)
+        self.assert_(not(linearDiv.pickgrid))
+        self.assert_(gridDiv.pickgrid)
+        linearNodes = createChildren(linearDiv)
+        gridNodes = createChildren(gridDiv)
+        self.start(False,
+                (comparePicking,
+                 changeChildren,
+                 comparePicking,
+                 lambda: setattr(gridDiv, "pickgrid", False),
+                 comparePicking,
+                 lambda: setattr(gridDiv, "pickgrid", True),
+                 comparePicking,
+                ))
+
     def testRotate(self):
         def onOuterDown(Event):
             self.onOuterDownCalled = True
@@ -413,6 +506,41 @@ class PlayerTestCase(AVGTestCase):
                 ))
 
 
+    def testManyTimeouts(self):
+        def onTimeout(i):
+            self.firedTimeouts.append(i)
+
+        def onInterval():
+            self.numIntervalCalls += 1
+            if self.numIntervalCalls == 2:
+                self.assert_(player.clearInterval(self.intervalID))
+                self.assert_(not(player.clearInterval(self.intervalID)))
+
+        def setupTimeouts():
+            # Register in reverse order so the timeouts need to be sorted.
+            ids = {}
+            for i in reversed(xrange(1000)):
+                ids[i] = player.setTimeout(i%5, lambda i=i: onTimeout(i))
+            for i in xrange(0, 1000, 2):
+                self.assert_(player.clearInterval(ids[i]))
+            self.intervalID = player.setInterval(0, onInterval)
+
+        def checkTimeouts():
+            self.assert_(len(self.firedTimeouts) == 500)
+            self.assert_(all(i%2 == 1 for i in self.firedTimeouts))
+            dueTimes = [i%5 for i in self.firedTimeouts]
+            self.assert_(dueTimes == sorted(dueTimes))
+            self.assert_(self.numIntervalCalls == 2)
+
+        self.initDefaultImageScene()
+        self.firedTimeouts = []
+        self.numIntervalCalls = 0
+        self.start(False,
+                (setupTimeouts,
+                 lambda: self.delay(10),
+                 checkTimeouts,
+                ))
+
     def testCallFromThread(self):
 
         def onAsyncCall():
@@ -479,6 +607,37 @@ class PlayerTestCase(AVGTestCase):
                  checkRelPos
                 ))
 
+    def testVertexUpload(self):
+        def checkNoUpload():
+            self.assertEqual(canvas.getVertexBytesUploaded(), 0)
+
+        def moveNode():
+            nodes[5].x += 1
+
+        def checkPartialUpload():
+            bytesUploaded = canvas.getVertexBytesUploaded()
+            self.assert_(bytesUploaded > 0)
+            self.assert_(bytesUploaded < self.__fullUpload)
+
+        def storeFullUpload():
+            self.__fullUpload = canvas.getVertexBytesUploaded()
+            self.assert_(self.__fullUpload > 0)
+
+        root = self.loadEmptyScene()
+        canvas = player.getMainCanvas()
+        nodes = []
+        for i in range(20):
+            nodes.append(avg.ImageNode(pos=(i*8,i*6), href="rgb24-32x32.png",
+                    parent=root))
+        self.start(False,
+                (storeFullUpload,
+                 checkNoUpload,
+                 checkNoUpload,
+                 moveNode,
+                 checkPartialUpload,
+                 checkNoUpload
+                ))
+
     def testCropImage(self):
         def moveTLCrop():
             node = player.getElementByID("img")
@@ -865,10 +1024,12 @@ def playerTestSuite(tests):
     availableTests = (
             "testPoint",
             "testBasics",
+            "testCreateNodes",
             "testSetResolution",
             "testColorParse",
             "testFakeTime",
             "testDivResize",
+            "testPickGrid",
             "testRotate",
             "testRotate2",
             "testRotatePivot",
@@ -881,10 +1042,12 @@ def playerTestSuite(tests):
             "testInvalidVideoFilename",
             "testTimeouts",
             "testTimeoutOnFrameHandling",
+            "testManyTimeouts",
             "testCallFromThread",
             "testAVGFile",
             "testBroken",
             "testMove",
+            "testVertexUpload",
             "testCropImage",
             "testCropMovie",
             "testWarp",
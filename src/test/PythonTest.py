@@ -22,8 +22,9 @@
 import os
 import time
 import tempfile
+import cPickle
 
-from libavg import geom, statemachine, persist
+from libavg import geom, statemachine, persist, graph
 
 from testcase import *
 
@@ -189,6 +190,36 @@ class PythonTestCase(AVGTestCase):
         except avg.Exception:
             self.skip("graphviz not installed.")
 
+    def testRingBuffer(self):
+        values = graph.RingBuffer(3)
+        self.assertEqual(len(values), 0)
+        values.append(1)
+        values.append(2)
+        self.assertEqual(list(values.getValues()), [1, 2])
+        for i in xrange(3, 7):
+            values.append(i)
+        self.assertEqual(len(values), 3)
+        self.assertEqual(list(values.getValues()), [4, 5, 6])
+        self.assertEqual(values.getLast(), 6)
+
+    def testDownsampledSeries(self):
+        series = graph.DownsampledSeries(2, 3)
+        self.assertEqual(len(series), 0)
+        self.assertEqual(list(series.getAverages()), [])
+        for value in (1, 5, 3, 2):
+            series.append(value)
+        self.assertEqual(len(series), 2)
+        self.assertEqual(list(series.getMinima()), [1, 2])
+        self.assertEqual(list(series.getMaxima()), [5, 2])
+        self.assertEqual(list(series.getAverages()), [3, 2])
+        for value in xrange(6):
+            series.append(value)
+        # The oldest bucket has been dropped.
+        self.assertEqual(len(series), 3)
+        self.assertEqual(list(series.getMinima()), [0, 2, 5])
+        self.assertEqual(list(series.getMaxima()), [2, 4, 5])
+        self.assertEqual(list(series.getAverages()), [1, 3, 5])
+
     def testPersistStore(self):
         testFile = getTempFileName()
         p = persist.Persist(testFile, {})
@@ -222,6 +253,75 @@ class PythonTestCase(AVGTestCase):
         os.unlink(testFile)
         logger.configureCategory("APP", logger.Severity.WARN)
 
+    def testJournaledPersist(self):
+        testFile = getTempFileName()
+        p = persist.JournaledPersist(testFile, {'test': 1}, minCompactSize=256)
+        p['hiscore'] = [3, 2]
+        p.commit()
+        p.wait()
+        p = persist.JournaledPersist(testFile, {}, minCompactSize=256)
+        self.assertEqual(sorted(p.keys()), ['hiscore', 'test'])
+        self.assertEqual(p['test'], 1)
+        p['hiscore'].append(1)
+        p.markChanged('hiscore')
+        del p['test']
+        for i in xrange(50):
+            p['key%d' % i] = i
+        p.commit()
+        p.wait()
+        # The journal has been compacted into the store file.
+        self.assert_(os.path.exists(testFile))
+        self.assertEqual(os.path.getsize(testFile + '.journal'), 0)
+        p = persist.JournaledPersist(testFile, {})
+        self.assertEqual(len(p), 51)
+        self.assertEqual(p['hiscore'], [3, 2, 1])
+        self.assert_('test' not in p)
+        os.unlink(testFile)
+        os.unlink(testFile + '.journal')
+
+    def testJournaledPersistCorrupted(self):
+        logger.configureCategory("APP", logger.Severity.ERR)
+        testFile = getTempFileName()
+        f = open(testFile, 'w')
+        f.write('garbage')
+        f.close()
+        p = persist.JournaledPersist(testFile, {'a': 1})
+        self.assertEqual(p.keys(), ['a'])
+        p['score'] = 42
+        p.commit()
+        p.wait()
+        for i in xrange(2):
+            p = persist.JournaledPersist(testFile, {'a': 1})
+            self.assertEqual(sorted(p.keys()), ['a', 'score'])
+            self.assertEqual(p['score'], 42)
+        os.unlink(testFile)
+        os.unlink(testFile + '.journal')
+        logger.configureCategory("APP", logger.Severity.WARN)
+
+    def testJournaledPersistTornRecord(self):
+        logger.configureCategory("APP", logger.Severity.ERR)
+        testFile = getTempFileName()
+        p = persist.JournaledPersist(testFile, {'a': 1})
+        p['b'] = 2
+        p.commit()
+        p.wait()
+        # Simulate a crash while a record was being written.
+        f = open(testFile + '.journal', 'ab')
+        f.write(cPickle.dumps(('c', 'garbage'), cPickle.HIGHEST_PROTOCOL)[:5])
+        f.close()
+        p = persist.JournaledPersist(testFile, {'a': 1})
+        self.assertEqual(sorted(p.keys()), ['a', 'b'])
+        p['d'] = 4
+        p.commit()
+        p.wait()
+        p = persist.JournaledPersist(testFile, {'a': 1})
+        self.assertEqual(sorted(p.keys()), ['a', 'b', 'd'])
+        self.assertEqual(p['d'], 4)
+        if os.path.exists(testFile):
+            os.unlink(testFile)
+        os.unlink(testFile + '.journal')
+        logger.configureCategory("APP", logger.Severity.WARN)
+
 
 def pythonTestSuite(tests):
     availableTests = (
@@ -230,9 +330,14 @@ def pythonTestSuite(tests):
         "testArc",
         "testStateMachine",
         "testStateMachineDiagram",
+        "testRingBuffer",
+        "testDownsampledSeries",
         "testPersistStore",
         "testPersistCorrupted",
         "testPersistValidation",
+        "testJournaledPersist",
+        "testJournaledPersistCorrupted",
+        "testJournaledPersistTornRecord",
         )
     
     return createAVGTestSuite(availableTests, PythonTestCase, tests)
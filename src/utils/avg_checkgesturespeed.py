@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# libavg - Media Playback Engine.
+# Copyright (C) 2003-2014 Ulrich von Zadow
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Current versions can be found at www.libavg.de
+#
+
+from libavg import *
+
+import math
+import time
+
+
+class SpeedDiv(app.MainDiv):
+    def onArgvParserCreated(self, parser):
+        usage = '%prog [options]\n' \
+                'Checks gesture recognition performance by moving increasing numbers ' \
+                'of contacts\non a set of nodes that have TransformRecognizers.\n' \
+                'Prints the average frame time for each number of contacts.'
+        parser.set_usage(usage)
+
+        parser.add_option('--num-nodes', '-n', dest='numNodes',
+                type='int', default=10,
+                help='number of nodes with recognizers [Default: 10]')
+        parser.add_option('--contacts', '-c', dest='contacts',
+                default='1,2,5,10,20,50',
+                help='comma-separated numbers of contacts per node '
+                     '[Default: 1,2,5,10,20,50]')
+        parser.add_option('--frames', '-f', dest='numFrames',
+                type='int', default=200,
+                help='number of frames to measure per step [Default: 200]')
+
+    def onArgvParsed(self, options, args, parser):
+        self.__optNumNodes = options.numNodes
+        self.__optContacts = [int(num) for num in options.contacts.split(',')]
+        self.__optNumFrames = options.numFrames
+
+    def onInit(self):
+        player.setFramerate(1000)
+        self.__helper = player.getTestHelper()
+        self.__nodes = []
+        self.__recognizers = []
+        nodeWidth = self.width / self.__optNumNodes
+        for i in xrange(self.__optNumNodes):
+            node = avg.RectNode(parent=self, pos=(i*nodeWidth, 0),
+                    size=(nodeWidth, self.height), fillopacity=0.2)
+            recognizer = gesture.TransformRecognizer(node, friction=-1,
+                    moveHandler=lambda transform, node=node: transform.moveNode(node))
+            self.__nodes.append(node)
+            self.__recognizers.append(recognizer)
+        self.__frameNum = None
+        player.setTimeout(0, self.__nextStep)
+
+    def onFrame(self):
+        if self.__frameNum is None:
+            return
+        # Rotate all contacts around the center of their node.
+        angle = self.__frameNum * 0.01
+        for contactID, center, radius, startAngle in self.__contacts:
+            pos = center + avg.Point2D.fromPolar(startAngle+angle, radius)
+            self.__sendTouchEvent(contactID, avg.Event.CURSOR_MOTION, pos)
+
+        now = time.time()
+        if self.__frameNum > 0:
+            self.__frameTimes.append(now - self.__lastFrameStart)
+        self.__lastFrameStart = now
+        self.__frameNum += 1
+        if self.__frameNum > self.__optNumFrames:
+            self.__endStep()
+
+    def __nextStep(self):
+        numContacts = self.__optContacts.pop(0)
+        self.__contacts = []
+        for nodeIndex, node in enumerate(self.__nodes):
+            center = node.pos + node.size/2
+            radius = min(node.size.x, node.size.y) / 3
+            for i in xrange(numContacts):
+                contactID = nodeIndex*1000 + i + 1
+                startAngle = 2*math.pi*i / numContacts
+                self.__contacts.append((contactID, center, radius, startAngle))
+                pos = center + avg.Point2D.fromPolar(startAngle, radius)
+                self.__sendTouchEvent(contactID, avg.Event.CURSOR_DOWN, pos)
+        self.__numContacts = numContacts
+        self.__frameTimes = []
+        self.__frameNum = 0
+
+    def __endStep(self):
+        self.__frameNum = None
+        for contactID, center, radius, startAngle in self.__contacts:
+            self.__sendTouchEvent(contactID, avg.Event.CURSOR_UP, center)
+        avgFrameTime = sum(self.__frameTimes) / len(self.__frameTimes)
+        print '%4i contacts per node: %.3f ms/frame' % (self.__numContacts,
+                avgFrameTime*1000)
+        if self.__optContacts:
+            player.setTimeout(0, self.__nextStep)
+        else:
+            player.stop()
+
+    def __sendTouchEvent(self, contactID, eventType, pos):
+        self.__helper.fakeTouchEvent(contactID, eventType, avg.Event.TOUCH, pos)
+
+
+if __name__ == '__main__':
+    app.App().run(SpeedDiv(), app_resolution='1024x768')
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# libavg - Media Playback Engine.
+# Copyright (C) 2003-2014 Ulrich von Zadow
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Current versions can be found at www.libavg.de
+#
+
+from libavg import *
+
+import time
+
+
+class BenchPublisher(avg.Publisher):
+    MESSAGE = avg.Publisher.genMessageID()
+
+    def __init__(self):
+        super(BenchPublisher, self).__init__()
+        self.publish(BenchPublisher.MESSAGE)
+
+
+class Subscriber(object):
+    def __init__(self):
+        self.numCalls = 0
+
+    def onMessage(self, *args):
+        self.numCalls += 1
+
+
+class SpeedDiv(app.MainDiv):
+    def onArgvParserCreated(self, parser):
+        usage = '%prog [options]\n' \
+                'Checks the speed of publisher notifications by sending a large number ' \
+                'of messages\nto python and C++ publishers. Prints the time per ' \
+                'notification for each case.'
+        parser.set_usage(usage)
+
+        parser.add_option('--num-notifications', '-n', dest='numNotifications',
+                type='int', default=1000000,
+                help='number of notifications per case [Default: 1000000]')
+        parser.add_option('--subscribers', '-s', dest='numSubscribers',
+                type='int', default=5,
+                help='number of subscribers in the multi-subscriber case '
+                     '[Default: 5]')
+
+    def onArgvParsed(self, options, args, parser):
+        self.__optNumNotifications = options.numNotifications
+        self.__optNumSubscribers = options.numSubscribers
+
+    def onInit(self):
+        player.setTimeout(0, self.__runBenchmarks)
+
+    def __runBenchmarks(self):
+        publisher = BenchPublisher()
+        msg = BenchPublisher.MESSAGE
+        subscriber = Subscriber()
+        publisher.subscribe(msg, subscriber.onMessage)
+        self.__measure('Python publisher, no args, 1 subscriber',
+                lambda: publisher.notifySubscribers(msg, []))
+        self.__measure('Python publisher, 1 arg, 1 subscriber',
+                lambda: publisher.notifySubscribers(msg, [1]))
+
+        subscribers = [Subscriber() for i in xrange(self.__optNumSubscribers-1)]
+        for curSubscriber in subscribers:
+            publisher.subscribe(msg, curSubscriber.onMessage)
+        self.__measure('Python publisher, 1 arg, %i subscribers'
+                % self.__optNumSubscribers,
+                lambda: publisher.notifySubscribers(msg, [1]))
+
+        # RectNode.size notifies SIZE_CHANGED from C++.
+        node = avg.RectNode(parent=self, size=(10,10))
+        node.subscribe(avg.Node.SIZE_CHANGED, subscriber.onMessage)
+        sizes = [avg.Point2D(10,10), avg.Point2D(11,11)]
+        def setSize(i):
+            node.size = sizes[i%2]
+        self.__measure('C++ publisher (SIZE_CHANGED), 1 arg, 1 subscriber', setSize,
+                passIndex=True)
+        player.stop()
+
+    def __measure(self, name, func, passIndex=False):
+        numNotifications = self.__optNumNotifications
+        startTime = time.time()
+        if passIndex:
+            for i in xrange(numNotifications):
+                func(i)
+        else:
+            for i in xrange(numNotifications):
+                func()
+        duration = time.time() - startTime
+        print '%s: %.3f s total, %.3f us/notification' % (name, duration,
+                duration*1000000/numNotifications)
+
+
+if __name__ == '__main__':
+    app.App().run(SpeedDiv(), app_resolution='320x240')
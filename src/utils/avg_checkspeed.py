@@ -46,6 +46,12 @@ class SpeedDiv(app.MainDiv):
         parser.add_option('--create-nodes', '-c', dest='create',
                 action='store_true', default=False,
                 help='destroy and recreate all nodes every 400 ms.')
+        parser.add_option('--churn', '-r', dest='churn',
+                type='int', default=0,
+                help='create and destroy this many rect nodes every frame to test node creation speed.')
+        parser.add_option('--bulk', '-k', dest='bulk',
+                action='store_true', default=False,
+                help='use player.createNodes() to create the nodes for --churn.')
         parser.add_option('--move', '-m', dest='move',
                 action='store_true', default=False,
                 help='move nodes every frame.')
@@ -76,6 +82,8 @@ class SpeedDiv(app.MainDiv):
         self.__optVideo = options.video
         self.__optAudio = options.audio
         self.__optCreate = options.create
+        self.__optChurn = options.churn
+        self.__optBulk = options.bulk
         self.__optMove = options.move
         self.__optBlur = options.blur
         self.__optColor = options.color
@@ -101,6 +109,7 @@ class SpeedDiv(app.MainDiv):
         self.mediadir = utils.getMediaDir(None, 'data')
         self.__createTexture()
         self.__createNodes()
+        self.__churnNodes = []
         app.instance.debugPanel.toggleWidget(app.debugpanel.FrametimeGraphWidget)
         if self.__optCreate:
             player.setInterval(400, self.__createNodes)
@@ -111,6 +120,8 @@ class SpeedDiv(app.MainDiv):
     def onFrame(self):
         if self.__optMove:
             self.__moveNodes()
+        if self.__optChurn > 0:
+            self.__churn()
 
     def __createTexture(self):
         if self.__optTexSize != 64:
@@ -159,6 +170,18 @@ class SpeedDiv(app.MainDiv):
             node.unlink(True)
         self.__nodes = []
 
+    def __churn(self):
+        for node in self.__churnNodes:
+            node.unlink(True)
+        attrList = [{"pos":(random.randrange(self.width-8),
+                random.randrange(self.height-8)), "size":(8,8)}
+                for i in xrange(self.__optChurn)]
+        if self.__optBulk:
+            self.__churnNodes = player.createNodes("rect", attrList, self)
+        else:
+            self.__churnNodes = [avg.RectNode(parent=self, **attrs)
+                    for attrs in attrList]
+
     def __moveNodes(self):
         for node in self.__nodes:
             node.pos = (random.randrange(self.width-64), random.randrange(self.height-64))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# libavg - Media Playback Engine.
+# Copyright (C) 2003-2014 Ulrich von Zadow
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Current versions can be found at www.libavg.de
+#
+
+from libavg import *
+
+import time
+
+
+class SpeedDiv(app.MainDiv):
+    def onArgvParserCreated(self, parser):
+        usage = '%prog [options]\n' \
+                'Checks timer performance by registering increasing numbers of ' \
+                'pending timeouts and intervals.\n' \
+                'Prints the average frame time for each number of timers.'
+        parser.set_usage(usage)
+
+        parser.add_option('--max-timers', '-n', dest='maxTimers',
+                type='int', default=100000,
+                help='maximum number of pending timers [Default: 100000]')
+        parser.add_option('--churn', '-c', dest='churn',
+                type='int', default=100,
+                help='number of timeouts added and cleared every frame [Default: 100]')
+        parser.add_option('--intervals', '-i', dest='numIntervals',
+                type='int', default=100,
+                help='number of intervals firing every frame [Default: 100]')
+        parser.add_option('--frames', '-f', dest='numFrames',
+                type='int', default=200,
+                help='number of frames to measure per step [Default: 200]')
+
+    def onArgvParsed(self, options, args, parser):
+        self.__optMaxTimers = options.maxTimers
+        self.__optChurn = options.churn
+        self.__optNumIntervals = options.numIntervals
+        self.__optNumFrames = options.numFrames
+
+    def onInit(self):
+        player.setFramerate(1000)
+        self.__idleIDs = []
+        self.__frameNum = None
+        self.__steps = []
+        numTimers = 100
+        while numTimers < self.__optMaxTimers:
+            self.__steps.append(numTimers)
+            numTimers *= 10
+        self.__steps.append(self.__optMaxTimers)
+
+        for i in xrange(self.__optNumIntervals):
+            player.setInterval(0, self.__onInterval)
+        player.setTimeout(0, self.__nextStep)
+
+    def onFrame(self):
+        if self.__frameNum is None:
+            return
+        ids = [player.setTimeout(10000000, self.__onInterval)
+                for i in xrange(self.__optChurn)]
+        for id in ids:
+            player.clearInterval(id)
+
+        now = time.time()
+        if self.__frameNum > 0:
+            self.__frameTimes.append(now - self.__lastFrameStart)
+        self.__lastFrameStart = now
+        self.__frameNum += 1
+        if self.__frameNum > self.__optNumFrames:
+            self.__endStep()
+
+    def __nextStep(self):
+        numTimers = self.__steps.pop(0)
+        tstart = time.time()
+        for i in xrange(numTimers - len(self.__idleIDs)):
+            self.__idleIDs.append(player.setTimeout(10000000+i, self.__onInterval))
+        self.__insertTime = time.time() - tstart
+        self.__numTimers = numTimers
+        self.__frameTimes = []
+        self.__frameNum = 0
+
+    def __endStep(self):
+        self.__frameNum = None
+        avgFrameTime = sum(self.__frameTimes) / len(self.__frameTimes)
+        print '%8i timers: %.3f ms/frame, setup %.3f s' % (self.__numTimers,
+                avgFrameTime*1000, self.__insertTime)
+        if self.__steps:
+            player.setTimeout(0, self.__nextStep)
+        else:
+            player.stop()
+
+    def __onInterval(self):
+        pass
+
+
+if __name__ == '__main__':
+    app.App().run(SpeedDiv(), app_resolution='160x120')
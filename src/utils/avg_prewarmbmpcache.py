@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# libavg - Media Playback Engine.
+# Copyright (C) 2003-2014 Ulrich von Zadow
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# Current versions can be found at www.libavg.de
+#
+
+from optparse import OptionParser
+import os
+import sys
+from libavg import avg
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff")
+
+parser = OptionParser(usage="%prog mediadir(s) [options]",
+        description="Decodes all images in the media directories and stores them in "
+                "the bitmap disk cache. By default, the cache configured in avgrc is "
+                "used.")
+parser.add_option("-d", "--cachedir", dest = "cachedir",
+        help = "Cache directory")
+parser.add_option("-s", "--size", dest = "size", type = "int", default = 1024,
+        help = "Maximum cache size in megabytes if --cachedir is given. "
+                "Default: %default")
+parser.add_option("-p", "--pixelformat", dest = "pixelformat",
+        help = "Pixel format the images will be requested in, e.g. B8G8R8. "
+                "Default: The pixel format used by image nodes.")
+options, args = parser.parse_args()
+
+if len(args) == 0:
+    parser.print_help()
+    sys.exit(1)
+
+if options.cachedir:
+    cache = avg.BitmapDiskCache(options.cachedir, options.size*1024*1024)
+else:
+    cache = avg.BitmapDiskCache.get()
+    if cache is None:
+        sys.stderr.write(
+                "No cache directory given and no bmpdiskcachedir set in avgrc.\n")
+        sys.exit(1)
+
+if options.pixelformat:
+    try:
+        pf = avg.pixelformat.names[options.pixelformat]
+    except KeyError:
+        sys.stderr.write("Unknown pixel format %s.\n" % options.pixelformat)
+        sys.exit(1)
+    prewarm = lambda filename: cache.prewarm(filename, pf)
+else:
+    prewarm = cache.prewarm
+
+numAdded = 0
+numCached = 0
+numErrors = 0
+for mediaDir in args:
+    for dirPath, dirNames, fileNames in os.walk(mediaDir):
+        for fileName in sorted(fileNames):
+            if os.path.splitext(fileName)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.abspath(os.path.join(dirPath, fileName))
+            try:
+                if prewarm(path):
+                    numAdded += 1
+                else:
+                    numCached += 1
+            except avg.Exception, e:
+                sys.stderr.write("%s: %s\n" % (path, e))
+                numErrors += 1
+
+print "%d images added, %d already cached, %d errors." % (numAdded, numCached, 
+        numErrors)
+print "Cache %s: %d files, %.1f MB of %.1f MB." % (cache.dir, cache.getNumFiles(),
+        cache.getSize()/(1024.*1024), cache.maxsize/(1024.*1024))
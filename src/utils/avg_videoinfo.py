@@ -23,7 +23,8 @@
 
 from optparse import OptionParser
 import sys
-from libavg import avg
+import random
+from libavg import avg, player
 from xml.dom import minidom
 import os
 
@@ -34,6 +35,10 @@ parser.add_option("-c", "--csv", dest = "csv", action = "store_true",
         help = "Output in csv format")
 parser.add_option("-r", "--recursion", dest = "recursion", action = "store_true",
         help = "Recurse into subdirectories")
+parser.add_option("-s", "--seektest", dest = "numSeeks", type = "int", default = 0,
+        help = "Perform the given number of random seeks and print seek latencies")
+parser.add_option("--framecache", dest = "frameCacheSize", type = "int", default = 0,
+        help = "Number of frames to cache during the seek test [Default: 0]")
 options, args = parser.parse_args()
 
 def sortByName(a, b):
@@ -259,6 +264,63 @@ class CSVOutputHandler(OutputHandler):
             s += ' \t \t'
         print s
     
+MAX_FRAMES_PER_SEEK = 100
+
+class SeekTestOutputHandler(OutputHandler):
+
+    def __init__(self, args):
+        super(SeekTestOutputHandler, self).__init__(args)
+
+    def output(self):
+        for filename in self._fileNameList:
+            for fastSeek in (False, True):
+                self.__testFile(filename, fastSeek)
+
+    def __testFile(self, filename, fastSeek):
+        player.createMainCanvas(size=(160,120))
+        root = player.getRootNode()
+        self.__node = avg.VideoNode(href=filename, threaded=False, fastseek=fastSeek,
+                framecachesize=options.frameCacheSize, size=(160,120), parent=root)
+        self.__node.pause()
+        self.__numFrames = self.__node.getNumFrames()
+        self.__seeksLeft = options.numSeeks
+        self.__seekPending = False
+        # Use the same seek targets for regular and fast seeks.
+        random.seed(0)
+        player.subscribe(player.ON_FRAME, self.__onFrame)
+        player.play()
+        player.unsubscribe(player.ON_FRAME, self.__onFrame)
+
+        stats = self.__node.getSeekStats()
+        if fastSeek:
+            mode = "fast seek"
+        else:
+            mode = "regular seek"
+        print "%s (%s): %i seeks, %i cache hits, %i forward decodes" % (filename, mode,
+                stats["numseeks"], stats["cachehits"], stats["forwarddecodes"])
+        print "  Latency (ms): p50 %.2f, p90 %.2f, p99 %.2f, max %.2f" % (stats["p50"],
+                stats["p90"], stats["p99"], stats["max"])
+        self.__node.unlink(True)
+        self.__node = None
+
+    def __onFrame(self):
+        if self.__seekPending:
+            # Wait until the frame has actually been displayed.
+            self.__framesWaited += 1
+            if (self.__node.getCurFrame() != self.__destFrame and 
+                    self.__framesWaited < MAX_FRAMES_PER_SEEK):
+                return
+            self.__seekPending = False
+        if self.__seeksLeft == 0:
+            player.stop()
+            return
+        self.__destFrame = random.randint(0, self.__numFrames-1)
+        self.__node.seekToFrame(self.__destFrame)
+        self.__seeksLeft -= 1
+        self.__seekPending = True
+        self.__framesWaited = 0
+
+
 def printHelp():
     parser.print_help()
     sys.exit(1)
@@ -266,7 +328,9 @@ def printHelp():
 if len(sys.argv) == 1:
     printHelp()
 
-if options.xml:
+if options.numSeeks > 0:
+    outputHandler = SeekTestOutputHandler(args)
+elif options.xml:
     outputHandler = XMLOutputHandler(args)
 elif options.csv:
     outputHandler = CSVOutputHandler(args)
@@ -249,7 +249,6 @@ FrameAvailableCode AsyncVideoDecoder::getRenderedBmps(vector<BitmapPtr>& pBmps,
             for (unsigned i = 0; i < pBmps.size(); ++i) {
                 pBmps[i] = pFrameMsg->getFrameBitmap(i);
             }
-//            returnFrame(pFrameMsg);
         }
     }
     return frameAvailable;
@@ -304,7 +303,7 @@ void AsyncVideoDecoder::setupDemuxer(vector<int> streamIndexes)
         m_PacketQs[streamIndexes[i]] = pPacketQ;
     }
     m_pDemuxThread = new boost::thread(VideoDemuxerThread(*m_pDemuxCmdQ,
-            getFormatContext(), m_PacketQs));
+            getFormatContext(), m_PacketQs, getKeyframeIndex()));
 }
 
 void AsyncVideoDecoder::deleteDemuxer()
@@ -354,15 +353,13 @@ VideoMsgPtr AsyncVideoDecoder::getBmpsForTime(float timeWanted,
     } else {
         float frameTime = -1;
         while (frameTime-timeWanted < -0.5*timePerFrame && !m_bVideoEOF) {
-            if (pFrameMsg) {
-                if (pFrameMsg->getType() == VideoMsg::FRAME) {
-                    returnFrame(pFrameMsg);
-                } else {
+            // Skipped frame bitmaps return to the bitmap pool when pFrameMsg is
+            // released.
+            if (pFrameMsg && pFrameMsg->getType() == VideoMsg::VDPAU_FRAME) {
 #if AVG_ENABLE_VDPAU
-                    vdpau_render_state* pRenderState = pFrameMsg->getRenderState();
-                    unlockVDPAUSurface(pRenderState);
+                vdpau_render_state* pRenderState = pFrameMsg->getRenderState();
+                unlockVDPAUSurface(pRenderState);
 #endif
-                }
             }
             pFrameMsg = getNextBmps(false);
             if (pFrameMsg) {
@@ -438,7 +435,7 @@ void AsyncVideoDecoder::handleVSeekMsg(VideoMsgPtr pMsg)
             handleVSeekDone(pMsg);
             break;
         case VideoMsg::FRAME:
-            returnFrame(dynamic_pointer_cast<VideoMsg>(pMsg));
+            // The frame's bitmaps return to the bitmap pool when pMsg is released.
             break;
         case VideoMsg::VDPAU_FRAME:
 #ifdef AVG_ENABLE_VDPAU
@@ -488,14 +485,6 @@ void AsyncVideoDecoder::handleAudioMsg(AudioMsgPtr pMsg)
     }
 }
 
-void AsyncVideoDecoder::returnFrame(VideoMsgPtr pFrameMsg)
-{
-    if (pFrameMsg) {
-        AVG_ASSERT(pFrameMsg->getType() == VideoMsg::FRAME);
-        m_pVCmdQ->pushCmd(boost::bind(&VideoDecoderThread::returnFrame, _1, pFrameMsg));
-    }
-}
-
 bool AsyncVideoDecoder::isSeeking() const
 {
     return (m_NumSeeksSent > m_NumVSeeksDone || m_NumSeeksSent > m_NumASeeksDone);
@@ -74,7 +74,6 @@ private:
     void handleVSeekMsg(VideoMsgPtr pMsg);
     void handleVSeekDone(AudioMsgPtr pMsg);
     void handleAudioMsg(AudioMsgPtr pMsg);
-    void returnFrame(VideoMsgPtr pFrameMsg);
     bool isSeeking() const;
     bool isVSeeking() const;
 
@@ -33,8 +33,10 @@ using namespace std;
 
 namespace avg {
 
-FFMpegDemuxer::FFMpegDemuxer(AVFormatContext * pFormatContext, vector<int> streamIndexes)
-    : m_pFormatContext(pFormatContext)
+FFMpegDemuxer::FFMpegDemuxer(AVFormatContext * pFormatContext, vector<int> streamIndexes,
+        KeyframeIndexPtr pKeyframeIndex)
+    : m_pFormatContext(pFormatContext),
+      m_pKeyframeIndex(pKeyframeIndex)
 {
     ObjectCounter::get()->incRef(&typeid(*this));
     for (unsigned i = 0; i < streamIndexes.size(); ++i) {
@@ -113,6 +115,15 @@ AVPacket * FFMpegDemuxer::getPacket(int streamIndex)
         
 void FFMpegDemuxer::seek(float destTime)
 {
+    if (m_pKeyframeIndex && m_pKeyframeIndex->getNumKeyframes() > 0) {
+        // Seek directly to the keyframe before destTime in the video stream. This 
+        // avoids the demuxer's own keyframe search, which is slow or inexact for 
+        // several container formats.
+        av_seek_frame(m_pFormatContext, m_pKeyframeIndex->getStreamIndex(),
+                m_pKeyframeIndex->getKeyframeTimestamp(destTime), AVSEEK_FLAG_BACKWARD);
+        clearPacketCache();
+        return;
+    }
 #if LIBAVFORMAT_BUILD <= 4616
     av_seek_frame(m_pFormatContext, -1, destTime*1000000);
 #else
@@ -25,6 +25,7 @@
 #include "../avgconfigwrapper.h"
 
 #include "WrapFFMpeg.h"
+#include "KeyframeIndex.h"
 
 #include <list>
 #include <vector>
@@ -36,7 +37,8 @@ namespace avg {
 
 class AVG_API FFMpegDemuxer {
     public:
-        FFMpegDemuxer(AVFormatContext * pFormatContext, std::vector<int> streamIndexes);
+        FFMpegDemuxer(AVFormatContext * pFormatContext, std::vector<int> streamIndexes,
+                KeyframeIndexPtr pKeyframeIndex=KeyframeIndexPtr());
         virtual ~FFMpegDemuxer();
        
         AVPacket * getPacket(int streamIndex);
@@ -51,6 +53,7 @@ class AVG_API FFMpegDemuxer {
         std::map<int, PacketList> m_PacketLists;
        
         AVFormatContext * m_pFormatContext;
+        KeyframeIndexPtr m_pKeyframeIndex;
 };
 
 typedef boost::shared_ptr<FFMpegDemuxer> FFMpegDemuxerPtr;
@@ -0,0 +1,324 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "KeyframeIndex.h"
+#include "VideoDecoder.h"
+
+#include "../base/Exception.h"
+#include "../base/Logger.h"
+#include "../base/ScopeTimer.h"
+#include "../base/ThreadHelper.h"
+
+#include <boost/thread/thread.hpp>
+#include <boost/bind.hpp>
+
+#include <sys/types.h>
+#include <sys/stat.h>
+#include <stdio.h>
+#include <string.h>
+
+#include <algorithm>
+#include <sstream>
+
+using namespace std;
+
+namespace avg {
+
+namespace {
+
+const char INDEX_MAGIC[8] = {'A', 'V', 'G', 'K', 'F', 'I', '0', '1'};
+const string INDEX_EXTENSION = ".avgkfi";
+
+struct IndexFileHeader {
+    char m_Magic[8];
+    long long m_FileSize;
+    long long m_MTime;
+    long long m_StartTimestamp;
+    double m_TimeUnitsPerSecond;
+    int m_StreamIndex;
+    int m_NumKeyframes;
+};
+
+void closeFormatContext(AVFormatContext* pFormatContext)
+{
+#if LIBAVCODEC_VERSION_INT > AV_VERSION_INT(53, 21, 0)
+    avformat_close_input(&pFormatContext);
+#else
+    av_close_input_file(pFormatContext);
+#endif
+}
+
+}
+
+KeyframeIndexPtr KeyframeIndex::create(const string& sFilename, int streamIndex)
+{
+    struct stat fileStat;
+    if (stat(sFilename.c_str(), &fileStat) != 0 || 
+            (fileStat.st_mode & S_IFMT) != S_IFREG) {
+        // Network streams and pipes can't be demuxed twice (and might never end).
+        return KeyframeIndexPtr();
+    }
+    KeyframeIndexPtr pIndex(new KeyframeIndex(streamIndex));
+    if (!pIndex->load(getIndexFilename(sFilename), fileStat.st_size, 
+            fileStat.st_mtime))
+    {
+        boost::thread buildThread(boost::bind(&KeyframeIndex::buildInBackground, pIndex,
+                sFilename, (long long)fileStat.st_size, (long long)fileStat.st_mtime));
+        buildThread.detach();
+    }
+    return pIndex;
+}
+
+void KeyframeIndex::buildInBackground(KeyframeIndexPtr pIndex, string sFilename, 
+        long long fileSize, long long mtime)
+{
+    try {
+        pIndex->build(sFilename);
+    } catch (Exception& ex) {
+        AVG_LOG_WARNING(ex.getStr());
+        return;
+    }
+    if (pIndex->isReady()) {
+        pIndex->save(getIndexFilename(sFilename), fileSize, mtime);
+    }
+}
+
+KeyframeIndex::KeyframeIndex(int streamIndex)
+    : m_bReady(false),
+      m_bCancelled(false),
+      m_StreamIndex(streamIndex),
+      m_TimeUnitsPerSecond(1),
+      m_StartTimestamp(0)
+{
+}
+
+KeyframeIndex::~KeyframeIndex()
+{
+}
+
+static ProfilingZoneID BuildIndexProfilingZone("Build keyframe index");
+
+void KeyframeIndex::build(const string& sFilename)
+{
+    ScopeTimer timer(BuildIndexProfilingZone);
+    AVFormatContext* pFormatContext = 0;
+    {
+        // avformat_find_stream_info() opens codecs, which isn't thread-safe.
+        lock_guard lock(VideoDecoder::s_OpenMutex);
+        int err = avformat_open_input(&pFormatContext, sFilename.c_str(), 0, 0);
+        if (err < 0) {
+            avcodecError(sFilename, err);
+        }
+        err = avformat_find_stream_info(pFormatContext, 0);
+        if (err < 0 || m_StreamIndex >= int(pFormatContext->nb_streams)) {
+            closeFormatContext(pFormatContext);
+            throw Exception(AVG_ERR_VIDEO_INIT_FAILED, 
+                    sFilename + ": Could not build keyframe index.");
+        }
+    }
+    AVStream* pStream = pFormatContext->streams[m_StreamIndex];
+    m_TimeUnitsPerSecond = 1.0/av_q2d(pStream->time_base);
+    m_Timestamps.clear();
+    bool bFirstPacket = true;
+    AVPacket packet;
+    while (!m_bCancelled && av_read_frame(pFormatContext, &packet) >= 0) {
+        if (packet.stream_index == m_StreamIndex) {
+            long long timestamp = packet.dts;
+            if (timestamp == (long long)AV_NOPTS_VALUE) {
+                timestamp = packet.pts;
+            }
+            if (timestamp != (long long)AV_NOPTS_VALUE) {
+                if (bFirstPacket) {
+                    m_StartTimestamp = timestamp;
+                    bFirstPacket = false;
+                }
+                if ((packet.flags & AV_PKT_FLAG_KEY) && 
+                        (m_Timestamps.empty() || timestamp > m_Timestamps.back()))
+                {
+                    m_Timestamps.push_back(timestamp);
+                }
+            }
+        }
+        av_free_packet(&packet);
+    }
+    {
+        lock_guard lock(VideoDecoder::s_OpenMutex);
+        closeFormatContext(pFormatContext);
+    }
+    if (m_bCancelled) {
+        m_Timestamps.clear();
+        return;
+    }
+    setReady();
+    AVG_TRACE(Logger::category::PROFILE_VIDEO, Logger::severity::INFO,
+            "Keyframe index for " << sFilename << ": " << m_Timestamps.size() 
+            << " keyframes.");
+}
+
+bool KeyframeIndex::load(const string& sIndexFilename, long long fileSize, 
+        long long mtime)
+{
+    FILE* pFile = fopen(sIndexFilename.c_str(), "rb");
+    if (!pFile) {
+        return false;
+    }
+    IndexFileHeader header;
+    bool bOk = fread(&header, sizeof(header), 1, pFile) == 1 &&
+            memcmp(header.m_Magic, INDEX_MAGIC, sizeof(INDEX_MAGIC)) == 0 &&
+            header.m_FileSize == fileSize && header.m_MTime == mtime &&
+            header.m_StreamIndex == m_StreamIndex && header.m_NumKeyframes >= 0;
+    if (bOk) {
+        m_Timestamps.resize(header.m_NumKeyframes);
+        if (!m_Timestamps.empty()) {
+            bOk = fread(&m_Timestamps[0], sizeof(long long), m_Timestamps.size(), 
+                    pFile) == m_Timestamps.size();
+        }
+    }
+    fclose(pFile);
+    if (bOk) {
+        m_StartTimestamp = header.m_StartTimestamp;
+        m_TimeUnitsPerSecond = header.m_TimeUnitsPerSecond;
+        setReady();
+    } else {
+        m_Timestamps.clear();
+    }
+    return bOk;
+}
+
+bool KeyframeIndex::save(const string& sIndexFilename, long long fileSize,
+        long long mtime) const
+{
+    stringstream ss;
+    ss << sIndexFilename << ".tmp" << boost::this_thread::get_id();
+    string sTempFilename = ss.str();
+
+    IndexFileHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.m_Magic, INDEX_MAGIC, sizeof(INDEX_MAGIC));
+    header.m_FileSize = fileSize;
+    header.m_MTime = mtime;
+    header.m_StartTimestamp = m_StartTimestamp;
+    header.m_TimeUnitsPerSecond = m_TimeUnitsPerSecond;
+    header.m_StreamIndex = m_StreamIndex;
+    header.m_NumKeyframes = int(m_Timestamps.size());
+
+    FILE* pFile = fopen(sTempFilename.c_str(), "wb");
+    if (!pFile) {
+        // Read-only media directories are common, so this isn't a warning.
+        AVG_TRACE(Logger::category::PROFILE_VIDEO, Logger::severity::INFO,
+                "Can't write keyframe index " << sIndexFilename << ".");
+        return false;
+    }
+    bool bOk = fwrite(&header, sizeof(header), 1, pFile) == 1;
+    if (!m_Timestamps.empty()) {
+        bOk = bOk && fwrite(&m_Timestamps[0], sizeof(long long), m_Timestamps.size(),
+                pFile) == m_Timestamps.size();
+    }
+    bOk = (fclose(pFile) == 0) && bOk;
+#ifdef _WIN32
+    if (bOk) {
+        remove(sIndexFilename.c_str());
+    }
+#endif
+    bOk = bOk && (rename(sTempFilename.c_str(), sIndexFilename.c_str()) == 0);
+    if (!bOk) {
+        AVG_TRACE(Logger::category::PROFILE_VIDEO, Logger::severity::INFO,
+                "Can't write keyframe index " << sIndexFilename << ".");
+        remove(sTempFilename.c_str());
+    }
+    return bOk;
+}
+
+void KeyframeIndex::cancel()
+{
+    m_bCancelled = true;
+}
+
+bool KeyframeIndex::isReady() const
+{
+    lock_guard lock(m_ReadyMutex);
+    return m_bReady;
+}
+
+int KeyframeIndex::getStreamIndex() const
+{
+    return m_StreamIndex;
+}
+
+int KeyframeIndex::getNumKeyframes() const
+{
+    // The timestamps don't change once the index is ready.
+    lock_guard lock(m_ReadyMutex);
+    if (!m_bReady) {
+        return 0;
+    }
+    return int(m_Timestamps.size());
+}
+
+float KeyframeIndex::getKeyframeTime(float time) const
+{
+    int i = findKeyframe(time);
+    if (i == -1) {
+        return 0;
+    }
+    return float((m_Timestamps[i]-m_StartTimestamp)/m_TimeUnitsPerSecond);
+}
+
+long long KeyframeIndex::getKeyframeTimestamp(float time) const
+{
+    int i = findKeyframe(time);
+    if (i == -1) {
+        return m_StartTimestamp;
+    }
+    return m_Timestamps[i];
+}
+
+void KeyframeIndex::setReady()
+{
+    lock_guard lock(m_ReadyMutex);
+    m_bReady = true;
+}
+
+string KeyframeIndex::getIndexFilename(const string& sFilename)
+{
+    return sFilename + INDEX_EXTENSION;
+}
+
+int KeyframeIndex::findKeyframe(float time) const
+{
+    if (m_Timestamps.empty()) {
+        return -1;
+    }
+    // Round so float imprecision doesn't move exact keyframe times to the previous
+    // keyframe.
+    long long timestamp = m_StartTimestamp + 
+            (long long)(time*m_TimeUnitsPerSecond+0.5);
+    vector<long long>::const_iterator it = upper_bound(m_Timestamps.begin(), 
+            m_Timestamps.end(), timestamp);
+    if (it == m_Timestamps.begin()) {
+        return 0;
+    }
+    return int(it-m_Timestamps.begin())-1;
+}
+
+}
+
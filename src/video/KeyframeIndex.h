@@ -0,0 +1,96 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _KeyframeIndex_H_
+#define _KeyframeIndex_H_
+
+#include "../api.h"
+#include "../avgconfigwrapper.h"
+
+#include "WrapFFMpeg.h"
+
+#include <boost/shared_ptr.hpp>
+#include <boost/thread/mutex.hpp>
+#include <boost/atomic.hpp>
+
+#include <string>
+#include <vector>
+
+namespace avg {
+
+class KeyframeIndex;
+typedef boost::shared_ptr<KeyframeIndex> KeyframeIndexPtr;
+
+// Timestamps of all keyframes in a video stream. Used to seek directly to the keyframe
+// before a seek target and to decide whether decoding forward is cheaper than seeking.
+// Building the index means demuxing the whole file, so it is persisted in a sidecar
+// file (<video file>.avgkfi) next to the video if the directory is writable.
+class AVG_API KeyframeIndex
+{
+public:
+    // Loads the index from the sidecar file if it is up to date. Otherwise, the index
+    // is built in a background thread and has no keyframes until it's ready. Returns
+    // an empty pointer for sources that aren't regular local files (e.g. network
+    // streams or pipes).
+    static KeyframeIndexPtr create(const std::string& sFilename, int streamIndex);
+
+    KeyframeIndex(int streamIndex);
+    virtual ~KeyframeIndex();
+
+    void build(const std::string& sFilename);
+    // Stops a build running in the background.
+    void cancel();
+    bool isReady() const;
+    bool load(const std::string& sIndexFilename, long long fileSize, long long mtime);
+    bool save(const std::string& sIndexFilename, long long fileSize, 
+            long long mtime) const;
+
+    int getStreamIndex() const;
+    int getNumKeyframes() const;
+    // Time in seconds of the last keyframe at or before time. Times are relative to
+    // the start of the stream.
+    float getKeyframeTime(float time) const;
+    // Same as getKeyframeTime, but in stream time base units.
+    long long getKeyframeTimestamp(float time) const;
+
+    static std::string getIndexFilename(const std::string& sFilename);
+
+private:
+    static void buildInBackground(KeyframeIndexPtr pIndex, std::string sFilename, 
+            long long fileSize, long long mtime);
+    void setReady();
+    int findKeyframe(float time) const;
+
+    mutable boost::mutex m_ReadyMutex;
+    bool m_bReady;
+    boost::atomic<bool> m_bCancelled;
+
+    int m_StreamIndex;
+    double m_TimeUnitsPerSecond;
+    long long m_StartTimestamp;
+    std::vector<long long> m_Timestamps;
+};
+
+}
+
+#endif
+
@@ -0,0 +1,297 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "SampleCache.h"
+#include "AsyncVideoDecoder.h"
+
+#include "../base/Exception.h"
+#include "../base/Logger.h"
+#include "../base/ObjectCounter.h"
+#include "../base/ScopeTimer.h"
+
+#include "../audio/AudioMsg.h"
+
+#include <sys/stat.h>
+
+using namespace std;
+
+namespace avg {
+
+CachedSample::CachedSample(const VideoInfo& videoInfo, const AudioParams& ap)
+    : m_VideoInfo(videoInfo),
+      m_AP(ap),
+      m_MemUsed(0)
+{
+    ObjectCounter::get()->incRef(&typeid(*this));
+}
+
+CachedSample::~CachedSample()
+{
+    ObjectCounter::get()->decRef(&typeid(*this));
+}
+
+void CachedSample::addBuffer(AudioBufferPtr pBuffer, float time)
+{
+    m_pBuffers.push_back(pBuffer);
+    m_BufferTimes.push_back(time);
+    m_MemUsed += pBuffer->getNumBytes();
+}
+
+const VideoInfo& CachedSample::getVideoInfo() const
+{
+    return m_VideoInfo;
+}
+
+const AudioParams& CachedSample::getAudioParams() const
+{
+    return m_AP;
+}
+
+bool CachedSample::hasFormat(const AudioParams& ap) const
+{
+    return m_AP.m_SampleRate == ap.m_SampleRate && m_AP.m_Channels == ap.m_Channels;
+}
+
+int CachedSample::getNumBuffers() const
+{
+    return int(m_pBuffers.size());
+}
+
+AudioBufferPtr CachedSample::getBuffer(int i) const
+{
+    return m_pBuffers[i];
+}
+
+float CachedSample::getBufferTime(int i) const
+{
+    return m_BufferTimes[i];
+}
+
+long long CachedSample::getMemUsed() const
+{
+    return m_MemUsed;
+}
+
+
+SampleCache::Stats::Stats()
+    : m_NumHits(0),
+      m_NumMisses(0),
+      m_NumEvictions(0)
+{
+}
+
+SampleCache* SampleCache::s_pSampleCache = 0;
+
+SampleCache* SampleCache::get()
+{
+    if (s_pSampleCache == 0) {
+        s_pSampleCache = new SampleCache();
+    }
+    return s_pSampleCache;
+}
+
+SampleCache::SampleCache()
+    : m_Capacity(16*1024*1024),
+      m_MaxDuration(5000),
+      m_MemUsed(0)
+{
+}
+
+SampleCache::~SampleCache()
+{
+}
+
+void SampleCache::setCapacity(long long capacity)
+{
+    m_Capacity = capacity;
+    m_UncachedFiles.clear();
+    evict();
+}
+
+long long SampleCache::getCapacity() const
+{
+    return m_Capacity;
+}
+
+void SampleCache::setMaxDuration(long long maxDuration)
+{
+    m_MaxDuration = maxDuration;
+    m_UncachedFiles.clear();
+}
+
+long long SampleCache::getMaxDuration() const
+{
+    return m_MaxDuration;
+}
+
+CachedSamplePtr SampleCache::getSample(const string& sFilename, const AudioParams& ap)
+{
+    FileVersion version;
+    if (m_Capacity <= 0 || !getFileVersion(sFilename, version)) {
+        return CachedSamplePtr();
+    }
+    map<string, FileVersion>::iterator uncachedIt = m_UncachedFiles.find(sFilename);
+    if (uncachedIt != m_UncachedFiles.end()) {
+        if (uncachedIt->second == version) {
+            return CachedSamplePtr();
+        }
+        // The file has changed since it was rejected.
+        m_UncachedFiles.erase(uncachedIt);
+    }
+    EntryMap::iterator it = m_Entries.find(sFilename);
+    if (it != m_Entries.end()) {
+        if (it->second.m_Version == version && it->second.m_pSample->hasFormat(ap)) {
+            m_Stats.m_NumHits++;
+            m_UseOrder.erase(it->second.m_UsePos);
+            m_UseOrder.push_front(sFilename);
+            it->second.m_UsePos = m_UseOrder.begin();
+            return it->second.m_pSample;
+        }
+        // The file has changed or was decoded for a different output format.
+        removeSample(sFilename);
+    }
+    m_Stats.m_NumMisses++;
+    CachedSamplePtr pSample = loadSample(sFilename, ap);
+    if (!pSample) {
+        m_UncachedFiles[sFilename] = version;
+        return pSample;
+    }
+    m_UseOrder.push_front(sFilename);
+    Entry& entry = m_Entries[sFilename];
+    entry.m_pSample = pSample;
+    entry.m_Version = version;
+    entry.m_UsePos = m_UseOrder.begin();
+    m_MemUsed += pSample->getMemUsed();
+    evict();
+    return pSample;
+}
+
+void SampleCache::clear()
+{
+    m_Entries.clear();
+    m_UseOrder.clear();
+    m_UncachedFiles.clear();
+    m_MemUsed = 0;
+}
+
+int SampleCache::getNumSamples() const
+{
+    return int(m_Entries.size());
+}
+
+long long SampleCache::getMemUsed() const
+{
+    return m_MemUsed;
+}
+
+const SampleCache::Stats& SampleCache::getStats() const
+{
+    return m_Stats;
+}
+
+void SampleCache::resetStats()
+{
+    m_Stats = Stats();
+}
+
+bool SampleCache::FileVersion::operator ==(const FileVersion& other) const
+{
+    return m_MTime == other.m_MTime && m_Size == other.m_Size;
+}
+
+bool SampleCache::getFileVersion(const string& sFilename, FileVersion& version)
+{
+    struct stat fileStat;
+    if (stat(sFilename.c_str(), &fileStat) != 0) {
+        // Not a local file (e.g. a URL).
+        return false;
+    }
+    version.m_MTime = (long long)(fileStat.st_mtime);
+    version.m_Size = (long long)(fileStat.st_size);
+    return true;
+}
+
+static ProfilingZoneID LoadSampleProfilingZone("SampleCache::loadSample");
+
+CachedSamplePtr SampleCache::loadSample(const string& sFilename, const AudioParams& ap)
+{
+    ScopeTimer timer(LoadSampleProfilingZone);
+    AsyncVideoDecoder decoder(8);
+    decoder.open(sFilename, false, true);
+    VideoInfo videoInfo = decoder.getVideoInfo();
+    if (!videoInfo.m_bHasAudio || videoInfo.m_bHasVideo ||
+            videoInfo.m_Duration*1000 > m_MaxDuration)
+    {
+        decoder.close();
+        return CachedSamplePtr();
+    }
+
+    CachedSamplePtr pSample(new CachedSample(videoInfo, ap));
+    decoder.startDecoding(false, &ap);
+    AudioMsgQueue& msgQ = *decoder.getAudioMsgQ();
+    bool bDone = false;
+    while (!bDone) {
+        AudioMsgPtr pMsg = msgQ.pop(true);
+        switch (pMsg->getType()) {
+            case AudioMsg::AUDIO:
+                pSample->addBuffer(pMsg->getAudioBuffer(), pMsg->getAudioTime());
+                if (pSample->getMemUsed() > m_Capacity) {
+                    pSample = CachedSamplePtr();
+                    bDone = true;
+                }
+                break;
+            case AudioMsg::END_OF_FILE:
+                bDone = true;
+                break;
+            case AudioMsg::ERROR:
+                AVG_LOG_WARNING("Can't cache " << sFilename << ": " <<
+                        pMsg->getException().getStr());
+                pSample = CachedSamplePtr();
+                bDone = true;
+                break;
+            default:
+                break;
+        }
+    }
+    decoder.close();
+    return pSample;
+}
+
+void SampleCache::removeSample(const string& sFilename)
+{
+    EntryMap::iterator it = m_Entries.find(sFilename);
+    AVG_ASSERT(it != m_Entries.end());
+    m_MemUsed -= it->second.m_pSample->getMemUsed();
+    m_UseOrder.erase(it->second.m_UsePos);
+    m_Entries.erase(it);
+}
+
+void SampleCache::evict()
+{
+    while (m_MemUsed > m_Capacity && !m_UseOrder.empty()) {
+        string sFilename = m_UseOrder.back();
+        removeSample(sFilename);
+        m_Stats.m_NumEvictions++;
+    }
+}
+
+}
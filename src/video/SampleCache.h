@@ -0,0 +1,145 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _SampleCache_H_
+#define _SampleCache_H_
+
+#include "../api.h"
+
+#include "VideoInfo.h"
+
+#include "../audio/AudioBuffer.h"
+#include "../audio/AudioParams.h"
+
+#include <boost/shared_ptr.hpp>
+
+#include <string>
+#include <vector>
+#include <list>
+#include <map>
+
+namespace avg {
+
+// A sound file, completely decoded and resampled to the output format. The buffers are
+// never changed after loading, so any number of voices can play them at once.
+class AVG_API CachedSample
+{
+public:
+    CachedSample(const VideoInfo& videoInfo, const AudioParams& ap);
+    virtual ~CachedSample();
+
+    void addBuffer(AudioBufferPtr pBuffer, float time);
+
+    const VideoInfo& getVideoInfo() const;
+    const AudioParams& getAudioParams() const;
+    // Returns true if the sample was decoded for output with these parameters.
+    bool hasFormat(const AudioParams& ap) const;
+    int getNumBuffers() const;
+    AudioBufferPtr getBuffer(int i) const;
+    // Stream time of the first frame in buffer i, in seconds.
+    float getBufferTime(int i) const;
+    long long getMemUsed() const;
+
+private:
+    VideoInfo m_VideoInfo;
+    AudioParams m_AP;
+    std::vector<AudioBufferPtr> m_pBuffers;
+    std::vector<float> m_BufferTimes;
+    long long m_MemUsed;
+};
+
+typedef boost::shared_ptr<CachedSample> CachedSamplePtr;
+
+// Keeps short sound files in decoded form so SoundNodes can start playing them
+// without opening and decoding the file again. Files longer than maxDuration aren't 
+// cached. When the cached samples need more than capacity bytes, the least recently
+// used samples are dropped.
+class AVG_API SampleCache
+{
+public:
+    struct Stats {
+        Stats();
+
+        long long m_NumHits;
+        long long m_NumMisses;
+        long long m_NumEvictions;
+    };
+
+    static SampleCache* get();
+    virtual ~SampleCache();
+
+    void setCapacity(long long capacity);
+    long long getCapacity() const;
+    void setMaxDuration(long long maxDuration);
+    long long getMaxDuration() const;
+
+    // Returns an empty pointer if the file can't be cached. In that case, the caller
+    // should decode the file itself. On a miss, the file is decoded synchronously.
+    // Cached data is only used while the file's size and modification time are 
+    // unchanged.
+    CachedSamplePtr getSample(const std::string& sFilename, const AudioParams& ap);
+    void clear();
+
+    int getNumSamples() const;
+    long long getMemUsed() const;
+    const Stats& getStats() const;
+    void resetStats();
+
+private:
+    SampleCache();
+
+    struct FileVersion {
+        bool operator ==(const FileVersion& other) const;
+
+        long long m_MTime;
+        long long m_Size;
+    };
+    static bool getFileVersion(const std::string& sFilename, FileVersion& version);
+
+    CachedSamplePtr loadSample(const std::string& sFilename, const AudioParams& ap);
+    void removeSample(const std::string& sFilename);
+    void evict();
+
+    typedef std::list<std::string> FileList;
+    struct Entry {
+        CachedSamplePtr m_pSample;
+        FileVersion m_Version;
+        FileList::iterator m_UsePos;
+    };
+    typedef std::map<std::string, Entry> EntryMap;
+
+    long long m_Capacity;
+    long long m_MaxDuration;
+    long long m_MemUsed;
+    EntryMap m_Entries;
+    // File names, most recently used first.
+    FileList m_UseOrder;
+    // Files that turned out to be unsuitable for caching.
+    std::map<std::string, FileVersion> m_UncachedFiles;
+    Stats m_Stats;
+
+    static SampleCache* s_pSampleCache;
+};
+
+}
+
+#endif
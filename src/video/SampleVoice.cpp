@@ -0,0 +1,164 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "SampleVoice.h"
+
+#include "../base/Exception.h"
+#include "../base/ObjectCounter.h"
+
+#include <string.h>
+
+using namespace std;
+
+namespace avg {
+
+SampleVoice::SampleVoice(CachedSamplePtr pSample)
+    : m_pSample(pSample),
+      m_NumSeeksSent(0),
+      m_NumSeeksDone(0),
+      m_bEOF(false),
+      m_CurTime(0)
+{
+    ObjectCounter::get()->incRef(&typeid(*this));
+}
+
+SampleVoice::~SampleVoice()
+{
+    ObjectCounter::get()->decRef(&typeid(*this));
+}
+
+const VideoInfo& SampleVoice::getVideoInfo() const
+{
+    return m_pSample->getVideoInfo();
+}
+
+AudioMsgQueue& SampleVoice::getAudioMsgQ()
+{
+    return m_MsgQ;
+}
+
+AudioMsgQueue& SampleVoice::getAudioStatusQ()
+{
+    return m_StatusQ;
+}
+
+void SampleVoice::start()
+{
+    queueBuffers(0);
+}
+
+void SampleVoice::seek(float destTime)
+{
+    // Buffers that haven't been played yet are obsolete.
+    m_MsgQ.clear();
+    m_NumSeeksSent++;
+    AudioMsgPtr pMsg(new AudioMsg);
+    pMsg->setSeekDone(m_NumSeeksSent, destTime);
+    m_MsgQ.push(pMsg);
+    queueBuffers(destTime);
+    m_bEOF = false;
+}
+
+void SampleVoice::updateAudioStatus()
+{
+    AudioMsgPtr pMsg = m_StatusQ.pop(false);
+    while (pMsg) {
+        bool bSeeking = m_NumSeeksSent > m_NumSeeksDone;
+        switch (pMsg->getType()) {
+            case AudioMsg::END_OF_FILE:
+                // An end of file from before a seek is stale.
+                if (!bSeeking) {
+                    m_bEOF = true;
+                }
+                break;
+            case AudioMsg::SEEK_DONE:
+                if (m_NumSeeksDone < pMsg->getSeekSeqNum()) {
+                    m_NumSeeksDone = pMsg->getSeekSeqNum();
+                }
+                if (m_NumSeeksDone == m_NumSeeksSent) {
+                    m_bEOF = false;
+                    m_CurTime = pMsg->getSeekTime();
+                }
+                break;
+            case AudioMsg::AUDIO_TIME:
+                if (!bSeeking) {
+                    m_CurTime = pMsg->getAudioTime();
+                }
+                break;
+            default:
+                // Unhandled message type.
+                pMsg->dump();
+                AVG_ASSERT(false);
+        }
+        pMsg = m_StatusQ.pop(false);
+    }
+}
+
+bool SampleVoice::isEOF() const
+{
+    return m_bEOF;
+}
+
+float SampleVoice::getCurTime() const
+{
+    return m_CurTime;
+}
+
+void SampleVoice::queueBuffers(float startTime)
+{
+    const AudioParams& ap = m_pSample->getAudioParams();
+    int numBuffers = m_pSample->getNumBuffers();
+    int i = 0;
+    while (i < numBuffers-1 && m_pSample->getBufferTime(i+1) <= startTime) {
+        i++;
+    }
+    for (; i < numBuffers; ++i) {
+        AudioBufferPtr pBuffer = m_pSample->getBuffer(i);
+        float bufferTime = m_pSample->getBufferTime(i);
+        int startFrame = 0;
+        if (startTime > bufferTime) {
+            startFrame = int((startTime-bufferTime)*ap.m_SampleRate);
+        }
+        if (startFrame >= pBuffer->getNumFrames()) {
+            continue;
+        }
+        if (startFrame > 0) {
+            // Only the part of the buffer after startTime is played. The cached 
+            // buffer is shared, so the remainder is copied.
+            AudioBufferPtr pPartBuffer(new AudioBuffer(
+                    pBuffer->getNumFrames()-startFrame, ap));
+            memcpy(pPartBuffer->getData(), 
+                    pBuffer->getData()+startFrame*pBuffer->getNumChannels(),
+                    pPartBuffer->getNumBytes());
+            pBuffer = pPartBuffer;
+            bufferTime += float(startFrame)/ap.m_SampleRate;
+        }
+        AudioMsgPtr pMsg(new AudioMsg);
+        pMsg->setAudio(pBuffer, bufferTime);
+        m_MsgQ.push(pMsg);
+    }
+    AudioMsgPtr pMsg(new AudioMsg);
+    pMsg->setEOF();
+    m_MsgQ.push(pMsg);
+}
+
+}
@@ -0,0 +1,72 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _SampleVoice_H_
+#define _SampleVoice_H_
+
+#include "../api.h"
+
+#include "SampleCache.h"
+
+#include "../audio/AudioMsg.h"
+
+#include <boost/shared_ptr.hpp>
+
+namespace avg {
+
+// Plays a CachedSample through an AudioSource. Takes the place of an 
+// AsyncVideoDecoder: Audio buffers are queued directly from the cache, and status
+// messages from the AudioSource are evaluated the same way.
+class AVG_API SampleVoice
+{
+public:
+    SampleVoice(CachedSamplePtr pSample);
+    virtual ~SampleVoice();
+
+    const VideoInfo& getVideoInfo() const;
+    AudioMsgQueue& getAudioMsgQ();
+    AudioMsgQueue& getAudioStatusQ();
+
+    void start();
+    void seek(float destTime);
+    void updateAudioStatus();
+    bool isEOF() const;
+    float getCurTime() const;
+
+private:
+    void queueBuffers(float startTime);
+
+    CachedSamplePtr m_pSample;
+    AudioMsgQueue m_MsgQ;
+    AudioMsgQueue m_StatusQ;
+
+    int m_NumSeeksSent;
+    int m_NumSeeksDone;
+    bool m_bEOF;
+    float m_CurTime;
+};
+
+typedef boost::shared_ptr<SampleVoice> SampleVoicePtr;
+
+}
+
+#endif
@@ -78,7 +78,8 @@ void SyncVideoDecoder::startDecoding(bool bDeliverYCbCr, const AudioParams* pAP)
     AVG_ASSERT(!m_pDemuxer);
     vector<int> streamIndexes;
     streamIndexes.push_back(getVStreamIndex());
-    m_pDemuxer = new FFMpegDemuxer(getFormatContext(), streamIndexes);
+    m_pDemuxer = new FFMpegDemuxer(getFormatContext(), streamIndexes,
+            getKeyframeIndex());
 
     m_pFrameDecoder = FFMpegFrameDecoderPtr(new FFMpegFrameDecoder(getVideoStream()));
     m_pFrameDecoder->setFPS(m_FPS);
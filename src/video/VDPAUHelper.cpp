@@ -25,6 +25,7 @@
 #include "../base/ConfigMgr.h"
 
 #include "../graphics/Bitmap.h"
+#include "../graphics/BitmapPool.h"
 
 #include <dlfcn.h>
 
@@ -167,9 +168,10 @@ void getBitmapFromVDPAU(vdpau_render_state* pRenderState, BitmapPtr pBmpDest)
 {
     IntPoint YSize = pBmpDest->getSize();
     IntPoint UVSize(YSize.x/2, YSize.y/2);
-    BitmapPtr pBmpY(new Bitmap(YSize, I8));
-    BitmapPtr pBmpU(new Bitmap(UVSize, I8));
-    BitmapPtr pBmpV(new Bitmap(UVSize, I8));
+    BitmapPoolPtr pPool = BitmapPool::get();
+    BitmapPtr pBmpY = pPool->getBitmap(YSize, I8);
+    BitmapPtr pBmpU = pPool->getBitmap(UVSize, I8);
+    BitmapPtr pBmpV = pPool->getBitmap(UVSize, I8);
     getPlanesFromVDPAU(pRenderState, pBmpY, pBmpU, pBmpV);
     pBmpDest->copyYUVPixels(*pBmpY, *pBmpU, *pBmpV, false);
 }   
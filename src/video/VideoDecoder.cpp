@@ -31,6 +31,7 @@
 
 #include "../graphics/Bitmap.h"
 #include "../graphics/BitmapLoader.h"
+#include "../graphics/BitmapPool.h"
 
 #include "../audio/AudioParams.h"
 
@@ -58,7 +59,8 @@ VideoDecoder::VideoDecoder()
       m_pVDPAUDecoder(0),
 #endif
       m_AStreamIndex(-1),
-      m_pAStream(0)
+      m_pAStream(0),
+      m_bUseKeyframeIndex(false)
 {
     ObjectCounter::get()->incRef(&typeid(*this));
     initVideoSupport();
@@ -197,6 +199,10 @@ void VideoDecoder::startDecoding(bool bDeliverYCbCr, const AudioParams* pAP)
                 m_sFilename + ": no usable streams found.");
     }
 
+    if (m_bUseKeyframeIndex && m_VStreamIndex >= 0) {
+        m_pKeyframeIndex = KeyframeIndex::create(m_sFilename, m_VStreamIndex);
+    }
+
     m_State = DECODING;
 }
 
@@ -217,6 +223,10 @@ void VideoDecoder::close()
         m_pAStream = 0;
         m_AStreamIndex = -1;
     }
+    if (m_pKeyframeIndex) {
+        m_pKeyframeIndex->cancel();
+        m_pKeyframeIndex = KeyframeIndexPtr();
+    }
     if (m_pFormatContext) {
 #if LIBAVCODEC_VERSION_INT > AV_VERSION_INT(53, 21, 0)
         avformat_close_input(&m_pFormatContext);
@@ -234,6 +244,17 @@ VideoDecoder::DecoderState VideoDecoder::getState() const
     return m_State;
 }
 
+void VideoDecoder::enableKeyframeIndex(bool bEnable)
+{
+    AVG_ASSERT(m_State != DECODING);
+    m_bUseKeyframeIndex = bEnable;
+}
+
+bool VideoDecoder::isKeyframeIndexEnabled() const
+{
+    return m_bUseKeyframeIndex;
+}
+
 VideoInfo VideoDecoder::getVideoInfo() const
 {
     AVG_ASSERT(m_State != CLOSED);
@@ -281,6 +302,21 @@ FrameAvailableCode VideoDecoder::getRenderedBmp(BitmapPtr& pBmp, float timeWante
     return fa;
 }
 
+bool VideoDecoder::isSeekByDecodingFaster(float destTime) const
+{
+    if (!m_pKeyframeIndex || m_pKeyframeIndex->getNumKeyframes() == 0) {
+        return false;
+    }
+    float curTime = getCurTime();
+    if (destTime <= curTime) {
+        return false;
+    }
+    // Seeking always has to decode from the keyframe before destTime, so if the
+    // current position is after that keyframe, decoding forward does less work.
+    float keyframeTime = m_pKeyframeIndex->getKeyframeTime(destTime);
+    return curTime >= keyframeTime;
+}
+
 void VideoDecoder::logConfig()
 {
     bool bVDPAUAvailable = false;
@@ -335,20 +371,26 @@ AVCodecContext* VideoDecoder::getCodecContext()
 
 void VideoDecoder::allocFrameBmps(vector<BitmapPtr>& pBmps)
 {
+    BitmapPoolPtr pPool = BitmapPool::get();
     if (pixelFormatIsPlanar(getPixelFormat())) {
         IntPoint size = getSize();
-        pBmps[0] = BitmapPtr(new Bitmap(size, I8));
+        pBmps[0] = pPool->getBitmap(size, I8);
         IntPoint halfSize(size.x/2, size.y/2);
-        pBmps[1] = BitmapPtr(new Bitmap(halfSize, I8));
-        pBmps[2] = BitmapPtr(new Bitmap(halfSize, I8));
+        pBmps[1] = pPool->getBitmap(halfSize, I8);
+        pBmps[2] = pPool->getBitmap(halfSize, I8);
         if (pixelFormatHasAlpha(getPixelFormat())) {
-            pBmps[3] = BitmapPtr(new Bitmap(size, I8));
+            pBmps[3] = pPool->getBitmap(size, I8);
         }
     } else {
-        pBmps[0] = BitmapPtr(new Bitmap(getSize(), getPixelFormat()));
+        pBmps[0] = pPool->getBitmap(getSize(), getPixelFormat());
     }
 }
 
+KeyframeIndexPtr VideoDecoder::getKeyframeIndex() const
+{
+    return m_pKeyframeIndex;
+}
+
 int VideoDecoder::getVStreamIndex() const
 {
     return m_VStreamIndex;
@@ -26,6 +26,7 @@
 #include "../avgconfigwrapper.h"
 
 #include "VideoInfo.h"
+#include "KeyframeIndex.h"
 
 #include "../graphics/PixelFormat.h"
 
@@ -62,6 +63,9 @@ class AVG_API VideoDecoder
         virtual void startDecoding(bool bDeliverYCbCr, const AudioParams* pAP);
         virtual void close();
         virtual DecoderState getState() const;
+        // Must be called before startDecoding().
+        void enableKeyframeIndex(bool bEnable);
+        bool isKeyframeIndexEnabled() const;
         VideoInfo getVideoInfo() const;
         PixelFormat getPixelFormat() const;
         IntPoint getSize() const;
@@ -80,6 +84,9 @@ class AVG_API VideoDecoder
                 float timeWanted) = 0;
         virtual bool isEOF() const = 0;
         virtual void throwAwayFrame(float timeWanted) = 0;
+        // True if decoding forward from the current position reaches destTime 
+        // at least as fast as seeking to the keyframe before destTime.
+        bool isSeekByDecodingFaster(float destTime) const;
 
         static void logConfig();
 
@@ -90,6 +97,7 @@ class AVG_API VideoDecoder
         AVCodecContext const * getCodecContext() const;
         AVCodecContext * getCodecContext();
         void allocFrameBmps(std::vector<BitmapPtr>& pBmps);
+        KeyframeIndexPtr getKeyframeIndex() const;
 
         int getVStreamIndex() const;
         AVStream* getVideoStream() const;
@@ -119,10 +127,14 @@ class AVG_API VideoDecoder
         // Audio
         int m_AStreamIndex;
         AVStream * m_pAStream;
+
+        bool m_bUseKeyframeIndex;
+        KeyframeIndexPtr m_pKeyframeIndex;
         
         static bool s_bInitialized;
         // Prevents different decoder instances from executing open/close simultaneously
         static boost::mutex s_OpenMutex;   
+        friend class KeyframeIndex;
 };
 
 typedef boost::shared_ptr<VideoDecoder> VideoDecoderPtr;
@@ -27,6 +27,7 @@
 #include "../base/ScopeTimer.h"
 #include "../base/TimeSource.h"
 #include "../graphics/Bitmap.h"
+#include "../graphics/BitmapPool.h"
 #include "../avgconfigwrapper.h"
 
 struct vdpau_render_state;
@@ -42,8 +43,6 @@ VideoDecoderThread::VideoDecoderThread(CQueue& cmdQ, VideoMsgQueue& msgQ,
             Logger::category::PROFILE_VIDEO),
       m_MsgQ(msgQ),
       m_PacketQ(packetQ),
-      m_pBmpQ(new BitmapQueue()),
-      m_pHalfBmpQ(new BitmapQueue()),
       m_Size(size),
       m_PF(pf),
       m_bUseVDPAU(bUseVDPAU),
@@ -120,18 +119,6 @@ void VideoDecoderThread::setFPS(float fps)
     m_pFrameDecoder->setFPS(fps);
 }
 
-void VideoDecoderThread::returnFrame(VideoMsgPtr pMsg)
-{
-    m_pBmpQ->push(pMsg->getFrameBitmap(0));
-    if (pixelFormatIsPlanar(m_PF)) {
-        m_pHalfBmpQ->push(pMsg->getFrameBitmap(1));
-        m_pHalfBmpQ->push(pMsg->getFrameBitmap(2));
-        if (m_PF == YCbCrA420p) {
-            m_pBmpQ->push(pMsg->getFrameBitmap(3));
-        }
-    }
-}
-
 void VideoDecoderThread::decodePacket(AVPacket* pPacket)
 {
     bool bGotPicture = m_pFrameDecoder->decodePacket(pPacket, m_pFrame, m_bSeekDone);
@@ -171,22 +158,25 @@ void VideoDecoderThread::sendFrame(AVFrame* pFrame)
         vdpau_render_state *pRenderState = (vdpau_render_state *)pFrame->data[0];
         pMsg->setVDPAUFrame(pRenderState, m_pFrameDecoder->getCurTime());
     } else {
+        // Frame bitmaps return to the pool when the frame has been displayed or 
+        // discarded.
+        BitmapPoolPtr pPool = BitmapPool::get();
         vector<BitmapPtr> pBmps;
         if (pixelFormatIsPlanar(m_PF)) {
             ScopeTimer timer(CopyImageProfilingZone);
             IntPoint halfSize(m_Size.x/2, m_Size.y/2);
-            pBmps.push_back(getBmp(m_pBmpQ, m_Size, I8));
-            pBmps.push_back(getBmp(m_pHalfBmpQ, halfSize, I8));
-            pBmps.push_back(getBmp(m_pHalfBmpQ, halfSize, I8));
+            pBmps.push_back(pPool->getBitmap(m_Size, I8));
+            pBmps.push_back(pPool->getBitmap(halfSize, I8));
+            pBmps.push_back(pPool->getBitmap(halfSize, I8));
             if (m_PF == YCbCrA420p) {
-                pBmps.push_back(getBmp(m_pBmpQ, m_Size, I8));
+                pBmps.push_back(pPool->getBitmap(m_Size, I8));
             }
             for (unsigned i = 0; i < pBmps.size(); ++i) {
                 m_pFrameDecoder->copyPlaneToBmp(pBmps[i], pFrame->data[i], 
                         pFrame->linesize[i]);
             }
         } else {
-            pBmps.push_back(getBmp(m_pBmpQ, m_Size, m_PF));
+            pBmps.push_back(pPool->getBitmap(m_Size, m_PF));
             m_pFrameDecoder->convertFrameToBmp(pFrame, pBmps[0]);
         }
         pMsg->setFrame(pBmps, m_pFrameDecoder->getCurTime());
@@ -200,18 +190,6 @@ void VideoDecoderThread::close()
     stop();
 }
 
-BitmapPtr VideoDecoderThread::getBmp(BitmapQueuePtr pBmpQ, const IntPoint& size, 
-        PixelFormat pf)
-{
-    BitmapPtr pBmp = pBmpQ->pop(false);
-    if (pBmp) {
-        AVG_ASSERT (pBmp->getSize() == size && pBmp->getPixelFormat() == pf);
-        return pBmp;
-    } else {
-        return BitmapPtr(new Bitmap(size, pf)); 
-    }
-}
-
 static ProfilingZoneID PushMsgProfilingZone("Push message", true);
 
 void VideoDecoderThread::pushMsg(VideoMsgPtr pMsg)
@@ -38,9 +38,6 @@
 
 namespace avg {
 
-typedef Queue<Bitmap> BitmapQueue;
-typedef boost::shared_ptr<BitmapQueue> BitmapQueuePtr;
-
 class FFMpegFrameDecoder;
 typedef boost::shared_ptr<FFMpegFrameDecoder> FFMpegFrameDecoderPtr;
 
@@ -54,7 +51,6 @@ class AVG_API VideoDecoderThread: public WorkerThread<VideoDecoderThread> {
         
         bool work();
         void setFPS(float fps);
-        void returnFrame(VideoMsgPtr pMsg);
 
     private:
         void decodePacket(AVPacket* pPacket);
@@ -62,16 +58,12 @@ class AVG_API VideoDecoderThread: public WorkerThread<VideoDecoderThread> {
         void handleSeekDone(VideoMsgPtr pMsg);
         void sendFrame(AVFrame* pFrame);
         void close();
-        BitmapPtr getBmp(BitmapQueuePtr pBmpQ, const IntPoint& size, PixelFormat pf);
         void pushMsg(VideoMsgPtr pMsg);
 
         VideoMsgQueue& m_MsgQ;
         FFMpegFrameDecoderPtr m_pFrameDecoder;
         VideoMsgQueue& m_PacketQ;
 
-        BitmapQueuePtr m_pBmpQ;
-        BitmapQueuePtr m_pHalfBmpQ;
-        
         IntPoint m_Size;
         PixelFormat m_PF;
         bool m_bUseVDPAU;
@@ -29,11 +29,12 @@ using namespace std;
 namespace avg {
 
 VideoDemuxerThread::VideoDemuxerThread(CQueue& cmdQ, AVFormatContext* pFormatContext,
-        const map<int, VideoMsgQueuePtr>& packetQs)
+        const map<int, VideoMsgQueuePtr>& packetQs, KeyframeIndexPtr pKeyframeIndex)
     : WorkerThread<VideoDemuxerThread>("VideoDemuxer", cmdQ),
       m_PacketQs(packetQs),
       m_bEOF(false),
       m_pFormatContext(pFormatContext),
+      m_pKeyframeIndex(pKeyframeIndex),
       m_pDemuxer()
 {
     map<int, VideoMsgQueuePtr>::iterator it;
@@ -54,7 +55,8 @@ bool VideoDemuxerThread::init()
     for (it = m_PacketQs.begin(); it != m_PacketQs.end(); it++) {
         streamIndexes.push_back(it->first);
     }
-    m_pDemuxer = FFMpegDemuxerPtr(new FFMpegDemuxer(m_pFormatContext, streamIndexes));
+    m_pDemuxer = FFMpegDemuxerPtr(new FFMpegDemuxer(m_pFormatContext, streamIndexes,
+            m_pKeyframeIndex));
     return true;
 }
 
@@ -25,6 +25,7 @@
 #include "../api.h"
 #include "VideoMsg.h"
 #include "WrapFFMpeg.h"
+#include "KeyframeIndex.h"
 
 #include "../base/WorkerThread.h"
 #include "../base/Command.h"
@@ -39,7 +40,8 @@ typedef boost::shared_ptr<FFMpegDemuxer> FFMpegDemuxerPtr;
 class AVG_API VideoDemuxerThread: public WorkerThread<VideoDemuxerThread> {
     public:
         VideoDemuxerThread(CQueue& cmdQ, AVFormatContext* pFormatContext, 
-                const std::map<int, VideoMsgQueuePtr>& packetQs);
+                const std::map<int, VideoMsgQueuePtr>& packetQs,
+                KeyframeIndexPtr pKeyframeIndex=KeyframeIndexPtr());
         virtual ~VideoDemuxerThread();
         bool init();
         bool work();
@@ -55,6 +57,7 @@ class AVG_API VideoDemuxerThread: public WorkerThread<VideoDemuxerThread> {
         std::map<int, bool> m_PacketQEOFMap;
         bool m_bEOF;
         AVFormatContext* m_pFormatContext;
+        KeyframeIndexPtr m_pKeyframeIndex;
         FFMpegDemuxerPtr m_pDemuxer;
 };
 
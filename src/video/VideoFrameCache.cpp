@@ -0,0 +1,123 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#include "VideoFrameCache.h"
+
+#include "../base/Exception.h"
+#include "../base/ObjectCounter.h"
+
+#include "../graphics/Bitmap.h"
+
+using namespace std;
+
+namespace avg {
+
+VideoFrameCache::VideoFrameCache(int maxFrames)
+    : m_MaxFrames(maxFrames),
+      m_NumHits(0),
+      m_NumMisses(0)
+{
+    ObjectCounter::get()->incRef(&typeid(*this));
+}
+
+VideoFrameCache::~VideoFrameCache()
+{
+    ObjectCounter::get()->decRef(&typeid(*this));
+}
+
+void VideoFrameCache::add(int frameNum, const vector<BitmapPtr>& pBmps)
+{
+    if (m_MaxFrames <= 0) {
+        return;
+    }
+    EntryMap::iterator it = m_Entries.find(frameNum);
+    if (it != m_Entries.end()) {
+        m_UseOrder.erase(it->second.m_UsePos);
+    } else {
+        it = m_Entries.insert(make_pair(frameNum, Entry())).first;
+    }
+    m_UseOrder.push_front(frameNum);
+    it->second.m_pBmps = pBmps;
+    it->second.m_UsePos = m_UseOrder.begin();
+    evict();
+}
+
+bool VideoFrameCache::get(int frameNum, vector<BitmapPtr>& pBmps)
+{
+    EntryMap::iterator it = m_Entries.find(frameNum);
+    if (it == m_Entries.end()) {
+        m_NumMisses++;
+        return false;
+    }
+    m_NumHits++;
+    m_UseOrder.erase(it->second.m_UsePos);
+    m_UseOrder.push_front(frameNum);
+    it->second.m_UsePos = m_UseOrder.begin();
+    pBmps = it->second.m_pBmps;
+    return true;
+}
+
+void VideoFrameCache::clear()
+{
+    m_Entries.clear();
+    m_UseOrder.clear();
+}
+
+void VideoFrameCache::setMaxFrames(int maxFrames)
+{
+    if (maxFrames < 0) {
+        throw Exception(AVG_ERR_OUT_OF_RANGE, 
+                "VideoFrameCache: Maximum number of frames must not be negative.");
+    }
+    m_MaxFrames = maxFrames;
+    evict();
+}
+
+int VideoFrameCache::getMaxFrames() const
+{
+    return m_MaxFrames;
+}
+
+int VideoFrameCache::getNumFrames() const
+{
+    return int(m_Entries.size());
+}
+
+int VideoFrameCache::getNumHits() const
+{
+    return m_NumHits;
+}
+
+int VideoFrameCache::getNumMisses() const
+{
+    return m_NumMisses;
+}
+
+void VideoFrameCache::evict()
+{
+    while (int(m_Entries.size()) > m_MaxFrames) {
+        m_Entries.erase(m_UseOrder.back());
+        m_UseOrder.pop_back();
+    }
+}
+
+}
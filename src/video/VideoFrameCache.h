@@ -0,0 +1,82 @@
+//
+//  libavg - Media Playback Engine. 
+//  Copyright (C) 2003-2014 Ulrich von Zadow
+//
+//  This library is free software; you can redistribute it and/or
+//  modify it under the terms of the GNU Lesser General Public
+//  License as published by the Free Software Foundation; either
+//  version 2 of the License, or (at your option) any later version.
+//
+//  This library is distributed in the hope that it will be useful,
+//  but WITHOUT ANY WARRANTY; without even the implied warranty of
+//  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+//  Lesser General Public License for more details.
+//
+//  You should have received a copy of the GNU Lesser General Public
+//  License along with this library; if not, write to the Free Software
+//  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+//
+//  Current versions can be found at www.libavg.de
+//
+
+
+#ifndef _VideoFrameCache_H_
+#define _VideoFrameCache_H_
+
+#include "../api.h"
+
+#include <boost/shared_ptr.hpp>
+
+#include <vector>
+#include <list>
+#include <map>
+
+namespace avg {
+
+class Bitmap;
+typedef boost::shared_ptr<Bitmap> BitmapPtr;
+
+// Keeps the planes of the most recently decoded video frames, indexed by frame 
+// number, so that seeks back to a recently displayed frame don't need to touch the 
+// decoder. When more than maxFrames frames are cached, the least recently used frame 
+// is dropped.
+class AVG_API VideoFrameCache
+{
+public:
+    VideoFrameCache(int maxFrames);
+    virtual ~VideoFrameCache();
+
+    void add(int frameNum, const std::vector<BitmapPtr>& pBmps);
+    // Returns false and leaves pBmps untouched if the frame is not cached.
+    bool get(int frameNum, std::vector<BitmapPtr>& pBmps);
+    void clear();
+
+    void setMaxFrames(int maxFrames);
+    int getMaxFrames() const;
+    int getNumFrames() const;
+    int getNumHits() const;
+    int getNumMisses() const;
+
+private:
+    void evict();
+
+    typedef std::list<int> FrameList;
+    struct Entry {
+        std::vector<BitmapPtr> m_pBmps;
+        FrameList::iterator m_UsePos;
+    };
+    typedef std::map<int, Entry> EntryMap;
+
+    int m_MaxFrames;
+    EntryMap m_Entries;
+    // Frame numbers, most recently used first.
+    FrameList m_UseOrder;
+    int m_NumHits;
+    int m_NumMisses;
+};
+
+typedef boost::shared_ptr<VideoFrameCache> VideoFrameCachePtr;
+
+}
+
+#endif
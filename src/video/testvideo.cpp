@@ -21,6 +21,7 @@
 
 #include "AsyncVideoDecoder.h"
 #include "SyncVideoDecoder.h"
+#include "KeyframeIndex.h"
 #ifdef AVG_ENABLE_VDPAU
 #include "VDPAUDecoder.h"
 #endif
@@ -31,6 +32,7 @@
 #include "../graphics/BitmapLoader.h"
 
 #include "../base/StringHelper.h"
+#include "../base/MathHelper.h"
 #include "../base/TimeSource.h"
 #include "../base/TestSuite.h"
 #include "../base/Exception.h"
@@ -41,6 +43,7 @@
 #include <string>
 #include <sstream>
 #include <cmath>
+#include <cstdio>
 
 #include <glib-object.h>
 
@@ -176,7 +179,11 @@ class VideoDecoderTest: public DecoderTest {
             basicFileTest("mpeg1-48x48.mov", 30);
 #ifndef AVG_ENABLE_RPI
             basicFileTest("mjpeg-48x48.avi", 202);
-            testSeeks("mjpeg-48x48.avi");
+            testSeeks("mjpeg-48x48.avi", false);
+            testSeeks("mjpeg-48x48.avi", true);
+            if (!isThreaded()) {
+                testKeyframeIndex("mjpeg-48x48.avi", 202);
+            }
 #else
             cerr << "Skipping mjpeg tests: SW decoding too slow on RaspberryPi." << endl;
 #endif
@@ -219,11 +226,16 @@ class VideoDecoderTest: public DecoderTest {
             }
         }
 
-        void testSeeks(const string& sFilename)
+        void testSeeks(const string& sFilename, bool bUseKeyframeIndex)
         {
-            cerr << "    Testing " << sFilename << " (seek)" << endl;
+            cerr << "    Testing " << sFilename << " (seek";
+            if (bUseKeyframeIndex) {
+                cerr << ", keyframe index";
+            }
+            cerr << ")" << endl;
 
             VideoDecoderPtr pDecoder = createDecoder();
+            pDecoder->enableKeyframeIndex(bUseKeyframeIndex);
             pDecoder->open(getMediaLoc(sFilename), useHardwareAcceleration(), true);
             pDecoder->startDecoding(false, getAudioParams());
 
@@ -237,6 +249,48 @@ class VideoDecoderTest: public DecoderTest {
             pDecoder->close();
         }
 
+        void testKeyframeIndex(const string& sFilename, int numFrames)
+        {
+            cerr << "    Testing " << sFilename << " (keyframe index)" << endl;
+            
+            // mjpeg files consist of keyframes only.
+            KeyframeIndex index(0);
+            index.build(getMediaLoc(sFilename));
+            TEST(index.getNumKeyframes() == numFrames);
+            TEST(index.getStreamIndex() == 0);
+            VideoDecoderPtr pDecoder = createDecoder();
+            pDecoder->open(getMediaLoc(sFilename), false, false);
+            float fps = pDecoder->getStreamFPS();
+            pDecoder->close();
+            TEST(almostEqual(index.getKeyframeTime(0), 0.f));
+            TEST(almostEqual(index.getKeyframeTime(53/fps), 53/fps));
+            TEST(almostEqual(index.getKeyframeTime(53.4f/fps), 53/fps));
+            TEST(almostEqual(index.getKeyframeTime(1000), (numFrames-1)/fps));
+
+            string sIndexFilename = "testkeyframeindex.avgkfi";
+            TEST(index.save(sIndexFilename, 1234, 5678));
+            KeyframeIndex loadedIndex(0);
+            TEST(!loadedIndex.load(sIndexFilename, 1234, 5679));
+            TEST(loadedIndex.load(sIndexFilename, 1234, 5678));
+            TEST(loadedIndex.getNumKeyframes() == numFrames);
+            TEST(loadedIndex.getKeyframeTimestamp(53/fps) == 
+                    index.getKeyframeTimestamp(53/fps));
+            KeyframeIndex otherStreamIndex(1);
+            TEST(!otherStreamIndex.load(sIndexFilename, 1234, 5678));
+            remove(sIndexFilename.c_str());
+
+            // create() builds the index in the background.
+            string sVideoFilename = getMediaLoc(sFilename);
+            remove(KeyframeIndex::getIndexFilename(sVideoFilename).c_str());
+            KeyframeIndexPtr pIndex = KeyframeIndex::create(sVideoFilename, 0);
+            TEST(pIndex.get() != 0);
+            while (!pIndex->isReady()) {
+                msleep(10);
+            }
+            TEST(pIndex->getNumKeyframes() == numFrames);
+            TEST(!KeyframeIndex::create(sVideoFilename+".doesnotexist", 0));
+        }
+
         void testSeek(int frameNum, const string& sFilename, VideoDecoderPtr pDecoder)
         {
             BitmapPtr pBmp;
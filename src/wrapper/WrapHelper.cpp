@@ -320,6 +320,14 @@ struct UTF8String_to_unicode
     }
 };
 
+struct InternedCategory_to_unicode
+{
+    static PyObject *convert(const InternedCategory& category)
+    {
+        return UTF8String_to_unicode::convert(category);
+    }
+};
+
 struct UTF8String_from_unicode
 {
     UTF8String_from_unicode()
@@ -454,13 +462,16 @@ void export_base()
 
     // string
     to_python_converter<UTF8String, UTF8String_to_unicode>();
+    to_python_converter<InternedCategory, InternedCategory_to_unicode>();
     UTF8String_from_unicode();
     UTF8String_from_string();
 
     to_python_converter<vector<string>, to_list<vector<string> > >();    
     from_python_sequence<vector<string>, variable_capacity_policy>();
+    from_python_sequence<vector<UTF8String>, variable_capacity_policy>();
   
     from_python_sequence<vector<float>, variable_capacity_policy>();
+    to_python_converter<vector<int>, to_list<vector<int> > >();
     from_python_sequence<vector<int>, variable_capacity_policy>();
 
     to_python_converter<std::type_info, type_info_to_string>();
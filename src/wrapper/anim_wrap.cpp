@@ -21,6 +21,7 @@
 
 #include "WrapHelper.h"
 
+#include "../anim/AnimScheduler.h"
 #include "../anim/SimpleAnim.h"
 #include "../anim/LinearAnim.h"
 #include "../anim/EaseInOutAnim.h"
@@ -52,6 +53,16 @@ AnimPtr fadeOutDeprecated(const bp::object& node, long long duration,
     return LinearAnim::fadeOut(node, duration, stopCallback);
 }
 
+bp::dict getAnimSchedulerStats()
+{
+    AnimScheduler* pScheduler = AnimScheduler::get();
+    bp::dict statsDict;
+    statsDict["numanims"] = pScheduler->getNumAnims();
+    statsDict["numnativeanims"] = AttrAnim::getNumNativeAnims();
+    statsDict["steptime"] = pScheduler->getStepTime();
+    return statsDict;
+}
+
 void export_anim()
 {
     from_python_sequence<std::vector<AnimPtr>, variable_capacity_policy>();
@@ -64,6 +75,8 @@ void export_anim()
         .def("isRunning", &Anim::isRunning)
         .def("getNumRunningAnims", AttrAnim::getNumRunningAnims)
         .staticmethod("getNumRunningAnims")
+        .def("getSchedulerStats", getAnimSchedulerStats)
+        .staticmethod("getSchedulerStats")
         .def("fadeIn", LinearAnim::fadeIn, (bp::arg("node"), bp::arg("duration"),
                 bp::arg("max")=1.0, bp::arg("stopCallback")=object()))
         .staticmethod("fadeIn")
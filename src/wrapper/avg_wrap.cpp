@@ -32,6 +32,7 @@ void export_anim();
 #include "../base/GeomHelper.h"
 #include "../base/XMLHelper.h"
 #include "../graphics/ImageCache.h"
+#include "../video/SampleCache.h"
 #include "../player/Player.h"
 #include "../player/AVGNode.h"
 #include "../player/CameraNode.h"
@@ -61,6 +62,8 @@ BOOST_PYTHON_MEMBER_FUNCTION_OVERLOADS(TestHelper_fakeTouchEvent_overloads,
         fakeTouchEvent, 4, 5)
 BOOST_PYTHON_MEMBER_FUNCTION_OVERLOADS(Player_createNode_overloads,
         createNode, 2, 3)
+BOOST_PYTHON_MEMBER_FUNCTION_OVERLOADS(Player_createNodes_overloads,
+        createNodes, 2, 3)
 
 OffscreenCanvasPtr createCanvas(const boost::python::tuple &args,
                 const boost::python::dict& params)
@@ -97,6 +100,14 @@ bool pointInPolygonDepcrecated(const glm::vec2& pt, const std::vector<glm::vec2>
 }
 // end remove
 
+bp::tuple calcKMeansPy(const std::vector<glm::vec2>& pts)
+{
+    std::vector<int> cluster0;
+    std::vector<int> cluster1;
+    calcKMeans(pts, cluster0, cluster1);
+    return bp::make_tuple(cluster0, cluster1);
+}
+
 BOOST_PYTHON_MODULE(avg)
 {
     try {
@@ -119,6 +130,8 @@ BOOST_PYTHON_MODULE(avg)
         // end remove
 
         def("validateXml", validateXml);
+        def("getCentroid", getCentroid);
+        def("calcKMeans", calcKMeansPy);
 
         class_<MessageID>("MessageID", no_init)
             .def("__repr__", &MessageID::getRepr)
@@ -129,6 +142,7 @@ BOOST_PYTHON_MODULE(avg)
                 .def("addSink", addPythonLogger)
                 .def("removeSink", removePythonLogger)
                 .def("removeStdLogSink", &Logger::removeStdLogSink)
+                .def("flush", &Logger::flush)
                 .def("configureCategory", &Logger::configureCategory,
                         (bp::arg("severity")=Logger::severity::NONE))
                 .def("getCategories", &Logger::getCategories)
@@ -231,6 +245,8 @@ BOOST_PYTHON_MODULE(avg)
             .def("useGLES", &Player::useGLES)
             .def("setOGLOptions", &Player::setOGLOptions)
             .def("setMultiSampleSamples", &Player::setMultiSampleSamples)
+            .def("setOfflineAudio", &Player::setOfflineAudio,
+                    (bp::arg("offline"), bp::arg("wavfile")=""))
             .def("enableGLErrorChecks", &Player::enableGLErrorChecks)
             .def("getScreenResolution", &Player::getScreenResolution)
             .def("getPixelsPerMM", &Player::getPixelsPerMM)
@@ -259,6 +275,7 @@ BOOST_PYTHON_MODULE(avg)
             .def("getFrameDuration", &Player::getFrameDuration)
             .def("createNode", &Player::createNodeFromXmlString)
             .def("createNode", &Player::createNode, Player_createNode_overloads())
+            .def("createNodes", &Player::createNodes, Player_createNodes_overloads())
             .def("enableMultitouch", &Player::enableMultitouch)
             .def("enableMouse", &Player::enableMouse)
             .def("isMultitouchAvailable", &Player::isMultitouchAvailable)
@@ -296,6 +313,8 @@ BOOST_PYTHON_MODULE(avg)
             .add_property("volume", &Player::getVolume, &Player::setVolume)
             .add_property("imageCache", make_function(&Player::getImageCache,
                     return_value_policy<reference_existing_object>()))
+            .add_property("sampleCache", make_function(&Player::getSampleCache,
+                    return_value_policy<reference_existing_object>()))
         ;
         exportMessages(playerClass, "Player");
         
@@ -304,6 +323,7 @@ BOOST_PYTHON_MODULE(avg)
             .def("getRootNode", &Canvas::getRootNode)
             .def("getElementByID", &Canvas::getElementByID)
             .def("screenshot", &Canvas::screenshot)
+            .def("getVertexBytesUploaded", &Canvas::getVertexBytesUploaded)
         ;
 
         class_<OffscreenCanvas, boost::shared_ptr<OffscreenCanvas>, bases<Canvas>,
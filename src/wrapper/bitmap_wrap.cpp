@@ -23,9 +23,11 @@
 
 #include "../player/BoostPython.h"
 #include "../player/BitmapManager.h"
+#include "../player/WrapPython.h"
 
 #include "../graphics/Bitmap.h"
 #include "../graphics/BitmapLoader.h"
+#include "../graphics/BitmapPool.h"
 #include "../graphics/FilterResizeBilinear.h"
 #include "../graphics/ImageCache.h"
 
@@ -145,6 +147,136 @@ static void Bitmap_setPixels(Bitmap& bitmap, PyObject* exporter, int stride=0)
 BOOST_PYTHON_FUNCTION_OVERLOADS(Bitmap_setPixels_overloads, Bitmap_setPixels,
         2, 3);
 
+static bp::dict Bitmap_getArrayInterface(BitmapPtr pBmp)
+{
+    PixelFormat pf = pBmp->getPixelFormat();
+    if (pixelFormatIsPlanar(pf) || pf == YCbCr411) {
+        throw Exception(AVG_ERR_UNSUPPORTED, "Bitmap.__array_interface__: "
+                + getPixelFormatString(pf) + " not supported.");
+    }
+    IntPoint size = pBmp->getSize();
+    int bpp = pBmp->getBytesPerPixel();
+    int stride = pBmp->getStride();
+    unsigned short endianTest = 1;
+    string sEndian = (*(unsigned char*)&endianTest == 1) ? "<" : ">";
+
+    bp::dict interface;
+    switch (pf) {
+        case B5G6R5:
+        case R5G6B5:
+        case I16:
+            interface["shape"] = bp::make_tuple(size.y, size.x);
+            interface["strides"] = bp::make_tuple(stride, bpp);
+            interface["typestr"] = sEndian+"u2";
+            break;
+        case I32F:
+            interface["shape"] = bp::make_tuple(size.y, size.x);
+            interface["strides"] = bp::make_tuple(stride, bpp);
+            interface["typestr"] = sEndian+"f4";
+            break;
+        case R32G32B32A32F:
+            interface["shape"] = bp::make_tuple(size.y, size.x, 4);
+            interface["strides"] = bp::make_tuple(stride, bpp, 4);
+            interface["typestr"] = sEndian+"f4";
+            break;
+        default:
+            if (bpp == 1) {
+                interface["shape"] = bp::make_tuple(size.y, size.x);
+                interface["strides"] = bp::make_tuple(stride, bpp);
+            } else {
+                interface["shape"] = bp::make_tuple(size.y, size.x, bpp);
+                interface["strides"] = bp::make_tuple(stride, bpp, 1);
+            }
+            interface["typestr"] = "|u1";
+    }
+    // The array holds a reference to the python Bitmap object, which keeps the
+    // pixels alive.
+    size_t pPixels = size_t(pBmp->getPixels());
+    interface["data"] = bp::make_tuple(pPixels, false);
+    interface["version"] = 3;
+    return interface;
+}
+
+// Bitmap that uses the memory of a python object that supports the buffer interface.
+// Holds a reference to the python object for as long as the bitmap exists.
+class PyBufferBitmap: public Bitmap
+{
+public:
+    PyBufferBitmap(const IntPoint& size, PixelFormat pf, int stride,
+            PyObject* pExporter, const Py_buffer& view)
+        : Bitmap(size, pf, (unsigned char*)(view.buf), stride, false, "PyBufferBitmap"),
+          m_pExporter(pExporter),
+          m_View(view)
+    {
+        Py_INCREF(m_pExporter);
+    }
+
+    virtual ~PyBufferBitmap()
+    {
+        // The bitmap might be destroyed in a thread that doesn't hold the GIL.
+        aquirePyGIL lock;
+        PyBuffer_Release(&m_View);
+        Py_DECREF(m_pExporter);
+    }
+
+private:
+    PyObject* m_pExporter;
+    Py_buffer m_View;
+};
+
+static BitmapPtr createBitmapFromBuffer(bp::object exporter, const glm::vec2& size,
+        PixelFormat pf, int stride)
+{
+    IntPoint intSize(size);
+    if (intSize.x <= 0 || intSize.y <= 0) {
+        throw Exception(AVG_ERR_OUT_OF_RANGE,
+                "Can't create a bitmap with zero or negative width/height.");
+    }
+    if (pixelFormatIsPlanar(pf) || pf == YCbCr411) {
+        throw Exception(AVG_ERR_UNSUPPORTED, "Bitmap: Can't wrap buffers of pixel format "
+                + getPixelFormatString(pf) + ".");
+    }
+    int lineLen = intSize.x*getBytesPerPixel(pf);
+    if (stride == 0) {
+        stride = lineLen;
+    }
+    if (stride < lineLen) {
+        throw Exception(AVG_ERR_INVALID_ARGS, "Bitmap: stride too small for width.");
+    }
+
+    PyObject* pExporter = exporter.ptr();
+    Py_ssize_t minSize = Py_ssize_t(stride)*(intSize.y-1)+lineLen;
+    if (PyObject_CheckBuffer(pExporter)) {
+        Py_buffer view;
+        if (PyObject_GetBuffer(pExporter, &view, PyBUF_WRITABLE) == -1) {
+            PyErr_Clear();
+            throw Exception(AVG_ERR_INVALID_ARGS,
+                    "Bitmap: buffer must be writable and contiguous.");
+        }
+        if (view.len < minSize) {
+            PyBuffer_Release(&view);
+            throw Exception(AVG_ERR_INVALID_ARGS,
+                    "Bitmap: buffer too small for bitmap size.");
+        }
+        return BitmapPtr(new PyBufferBitmap(intSize, pf, stride, pExporter, view));
+    } else {
+        // Old-style buffers don't pin their memory (e.g. array.array can reallocate
+        // and mmap can be closed), so the pixels are copied.
+        const void* pBuf;
+        Py_ssize_t bufferSize;
+        if (PyObject_AsReadBuffer(pExporter, &pBuf, &bufferSize) == -1) {
+            PyErr_Clear();
+            throw Exception(AVG_ERR_INVALID_ARGS,
+                    "Bitmap: First parameter must support the buffer interface.");
+        }
+        if (bufferSize < minSize) {
+            throw Exception(AVG_ERR_INVALID_ARGS,
+                    "Bitmap: buffer too small for bitmap size.");
+        }
+        return BitmapPtr(new Bitmap(intSize, pf, (unsigned char*)pBuf, stride, true));
+    }
+}
+
 ConstVec2 Bitmap_getSize(Bitmap* This)
 {
     return (glm::vec2)(This->getSize());
@@ -182,7 +314,33 @@ BitmapPtr createBitmapWithRect(BitmapPtr pBmp,
 }
 
 BOOST_PYTHON_MEMBER_FUNCTION_OVERLOADS(loadBitmap_overloads, BitmapManager::loadBitmapPy, 
-        2, 3);
+        2, 4);
+
+static bp::dict BitmapManager_GetStats(BitmapManager* pManager)
+{
+    BitmapManager::Stats stats = pManager->getStats();
+    bp::dict statsDict;
+    statsDict["queued"] = stats.m_NumQueued;
+    statsDict["pendingcallbacks"] = stats.m_NumPendingCallbacks;
+    statsDict["maxqueuedepth"] = stats.m_MaxQueueDepth;
+    statsDict["loaded"] = stats.m_NumLoaded;
+    statsDict["cancelled"] = stats.m_NumCancelled;
+    statsDict["avgqueuetime"] = stats.m_AvgQueueTime;
+    statsDict["maxqueuetime"] = stats.m_MaxQueueTime;
+    statsDict["avgloadtime"] = stats.m_AvgLoadTime;
+    statsDict["avglatency"] = stats.m_AvgLatency;
+    return statsDict;
+}
+
+static bp::dict BitmapPool_GetStats(BitmapPool* pPool)
+{
+    BitmapPool::Stats stats = pPool->getStats();
+    bp::dict statsDict;
+    statsDict["hits"] = stats.m_NumHits;
+    statsDict["misses"] = stats.m_NumMisses;
+    statsDict["evictions"] = stats.m_NumEvictions;
+    return statsDict;
+}
 
 static bp::object ImageCache_GetCapacity(ImageCache* pCache)
 {
@@ -208,6 +366,39 @@ static bp::object ImageCache_GetMemUsed(ImageCache* pCache)
             pCache->getMemUsed(CachedImage::STORAGE_GPU));
 }
 
+static bp::dict statsToDict(const ImageCache::Stats& stats)
+{
+    bp::dict statsDict;
+    statsDict["hits"] = stats.m_NumHits;
+    statsDict["misses"] = stats.m_NumMisses;
+    statsDict["evictions"] = stats.m_NumEvictions;
+    statsDict["bytesreloaded"] = stats.m_BytesReloaded;
+    return statsDict;
+}
+
+static bp::object ImageCache_GetStats(ImageCache* pCache)
+{
+    return bp::make_tuple(statsToDict(pCache->getStats(CachedImage::STORAGE_CPU)),
+            statsToDict(pCache->getStats(CachedImage::STORAGE_GPU)));
+}
+
+static void ImageCache_Prefetch(ImageCache* pCache, const vector<UTF8String>& filenames,
+        bool bGPU)
+{
+    CachedImage::StorageType st;
+    if (bGPU) {
+        st = CachedImage::STORAGE_GPU;
+    } else {
+        st = CachedImage::STORAGE_CPU;
+    }
+    BitmapManager::get()->prefetchImages(filenames, st);
+}
+
+static int ImageCache_GetNumPendingPrefetches(ImageCache* pCache)
+{
+    return BitmapManager::get()->getNumPendingPrefetches();
+}
+
 vector<string> getSupportedPixelFormatsDeprecated()
 {
     avgDeprecationWarning("1.9.0", "avg.getSupportedPixelFormats",
@@ -275,6 +466,10 @@ void export_bitmap()
         .def(init<Bitmap>())
         .def("__init__", make_constructor(createBitmapWithRect))
         .def("__init__", make_constructor(createBitmapFromFile))
+        .def("__init__", make_constructor(createBitmapFromBuffer, default_call_policies(),
+                (bp::arg("buffer"), bp::arg("size"), bp::arg("pixelformat"),
+                 bp::arg("stride")=0)))
+        .add_property("__array_interface__", &Bitmap_getArrayInterface)
         .def("blt", &Bitmap::blt)
         .def("getResized", &Bitmap_getResized)
         .def("save", &Bitmap::save)
@@ -293,18 +488,59 @@ void export_bitmap()
         .staticmethod("getSupportedPixelFormats")
     ;
 
+    class_<BitmapDiskCache, BitmapDiskCachePtr, boost::noncopyable>("BitmapDiskCache",
+            init<const string&, long long>())
+        .def("get", &BitmapLoader::getDiskCache)
+        .staticmethod("get")
+        .def("set", &BitmapLoader::setDiskCache)
+        .staticmethod("set")
+        .def("prewarm", &BitmapDiskCache::prewarm, 
+                (bp::arg("filename"), bp::arg("pixelformat")=NO_PIXELFORMAT))
+        .def("getSize", &BitmapDiskCache::getSize)
+        .def("getNumFiles", &BitmapDiskCache::getNumFiles)
+        .def("clear", &BitmapDiskCache::clear)
+        .add_property("dir", make_function(&BitmapDiskCache::getDir, 
+                return_value_policy<copy_const_reference>()))
+        .add_property("maxsize", &BitmapDiskCache::getMaxSize, 
+                &BitmapDiskCache::setMaxSize)
+    ;
+
+    class_<BitmapPool, BitmapPoolPtr, boost::noncopyable>("BitmapPool", no_init)
+        .def("get", &BitmapPool::get)
+        .staticmethod("get")
+        .add_property("maxmem", &BitmapPool::getMaxMem, &BitmapPool::setMaxMem)
+        .def("getMemUsed", &BitmapPool::getMemUsed)
+        .def("getMemInUse", &BitmapPool::getMemInUse)
+        .def("getNumBitmaps", &BitmapPool::getNumBitmaps)
+        .def("clear", &BitmapPool::clear)
+        .def("getStats", BitmapPool_GetStats)
+        .def("resetStats", &BitmapPool::resetStats)
+    ;
+
     class_<ImageCache>("ImageCache", no_init)
         .add_property("capacity", ImageCache_GetCapacity, ImageCache_SetCapacity)
         .def("getNumImages", ImageCache_GetNumImages)
         .def("getMemUsed", ImageCache_GetMemUsed)
+        .def("getStats", ImageCache_GetStats)
+        .def("resetStats", &ImageCache::resetStats)
+        .def("prefetch", ImageCache_Prefetch,
+                (bp::arg("filenames"), bp::arg("gpu")=false))
+        .def("getNumPendingPrefetches", ImageCache_GetNumPendingPrefetches)
     ;
 
     class_<BitmapManager>("BitmapManager", no_init)
         .def("get", &BitmapManager::get,
                 return_value_policy<reference_existing_object>())
         .staticmethod("get")
-        .def("loadBitmap", &BitmapManager::loadBitmapPy, loadBitmap_overloads())
+        .def("loadBitmap", &BitmapManager::loadBitmapPy, loadBitmap_overloads(
+                args("fileName", "callback", "pixelformat", "priority")))
+        .def("cancelLoad", &BitmapManager::cancelLoad)
         .def("setNumThreads", &BitmapManager::setNumThreads)
+        .def("getNumThreads", &BitmapManager::getNumThreads)
+        .add_property("callbacktimebudget", &BitmapManager::getCallbackTimeBudget,
+                &BitmapManager::setCallbackTimeBudget)
+        .def("getStats", BitmapManager_GetStats)
+        .def("resetStats", &BitmapManager::resetStats)
     ;
 
     class_<CubicSpline, boost::noncopyable>("CubicSpline", no_init)
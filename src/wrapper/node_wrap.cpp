@@ -45,6 +45,8 @@ void export_devices();
 #include "../player/CircleNode.h"
 #include "../player/MeshNode.h"
 
+#include "../video/SampleCache.h"
+
 #include <boost/version.hpp>
 #include <boost/shared_ptr.hpp>
 #include <string>
@@ -79,6 +81,16 @@ ConstVec2 AreaNode_getMediaSize(AreaNode* This)
     return (glm::vec2)(This->getMediaSize());
 }
 
+static boost::python::dict SampleCache_GetStats(SampleCache* pCache)
+{
+    const SampleCache::Stats& stats = pCache->getStats();
+    boost::python::dict statsDict;
+    statsDict["hits"] = stats.m_NumHits;
+    statsDict["misses"] = stats.m_NumMisses;
+    statsDict["evictions"] = stats.m_NumEvictions;
+    return statsDict;
+}
+
 char divNodeName[] = "div";
 char avgNodeName[] = "avg";
 char soundNodeName[] = "sound";
@@ -152,6 +164,7 @@ void export_node()
     class_<DivNode, bases<AreaNode>, boost::noncopyable>("DivNode", no_init)
         .def("__init__", raw_constructor(createNode<divNodeName>))
         .add_property("crop", &DivNode::getCrop, &DivNode::setCrop)
+        .add_property("pickgrid", &DivNode::getPickGrid, &DivNode::setPickGrid)
         .def("getNumChildren", &DivNode::getNumChildren)
         .def("getChild", make_function(&DivNode::getChild,
                 return_value_policy<copy_const_reference>()))
@@ -196,6 +209,17 @@ void export_node()
         .add_property("volume", &SoundNode::getVolume, &SoundNode::setVolume)
     ;
 
+    class_<SampleCache>("SampleCache", no_init)
+        .add_property("capacity", &SampleCache::getCapacity, &SampleCache::setCapacity)
+        .add_property("maxDuration", &SampleCache::getMaxDuration,
+                &SampleCache::setMaxDuration)
+        .def("getNumSamples", &SampleCache::getNumSamples)
+        .def("getMemUsed", &SampleCache::getMemUsed)
+        .def("getStats", SampleCache_GetStats)
+        .def("resetStats", &SampleCache::resetStats)
+        .def("clear", &SampleCache::clear)
+    ;
+
     class_<VectorNode, bases<Node>, boost::noncopyable>("VectorNode", 
             no_init)
         .add_property("strokewidth", &VectorNode::getStrokeWidth, 
@@ -44,6 +44,20 @@ long long getDurationDeprecated(VideoNode* pNode)
     return pNode->getDuration();
 }
 
+dict VideoNode_getSeekStats(VideoNode* pNode)
+{
+    VideoNode::SeekStats stats = pNode->getSeekStats();
+    dict statsDict;
+    statsDict["numseeks"] = stats.m_NumSeeks;
+    statsDict["cachehits"] = stats.m_NumCacheHits;
+    statsDict["forwarddecodes"] = stats.m_NumForwardDecodes;
+    statsDict["p50"] = stats.m_P50Latency;
+    statsDict["p90"] = stats.m_P90Latency;
+    statsDict["p99"] = stats.m_P99Latency;
+    statsDict["max"] = stats.m_MaxLatency;
+    return statsDict;
+}
+
 void export_raster()
 {
     scope mainScope;
@@ -194,6 +208,8 @@ void export_raster()
         .def("hasAudio", &VideoNode::hasAudio)
         .def("hasAlpha", &VideoNode::hasAlpha)
         .def("setEOFCallback", &VideoNode::setEOFCallback)
+        .def("getSeekStats", &VideoNode_getSeekStats)
+        .def("resetSeekStats", &VideoNode::resetSeekStats)
         .def("getVideoAccelConfig", &VideoNode::getVideoAccelConfig)
         .staticmethod("getVideoAccelConfig")
         .add_property("fps", &VideoNode::getFPS)
@@ -207,6 +223,9 @@ void export_raster()
         .add_property("threaded", &VideoNode::isThreaded)
         .add_property("accelerated", &VideoNode::isAccelerated)
         .add_property("duration", &VideoNode::getDuration)
+        .add_property("fastseek", &VideoNode::getFastSeek)
+        .add_property("framecachesize", &VideoNode::getFrameCacheSize,
+                &VideoNode::setFrameCacheSize)
     ;
 
     class_<FontStyle, bases<ExportedObject> >("FontStyle", no_init)